@@ -18,14 +18,17 @@ from __future__ import annotations
 from functools import lru_cache
 from functools import wraps
 import logging
+import os
 import requests
 from requests.auth import HTTPBasicAuth
 import time
+import typing as tp
 
 from restalchemy.dm import types as ra_types
 from gcl_sdk.agents.universal.drivers import meta
 from gcl_sdk.infra import constants as pc
 import psycopg
+from psycopg import rows as pg_rows
 from psycopg import sql
 import yaml
 
@@ -33,6 +36,9 @@ from restalchemy.common import singletons
 from restalchemy.dm import properties
 
 
+from exordos_db.agent.universal.drivers import pg_backup
+from exordos_db.agent.universal.drivers import pg_wal
+from exordos_db.agent.universal.drivers import sqlite_meta
 from exordos_db.common import constants
 
 LOG = logging.getLogger(__name__)
@@ -40,6 +46,29 @@ LOG = logging.getLogger(__name__)
 # NOTE: don't forget to update validation in controlplane
 PG_SYSTEM_USERS_REGEX_TMPL = "'^(pg_|dbaas_|postgres$)'"
 PG_SYSTEM_DATABASES_TMPL = "('postgres', 'template0', 'template1')"
+PG_MAINTENANCE_DATABASE = "postgres"
+
+PG_STAT_STATEMENTS_EXTENSION = "pg_stat_statements"
+TOP_QUERIES_PERIOD = 60
+TOP_QUERIES_LIMIT = 10
+TOP_QUERY_MAX_LENGTH = 1024
+
+# Reported replication lags are rounded down to avoid status updates on
+# every jitter
+REPLICATION_LATENCY_RESOLUTION_MS = 5
+
+# pg_settings contexts of parameters which can't be changed without restart
+PG_RESTART_CONTEXTS = frozenset(("postmaster",))
+# pg_settings contexts of parameters which can't be changed at all
+PG_READONLY_CONTEXTS = frozenset(("internal",))
+
+# Patroni member roles of the primary
+PATRONI_PRIMARY_ROLES = frozenset(("leader", "primary", "standby_leader"))
+# Patroni member states of a node serving queries
+PATRONI_RUNNING_STATES = frozenset(("running", "streaming"))
+
+# WAL files are pushed by the agent, the command waits for them
+ARCHIVE_COMMAND_TMPL = "exordos-db-wal-archived {instance} %f"
 
 
 def get_ttl_hash(seconds=600):
@@ -64,6 +93,21 @@ class PatroniClient:
             config = yaml.safe_load(file)
         self._config = config
 
+    @property
+    def bootstrap_parameters(self) -> dict[str, tp.Any]:
+        """Parameters written to the DCS on the cluster bootstrap."""
+        bootstrap = self._config.get("bootstrap", {})
+        return bootstrap.get("dcs", {}).get("postgresql", {}).get("parameters", {})
+
+    @property
+    def data_dir(self) -> str:
+        return self._config["postgresql"]["data_dir"]
+
+    @property
+    def name(self) -> str:
+        """Name of the local member, the node uuid."""
+        return self._config["name"]
+
     def get_full_state(self):
         return self._client.get(f"{self._endpoint}/").json()
 
@@ -82,11 +126,165 @@ class PatroniClient:
         response.raise_for_status()
         return response.json()
 
+    def get_cluster(self) -> dict[str, tp.Any]:
+        response = self._client.get(f"{self._endpoint}/cluster")
+        response.raise_for_status()
+        return response.json()
+
+    def restart_pending(self) -> None:
+        """Restart the local PostgreSQL if it has pending parameters."""
+        response = self._client.post(
+            f"{self._endpoint}/restart", json={"restart_pending": True}
+        )
+        response.raise_for_status()
+
+
+class TopQueriesCollector:
+    """Collect top normalized queries from pg_stat_statements.
+
+    Counters in pg_stat_statements are cumulative, so every collection is
+    compared with the previous snapshot and only deltas for the last period
+    are reported. The result is kept for `TOP_QUERIES_PERIOD` seconds.
+    """
+
+    STATEMENTS_QUERY = """\
+SELECT s.queryid, s.userid, s.dbid, s.query,
+pg_catalog.pg_get_userbyid(s.userid) AS "user",
+d.datname AS "database",
+s.calls, s.total_exec_time, s.rows,
+s.shared_blks_read + s.local_blks_read + s.temp_blks_read AS blks_read,
+s.shared_blks_written + s.local_blks_written + s.temp_blks_written
+    AS blks_written,
+{blk_read_time} AS blk_read_time,
+{blk_write_time} AS blk_write_time
+FROM pg_stat_statements s
+LEFT JOIN pg_catalog.pg_database d ON d.oid = s.dbid
+WHERE s.queryid IS NOT NULL"""
+
+    # I/O timings (track_io_timing) are split by buffer kinds since PG 17
+    IO_TIME_COLUMNS: tp.ClassVar[dict[str, str]] = {
+        "blk_read_time": "s.blk_read_time",
+        "blk_write_time": "s.blk_write_time",
+    }
+    IO_TIME_COLUMNS_17: tp.ClassVar[dict[str, str]] = {
+        "blk_read_time": "s.shared_blk_read_time + s.local_blk_read_time",
+        "blk_write_time": "s.shared_blk_write_time + s.local_blk_write_time",
+    }
+
+    COUNTERS = (
+        "calls",
+        "total_exec_time",
+        "rows",
+        "blks_read",
+        "blks_written",
+        "blk_read_time",
+        "blk_write_time",
+    )
+
+    def __init__(self, clients: ClientsSingleton) -> None:
+        self._c = clients
+        self._snapshot: dict[tuple, dict[str, tp.Any]] | None = None
+        self._snapshot_at: float | None = None
+        self._top: dict[str, tp.Any] = {}
+        self._collected_at: float | None = None
+
+    def _fetch(self) -> list[dict[str, tp.Any]]:
+        psql = self._c.psql
+        if psql.info.server_version >= 170000:
+            query = self.STATEMENTS_QUERY.format(**self.IO_TIME_COLUMNS_17)
+        else:
+            query = self.STATEMENTS_QUERY.format(**self.IO_TIME_COLUMNS)
+        with psql.cursor(row_factory=pg_rows.dict_row) as cur:
+            return cur.execute(query).fetchall()
+
+    def _deltas(
+        self,
+        previous: dict[tuple, dict[str, tp.Any]],
+        snapshot: dict[tuple, dict[str, tp.Any]],
+    ) -> tp.Iterator[dict[str, tp.Any]]:
+        for key, row in snapshot.items():
+            prev = previous.get(key)
+            # New statement or statistics were reset since the last snapshot
+            if prev is None or row["calls"] < prev["calls"]:
+                delta = {c: row[c] for c in self.COUNTERS}
+            else:
+                delta = {c: row[c] - prev[c] for c in self.COUNTERS}
+
+            if delta["calls"] <= 0:
+                continue
+
+            yield {
+                "queryid": str(row["queryid"]),
+                "database": row["database"],
+                "user": row["user"],
+                "query": row["query"][:TOP_QUERY_MAX_LENGTH],
+                "calls": delta["calls"],
+                "rows": delta["rows"],
+                "total_time_ms": round(delta["total_exec_time"], 3),
+                "mean_time_ms": round(delta["total_exec_time"] / delta["calls"], 3),
+                "blks_read": delta["blks_read"],
+                "blks_written": delta["blks_written"],
+                "blk_read_time_ms": round(delta["blk_read_time"], 3),
+                "blk_write_time_ms": round(delta["blk_write_time"], 3),
+            }
+
+    @staticmethod
+    def _sort(
+        entries: list[dict[str, tp.Any]],
+        key: tp.Callable[[dict[str, tp.Any]], float],
+    ) -> list[dict[str, tp.Any]]:
+        return sorted(entries, key=key, reverse=True)[:TOP_QUERIES_LIMIT]
+
+    def collect(self) -> dict[str, tp.Any]:
+        """Return top queries of the last period, collected once a period."""
+        now = time.monotonic()
+        if (
+            self._collected_at is not None
+            and now - self._collected_at < TOP_QUERIES_PERIOD
+        ):
+            return self._top
+        self._collected_at = now
+        self._top = self._collect()
+        return self._top
+
+    def _collect(self) -> dict[str, tp.Any]:
+        try:
+            rows = self._fetch()
+        except psycopg.Error as e:
+            # The extension may be not created or not preloaded yet
+            LOG.warning("Unable to collect pg_stat_statements: %s", e)
+            return {}
+
+        now = time.time()
+        snapshot = {(r["queryid"], r["userid"], r["dbid"]): r for r in rows}
+        previous, previous_at = self._snapshot, self._snapshot_at
+        self._snapshot, self._snapshot_at = snapshot, now
+        if previous is None or previous_at is None:
+            # Nothing to compare with, wait for the next period
+            return {}
+
+        entries = list(self._deltas(previous, snapshot))
+        period = round(now - previous_at)
+
+        return {
+            "collected_at": int(now),
+            "period": period,
+            "by_total_time": self._sort(entries, lambda e: e["total_time_ms"]),
+            "by_mean_time": self._sort(entries, lambda e: e["mean_time_ms"]),
+            "by_io": self._sort(entries, lambda e: e["blks_read"] + e["blks_written"]),
+            "by_io_time": self._sort(
+                entries, lambda e: e["blk_read_time_ms"] + e["blk_write_time_ms"]
+            ),
+        }
+
 
 class ClientsSingleton(singletons.InheritSingleton):
     def __init__(self):
         self.reinit_pclient()
         self.reinit_psql()
+        self.top_queries = TopQueriesCollector(self)
+        # (database, extension) pairs already ensured by this process
+        self._extensions = set()
 
     def reinit_pclient(self):
         self._pclient = PatroniClient()
@@ -107,6 +305,57 @@ class ClientsSingleton(singletons.InheritSingleton):
             self.reinit_psql()
         return self._psql
 
+    @staticmethod
+    def _quantize_lag(lag_ms: float | None) -> int | None:
+        # Lag is NULL for idle standbys
+        if lag_ms is None:
+            return None
+        return int(lag_ms // REPLICATION_LATENCY_RESOLUTION_MS) * (
+            REPLICATION_LATENCY_RESOLUTION_MS
+        )
+
+    def get_replication_latency(self) -> dict[str, dict[str, int | None]]:
+        """Return replication latency of standbys, known by the primary only.
+
+        Lag is quantized, so the statistics aren't reported on every jitter.
+        """
+        if not self.pclient.is_primary(get_ttl_hash(seconds=20)):
+            return {}
+
+        # application_name of standbys is the Patroni member name (node uuid)
+        return {
+            r[0]: {
+                "write_lag_ms": self._quantize_lag(r[1]),
+                "flush_lag_ms": self._quantize_lag(r[2]),
+            }
+            for r in self.psql.execute(
+                """\
+SELECT application_name,
+EXTRACT(EPOCH FROM write_lag) * 1000 AS write_lag_ms,
+EXTRACT(EPOCH FROM flush_lag) * 1000 AS flush_lag_ms
+FROM pg_stat_replication"""
+            ).fetchall()
+        }
+
+    def ensure_extension(self, database: str, extension: str) -> None:
+        if (database, extension) in self._extensions:
+            return
+
+        # Extensions are per database, so a dedicated connection is needed
+        with psycopg.connect(user="postgres", dbname=database, autocommit=True) as conn:
+            conn.execute(
+                sql.SQL("CREATE EXTENSION IF NOT EXISTS {}").format(
+                    sql.Identifier(extension)
+                )
+            )
+
+        self._extensions.add((database, extension))
+        LOG.info("Extension %s ensured in database %s", extension, database)
+
+    def forget_database(self, database: str) -> None:
+        """Forget extensions of the dropped database, it may be recreated."""
+        self._extensions = {e for e in self._extensions if e[0] != database}
+
 
 def on_primary_only(method):
     @wraps(method)
@@ -133,8 +382,33 @@ class PGInstance(meta.MetaDataPlaneModel):
         ra_types.Enum([s.value for s in pc.InstanceStatus]),
         default=pc.InstanceStatus.ACTIVE.value,
     )
+    parameters = properties.property(ra_types.Dict(), default={})
+    # Changed parameters waiting for the restart of this node, with context
+    pending_restart = properties.property(ra_types.Dict(), default={})
+    instance = properties.property(ra_types.AllowNone(ra_types.UUID()), default=None)
+    # Backups of the instance, every one is made by the node it names
+    backups = properties.property(ra_types.Dict(), default={})
+    # Restores of backups requested by users, made by the primary
+    restores = properties.property(ra_types.Dict(), default={})
+    # Statuses of backups made by this node and of restores, by backup
+    backup_status = properties.property(ra_types.Dict(), default={})
+    restore_status = properties.property(ra_types.Dict(), default={})
+    # WAL archiving progress, reported by the primary only
+    archive_status = properties.property(ra_types.Dict(), default={})
+    # Nodes sharing the backup storage report the same id
+    backup_storage_id = properties.property(
+        ra_types.AllowNone(ra_types.String(max_length=64)), default=None
+    )
 
-    _meta_fields = {"uuid", "name", "nodes_number"}
+    _meta_fields = {
+        "uuid",
+        "name",
+        "nodes_number",
+        "parameters",
+        "instance",
+        "backups",
+        "restores",
+    }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -253,6 +527,7 @@ WHERE d.datname not in """
                         sql.Identifier(a)
                     )
                 )
+                self.c.forget_database(a)
 
                 LOG.info("Database %s dropped", a)
 
@@ -272,6 +547,17 @@ WHERE d.datname not in """
         for aname, aowner in actual_dbs.items():
             self.databases[aname] = {"owner": aowner}
 
+    def _reconcile_extensions(self) -> None:
+        for database in (PG_MAINTENANCE_DATABASE, *self.databases):
+            try:
+                self.c.ensure_extension(database, PG_STAT_STATEMENTS_EXTENSION)
+            except psycopg.Error:
+                LOG.exception(
+                    "Unable to create extension %s in database %s",
+                    PG_STAT_STATEMENTS_EXTENSION,
+                    database,
+                )
+
     def _reconcile_DCS(self):
         sync_enabled = self.nodes_number > 1 and self.sync_replica_number
         tconfig = {
@@ -282,20 +568,214 @@ WHERE d.datname not in """
         LOG.info("DCS patch: %s", tconfig)
         self.c.pclient.config_patch(tconfig)
 
+    def _get_parameters_context(self, names: tp.Iterable[str]) -> dict[str, str]:
+        return {
+            r[0]: r[1]
+            for r in self.c.psql.execute(
+                "SELECT name, context FROM pg_settings WHERE name = ANY(%s)",
+                (list(names),),
+            ).fetchall()
+        }
+
+    def _reconcile_parameters(self) -> None:
+        config = self.c.pclient.config_get()
+        actual = config.get("postgresql", {}).get("parameters", {})
+        # Bootstrap parameters are the baseline, user ones override them.
+        # Managed ones can't be set by users.
+        target = {
+            **self.c.pclient.bootstrap_parameters,
+            **self._managed_parameters(),
+            **self.parameters,
+        }
+
+        changes = {k: v for k, v in target.items() if actual.get(k) != v}
+        # Removed overrides are reset to the PostgreSQL defaults
+        changes.update({k: None for k in actual if k not in target})
+        if not changes:
+            return
+
+        contexts = self._get_parameters_context(changes)
+        for name in tuple(changes):
+            context = contexts.get(name)
+            if context is None or context in PG_READONLY_CONTEXTS:
+                LOG.warning("Parameter %s is unknown or read-only, skipping", name)
+                changes.pop(name)
+            elif context in PG_RESTART_CONTEXTS:
+                LOG.info("Parameter %s will be applied after restart", name)
+            else:
+                LOG.info("Parameter %s (%s) will be reloaded", name, context)
+
+        if not changes:
+            return
+
+        # Patroni reloads PostgreSQL on DCS changes and only flags
+        # postmaster level parameters as pending restart, it never restarts
+        # nodes by itself, see `_reconcile_restart`.
+        LOG.info("DCS parameters patch: %s", changes)
+        self.c.pclient.config_patch({"postgresql": {"parameters": changes}})
+
+    def _is_restart_allowed(self, members: list[dict[str, tp.Any]]) -> bool:
+        """Whether this node may restart to apply pending parameters.
+
+        Nodes restart one by one while the others are running: replicas in
+        the order of their names, then the primary.
+        """
+        name = self.c.pclient.name
+        local = next((m for m in members if m["name"] == name), None)
+        if local is None or not local.get("pending_restart"):
+            return False
+
+        others = [m for m in members if m["name"] != name]
+        if any(m.get("state") not in PATRONI_RUNNING_STATES for m in others):
+            return False
+
+        pending = [m for m in others if m.get("pending_restart")]
+        if local.get("role") in PATRONI_PRIMARY_ROLES:
+            return not pending
+        return all(
+            name < m["name"]
+            for m in pending
+            if m.get("role") not in PATRONI_PRIMARY_ROLES
+        )
+
+    def _reconcile_restart(self) -> None:
+        # Patroni flags pending restarts after the DCS patch is applied by
+        # every node, so they are checked on every iteration
+        members = self.c.pclient.get_cluster().get("members", [])
+        if not self._is_restart_allowed(members):
+            return
+
+        LOG.info("Restarting PostgreSQL to apply pending parameters")
+        self.c.pclient.restart_pending()
+
+    def _fill_pending_restart(self) -> None:
+        self.pending_restart = {
+            r[0]: r[1]
+            for r in self.c.psql.execute(
+                "SELECT name, context FROM pg_settings WHERE pending_restart"
+            ).fetchall()
+        }
+
     def _fill_DCS(self):
         config = self.c.pclient.config_get()
         self.sync_replica_number = config["synchronous_node_count"]
 
+        actual = config.get("postgresql", {}).get("parameters", {})
+        self.parameters = {k: actual[k] for k in self.parameters if k in actual}
+
+    def _managed_parameters(self) -> dict[str, str]:
+        # Resources built before backups don't have the instance, WAL is
+        # discarded by the bootstrap `archive_command` without the storage
+        if self.instance is None or pg_backup.BackupRunner().storage is None:
+            return {}
+        return {"archive_command": ARCHIVE_COMMAND_TMPL.format(instance=self.instance)}
+
+    def _reconcile_archiving(self) -> None:
+        if self.instance is None:
+            return
+        # Only the primary has WAL ready for archiving, but any node may
+        # become the primary
+        pg_wal.WalArchiver().start(
+            self.instance, os.path.join(self.c.pclient.data_dir, "pg_wal")
+        )
+
+    def _fill_archive_status(self) -> None:
+        self.archive_status = {}
+        if self.instance is None or not self.c.pclient.is_primary(get_ttl_hash(20)):
+            return
+
+        archiver = pg_wal.WalArchiver()
+        last_wal, last_archived_at, failed_count = self.c.psql.execute(
+            """\
+SELECT last_archived_wal, last_archived_time, failed_count
+FROM pg_stat_archiver"""
+        ).fetchone()
+        self.archive_status = {
+            # WAL files waiting for archiving, the archive lag
+            "pending_files": len(archiver.ready_files()),
+            "last_archived_wal": last_wal,
+            "last_archived_at": last_archived_at and last_archived_at.isoformat(),
+            "failed_count": failed_count,
+            "push_failures": archiver.failures,
+        }
+
+    def _own_backups(self) -> dict[str, dict[str, tp.Any]]:
+        node = str(self.uuid)
+        return {u: b for u, b in self.backups.items() if b["node"] == node}
+
+    def _reconcile_backups(self) -> None:
+        runner = pg_backup.BackupRunner()
+        for uuid, backup in self._own_backups().items():
+            runner.backup(
+                self.instance,
+                uuid,
+                backup["databases"],
+                backup["jobs"],
+                kind=backup.get("kind", pg_backup.LOGICAL),
+            )
+
+    def _reconcile_restores(self) -> None:
+        # Resources built before backups don't have the instance
+        if self.instance is None:
+            return
+
+        runner = pg_backup.BackupRunner()
+        for uuid, restore in self.restores.items():
+            runner.restore(
+                self.instance, uuid, restore["requested_at"], restore["jobs"]
+            )
+        runner.collect_garbage(self.instance, self.backups)
+
+        current_wal = self.c.psql.execute(
+            "SELECT redo_wal_file FROM pg_control_checkpoint()"
+        ).fetchone()[0]
+        runner.collect_wal(self.instance, self.backups, current_wal)
+
+    def _fill_backup_status(self) -> None:
+        runner = pg_backup.BackupRunner()
+        self.backup_storage_id = runner.storage_id()
+        self.backup_status = {}
+        for uuid in self._own_backups():
+            status = runner.backup_status(self.instance, uuid)
+            if status is not None:
+                self.backup_status[uuid] = status
+
+        self.restore_status = {}
+        if not self.restores or not self.c.pclient.is_primary(get_ttl_hash(20)):
+            return
+        for uuid, restore in self.restores.items():
+            status = runner.restore_status(self.instance, uuid, restore["requested_at"])
+            if status is not None:
+                self.restore_status[uuid] = {
+                    "requested_at": restore["requested_at"],
+                    **status,
+                }
+
     @on_primary_only
-    def dump_to_dp(self) -> None:
+    def _dump_to_primary(self) -> None:
         self._reconcile_DCS()
+        self._reconcile_parameters()
         self._reconcile_target_users()
         self._reconcile_target_databases()
+        self._reconcile_extensions()
+        self._reconcile_restores()
+
+    def dump_to_dp(self) -> None:
+        self._reconcile_archiving()
+        # Backups are made by replicas, the primary isn't loaded
+        self._reconcile_backups()
+        self._dump_to_primary()
 
     def restore_from_dp(self) -> None:
+        # The agent may be restarted without changes of the instance
+        self._reconcile_archiving()
         self._fill_actual_users()
         self._fill_actual_databases()
         self._fill_DCS()
+        self._reconcile_restart()
+        self._fill_pending_restart()
+        self._fill_backup_status()
+        self._fill_archive_status()
 
     @on_primary_only
     def delete_from_dp(self) -> None:
@@ -303,19 +783,54 @@ WHERE d.datname not in """
         # TODO: maybe node draining on cluster shrink should be here?
         pass
 
-    @on_primary_only
     def update_on_dp(self) -> None:
         self.dump_to_dp()
 
 
-class PGCapabilityDriver(meta.MetaFileStorageAgentDriver):
+class PGCapabilityDriver(sqlite_meta.MetaSqliteStorageAgentDriver):
     """PG capability driver."""
 
-    PG_META_PATH = "/var/lib/exordos/exordos_db/pg_meta.json"
+    PG_META_PATH = "/var/lib/exordos/exordos_db/pg_meta.db"
+    # Meta file of the previous versions, migrated to PG_META_PATH
+    PG_LEGACY_META_PATH = "/var/lib/exordos/exordos_db/pg_meta.json"
 
     __model_map__ = {
         "pg_instance_node": PGInstance,
     }
 
-    def __init__(self, *args, **kwargs) -> None:
-        super().__init__(*args, meta_file=self.PG_META_PATH, **kwargs)
+    def __init__(
+        self,
+        *args: tp.Any,
+        backup_storage: str | None = None,
+        backup_spool_dir: str = pg_backup.DEFAULT_SPOOL_DIR,
+        wal_push_jobs: int | str = pg_wal.DEFAULT_JOBS,
+        wal_push_queue_size: int | str = pg_wal.DEFAULT_QUEUE_SIZE,
+        **kwargs: tp.Any,
+    ) -> None:
+        # Options of the driver section of the agent config, they are strings
+        runner = pg_backup.BackupRunner(
+            storage_url=backup_storage, spool_dir=backup_spool_dir
+        )
+        pg_wal.WalArchiver(
+            runner.storage,
+            jobs=int(wal_push_jobs),
+            queue_size=int(wal_push_queue_size),
+        )
+        super().__init__(
+            *args,
+            meta_file=self.PG_META_PATH,
+            legacy_meta_file=self.PG_LEGACY_META_PATH,
+            **kwargs,
+        )
+
+    def get_stats(self) -> dict:
+        """Return statistics of the node reported apart from resources.
+
+        Statistics change on every collection, so they aren't a part of
+        resources to keep their hashes stable.
+        """
+        clients = ClientsSingleton()
+        return {
+            "top_queries": clients.top_queries.collect(),
+            "replication_latency": clients.get_replication_latency(),
+        }
@@ -0,0 +1,639 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Backups of instances.
+
+A logical backup is made by `pg_dump -Fd -j N` on a replica, so the primary
+isn't loaded. The dump of a database is a directory of compressed table
+files, they are streamed to the storage in N threads. The manifest is
+written last, a backup without it is incomplete. A restore downloads the
+files in N threads and runs `pg_restore -j N` on the primary.
+
+A physical backup is a tar of the data directory streamed by
+`pg_basebackup` through zstd to the storage without WAL, WAL is archived
+continuously, see `pg_wal`. It's restored into a new instance with WAL up
+to the recovery target.
+
+Layout of the storage:
+
+    <instance>/<backup>/started
+    <instance>/<backup>/<database>/<file of the dump directory>
+    <instance>/<backup>/base.tar.zst
+    <instance>/<backup>/manifest.json
+    <instance>/wal/<WAL file>.zst
+    storage_id
+
+Backups and restores take hours for large databases, so they run in
+background threads and the agent iteration only reports their status.
+
+The storage must be shared by the nodes, a backup is made on a replica and
+restored on the primary. So there is no default storage, backups and WAL
+archiving are disabled until it's configured.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import functools
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import threading
+import time
+import typing as tp
+import urllib.parse
+import uuid as sys_uuid
+
+import psycopg
+from restalchemy.common import singletons
+import zstandard
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = "/var/lib/exordos/exordos_db/backup_spool"
+
+MANIFEST = "manifest.json"
+STARTED_MARKER = "started"
+BASE_BACKUP = "base.tar.zst"
+WAL_DIR = "wal"
+# Random id of the storage, nodes sharing the storage read the same one
+STORAGE_ID = "storage_id"
+CHUNK_SIZE = 1024**2
+# Archived WAL is pruned not more often
+WAL_COLLECT_PERIOD = 60
+
+# Kinds of backups, the same as of the user API models
+LOGICAL = "logical"
+PHYSICAL = "physical"
+
+# WAL segment file name: timeline, log and segment numbers. Names of backup
+# history and partial files start with the segment name.
+WAL_SEGMENT_RE = re.compile(r"^[0-9A-F]{24}")
+
+# Statuses of backups and restores, the same as of the user API models
+IN_PROGRESS = "IN_PROGRESS"
+ACTIVE = "ACTIVE"
+ERROR = "ERROR"
+
+NO_STORAGE_ERROR = "The backup storage isn't configured"
+
+
+class AbstractStorage:
+    """Storage of backup files addressed by `/` separated keys."""
+
+    def put(self, key: str, fileobj: tp.BinaryIO) -> int:
+        """Stream the file to the key, return the number of written bytes."""
+        raise NotImplementedError()
+
+    def get(self, key: str, fileobj: tp.BinaryIO) -> None:
+        """Stream the key to the file."""
+        raise NotImplementedError()
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError()
+
+    def list(self, prefix: str) -> list[str]:
+        """Return names of direct children of the prefix."""
+        raise NotImplementedError()
+
+    def delete(self, prefix: str) -> None:
+        """Delete the key or all keys under the prefix."""
+        raise NotImplementedError()
+
+
+class FileSystemStorage(AbstractStorage):
+    """Keys are files under the root directory.
+
+    The root must be shared by nodes of an instance to restore a backup
+    made on another node, e.g. an NFS mount.
+    """
+
+    def __init__(self, root: str):
+        self._root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self._root, key))
+        if os.path.commonpath((self._root, path)) != os.path.normpath(self._root):
+            raise ValueError(f"Key {key} is out of the storage")
+        return path
+
+    def put(self, key: str, fileobj: tp.BinaryIO) -> int:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(fileobj, f, CHUNK_SIZE)
+            size = f.tell()
+        os.replace(tmp_path, path)
+        return size
+
+    def get(self, key: str, fileobj: tp.BinaryIO) -> None:
+        with open(self._path(key), "rb") as f:
+            shutil.copyfileobj(f, fileobj, CHUNK_SIZE)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def list(self, prefix: str) -> list[str]:
+        try:
+            return sorted(os.listdir(self._path(prefix)))
+        except FileNotFoundError:
+            return []
+
+    def delete(self, prefix: str) -> None:
+        path = self._path(prefix)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+# Storage backends by the URL scheme
+STORAGES = {
+    "file": FileSystemStorage,
+}
+
+
+def get_storage(url: str) -> AbstractStorage:
+    parsed = urllib.parse.urlparse(url)
+    try:
+        storage_class = STORAGES[parsed.scheme]
+    except KeyError:
+        raise ValueError(f"Unsupported backup storage: {url}")
+    return storage_class(parsed.path)
+
+
+@functools.cache
+def dump_compression() -> str:
+    """Compression of dump files supported by the local `pg_dump`."""
+    output = subprocess.run(
+        ["pg_dump", "--version"], check=True, capture_output=True, text=True
+    ).stdout
+    match = re.search(r"(\d+)", output)
+    if match is None:
+        raise RuntimeError(f"Unknown version of pg_dump: {output.strip()}")
+    major = int(match.group(1))
+    # Compression methods are supported since 16, gzip level before
+    return "zstd" if major >= 16 else "6"
+
+
+def wal_key(instance: sys_uuid.UUID | str, name: str) -> str:
+    return f"{instance}/{WAL_DIR}/{name}.zst"
+
+
+def wal_position(name: str) -> str:
+    """Return the position of the WAL segment regardless of the timeline."""
+    return name[8:24]
+
+
+def wal_file_name(timeline: int, lsn: int, segment_size: int) -> str:
+    """Return the name of the WAL segment containing the LSN."""
+    segment = lsn // segment_size
+    segments_per_id = 0x100000000 // segment_size
+    return (
+        f"{timeline:08X}{segment // segments_per_id:08X}{segment % segments_per_id:08X}"
+    )
+
+
+def _wal_segment_size() -> int:
+    with psycopg.connect("user=postgres", autocommit=True) as conn:
+        row = conn.execute(
+            "SELECT setting::bigint FROM pg_settings WHERE name = 'wal_segment_size'"
+        ).fetchone()
+    if row is None:
+        raise RuntimeError("Unknown size of WAL segments")
+    return row[0]
+
+
+def restore_base_backup(
+    storage: AbstractStorage,
+    instance: sys_uuid.UUID | str,
+    backup: sys_uuid.UUID | str,
+    datadir: str,
+    waldir: str | None = None,
+) -> None:
+    """Extract the physical backup into the empty data directory.
+
+    `pg_wal` is linked to `waldir` if it's set, like `initdb --waldir` does.
+    """
+    if not storage.exists(f"{instance}/{backup}/{MANIFEST}"):
+        raise RuntimeError(
+            f"Backup {instance}/{backup} isn't found, the backup storage must "
+            "be shared with the nodes of the source instance"
+        )
+    os.makedirs(datadir, mode=0o700, exist_ok=True)
+    read_fd, write_fd = os.pipe()
+
+    def download() -> None:
+        with open(write_fd, "wb") as f:
+            storage.get(f"{instance}/{backup}/{BASE_BACKUP}", f)
+
+    # The backup is streamed through the pipe, it isn't stored on the node
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        downloaded = executor.submit(download)
+        with open(read_fd, "rb") as f:
+            reader = zstandard.ZstdDecompressor().stream_reader(f)
+            with tarfile.open(fileobj=reader, mode="r|") as tar:
+                # The archive is made by us, keep modes of the files
+                tar.extraction_filter = getattr(tarfile, "fully_trusted_filter", None)
+                tar.extractall(datadir)
+        downloaded.result()
+
+    # The node starts the recovery by itself, not as a standby
+    for name in ("standby.signal", "recovery.signal"):
+        if os.path.exists(os.path.join(datadir, name)):
+            os.remove(os.path.join(datadir, name))
+
+    if waldir is not None:
+        pg_wal = os.path.join(datadir, "pg_wal")
+        shutil.rmtree(waldir, ignore_errors=True)
+        os.makedirs(waldir, mode=0o700)
+        shutil.rmtree(pg_wal)
+        os.symlink(waldir, pg_wal)
+
+
+def _run(args: list[str]) -> None:
+    result = subprocess.run(args, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{args[0]} failed: {result.stderr.strip()}")
+
+
+class BackupRunner(singletons.InheritSingleton):
+    """Run backups and restores of the node in background threads.
+
+    The first call configures the runner, the following ones return it.
+    """
+
+    def __init__(
+        self,
+        storage_url: str | None = None,
+        spool_dir: str = DEFAULT_SPOOL_DIR,
+    ):
+        self._storage = get_storage(storage_url) if storage_url else None
+        self._spool_dir = spool_dir
+        self._lock = threading.Lock()
+        # Task key -> status of the running or finished task
+        self._tasks: dict[tuple[str, ...], dict[str, tp.Any]] = {}
+        self._wal_collected_at = 0.0
+
+    @property
+    def storage(self) -> AbstractStorage | None:
+        """The backup storage, None if it isn't configured."""
+        return self._storage
+
+    def storage_id(self) -> str | None:
+        """Return the id of the storage, None if it isn't configured.
+
+        Nodes report the id, so the control plane checks that they share
+        the storage.
+        """
+        if self._storage is None:
+            return None
+        if not self._storage.exists(STORAGE_ID):
+            self._storage.put(STORAGE_ID, io.BytesIO(str(sys_uuid.uuid4()).encode()))
+        # Another node may write its id at the same time, the last one wins
+        data = io.BytesIO()
+        self._storage.get(STORAGE_ID, data)
+        return data.getvalue().decode()
+
+    def _get_storage(self) -> AbstractStorage:
+        if self._storage is None:
+            raise RuntimeError(NO_STORAGE_ERROR)
+        return self._storage
+
+    def _start(
+        self,
+        key: tuple[str, ...],
+        target: tp.Callable[..., dict[str, tp.Any]],
+        *args: tp.Any,
+    ) -> None:
+        with self._lock:
+            if key in self._tasks:
+                return
+            if self._storage is None:
+                self._tasks[key] = {"status": ERROR, "error": NO_STORAGE_ERROR}
+                return
+            self._tasks[key] = {"status": IN_PROGRESS}
+
+        threading.Thread(
+            target=self._run_task, args=(key, target, *args), daemon=True
+        ).start()
+
+    def _run_task(
+        self,
+        key: tuple[str, ...],
+        target: tp.Callable[..., dict[str, tp.Any]],
+        *args: tp.Any,
+    ) -> None:
+        try:
+            result = target(*args)
+        except Exception as e:
+            LOG.exception("Task %s failed", key)
+            result = {"status": ERROR, "error": str(e)[:1024]}
+        with self._lock:
+            self._tasks[key] = result
+
+    def _upload(self, prefix: str, directory: str, jobs: int) -> dict[str, int]:
+        storage = self._get_storage()
+
+        def upload(name: str) -> int:
+            with open(os.path.join(directory, name), "rb") as f:
+                return storage.put(f"{prefix}/{name}", f)
+
+        names = sorted(os.listdir(directory))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            sizes = executor.map(upload, names)
+            return dict(zip(names, sizes))
+
+    def _download(
+        self, prefix: str, names: tp.Iterable[str], directory: str, jobs: int
+    ) -> None:
+        storage = self._get_storage()
+
+        def download(name: str) -> None:
+            with open(os.path.join(directory, name), "wb") as f:
+                storage.get(f"{prefix}/{name}", f)
+
+        os.makedirs(directory)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            # Raise the first error
+            list(executor.map(download, names))
+
+    def _backup(
+        self, prefix: str, databases: list[str], jobs: int
+    ) -> dict[str, tp.Any]:
+        storage = self._get_storage()
+        spool = os.path.join(self._spool_dir, prefix)
+        shutil.rmtree(spool, ignore_errors=True)
+        storage.put(f"{prefix}/{STARTED_MARKER}", io.BytesIO())
+        files_by_database = {}
+        size = 0
+        try:
+            for database in databases:
+                directory = os.path.join(spool, database)
+                _run(
+                    [
+                        "pg_dump",
+                        "--username=postgres",
+                        "--format=directory",
+                        f"--jobs={jobs}",
+                        f"--compress={dump_compression()}",
+                        f"--file={directory}",
+                        f"--dbname={database}",
+                    ]
+                )
+                files = self._upload(f"{prefix}/{database}", directory, jobs)
+                shutil.rmtree(directory)
+                files_by_database[database] = files
+                size += sum(files.values())
+        finally:
+            shutil.rmtree(spool, ignore_errors=True)
+
+        manifest = {"databases": files_by_database, "size": size}
+        storage.put(f"{prefix}/{MANIFEST}", io.BytesIO(json.dumps(manifest).encode()))
+        LOG.info("Backup %s of %s is done", prefix, databases)
+        return {"status": ACTIVE, "size": size}
+
+    def _base_backup(
+        self, instance: sys_uuid.UUID, prefix: str, jobs: int
+    ) -> dict[str, tp.Any]:
+        storage = self._get_storage()
+        storage.put(f"{prefix}/{STARTED_MARKER}", io.BytesIO())
+        with tempfile.TemporaryFile() as stderr:
+            # WAL isn't included, it's archived continuously
+            proc = subprocess.Popen(
+                [
+                    "pg_basebackup",
+                    "--username=postgres",
+                    "--pgdata=-",
+                    "--format=tar",
+                    "--wal-method=none",
+                    "--checkpoint=fast",
+                    "--verbose",
+                ],
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+            )
+            # The pipe is opened by `stdout=subprocess.PIPE`
+            stdout = tp.cast(tp.IO[bytes], proc.stdout)
+            try:
+                with stdout:
+                    compressor = zstandard.ZstdCompressor(threads=jobs)
+                    size = storage.put(
+                        f"{prefix}/{BASE_BACKUP}",
+                        compressor.stream_reader(stdout),
+                    )
+            finally:
+                returncode = proc.wait()
+            stderr.seek(0)
+            output = stderr.read().decode(errors="replace")
+        if returncode != 0:
+            raise RuntimeError(f"pg_basebackup failed: {output.strip()}")
+
+        match = re.search(
+            r"start point: ([0-9A-F]+)/([0-9A-F]+) on timeline (\d+)", output
+        )
+        if match is None:
+            raise RuntimeError(f"Unknown start of the base backup: {output.strip()}")
+        lsn = (int(match.group(1), 16) << 32) + int(match.group(2), 16)
+        start_wal = wal_file_name(int(match.group(3)), lsn, _wal_segment_size())
+
+        # WAL is pruned in order, so the start is pruned if a later segment
+        # is archived without it
+        archived = storage.list(f"{instance}/{WAL_DIR}")
+        if not storage.exists(wal_key(instance, start_wal)) and any(
+            WAL_SEGMENT_RE.match(n) and wal_position(n) > wal_position(start_wal)
+            for n in archived
+        ):
+            raise RuntimeError(f"WAL {start_wal} of the backup start is pruned")
+
+        manifest = {"kind": PHYSICAL, "start_wal": start_wal, "size": size}
+        storage.put(f"{prefix}/{MANIFEST}", io.BytesIO(json.dumps(manifest).encode()))
+        LOG.info("Base backup %s is done, it starts at %s", prefix, start_wal)
+        return {"status": ACTIVE, "size": size}
+
+    def _read_manifest(self, prefix: str) -> dict[str, tp.Any] | None:
+        storage = self._get_storage()
+        if not storage.exists(f"{prefix}/{MANIFEST}"):
+            return None
+        data = io.BytesIO()
+        storage.get(f"{prefix}/{MANIFEST}", data)
+        return json.loads(data.getvalue())
+
+    def _restore(self, prefix: str, jobs: int) -> dict[str, tp.Any]:
+        manifest = self._read_manifest(prefix)
+        if manifest is None:
+            raise RuntimeError(
+                f"Backup {prefix} isn't found, the backup storage must be "
+                "shared by the nodes of the instance"
+            )
+
+        spool = os.path.join(self._spool_dir, f"restore-{prefix}")
+        shutil.rmtree(spool, ignore_errors=True)
+        try:
+            for database, files in manifest["databases"].items():
+                directory = os.path.join(spool, database)
+                self._download(f"{prefix}/{database}", files, directory, jobs)
+                _run(
+                    [
+                        "pg_restore",
+                        "--username=postgres",
+                        "--clean",
+                        "--if-exists",
+                        f"--jobs={jobs}",
+                        f"--dbname={database}",
+                        directory,
+                    ]
+                )
+                shutil.rmtree(directory)
+        finally:
+            shutil.rmtree(spool, ignore_errors=True)
+
+        LOG.info("Restore of %s is done", prefix)
+        return {"status": ACTIVE}
+
+    def backup(
+        self,
+        instance: sys_uuid.UUID,
+        backup: str,
+        databases: list[str],
+        jobs: int,
+        kind: str = LOGICAL,
+    ) -> None:
+        """Start the backup if it isn't started yet."""
+        prefix = f"{instance}/{backup}"
+        if self._storage is not None and self._storage.exists(
+            f"{prefix}/{STARTED_MARKER}"
+        ):
+            return
+        if kind == PHYSICAL:
+            self._start(("backup", prefix), self._base_backup, instance, prefix, jobs)
+        else:
+            self._start(("backup", prefix), self._backup, prefix, databases, jobs)
+
+    def backup_status(
+        self, instance: sys_uuid.UUID, backup: str
+    ) -> dict[str, tp.Any] | None:
+        """Status of the backup, None if it isn't started."""
+        prefix = f"{instance}/{backup}"
+        key = ("backup", prefix)
+        with self._lock:
+            if key in self._tasks:
+                return dict(self._tasks[key])
+        if self._storage is None:
+            return None
+
+        # The agent is restarted or the backup is made by another node
+        manifest = self._read_manifest(prefix)
+        if manifest is not None:
+            status = {"status": ACTIVE, "size": manifest["size"]}
+        elif self._storage.exists(f"{prefix}/{STARTED_MARKER}"):
+            status = {"status": ERROR, "error": "The backup is interrupted"}
+        else:
+            return None
+
+        with self._lock:
+            self._tasks[key] = status
+        return dict(status)
+
+    def restore(
+        self, instance: sys_uuid.UUID, backup: str, requested_at: str, jobs: int
+    ) -> None:
+        """Start the restore requested at the time if it isn't started yet."""
+        prefix = f"{instance}/{backup}"
+        self._start(("restore", prefix, requested_at), self._restore, prefix, jobs)
+
+    def restore_status(
+        self, instance: sys_uuid.UUID, backup: str, requested_at: str
+    ) -> dict[str, tp.Any] | None:
+        with self._lock:
+            status = self._tasks.get(("restore", f"{instance}/{backup}", requested_at))
+        return dict(status) if status is not None else None
+
+    def _wal_floor(
+        self,
+        instance: sys_uuid.UUID,
+        backups: dict[str, dict[str, tp.Any]],
+        current_wal: str,
+    ) -> str | None:
+        """Return the oldest WAL needed by physical backups, None if unknown."""
+        floor = current_wal
+        for uuid, backup in backups.items():
+            if backup.get("kind") != PHYSICAL or backup.get("status") == ERROR:
+                continue
+            manifest = self._read_manifest(f"{instance}/{uuid}")
+            # The start of a backup in progress isn't known yet
+            if manifest is None:
+                return None
+            floor = min(floor, manifest["start_wal"], key=wal_position)
+        return floor
+
+    def collect_wal(
+        self,
+        instance: sys_uuid.UUID,
+        backups: dict[str, dict[str, tp.Any]],
+        current_wal: str,
+    ) -> None:
+        """Delete archived WAL older than all physical backups.
+
+        `current_wal` is the WAL file of the last checkpoint redo of the
+        primary, WAL before it isn't needed if there are no physical
+        backups.
+        """
+        if self._storage is None:
+            return
+        if time.monotonic() - self._wal_collected_at < WAL_COLLECT_PERIOD:
+            return
+        self._wal_collected_at = time.monotonic()
+
+        floor = self._wal_floor(instance, backups, current_wal)
+        if floor is None:
+            return
+
+        deleted = 0
+        for name in self._storage.list(f"{instance}/{WAL_DIR}"):
+            # History files are tiny and needed to follow timelines
+            if WAL_SEGMENT_RE.match(name) and wal_position(name) < wal_position(floor):
+                self._storage.delete(f"{instance}/{WAL_DIR}/{name}")
+                deleted += 1
+        if deleted:
+            LOG.info(
+                "%d WAL files of %s before %s are deleted", deleted, instance, floor
+            )
+
+    def collect_garbage(
+        self, instance: sys_uuid.UUID, backups: dict[str, dict[str, tp.Any]]
+    ) -> None:
+        """Delete backups of the instance which aren't in `backups`."""
+        if self._storage is None:
+            return
+        for backup in self._storage.list(str(instance)):
+            if backup in backups or backup == WAL_DIR:
+                continue
+            prefix = f"{instance}/{backup}"
+            with self._lock:
+                task = self._tasks.get(("backup", prefix))
+                if task is not None and task["status"] == IN_PROGRESS:
+                    continue
+                self._tasks.pop(("backup", prefix), None)
+            self._storage.delete(prefix)
+            LOG.info("Backup %s is deleted", prefix)
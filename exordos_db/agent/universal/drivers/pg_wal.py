@@ -0,0 +1,256 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Continuous archiving of WAL to the backup storage.
+
+PostgreSQL runs `archive_command` for WAL files one by one, it's too slow
+for bursty writes. So the command doesn't push files itself, the agent
+pushes all files ready for archiving, the ones with `.ready` status files,
+ahead of it in parallel threads. The command only asks the agent through
+its socket and waits for the answer, see `pg_wal_client`. Files are
+compressed by zstd on the fly from `pg_wal`, they aren't copied to the
+data disk.
+
+The number of files pushed at once is bounded, so a burst of WAL doesn't
+start a thread per file and the oldest files are pushed first.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import os
+import socketserver
+import threading
+import time
+import uuid as sys_uuid
+
+from restalchemy.common import singletons
+import zstandard
+
+from exordos_db.agent.universal.drivers import pg_backup
+from exordos_db.agent.universal.drivers import pg_wal_client
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_JOBS = 4
+DEFAULT_QUEUE_SIZE = 32
+# How often `pg_wal` is checked for new files if nothing is pushed
+POLL_INTERVAL = 0.5
+READY_SUFFIX = ".ready"
+
+
+def push(storage: pg_backup.AbstractStorage, instance: str, path: str) -> int:
+    """Compress and push the WAL file, return the compressed size."""
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdCompressor().stream_reader(f)
+        return storage.put(pg_backup.wal_key(instance, os.path.basename(path)), reader)
+
+
+def fetch(
+    storage: pg_backup.AbstractStorage, instance: str, name: str, path: str
+) -> bool:
+    """Fetch the archived WAL file to the path, False if it isn't archived."""
+    key = pg_backup.wal_key(instance, name)
+    if not storage.exists(key):
+        return False
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        with zstandard.ZstdDecompressor().stream_writer(f, closefd=False) as writer:
+            storage.get(key, writer)
+    os.replace(tmp_path, path)
+    return True
+
+
+class ArchivedRequestHandler(socketserver.StreamRequestHandler):
+    """Answer whether the WAL file is archived, see `pg_wal_client`."""
+
+    server: ArchivedServer
+
+    def handle(self) -> None:
+        try:
+            instance, name, timeout = self.rfile.readline(1024).decode().split()
+            archived = self.server.archiver.wait_pushed(instance, name, float(timeout))
+        except ValueError:
+            LOG.warning("Malformed request of the archive command")
+            archived = False
+        self.wfile.write(b"1\n" if archived else b"0\n")
+
+
+class ArchivedServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, archiver: WalArchiver) -> None:
+        self.archiver = archiver
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        # The socket of the previous run of the agent
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, ArchivedRequestHandler)
+        # `archive_command` is run by the postgres user, the requested files
+        # are only the ones PostgreSQL marked ready for archiving
+        os.chmod(socket_path, 0o666)
+
+
+class WalArchiver(singletons.InheritSingleton):
+    """Push WAL files ready for archiving in background threads.
+
+    The first call configures the archiver, the following ones return it.
+    """
+
+    def __init__(
+        self,
+        storage: pg_backup.AbstractStorage | None = None,
+        jobs: int = DEFAULT_JOBS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        socket_path: str = pg_wal_client.SOCKET_PATH,
+    ):
+        self._storage = storage
+        self._queue_size = queue_size
+        self._socket_path = socket_path
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=jobs, thread_name_prefix="wal-push"
+        )
+        self._lock = threading.Lock()
+        self._pg_instance: str | None = None
+        self._wal_dir: str | None = None
+        self._thread: threading.Thread | None = None
+        self._server: ArchivedServer | None = None
+        # Name -> future of the file being pushed
+        self._pushing: dict[str, concurrent.futures.Future[None]] = {}
+        # Pushed files PostgreSQL hasn't marked as archived yet
+        self._pushed: set[str] = set()
+        self._failures = 0
+
+    def start(self, instance: sys_uuid.UUID | str, wal_dir: str) -> None:
+        """Start archiving WAL of the instance if it isn't started yet.
+
+        Nothing is archived if the backup storage isn't configured.
+        """
+        if self._storage is None:
+            return
+        with self._lock:
+            self._pg_instance, self._wal_dir = str(instance), wal_dir
+            if self._thread is not None:
+                return
+            server = self._server = ArchivedServer(self._socket_path, self)
+            thread = self._thread = threading.Thread(
+                target=self._run, name="wal-archiver", daemon=True
+            )
+        thread.start()
+        threading.Thread(
+            target=server.serve_forever, name="wal-archived", daemon=True
+        ).start()
+
+    def ready_files(self) -> list[str]:
+        """Return WAL files ready for archiving, the oldest first."""
+        if self._wal_dir is None:
+            return []
+        try:
+            names = os.listdir(os.path.join(self._wal_dir, "archive_status"))
+        except FileNotFoundError:
+            return []
+        return sorted(
+            n[: -len(READY_SUFFIX)] for n in names if n.endswith(READY_SUFFIX)
+        )
+
+    @property
+    def failures(self) -> int:
+        return self._failures
+
+    def _push(self, instance: str, wal_dir: str, name: str) -> None:
+        storage = self._storage
+        if storage is None:
+            raise RuntimeError(pg_backup.NO_STORAGE_ERROR)
+        # The file may be pushed before the restart of the agent
+        if not storage.exists(pg_backup.wal_key(instance, name)):
+            push(storage, instance, os.path.join(wal_dir, name))
+
+    def _is_ready(self, wal_dir: str, name: str) -> bool:
+        return os.path.exists(
+            os.path.join(wal_dir, "archive_status", f"{name}{READY_SUFFIX}")
+        )
+
+    def wait_pushed(self, instance: str, name: str, timeout: float) -> bool:
+        """Wait until the WAL file is pushed, it's pushed ahead if it isn't.
+
+        The file is asked by `archive_command`, so it's ready for archiving.
+        """
+        with self._lock:
+            wal_dir = self._wal_dir
+            if instance != self._pg_instance or wal_dir is None:
+                return False
+            if name in self._pushed:
+                return True
+            future = self._pushing.get(name)
+            if future is None:
+                if os.path.basename(name) != name or not self._is_ready(wal_dir, name):
+                    return False
+                future = self._executor.submit(self._push, instance, wal_dir, name)
+                self._pushing[name] = future
+
+        try:
+            future.result(timeout)
+        except Exception:
+            # Failures are counted and logged by the archiver thread
+            return False
+        return True
+
+    def _push_ready(self) -> None:
+        with self._lock:
+            for name, future in tuple(self._pushing.items()):
+                if not future.done():
+                    continue
+                del self._pushing[name]
+                if future.exception() is None:
+                    self._pushed.add(name)
+                else:
+                    self._failures += 1
+                    LOG.error("Unable to push WAL %s: %s", name, future.exception())
+
+            instance, wal_dir = self._pg_instance, self._wal_dir
+            if instance is None or wal_dir is None:
+                return
+            ready = self.ready_files()
+            self._pushed.intersection_update(ready)
+            for name in ready:
+                if len(self._pushing) >= self._queue_size:
+                    break
+                if name in self._pushing or name in self._pushed:
+                    continue
+                self._pushing[name] = self._executor.submit(
+                    self._push, instance, wal_dir, name
+                )
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._push_ready()
+            except Exception:
+                LOG.exception("Error archiving WAL")
+
+            with self._lock:
+                pushing = tuple(self._pushing.values())
+            if pushing:
+                concurrent.futures.wait(
+                    pushing,
+                    timeout=POLL_INTERVAL,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+            else:
+                time.sleep(POLL_INTERVAL)
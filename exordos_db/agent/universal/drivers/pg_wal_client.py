@@ -0,0 +1,49 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Client of the WAL archiver of the agent.
+
+PostgreSQL runs `archive_command` for every WAL file, so the client imports
+only the standard library, it's run by a fresh interpreter every time.
+The agent pushes the file ahead of others if it isn't pushed yet and
+answers when it's in the storage, there is no polling.
+
+The request is a line `<instance> <WAL file> <timeout>`, the answer is
+`1` if the file is archived and `0` otherwise.
+"""
+
+import socket
+
+SOCKET_PATH = "/run/exordos_db/wal.sock"
+DEFAULT_TIMEOUT = 60
+# The agent answers at the timeout itself, the margin is for a stuck agent
+TIMEOUT_MARGIN = 5
+
+
+def wait_archived(
+    instance: str,
+    name: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    socket_path: str = SOCKET_PATH,
+) -> bool:
+    """Ask the agent to archive the WAL file, True if it's archived."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout + TIMEOUT_MARGIN)
+        sock.connect(socket_path)
+        sock.sendall(f"{instance} {name} {timeout}\n".encode())
+        with sock.makefile("rb") as f:
+            return f.readline() == b"1\n"
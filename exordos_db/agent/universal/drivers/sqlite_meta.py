@@ -0,0 +1,174 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Meta storage of capability drivers in SQLite.
+
+`MetaFileStorageAgentDriver` rewrites the whole JSON meta file at the end
+of every iteration. Here only the changed rows are written, in a single
+transaction at the end of the iteration, so a crash leaves the meta of the
+previous iteration.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import typing as tp
+import uuid as sys_uuid
+
+from gcl_sdk.agents.universal.drivers import meta
+
+LOG = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta_resources (
+    kind TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    view TEXT NOT NULL,
+    PRIMARY KEY (kind, uuid)
+)
+"""
+
+
+class SqliteMetaStorage:
+    """Meta resources of capability drivers, the changes are committed at once."""
+
+    _instances: tp.ClassVar[dict[str, "SqliteMetaStorage"]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Readable by the owner only as the JSON meta file
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+
+        # Transactions are opened implicitly by the first change
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def get_instance(cls, path: str) -> "SqliteMetaStorage":
+        """Get or create the storage of the given path."""
+        with cls._lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    def list(self, kind: str) -> list[dict[str, tp.Any]]:
+        rows = self._conn.execute(
+            "SELECT view FROM meta_resources WHERE kind = ? ORDER BY uuid", (kind,)
+        )
+        return [json.loads(view) for (view,) in rows]
+
+    def put(
+        self, kind: str, uuid: sys_uuid.UUID | str, view: dict[str, tp.Any]
+    ) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta_resources (kind, uuid, view) VALUES (?, ?, ?)",
+            (kind, str(uuid), json.dumps(view, separators=(",", ":"))),
+        )
+
+    def delete(self, kind: str, uuid: sys_uuid.UUID | str) -> None:
+        cursor = self._conn.execute(
+            "DELETE FROM meta_resources WHERE kind = ? AND uuid = ?",
+            (kind, str(uuid)),
+        )
+        if cursor.rowcount == 0:
+            # Same as removing a missing resource from the JSON meta file
+            raise KeyError(str(uuid))
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def import_json(self, json_path: str) -> None:
+        """Move resources of a JSON meta file of `MetaFileStorageAgentDriver`.
+
+        The file is renamed to `<json_path>.migrated` once its resources are
+        committed, an interrupted import is repeated on the next start.
+        """
+        if not os.path.exists(json_path):
+            return
+
+        with open(json_path) as f:
+            data = json.load(f)
+
+        count = 0
+        for kind, capstor in data.items():
+            # Files of old formats are reset by the JSON storage too
+            for uuid, view in capstor.get("resources", {}).items():
+                self.put(kind, uuid, view)
+                count += 1
+        self.commit()
+
+        os.replace(json_path, f"{json_path}.migrated")
+        LOG.info("Migrated %s meta resources from %s", count, json_path)
+
+
+class MetaSqliteStorageAgentDriver(meta.MetaFileStorageAgentDriver):
+    """`MetaFileStorageAgentDriver` keeping the meta in SQLite.
+
+    `meta_file` is the SQLite database, resources of `legacy_meta_file`, the
+    JSON meta file, are moved to the database on start.
+    """
+
+    def __init__(
+        self,
+        *args: tp.Any,
+        meta_file: str,
+        legacy_meta_file: str | None = None,
+        **kwargs: tp.Any,
+    ) -> None:
+        # Skip the JSON storage of the parent class
+        super(meta.MetaFileStorageAgentDriver, self).__init__()
+        self._meta_file = meta_file
+        self._storage = SqliteMetaStorage.get_instance(meta_file)
+        if legacy_meta_file is not None:
+            self._storage.import_json(legacy_meta_file)
+
+        for cap_model in self.__model_map__.values():
+            if not issubclass(cap_model, meta.MetaDataPlaneModel):
+                raise TypeError(f"Model {cap_model} is not a MetaDataPlaneModel")
+
+    def _load_from_meta(self, capability: str) -> list[meta.MetaDataPlaneModel]:
+        cap_model = self.__model_map__[capability]
+        return [
+            cap_model.restore_from_simple_view(**view)
+            for view in self._storage.list(capability)
+        ]
+
+    def _delete_from_meta(self, kind: str, uuid: sys_uuid.UUID) -> None:
+        self._storage.delete(kind, uuid)
+        LOG.debug("Deleted meta resource %s", uuid)
+
+    def _add_to_meta(
+        self, capability: str, meta_object: meta.MetaDataPlaneModel
+    ) -> None:
+        view = meta_object.dump_to_simple_view()
+
+        # Save only meta fields
+        if meta_fields := meta_object.get_meta_fields():
+            view = {k: v for k, v in view.items() if k in meta_fields}
+
+        self._storage.put(capability, meta_object.uuid, view)
+        LOG.debug("Saved meta resource: %s", view)
+
+    def finalize(self) -> None:
+        self._storage.commit()
@@ -0,0 +1,241 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import threading
+import time
+import typing as tp
+import uuid as sys_uuid
+
+import bazooka
+from bazooka import exceptions as baz_exc
+from gcl_sdk.agents.universal.clients.orch import exceptions
+from gcl_sdk.agents.universal.clients.orch import http as orch_http
+from gcl_sdk.agents.universal.dm import models
+from gcl_sdk.clients.http import base as base_client
+
+from exordos_db.common import tracing
+
+LOG = logging.getLogger(__name__)
+
+AGENTS_COLLECTION = "/v1/agents/"
+REPORTS_COLLECTION = "/v1/agents/{agent_uuid}/reports/"
+
+
+def trace_payload(
+    span: tracing.Span | tracing.NoopSpan,
+    payload: models.Payload | None,
+    new_payload: models.Payload | None,
+) -> None:
+    """Link the fetch span to traces of the changed payload resources."""
+    if new_payload is None or new_payload is payload or new_payload == payload:
+        span.drop()
+        return
+    if not span.recording:
+        return
+
+    resources = {}
+    for resource in new_payload.caps_resources():
+        resources[str(resource.uuid)] = resource.hash
+        span.add_link(tracing.resource_trace_id(resource.uuid, resource.hash))
+    span.set_attribute("payload", new_payload.hash)
+    span.set_attribute("resources", resources)
+
+
+class HttpOrchClient(orch_http.HttpOrchClient):
+    """HTTP orchestrator client able to send bulk status reports.
+
+    If `watch_endpoint` is set the target payload is watched with long
+    polling requests in a background thread, `agents_get_payload` returns
+    the last watched payload without requests to the orchestrator.
+    """
+
+    def __init__(
+        self,
+        orch_endpoint: str,
+        status_endpoint: str,
+        http_client: bazooka.Client | None = None,
+        encryptor: base_client.Encryptor | None = None,
+        watch_endpoint: str | None = None,
+        watch_timeout: float = 30,
+        watch_retry_period: float = 30,
+    ):
+        http_client = http_client or bazooka.Client(default_timeout=20)
+        super().__init__(
+            orch_endpoint=orch_endpoint,
+            status_endpoint=status_endpoint,
+            http_client=http_client,
+            encryptor=encryptor,
+        )
+        self._status_client = base_client.CollectionBaseClient(
+            status_endpoint,
+            http_client=http_client,
+            encryptor=encryptor,
+        )
+
+        self._watch_client: base_client.CollectionBaseClient | None = None
+        self._watch_timeout = watch_timeout
+        self._watch_retry_period = watch_retry_period
+        self._watch_lock = threading.Lock()
+        self._watch_threads: dict[sys_uuid.UUID, threading.Thread] = {}
+        self._watched_payloads: dict[sys_uuid.UUID, models.Payload] = {}
+        self._payload_changed = threading.Event()
+        if watch_endpoint:
+            self._watch_client = base_client.CollectionBaseClient(
+                watch_endpoint,
+                # The orchestrator may hold the request for the whole timeout
+                http_client=bazooka.Client(default_timeout=watch_timeout + 10),
+                encryptor=encryptor,
+            )
+
+    def agents_watch_payload(
+        self,
+        uuid: sys_uuid.UUID,
+        payload: models.Payload,
+        timeout: float,
+    ) -> models.Payload:
+        """Wait until the payload of the agent differs from the given one."""
+        if self._watch_client is None:
+            raise ValueError("The watch endpoint isn't configured")
+
+        try:
+            payload_data = self._watch_client.do_action(
+                AGENTS_COLLECTION,
+                "watch_payload",
+                uuid,
+                hash=payload.hash,
+                version=payload.version,
+                timeout=timeout,
+            )
+        except baz_exc.NotFoundError:
+            raise exceptions.AgentNotFound(uuid=uuid)
+
+        cp_payload = models.Payload.restore_from_simple_view(**payload_data)
+        return payload if payload == cp_payload else cp_payload
+
+    def _watch(self, uuid: sys_uuid.UUID) -> None:
+        payload = models.Payload.empty()
+        while True:
+            started_at = time.monotonic()
+            try:
+                with tracing.span("fetch", agent=str(uuid), watch=True) as span:
+                    new_payload = self.agents_watch_payload(
+                        uuid, payload, self._watch_timeout
+                    )
+                    trace_payload(span, payload, new_payload)
+            except Exception:
+                LOG.exception("Unable to watch payload of agent %s", uuid)
+                new_payload = None
+            else:
+                # The same payload returned at once means the orchestrator
+                # doesn't hold the requests
+                elapsed = time.monotonic() - started_at
+                if new_payload is payload and elapsed < self._watch_timeout / 2:
+                    LOG.warning("Payload watch isn't supported by the orchestrator")
+                    new_payload = None
+
+            if new_payload is None:
+                # Get payloads by regular requests until the watch recovers
+                with self._watch_lock:
+                    self._watched_payloads.pop(uuid, None)
+                payload = models.Payload.empty()
+                time.sleep(self._watch_retry_period)
+                continue
+
+            if new_payload is payload:
+                continue
+
+            LOG.debug("Payload of agent %s changed: %s", uuid, new_payload.hash)
+            payload = new_payload
+            with self._watch_lock:
+                self._watched_payloads[uuid] = payload
+            self._payload_changed.set()
+
+    def _start_watch(self, uuid: sys_uuid.UUID) -> None:
+        with self._watch_lock:
+            if uuid in self._watch_threads:
+                return
+            thread = threading.Thread(
+                target=self._watch,
+                args=(uuid,),
+                name=f"payload-watch-{uuid}",
+                daemon=True,
+            )
+            self._watch_threads[uuid] = thread
+            thread.start()
+
+    def _get_payload(
+        self, uuid: sys_uuid.UUID, payload: models.Payload | None, **kwargs: tp.Any
+    ) -> models.Payload:
+        with tracing.span("fetch", agent=str(uuid)) as span:
+            new_payload = super().agents_get_payload(uuid, payload, **kwargs)
+            trace_payload(span, payload, new_payload)
+            return new_payload
+
+    def agents_get_payload(
+        self,
+        uuid: sys_uuid.UUID,
+        payload: models.Payload | None,
+        **kwargs: tp.Any,
+    ) -> models.Payload:
+        if self._watch_client is None:
+            return self._get_payload(uuid, payload, **kwargs)
+
+        self._start_watch(uuid)
+        with self._watch_lock:
+            target_payload = self._watched_payloads.get(uuid)
+
+        if target_payload is None:
+            return self._get_payload(uuid, payload, **kwargs)
+
+        # Keep the semantic of the regular request, the local payload is
+        # used if it's equal to the target one.
+        if payload is not None and payload == target_payload:
+            return payload
+        return target_payload
+
+    def wait_payload_changed(self, timeout: float) -> bool:
+        """Wait until a watched payload changes.
+
+        Returns False on timeout.
+        """
+        changed = self._payload_changed.wait(timeout)
+        self._payload_changed.clear()
+        return changed
+
+    def resources_report(
+        self,
+        agent_uuid: sys_uuid.UUID,
+        resources: list[dict[str, tp.Any]],
+        hash: str,
+        previous_hash: str = "",
+        stats: dict[str, tp.Any] | None = None,
+    ) -> dict[str, tp.Any]:
+        """Report actual state of all resources of the agent at once.
+
+        `stats` of the agent aren't a part of the report hash, they are
+        sent only if changed.
+        """
+        report: dict[str, tp.Any] = {
+            "hash": hash,
+            "previous_hash": previous_hash,
+            "resources": resources,
+        }
+        if stats is not None:
+            report["stats"] = stats
+        return self._status_client.create(
+            REPORTS_COLLECTION.format(agent_uuid=agent_uuid), report
+        )
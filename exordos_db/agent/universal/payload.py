@@ -0,0 +1,216 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""The last payload of the universal agent in a compact binary file.
+
+The file is a header with the payload key, its hash and version, followed
+by the msgpack encoded payload:
+
+    MAGIC | key length (1 byte) | key | msgpack body
+
+The payload of an agent rarely changes between iterations, so the saved
+payload is kept in memory and the file is compared by the header only.
+The body is parsed through mmap only if the file is changed by someone
+else, e.g. after a restart of the agent.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import typing as tp
+
+from gcl_sdk.agents.universal.clients.orch import exceptions as orch_exc
+from gcl_sdk.agents.universal.dm import models
+from gcl_sdk.common import utils as common_utils
+import msgpack
+
+LOG = logging.getLogger(__name__)
+
+MAGIC = b"EXPL"
+HEADER_SIZE = len(MAGIC) + 1
+
+
+def payload_key(payload: models.Payload) -> bytes:
+    return f"{payload.hash}:{payload.version}".encode()
+
+
+class PayloadCache:
+    """The last payload saved by the agent.
+
+    `legacy_path` is the JSON payload of the previous releases, it's
+    loaded if there is no binary payload yet and removed after the first
+    save. A JSON payload at `path` itself is loaded and overwritten.
+    """
+
+    def __init__(self, path: str, legacy_path: str | None = None):
+        self._path = path
+        self._legacy_path = legacy_path
+        self._payload: models.Payload | None = None
+        self._key: bytes | None = None
+
+    def read_key(self) -> bytes | None:
+        """Read the key of the saved payload without parsing the body."""
+        try:
+            with open(self._path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+                if len(header) < HEADER_SIZE or header[: len(MAGIC)] != MAGIC:
+                    return None
+                key = f.read(header[-1])
+        except FileNotFoundError:
+            return None
+        return key if len(key) == header[-1] else None
+
+    def _load_legacy(self) -> models.Payload:
+        # The JSON payload of the previous releases may be at the same path
+        for path in (self._path, self._legacy_path):
+            if path is None or not os.path.exists(path):
+                continue
+            try:
+                return models.Payload.load(path)
+            except ValueError:
+                LOG.warning("The payload %s is corrupted, ignore it", path)
+        return models.Payload.empty()
+
+    def _parse(self) -> models.Payload:
+        with open(self._path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                offset = HEADER_SIZE + m[HEADER_SIZE - 1]
+                with memoryview(m) as view:
+                    data = msgpack.unpackb(view[offset:])
+        return models.Payload.restore_from_simple_view(**data)
+
+    def load(self) -> models.Payload:
+        """Return the last saved payload, an empty one if there isn't any."""
+        key = self.read_key()
+        if key is None:
+            return self._load_legacy()
+
+        if key == self._key and self._payload is not None:
+            return self._payload
+
+        try:
+            payload = self._parse()
+        except (ValueError, TypeError, msgpack.UnpackException):
+            LOG.exception("Unable to parse the payload %s, ignore it", self._path)
+            return models.Payload.empty()
+
+        self._payload, self._key = payload, key
+        return payload
+
+    def save(self, payload: models.Payload) -> None:
+        """Save the payload, the file isn't rewritten if it's unchanged."""
+        payload.calculate_hash()
+        key = payload_key(payload)
+        if key == self._key and key == self.read_key():
+            self._payload = payload
+            return
+
+        payload_dir = os.path.dirname(self._path)
+        if payload_dir and not os.path.exists(payload_dir):
+            os.makedirs(payload_dir)
+
+        body = msgpack.packb(payload.dump_to_simple_view())
+        tmp_file = f"{self._path}.tmp"
+        with open(tmp_file, "wb", opener=common_utils.rw_owner_opener) as f:
+            f.write(MAGIC + bytes((len(key),)) + key)
+            f.write(body)
+        os.replace(tmp_file, self._path)
+        self._payload, self._key = payload, key
+
+        if self._legacy_path is not None and os.path.exists(self._legacy_path):
+            os.remove(self._legacy_path)
+
+
+# The mixin is mixed into the agent service only
+if tp.TYPE_CHECKING:
+    from gcl_sdk.agents.universal.services.agent import (
+        UniversalAgentService as _AgentService,
+    )
+else:
+    _AgentService = object
+
+
+class PayloadCacheMixin(_AgentService):
+    """Keep the payload of the universal agent in `PayloadCache`.
+
+    The JSON payload next to the binary one, if any, is migrated.
+
+    `_iteration` is a copy of the parent one with the payload loaded from
+    and saved to the cache, the copy is pinned by the unit tests.
+    """
+
+    def __init__(
+        self, *args: tp.Any, payload_path: str | None = None, **kwargs: tp.Any
+    ) -> None:
+        super().__init__(*args, payload_path=payload_path, **kwargs)
+        self._payload_cache: PayloadCache | None = None
+        if payload_path:
+            legacy_path = os.path.splitext(payload_path)[0] + ".json"
+            self._payload_cache = PayloadCache(
+                payload_path,
+                legacy_path=legacy_path if legacy_path != payload_path else None,
+            )
+
+    def _iteration(self) -> None:
+        # Same as the parent iteration, but the payload is kept in the cache
+        collected_payload = models.Payload.empty()
+
+        # Last successfully saved payload. Use it to compare with CP payload.
+        if self._payload_cache is not None:
+            last_payload = self._payload_cache.load()
+        else:
+            last_payload = None
+
+        # Check if the agent is registered
+        try:
+            payload = self._orch_client.agents_get_payload(
+                self._agent_uuid, last_payload
+            )
+        except orch_exc.AgentNotFound:
+            # Auto discovery mechanism
+            self._register_agent()
+            return
+
+        # Capabilities
+        for driver in self._caps_drivers:
+            self._cap_driver_iteration(driver, payload, collected_payload)
+
+        # Facts
+        for driver in self._facts_drivers:
+            for fact in driver.get_facts():
+                # Skip facts that are not in the payload
+                if fact not in payload.facts:
+                    LOG.debug("Skipping fact %s", fact)
+                    continue
+
+                try:
+                    collected_facts = driver.list(fact)
+                    collected_payload.add_facts_resources(collected_facts)
+                except Exception:
+                    LOG.exception("Error collecting resources for fact: %s", fact)
+
+        # Calculate the hash of the collected payload
+        collected_payload.calculate_hash()
+
+        # The payloads aren't the same. It means the facts were updated.
+        if collected_payload != payload:
+            self._actualize_facts(collected_payload.facts, payload.facts)
+
+        # Save the collected payload after actualization
+        if self._payload_cache is not None:
+            self._payload_cache.save(collected_payload)
@@ -0,0 +1,157 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import time
+import typing as tp
+
+import bazooka.exceptions as baz_exc
+from gcl_sdk.agents.universal import utils as ua_utils
+from gcl_sdk.agents.universal.dm import models as ua_models
+from gcl_sdk.agents.universal.drivers import base as driver_base
+from gcl_sdk.agents.universal.services import agent
+
+from exordos_db.agent.universal import payload
+from exordos_db.common import tracing
+
+LOG = logging.getLogger(__name__)
+
+
+def trace_resources(
+    span: tracing.Span | tracing.NoopSpan, resources: list[dict[str, tp.Any]]
+) -> None:
+    """Link the span to traces of the reported resources by their hashes."""
+    if not span.recording:
+        return
+    reported = {}
+    for resource in resources:
+        reported[str(resource["uuid"])] = resource["hash"]
+        span.add_link(tracing.resource_trace_id(resource["uuid"], resource["hash"]))
+    span.set_attribute("resources", reported)
+
+
+class UniversalAgentService(payload.PayloadCacheMixin, agent.UniversalAgentService):
+    """Universal agent reporting the actual state in a single request.
+
+    Instead of a request per created, updated or deleted resource the
+    whole state collected from the data plane is sent to the Status API
+    which writes only the changed rows. Falls back to the per-resource
+    reporting if the Status API doesn't support reports. If the Status API
+    rejects the report since the last accepted one is another, the full
+    report is sent at once.
+
+    If the orchestrator client watches the payload, the next iteration
+    starts as soon as the payload changes instead of the next period.
+
+    The last payload is kept in the binary `payload.PayloadCache`.
+
+    Statistics of drivers having `get_stats` are sent along with the report
+    when they change, they don't affect hashes of resources.
+    """
+
+    def __init__(self, *args: tp.Any, **kwargs: tp.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._report_hash = ""
+        self._stats_hash = ""
+
+    def _loop(self) -> None:
+        if not hasattr(self._orch_client, "wait_payload_changed"):
+            return super()._loop()
+
+        self._enabled = True
+        while self._enabled:
+            next_iteration_time = time.monotonic() + self._iter_min_period
+            self._loop_iteration()
+            self._orch_client.wait_payload_changed(
+                max(next_iteration_time - time.monotonic(), self._iter_pause)
+            )
+
+    def _trace_apply(
+        self, action: str, resource: ua_models.Resource
+    ) -> tp.ContextManager[tracing.Span | tracing.NoopSpan]:
+        return tracing.span(
+            "apply",
+            trace_id=tracing.resource_trace_id(resource.uuid, resource.hash),
+            action=action,
+            kind=resource.kind,
+            resource=str(resource.uuid),
+            hash=resource.hash,
+        )
+
+    def _create_resource(
+        self, driver: driver_base.AbstractCapabilityDriver, resource: ua_models.Resource
+    ) -> ua_models.Resource:
+        with self._trace_apply("create", resource):
+            return super()._create_resource(driver, resource)
+
+    def _update_resource(
+        self, driver: driver_base.AbstractCapabilityDriver, resource: ua_models.Resource
+    ) -> ua_models.Resource:
+        with self._trace_apply("update", resource):
+            return super()._update_resource(driver, resource)
+
+    @staticmethod
+    def _calculate_report_hash(resources: list[dict[str, tp.Any]]) -> str:
+        return ua_utils.calculate_hash(
+            sorted(f"{r['kind']}:{r['uuid']}:{r['full_hash']}" for r in resources)
+        )
+
+    def _collect_stats(self) -> dict[str, tp.Any]:
+        stats: dict[str, tp.Any] = {}
+        for driver in self._caps_drivers:
+            if not hasattr(driver, "get_stats"):
+                continue
+            try:
+                stats.update(driver.get_stats())
+            except Exception:
+                LOG.exception("Unable to collect stats of %s", driver)
+        return stats
+
+    def _actualize_facts(self, target_facts: dict, actual_facts: dict) -> None:
+        resources = [
+            resource for fact in target_facts.values() for resource in fact["resources"]
+        ]
+        report_hash = self._calculate_report_hash(resources)
+        stats = self._collect_stats()
+        stats_hash = ua_utils.calculate_hash(stats)
+
+        try:
+            with tracing.span("report", agent=str(self._agent_uuid)) as span:
+                report = self._orch_client.resources_report(
+                    self._agent_uuid,
+                    resources,
+                    hash=report_hash,
+                    previous_hash=self._report_hash,
+                    stats=stats if stats_hash != self._stats_hash else None,
+                )
+                trace_resources(span, resources)
+        except baz_exc.NotFoundError:
+            LOG.warning("Status reports aren't supported, report per resource")
+            return super()._actualize_facts(target_facts, actual_facts)
+        except baz_exc.ConflictError:
+            # The last report is lost, the full one is applied at once
+            LOG.warning(
+                "Status report %s is out of sync, send the full one", report_hash
+            )
+            self._report_hash = ""
+            self._stats_hash = ""
+            return self._actualize_facts(target_facts, actual_facts)
+
+        self._report_hash = report_hash
+        self._stats_hash = stats_hash
+        LOG.debug(
+            "Status report %s changed %s resources", report_hash, report["changed"]
+        )
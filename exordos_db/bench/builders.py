@@ -0,0 +1,436 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Actualization throughput of the builders against a fake Core.
+
+N instances with M users and M databases each are created in the database
+and the control plane services run in rounds until all instances have
+their node payloads: `CoreInfraBuilder`, the infra scheduler, the infra
+agent talking to the fake Core and `PGInstanceBuilder`. The harness
+measures the time to converge, the time and queries of every service
+iteration, rounds with nothing to change and the propagation of an update.
+A throwaway PostgreSQL is used unless `--connection-url` is given:
+
+    python -m exordos_db.bench.builders --instances 10 100 --users 10
+"""
+
+import argparse
+import logging
+import os
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+import typing as tp
+import uuid as sys_uuid
+
+from gcl_sdk.agents.universal.clients.orch import db as orch_db
+from gcl_sdk.agents.universal.dm import models as ua_models
+from gcl_sdk.agents.universal.drivers import core as core_drivers
+from gcl_sdk.agents.universal.services import agent as agent_service
+from restalchemy.common import contexts
+from restalchemy.dm import filters as dm_filters
+
+from exordos_db.bench import core as fake_core
+from exordos_db.bench import postgres as local_postgres
+from exordos_db.bench import stats
+from exordos_db.infra.services import builder as infra_builder
+from exordos_db.paas.services import builder as paas_builder
+from exordos_db.services import gservice
+from exordos_db.user_api.dm import models
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_INSTANCES = (10, 100)
+DEFAULT_USERS = 10
+DEFAULT_NODES = 3
+DEFAULT_STEADY_ROUNDS = 5
+# Safety net, every step of the pipeline needs a round or two
+MAX_ROUNDS = 50
+# Default `iter_min_period` of the services
+ITERATION_PERIOD = 3
+EXTRA_COLUMNS = ("rounds", "queries", "core_requests")
+QUERIES_LOGGER = "restalchemy.storage.sql.sessions"
+
+
+class QueryCounter(logging.Handler):
+    """Count statements executed by restalchemy sessions.
+
+    Sessions log every statement at the debug level, records are counted
+    without formatting and aren't propagated to other handlers.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.queries = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.queries += 1
+
+    def install(self) -> None:
+        logger = logging.getLogger(QUERIES_LOGGER)
+        logger.addHandler(self)
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+
+
+def get_peak_rss_mb() -> float:
+    # Kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class Pipeline:
+    """Control plane services of `gservice` wired to the fake Core."""
+
+    def __init__(
+        self, core: fake_core.FakeCore, project_id: sys_uuid.UUID, workdir: str
+    ) -> None:
+        self.core = core
+        self.counter = QueryCounter()
+        self.counter.install()
+        agent_driver = core_drivers.RestCoreCapabilityDriver(
+            username="bench",
+            password="bench",
+            user_api_base_url=core.endpoint,
+            project_id=project_id,
+            agent_work_dir=workdir,
+            use_project_scope=True,
+            node_set=fake_core.NODE_SETS_COLLECTION,
+            config=fake_core.CONFIGS_COLLECTION,
+        )
+        self.services: dict[str, tp.Any] = {
+            "infra_builder": infra_builder.CoreInfraBuilder(
+                core_username="bench",
+                core_password="bench",
+                core_api_base_url=core.endpoint,
+                project_id=project_id,
+            ),
+            "scheduler": gservice.InfraScheduler(
+                capabilities=agent_driver.get_capabilities()
+            ),
+            "infra_agent": agent_service.UniversalAgentService(
+                agent_uuid=sys_uuid.uuid4(),
+                orch_client=orch_db.DatabaseOrchClient(),
+                caps_drivers=[agent_driver],
+                facts_drivers=[],
+                payload_path=os.path.join(workdir, "payload.json"),
+                system_uuid=sys_uuid.uuid4(),
+            ),
+            "paas_builder": paas_builder.PGInstanceBuilder(),
+        }
+        self.latencies: dict[str, list[float]] = {name: [] for name in self.services}
+        self.queries = dict.fromkeys(self.services, 0)
+        self.harness_queries = 0
+        self._orch_client = orch_db.DatabaseOrchClient()
+        self._node_agents: set[str] = set()
+
+    def setup(self) -> None:
+        for service in self.services.values():
+            service._setup()
+
+    def reset(self) -> None:
+        for name in self.services:
+            self.latencies[name] = []
+            self.queries[name] = 0
+
+    def _register_node_agents(self) -> None:
+        """Register agents of new nodes like they do on the node boot."""
+        queries_before = self.counter.queries
+        for node_set in self.core.list(fake_core.NODE_SETS_COLLECTION, {}):
+            for node in node_set["nodes"].keys() - self._node_agents:
+                node_uuid = sys_uuid.UUID(node)
+                agent = ua_models.UniversalAgent.from_system_uuid(
+                    capabilities=[models.PG_INSTANCE_NODE_KIND],
+                    facts=[],
+                    agent_uuid=paas_builder.PaaSBuilder.agent_uuid_by_node(node_uuid),
+                    system_uuid=node_uuid,
+                )
+                self._orch_client.agents_create(agent)
+                self._node_agents.add(node)
+        self.harness_queries += self.counter.queries - queries_before
+
+    def run_round(self) -> None:
+        for name, service in self.services.items():
+            if name == "paas_builder":
+                # Nodes provisioned by the infra agent in this round boot
+                self._register_node_agents()
+            queries_before = self.counter.queries
+            started_at = time.perf_counter()
+            service._iteration()
+            self.latencies[name].append(time.perf_counter() - started_at)
+            self.queries[name] += self.counter.queries - queries_before
+
+    def get_service_results(
+        self, phase: str, items: int, params: dict[str, tp.Any]
+    ) -> list[stats.Result]:
+        return [
+            stats.Result(
+                f"{phase}:{name}[instances={params['instances']}]",
+                latencies,
+                items=items,
+                elapsed=sum(latencies),
+                params=params,
+                extra={"rounds": len(latencies), "queries": self.queries[name]},
+            )
+            for name, latencies in self.latencies.items()
+        ]
+
+
+def seed_instances(
+    project_id: sys_uuid.UUID,
+    count: int,
+    users: int,
+    nodes_number: int,
+    prefix: str = "bench",
+) -> list[models.PGInstance]:
+    """Create instances with `users` users and databases through the models."""
+    version = models.PGVersion(name=f"{prefix}-version", image="bench-image")
+    version.insert()
+    instances = []
+    for i in range(count):
+        instance = models.PGInstance(
+            name=f"{prefix}-{i}",
+            project_id=project_id,
+            cpu=1,
+            ram=1024,
+            disk_size=10,
+            nodes_number=nodes_number,
+            sync_replica_number=min(1, nodes_number - 1),
+            version=version,
+        )
+        instance.insert()
+        for j in range(users):
+            add_user_with_database(instance, f"{prefix}_{j}")
+        instances.append(instance)
+    return instances
+
+
+def add_user_with_database(instance: models.PGInstance, name: str) -> None:
+    user = models.PGUser(
+        name=f"{name}_user",
+        password="bench-password",
+        instance=instance,
+        project_id=instance.project_id,
+    )
+    user.insert()
+    models.PGDatabase(
+        name=f"{name}_db",
+        owner=user,
+        instance=instance,
+        project_id=instance.project_id,
+    ).insert()
+
+
+def get_node_payloads(
+    instances: list[models.PGInstance],
+) -> list[ua_models.TargetResource]:
+    with contexts.Context().session_manager():
+        return ua_models.TargetResource.objects.get_all(
+            filters={
+                "master": dm_filters.In([i.uuid for i in instances]),
+                "kind": dm_filters.EQ(models.PG_INSTANCE_NODE_KIND),
+            },
+        )
+
+
+def run_until(pipeline: Pipeline, is_done: tp.Callable[[], bool]) -> int:
+    rounds = 0
+    while not is_done():
+        if rounds >= MAX_ROUNDS:
+            raise RuntimeError(f"Not converged in {MAX_ROUNDS} rounds")
+        pipeline.run_round()
+        rounds += 1
+    return rounds
+
+
+def get_service_queries(pipeline: Pipeline) -> int:
+    """Return queries of the services, without the ones of the harness."""
+    return pipeline.counter.queries - pipeline.harness_queries
+
+
+def measure_phase(
+    pipeline: Pipeline,
+    phase: str,
+    instances: list[models.PGInstance],
+    params: dict[str, tp.Any],
+    is_done: tp.Callable[[], bool] | None = None,
+    rounds: int = 0,
+) -> list[stats.Result]:
+    pipeline.reset()
+    queries_before = get_service_queries(pipeline)
+    core_requests_before = sum(pipeline.core.requests.values())
+    started_at = time.perf_counter()
+    if is_done is not None:
+        rounds = run_until(pipeline, is_done)
+    else:
+        for _ in range(rounds):
+            pipeline.run_round()
+    elapsed = time.perf_counter() - started_at
+
+    count = len(instances)
+    result = stats.Result(
+        f"{phase}[instances={count}]",
+        [elapsed],
+        items=count,
+        elapsed=elapsed,
+        params=params,
+        extra={
+            "rounds": rounds,
+            "queries": get_service_queries(pipeline) - queries_before,
+            "core_requests": sum(pipeline.core.requests.values())
+            - core_requests_before,
+            "peak_rss_mb": get_peak_rss_mb(),
+        },
+    )
+    if tracemalloc.is_tracing():
+        result.extra["traced_peak_mb"] = round(
+            tracemalloc.get_traced_memory()[1] / 1024**2, 1
+        )
+        tracemalloc.reset_peak()
+    return [result, *pipeline.get_service_results(phase, count, params)]
+
+
+def bench_instances(
+    pipeline: Pipeline,
+    project_id: sys_uuid.UUID,
+    count: int,
+    users: int,
+    nodes_number: int,
+    steady_rounds: int,
+) -> list[stats.Result]:
+    prefix = f"bench{count}x{users}_{sys_uuid.uuid4().hex[:6]}"
+    params = {"instances": count, "users": users, "nodes": nodes_number}
+
+    seeded_at = time.perf_counter()
+    instances = seed_instances(project_id, count, users, nodes_number, prefix)
+    seed_elapsed = time.perf_counter() - seeded_at
+    LOG.info("%s instances seeded in %.1fs", count, seed_elapsed)
+    expected = count * nodes_number
+
+    results = measure_phase(
+        pipeline,
+        "create",
+        instances,
+        params,
+        is_done=lambda: len(get_node_payloads(instances)) == expected,
+    )
+    results[0].extra["seed_seconds"] = round(seed_elapsed, 3)
+
+    # What every iteration costs when nothing changes
+    steady = measure_phase(pipeline, "steady", instances, params, rounds=steady_rounds)
+    per_round = steady[0].elapsed / steady_rounds
+    steady[0].extra["instances_per_period"] = int(count * ITERATION_PERIOD / per_round)
+    results.extend(steady)
+
+    for instance in instances:
+        add_user_with_database(instance, f"{prefix}_extra")
+    user_name = f"{prefix}_extra_user"
+    results.extend(
+        measure_phase(
+            pipeline,
+            "update",
+            instances,
+            params,
+            is_done=lambda: all(
+                user_name in p.value["users"] for p in get_node_payloads(instances)
+            ),
+        )
+    )
+    return results
+
+
+def run(
+    instances: tp.Iterable[int] = DEFAULT_INSTANCES,
+    users: int = DEFAULT_USERS,
+    nodes_number: int = DEFAULT_NODES,
+    steady_rounds: int = DEFAULT_STEADY_ROUNDS,
+    connection_url: str | None = None,
+    bindir: str | None = None,
+) -> list[stats.Result]:
+    postgres = None
+    workdir = tempfile.mkdtemp(prefix="exordos_db_builders_")
+    try:
+        if connection_url is None:
+            postgres = local_postgres.LocalPostgres(bindir=bindir)
+            postgres.start()
+            connection_url = postgres.connection_url
+        local_postgres.prepare_database(connection_url)
+
+        project_id = sys_uuid.uuid4()
+        results: list[stats.Result] = []
+        with fake_core.FakeCore() as core:
+            pipeline = Pipeline(core, project_id, workdir)
+            pipeline.setup()
+            for count in instances:
+                results.extend(
+                    bench_instances(
+                        pipeline, project_id, count, users, nodes_number, steady_rounds
+                    )
+                )
+        return results
+    finally:
+        if postgres is not None:
+            postgres.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--instances", type=int, nargs="+", default=list(DEFAULT_INSTANCES)
+    )
+    parser.add_argument(
+        "--users",
+        type=int,
+        default=DEFAULT_USERS,
+        help="Users and databases of every instance",
+    )
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODES)
+    parser.add_argument("--steady-rounds", type=int, default=DEFAULT_STEADY_ROUNDS)
+    parser.add_argument(
+        "--connection-url", help="An empty database instead of a throwaway one"
+    )
+    parser.add_argument("--bindir", help="Directory with PostgreSQL binaries")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Report the peak of Python allocations, slows the services down",
+    )
+    parser.add_argument("--output", help="Store the results as JSON")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if args.trace_memory:
+        tracemalloc.start()
+
+    results = run(
+        args.instances,
+        args.users,
+        args.nodes,
+        args.steady_rounds,
+        args.connection_url,
+        args.bindir,
+    )
+    print(stats.format_table(results, EXTRA_COLUMNS))
+    if args.output:
+        stats.save_results(args.output, results, benchmark="builders")
+
+
+if __name__ == "__main__":
+    main()
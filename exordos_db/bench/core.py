@@ -0,0 +1,264 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import base64
+import collections
+import copy
+import datetime
+import http.server
+import ipaddress
+import json
+import logging
+import os
+import threading
+import typing as tp
+import urllib.parse
+import uuid as sys_uuid
+
+from gcl_sdk.infra import constants as sdk_c
+
+LOG = logging.getLogger(__name__)
+
+NODE_SETS_COLLECTION = "/v1/compute/sets/"
+CONFIGS_COLLECTION = "/v1/config/configs/"
+TOKEN_PATH_SUFFIX = "/actions/get_token/invoke"
+PRIVATE_KEYS_ACTION = "get_private_keys"
+NODES_NETWORK = ipaddress.ip_network("10.0.0.0/8")
+NODE_UUID5_NAME = "bench-node-{}"
+
+# Status and body of a reply
+Reply = tuple[int, tp.Any]
+
+
+def utcnow() -> str:
+    # Core reports timestamps in the OpenAPI format
+    return datetime.datetime.now(datetime.timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S.%fZ"
+    )
+
+
+class FakeCoreServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, core: "FakeCore") -> None:
+        super().__init__(("127.0.0.1", 0), FakeCoreHandler)
+        self.core = core
+
+
+class FakeCoreHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeCoreServer
+
+    def log_message(self, format: str, *args: tp.Any) -> None:
+        LOG.debug("Fake Core: " + format, *args)
+
+    def _reply(self, status: int, body: tp.Any = None) -> None:
+        data = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> dict[str, tp.Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        if self.headers.get("Content-Type", "").startswith(
+            "application/x-www-form-urlencoded"
+        ):
+            return dict(urllib.parse.parse_qsl(data.decode()))
+        return json.loads(data or b"{}")
+
+    def _dispatch(self) -> None:
+        core = self.server.core
+        url = urllib.parse.urlsplit(self.path)
+        core.count(self.command, url.path)
+        body = self._read_body() if self.command in ("POST", "PUT") else {}
+
+        if self.command == "POST" and url.path.endswith(TOKEN_PATH_SUFFIX):
+            return self._reply(200, core.get_token())
+
+        for collection in core.collections:
+            if not url.path.startswith(collection):
+                continue
+
+            parts = url.path[len(collection) :].strip("/").split("/")
+            if parts == [""]:
+                if self.command == "GET":
+                    query = urllib.parse.parse_qs(url.query)
+                    return self._reply(200, core.list(collection, query))
+                if self.command == "POST":
+                    return self._reply(*core.create(collection, body))
+            elif len(parts) == 1:
+                if self.command == "GET":
+                    return self._reply(*core.get(collection, parts[0]))
+                if self.command == "PUT":
+                    return self._reply(*core.update(collection, parts[0], body))
+                if self.command == "DELETE":
+                    return self._reply(*core.delete(collection, parts[0]))
+            elif len(parts) == 3 and parts[1] == "actions" and self.command == "GET":
+                return self._reply(*core.do_action(collection, parts[0], parts[2]))
+            break
+
+        self._reply(404, {"message": f"{self.command} {url.path} isn't supported"})
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+
+class FakeCore:
+    """An in-process stand-in of the Core user API.
+
+    Serves node sets, configs and the `get_private_keys` action of node sets
+    with any credentials. Node sets become ACTIVE at once with `replicas`
+    nodes having stable UUIDs and addresses, configs are ACTIVE as well.
+    """
+
+    def __init__(self) -> None:
+        self.requests: collections.Counter[str] = collections.Counter()
+        self.collections: dict[str, dict[str, dict[str, tp.Any]]] = {
+            NODE_SETS_COLLECTION: {},
+            CONFIGS_COLLECTION: {},
+        }
+        self._lock = threading.Lock()
+        self._addresses = NODES_NETWORK.hosts()
+        self._node_addresses: dict[str, str] = {}
+        self._server: FakeCoreServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def endpoint(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Fake Core isn't started")
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def count(self, method: str, path: str) -> None:
+        # Resource UUIDs are dropped to keep the number of keys low
+        path = "/".join(p if len(p) != 36 else "{uuid}" for p in path.split("/"))
+        with self._lock:
+            self.requests[f"{method} {path}"] += 1
+
+    def get_token(self) -> dict[str, tp.Any]:
+        return {
+            "access_token": "bench-access-token",
+            "refresh_token": "bench-refresh-token",
+            "token_type": "Bearer",
+            "expires_in": 86400,
+        }
+
+    def _get_node_address(self, node_uuid: str) -> str:
+        if node_uuid not in self._node_addresses:
+            self._node_addresses[node_uuid] = str(next(self._addresses))
+        return self._node_addresses[node_uuid]
+
+    def _provision(self, collection: str, resource: dict[str, tp.Any]) -> None:
+        """Bring the resource to the state Core reports when it's done."""
+        if collection == NODE_SETS_COLLECTION:
+            set_uuid = sys_uuid.UUID(resource["uuid"])
+            nodes: dict[str, dict[str, str]] = {}
+            for idx in range(resource.get("replicas", 1)):
+                node_uuid = str(sys_uuid.uuid5(set_uuid, NODE_UUID5_NAME.format(idx)))
+                nodes[node_uuid] = {"ipv4": self._get_node_address(node_uuid)}
+            resource["nodes"] = nodes
+            resource["status"] = sdk_c.NodeStatus.ACTIVE.value
+        else:
+            resource["status"] = sdk_c.InstanceStatus.ACTIVE.value
+        resource["updated_at"] = utcnow()
+
+    def list(
+        self, collection: str, query: dict[str, list[str]]
+    ) -> list[dict[str, tp.Any]]:
+        uuids = set(query.get("uuid", ()))
+        project_ids = set(query.get("project_id", ()))
+        with self._lock:
+            return [
+                copy.deepcopy(r)
+                for r in self.collections[collection].values()
+                if (not uuids or r["uuid"] in uuids)
+                and (not project_ids or r.get("project_id") in project_ids)
+            ]
+
+    def get(self, collection: str, resource_uuid: str) -> Reply:
+        with self._lock:
+            resource = self.collections[collection].get(resource_uuid)
+            if resource is None:
+                return 404, {"message": f"{resource_uuid} isn't found"}
+            return 200, copy.deepcopy(resource)
+
+    def create(self, collection: str, body: dict[str, tp.Any]) -> Reply:
+        with self._lock:
+            resource_uuid = body.setdefault("uuid", str(sys_uuid.uuid4()))
+            if resource_uuid in self.collections[collection]:
+                return 409, {"message": f"{resource_uuid} already exists"}
+
+            body["created_at"] = utcnow()
+            self._provision(collection, body)
+            self.collections[collection][resource_uuid] = body
+            return 201, copy.deepcopy(body)
+
+    def update(
+        self, collection: str, resource_uuid: str, body: dict[str, tp.Any]
+    ) -> Reply:
+        with self._lock:
+            resource = self.collections[collection].get(resource_uuid)
+            if resource is None:
+                return 404, {"message": f"{resource_uuid} isn't found"}
+
+            resource.update(body)
+            self._provision(collection, resource)
+            return 200, copy.deepcopy(resource)
+
+    def delete(self, collection: str, resource_uuid: str) -> Reply:
+        with self._lock:
+            if self.collections[collection].pop(resource_uuid, None) is None:
+                return 404, {"message": f"{resource_uuid} isn't found"}
+            return 204, None
+
+    def do_action(self, collection: str, resource_uuid: str, name: str) -> Reply:
+        if collection != NODE_SETS_COLLECTION or name != PRIVATE_KEYS_ACTION:
+            return 404, {"message": f"Action {name} isn't supported"}
+
+        status, node_set = self.get(collection, resource_uuid)
+        if status != 200:
+            return status, node_set
+        return 200, {
+            node_uuid: base64.b64encode(os.urandom(32)).decode()
+            for node_uuid in node_set["nodes"]
+        }
+
+    def start(self) -> None:
+        self._server = FakeCoreServer(self)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-core", daemon=True
+        )
+        self._thread.start()
+        LOG.info("Fake Core listens on %s", self.endpoint)
+
+    def stop(self) -> None:
+        if self._server is None or self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = self._thread = None
+
+    def __enter__(self) -> "FakeCore":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
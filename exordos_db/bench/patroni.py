@@ -0,0 +1,207 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import collections
+import copy
+import http.server
+import json
+import logging
+import os
+import tempfile
+import threading
+import typing as tp
+
+import yaml
+
+from exordos_db.common import constants
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    "ttl": 30,
+    "loop_wait": 10,
+    "synchronous_mode": False,
+    "synchronous_mode_strict": False,
+    "synchronous_node_count": 0,
+    "postgresql": {"parameters": {}},
+}
+
+
+def merge_patch(
+    target: dict[str, tp.Any], patch: dict[str, tp.Any]
+) -> dict[str, tp.Any]:
+    """Apply a JSON merge patch like Patroni does, `None` removes a key."""
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_patch(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+
+class FakePatroniServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, patroni: "FakePatroni") -> None:
+        super().__init__(("127.0.0.1", 0), FakePatroniHandler)
+        self.patroni = patroni
+
+
+class FakePatroniHandler(http.server.BaseHTTPRequestHandler):
+    server: FakePatroniServer
+
+    def log_message(self, format: str, *args: tp.Any) -> None:
+        LOG.debug("Fake Patroni: " + format, *args)
+
+    def _reply(self, status: int, body: dict[str, tp.Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        patroni = self.server.patroni
+        patroni.count(self.command, self.path)
+        if self.path in ("/", "/patroni", "/primary", "/leader"):
+            self._reply(200, patroni.get_state())
+        elif self.path == "/config":
+            self._reply(200, patroni.get_config())
+        elif self.path == "/cluster":
+            self._reply(200, {"members": [patroni.get_member()]})
+        else:
+            self._reply(404, {})
+
+    def do_PATCH(self) -> None:
+        patroni = self.server.patroni
+        patroni.count(self.command, self.path)
+        if self.path != "/config":
+            self._reply(404, {})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        patch = json.loads(self.rfile.read(length) or b"{}")
+        self._reply(200, patroni.patch_config(patch))
+
+
+class FakePatroni:
+    """An in-process stand-in of the Patroni REST API of a single primary.
+
+    Serves `/`, `/primary`, `/config` with merge patches and `/cluster`.
+    `config_file` is a Patroni configuration with the REST API credentials
+    and the bootstrap parameters read by the PG driver.
+    """
+
+    def __init__(
+        self,
+        bootstrap_parameters: dict[str, tp.Any] | None = None,
+        name: str = "bench-node",
+    ) -> None:
+        self.name = name
+        self.requests: collections.Counter[str] = collections.Counter()
+        self._bootstrap_parameters = bootstrap_parameters or {}
+        self._config = copy.deepcopy(DEFAULT_CONFIG)
+        merge_patch(
+            self._config, {"postgresql": {"parameters": self._bootstrap_parameters}}
+        )
+        self._lock = threading.Lock()
+        self._server: FakePatroniServer | None = None
+        self._thread: threading.Thread | None = None
+        self._workdir: str | None = None
+
+    @property
+    def endpoint(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Fake Patroni isn't started")
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    @property
+    def workdir(self) -> str:
+        if self._workdir is None:
+            raise RuntimeError("Fake Patroni isn't started")
+        return self._workdir
+
+    @property
+    def config_file(self) -> str:
+        return os.path.join(self.workdir, "patroni.yml")
+
+    def count(self, method: str, path: str) -> None:
+        with self._lock:
+            self.requests[f"{method} {path}"] += 1
+
+    def get_state(self) -> dict[str, tp.Any]:
+        return {"state": "running", "role": "primary", "patroni": {"name": self.name}}
+
+    def get_member(self) -> dict[str, tp.Any]:
+        return {"name": self.name, "role": "leader", "state": "running", "lag": 0}
+
+    def get_config(self) -> dict[str, tp.Any]:
+        with self._lock:
+            return copy.deepcopy(self._config)
+
+    def patch_config(self, patch: dict[str, tp.Any]) -> dict[str, tp.Any]:
+        with self._lock:
+            return copy.deepcopy(merge_patch(self._config, patch))
+
+    def _write_config_file(self) -> None:
+        config = {
+            "name": self.name,
+            "restapi": {
+                "authentication": {
+                    "username": constants.PATRONI_API_USERNAME,
+                    "password": constants.PATRONI_API_PASSWORD,
+                },
+            },
+            "bootstrap": {
+                "dcs": {"postgresql": {"parameters": self._bootstrap_parameters}},
+            },
+        }
+        with open(self.config_file, "w") as f:
+            yaml.safe_dump(config, f)
+
+    def start(self) -> None:
+        self._workdir = tempfile.mkdtemp(prefix="exordos_db_patroni_")
+        self._write_config_file()
+        self._server = FakePatroniServer(self)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-patroni", daemon=True
+        )
+        self._thread.start()
+        LOG.info("Fake Patroni listens on %s", self.endpoint)
+
+    def stop(self) -> None:
+        if self._server is None or self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = self._thread = None
+        if os.path.exists(self.config_file):
+            os.remove(self.config_file)
+        os.rmdir(self.workdir)
+        self._workdir = None
+
+    def __enter__(self) -> "FakePatroni":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
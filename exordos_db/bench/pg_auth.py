@@ -0,0 +1,159 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Throughput and latency of the password hashing path.
+
+Run `python -m exordos_db.bench.pg_auth --output before.json` before and
+after a change of `exordos_db.common.pg_auth` to compare the numbers.
+"""
+
+import argparse
+import functools
+import itertools
+import typing as tp
+
+from exordos_db.bench import stats
+from exordos_db.common.pg_auth import passwd
+from exordos_db.common.pg_auth import saslprep
+
+DEFAULT_ITERATIONS = (1, 4096)
+DEFAULT_BATCH_SIZES = (1, 10, 100)
+DEFAULT_REPEAT = 5
+
+# Cyrillic letters, a non-ASCII space mapped to SPACE, a ligature and
+# a soft hyphen mapped to nothing, the full SASLprep work is done
+UNICODE_TEMPLATE = "пароль-{:05d}\u00a0\ufb01\u00ad"
+ASCII_TEMPLATE = "password-{:05d}"
+
+PASSWORDS = {
+    "ascii": ASCII_TEMPLATE,
+    "unicode": UNICODE_TEMPLATE,
+}
+
+
+def get_passwords(kind: str, count: int) -> list[str]:
+    return [PASSWORDS[kind].format(i) for i in range(count)]
+
+
+def bench_saslprep(kind: str, count: int = 1000) -> stats.Result:
+    return stats.measure(
+        f"saslprep[{kind}]",
+        saslprep.saslprep,
+        get_passwords(kind, count),
+        params={"kind": kind},
+    )
+
+
+def bench_scram(
+    kind: str, iterations: int, batch_size: int, repeat: int = DEFAULT_REPEAT
+) -> stats.Result:
+    batches = [get_passwords(kind, batch_size) for _ in range(repeat)]
+
+    def hash_batch(batch: list[str]) -> None:
+        for password in batch:
+            passwd.scram_sha_256(password, iterations=iterations)
+
+    return stats.measure(
+        f"scram_sha_256[{kind},i={iterations},b={batch_size}]",
+        hash_batch,
+        batches,
+        items_per_call=batch_size,
+        params={"kind": kind, "iterations": iterations, "batch_size": batch_size},
+    )
+
+
+def bench_scram_batch(
+    kind: str,
+    iterations: int,
+    batch_size: int,
+    processes: int | None = None,
+    repeat: int = DEFAULT_REPEAT,
+) -> stats.Result:
+    batches = [
+        [(password, None, iterations) for password in get_passwords(kind, batch_size)]
+        for _ in range(repeat)
+    ]
+    return stats.measure(
+        f"scram_sha_256_batch[{kind},i={iterations},b={batch_size}]",
+        functools.partial(passwd.scram_sha_256_batch, processes=processes),
+        batches,
+        items_per_call=batch_size,
+        params={
+            "kind": kind,
+            "iterations": iterations,
+            "batch_size": batch_size,
+            "processes": processes,
+        },
+    )
+
+
+def bench_verify(
+    kind: str, iterations: int, count: int = DEFAULT_REPEAT
+) -> stats.Result:
+    cases = [
+        (password, passwd.scram_sha_256(password, iterations=iterations))
+        for password in get_passwords(kind, count)
+    ]
+
+    def verify(case: tuple[str, str]) -> None:
+        if not passwd.verify_password("role", *case):
+            raise AssertionError("Password isn't verified")
+
+    return stats.measure(
+        f"verify_password[{kind},i={iterations}]",
+        verify,
+        cases,
+        params={"kind": kind, "iterations": iterations},
+    )
+
+
+def run(
+    iterations: tp.Iterable[int] = DEFAULT_ITERATIONS,
+    batch_sizes: tp.Iterable[int] = DEFAULT_BATCH_SIZES,
+    repeat: int = DEFAULT_REPEAT,
+) -> list[stats.Result]:
+    results = [bench_saslprep(kind) for kind in PASSWORDS]
+    for kind, iters, batch_size in itertools.product(
+        PASSWORDS, iterations, batch_sizes
+    ):
+        results.append(bench_scram(kind, iters, batch_size, repeat))
+        results.append(bench_scram_batch(kind, iters, batch_size, repeat=repeat))
+    for kind, iters in itertools.product(PASSWORDS, iterations):
+        results.append(bench_verify(kind, iters, repeat))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--iterations", type=int, nargs="+", default=list(DEFAULT_ITERATIONS)
+    )
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES)
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="Store the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.batch_sizes, args.repeat)
+    print(stats.format_table(results))
+    if args.output:
+        stats.save_results(args.output, results, benchmark="pg_auth")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import typing as tp
+
+from gcl_sdk import migrations as sdk_migrations
+from restalchemy.storage.sql import engines
+from restalchemy.storage.sql import migrations
+
+import exordos_db
+
+LOG = logging.getLogger(__name__)
+
+PG_STAT_STATEMENTS = "pg_stat_statements"
+SERVER_OPTIONS = {
+    # Nothing to recover, the cluster is removed after the benchmark
+    "fsync": "off",
+    "synchronous_commit": "off",
+    "full_page_writes": "off",
+    # Only the unix socket in the temporary directory
+    "listen_addresses": "''",
+    "max_connections": "200",
+}
+MIGRATIONS_PATHS = (
+    os.path.dirname(sdk_migrations.__file__),
+    os.path.join(os.path.dirname(os.path.dirname(exordos_db.__file__)), "migrations"),
+)
+
+
+def prepare_database(
+    connection_url: str, migrations_paths: tp.Iterable[str] = MIGRATIONS_PATHS
+) -> None:
+    """Configure the default engine and apply migrations of the SDK and ours."""
+    engines.engine_factory.configure_factory(db_url=connection_url)
+    for path in migrations_paths:
+        engine = migrations.MigrationEngine(migrations_path=path)
+        engine.apply_migration(migration_name=engine.get_latest_migration())
+
+
+def find_bindir(bindir: str | None = None) -> str:
+    """Return the directory with `initdb` and `pg_ctl`.
+
+    Looked up in `bindir`, then in PATH, then with `pg_config --bindir`.
+    """
+    if bindir:
+        return bindir
+
+    initdb = shutil.which("initdb")
+    if initdb:
+        return os.path.dirname(initdb)
+
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        result = subprocess.run(
+            [pg_config, "--bindir"], capture_output=True, text=True, check=True
+        )
+        bindir = result.stdout.strip()
+        if os.path.exists(os.path.join(bindir, "initdb")):
+            return bindir
+
+    raise RuntimeError("PostgreSQL binaries aren't found, set the bin directory")
+
+
+class LocalPostgres:
+    """A throwaway PostgreSQL cluster in a temporary directory.
+
+    The server listens on a unix socket in the same directory only, so
+    several clusters may run at once. `env` has the libpq variables to
+    connect to it. The cluster can't be created by root.
+    """
+
+    def __init__(
+        self,
+        bindir: str | None = None,
+        port: int = 5432,
+        options: dict[str, str] | None = None,
+    ) -> None:
+        self._bindir = find_bindir(bindir)
+        self._port = port
+        self._options = {**SERVER_OPTIONS, **(options or {})}
+        self._workdir: str | None = None
+
+    def _run(self, name: str, *args: str) -> str:
+        result = subprocess.run(
+            [os.path.join(self._bindir, name), *args],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"{name} failed: {result.stderr.strip()}")
+        return result.stdout
+
+    @property
+    def workdir(self) -> str:
+        if self._workdir is None:
+            raise RuntimeError("PostgreSQL isn't started")
+        return self._workdir
+
+    @property
+    def datadir(self) -> str:
+        return os.path.join(self.workdir, "data")
+
+    @property
+    def env(self) -> dict[str, str]:
+        return {"PGHOST": self.workdir, "PGPORT": str(self._port)}
+
+    @property
+    def connection_url(self) -> str:
+        return f"postgresql://postgres@/postgres?host={self.workdir}&port={self._port}"
+
+    def has_extension(self, name: str) -> bool:
+        sharedir = self._run("pg_config", "--sharedir").strip()
+        return os.path.exists(os.path.join(sharedir, "extension", f"{name}.control"))
+
+    def _init_and_start(self) -> None:
+        self._run(
+            "initdb",
+            "-D",
+            self.datadir,
+            "-U",
+            "postgres",
+            "--auth=trust",
+            "--encoding=UTF8",
+            "--no-sync",
+        )
+
+        options = dict(self._options)
+        if self.has_extension(PG_STAT_STATEMENTS):
+            options.setdefault("shared_preload_libraries", PG_STAT_STATEMENTS)
+        server_args = [f"-k {self.workdir}", f"-p {self._port}"]
+        server_args.extend(f"-c {k}={v}" for k, v in options.items())
+        self._run(
+            "pg_ctl",
+            "start",
+            "-w",
+            "-D",
+            self.datadir,
+            "-l",
+            os.path.join(self.workdir, "postgres.log"),
+            "-o",
+            " ".join(server_args),
+        )
+
+    def start(self) -> None:
+        workdir = tempfile.mkdtemp(prefix="exordos_db_bench_")
+        self._workdir = workdir
+        try:
+            self._init_and_start()
+        except Exception:
+            shutil.rmtree(workdir, ignore_errors=True)
+            self._workdir = None
+            raise
+        LOG.info("PostgreSQL started in %s", self._workdir)
+
+    def stop(self) -> None:
+        workdir = self._workdir
+        if workdir is None:
+            return
+        try:
+            self._run("pg_ctl", "stop", "-m", "immediate", "-D", self.datadir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+            self._workdir = None
+
+    def __enter__(self) -> "LocalPostgres":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
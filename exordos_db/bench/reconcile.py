@@ -0,0 +1,224 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Cycle time of the PG driver against a local PostgreSQL and fake Patroni.
+
+Every scale runs the cycles of the agent on the instance with N roles and
+N databases: `create` from scratch, `noop` with nothing to change, `restore`
+of the actual state and `drop` of everything. The throwaway cluster is
+created with initdb, so run it as a regular user with PostgreSQL binaries
+in PATH or `--bindir`. A database takes about 8 MB on disk, cap them with
+`--max-databases` on small disks:
+
+    python -m exordos_db.bench.reconcile --scales 10 1000 --output after.json
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import time
+import typing as tp
+import uuid
+
+import psycopg
+
+from exordos_db.agent.universal.drivers import pg as pg_driver
+from exordos_db.bench import patroni as fake_patroni
+from exordos_db.bench import postgres as local_postgres
+from exordos_db.bench import stats
+from exordos_db.common import constants
+from exordos_db.common.pg_auth import passwd
+
+DEFAULT_SCALES = (10, 1000, 10000)
+DEFAULT_REPEAT = 3
+BENCH_PASSWORD = "bench-password"
+EXTRA_COLUMNS = ("queries_per_cycle", "patroni_per_cycle")
+
+
+class CountingCursor(psycopg.Cursor):
+    """Cursor counting queries executed by the driver."""
+
+    queries = 0
+
+    def execute(self, *args: tp.Any, **kwargs: tp.Any) -> "CountingCursor":
+        CountingCursor.queries += 1
+        return super().execute(*args, **kwargs)
+
+
+@contextlib.contextmanager
+def driver_environment(
+    postgres: local_postgres.LocalPostgres, patroni: fake_patroni.FakePatroni
+) -> tp.Iterator[pg_driver.ClientsSingleton]:
+    """Point the PG driver to the local cluster and the fake Patroni."""
+    saved_env = {k: os.environ.get(k) for k in postgres.env}
+    saved_constants = (constants.PATRONI_API_ENDPOINT, constants.PATRONI_CONFIG_FILE)
+    os.environ.update(postgres.env)
+    constants.PATRONI_API_ENDPOINT = patroni.endpoint
+    constants.PATRONI_CONFIG_FILE = patroni.config_file
+    try:
+        clients = pg_driver.ClientsSingleton()
+        clients.reinit_pclient()
+        # Same connection as the driver opens, with queries counted
+        clients.psql.close()
+        clients._psql = psycopg.connect(
+            "user=postgres", autocommit=True, cursor_factory=CountingCursor
+        )
+        yield clients
+    finally:
+        constants.PATRONI_API_ENDPOINT, constants.PATRONI_CONFIG_FILE = saved_constants
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def build_instance(
+    instance_uuid: uuid.UUID, users: int = 0, databases: int = 0, prefix: str = "bench"
+) -> pg_driver.PGInstance:
+    """Build the target instance, databases are owned by users in turn."""
+    pw_hash = passwd.scram_sha_256(BENCH_PASSWORD, iterations=1)
+    user_names = [f"{prefix}_user_{i}" for i in range(users)]
+    return pg_driver.PGInstance(
+        uuid=instance_uuid,
+        name=prefix,
+        nodes_number=1,
+        sync_replica_number=0,
+        users={name: {"pw_hash": pw_hash} for name in user_names},
+        databases={
+            f"{prefix}_db_{i}": {
+                "owner": user_names[i % users] if users else "postgres"
+            }
+            for i in range(databases)
+        },
+    )
+
+
+def measure_cycles(
+    name: str,
+    cycle: tp.Callable[[], tp.Any],
+    patroni: fake_patroni.FakePatroni,
+    repeat: int = 1,
+    items: int = 0,
+    params: dict[str, tp.Any] | None = None,
+) -> stats.Result:
+    latencies: list[float] = []
+    queries: list[int] = []
+    patroni_requests: list[int] = []
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        queries_before = CountingCursor.queries
+        requests_before = sum(patroni.requests.values())
+        cycle_started_at = time.perf_counter()
+        cycle()
+        latencies.append(time.perf_counter() - cycle_started_at)
+        queries.append(CountingCursor.queries - queries_before)
+        patroni_requests.append(sum(patroni.requests.values()) - requests_before)
+    elapsed = time.perf_counter() - started_at
+
+    return stats.Result(
+        name,
+        latencies,
+        items=items * repeat,
+        elapsed=elapsed,
+        params=params,
+        extra={
+            "queries_per_cycle": max(queries),
+            "patroni_per_cycle": max(patroni_requests),
+        },
+    )
+
+
+def bench_scale(
+    patroni: fake_patroni.FakePatroni,
+    users: int,
+    databases: int,
+    repeat: int = DEFAULT_REPEAT,
+) -> list[stats.Result]:
+    # Unique names per scale, created extensions are cached by the driver
+    prefix = f"bench{users}x{databases}"
+    instance_uuid = uuid.uuid4()
+    items = users + databases
+    params = {"users": users, "databases": databases}
+    suffix = f"[users={users},databases={databases}]"
+
+    target = build_instance(instance_uuid, users, databases, prefix)
+    results = [
+        measure_cycles(f"create{suffix}", target.dump_to_dp, patroni, 1, items, params),
+        measure_cycles(
+            f"noop{suffix}", target.dump_to_dp, patroni, repeat, items, params
+        ),
+    ]
+
+    def restore() -> None:
+        actual = build_instance(instance_uuid, prefix=prefix)
+        actual.restore_from_dp()
+        if len(actual.users) < users or len(actual.databases) < databases:
+            raise RuntimeError("Not all roles or databases are restored")
+
+    results.append(
+        measure_cycles(f"restore{suffix}", restore, patroni, repeat, items, params)
+    )
+
+    # Roles are dropped on the second cycle, after their databases
+    empty = build_instance(instance_uuid, prefix=prefix)
+    results.append(
+        measure_cycles(f"drop{suffix}", empty.dump_to_dp, patroni, 2, items, params)
+    )
+    return results
+
+
+def run(
+    scales: tp.Iterable[int] = DEFAULT_SCALES,
+    max_databases: int | None = None,
+    repeat: int = DEFAULT_REPEAT,
+    bindir: str | None = None,
+) -> list[stats.Result]:
+    results: list[stats.Result] = []
+    with (
+        local_postgres.LocalPostgres(bindir=bindir) as postgres,
+        fake_patroni.FakePatroni() as patroni,
+        driver_environment(postgres, patroni),
+    ):
+        for scale in scales:
+            databases = scale if max_databases is None else min(scale, max_databases)
+            results.extend(bench_scale(patroni, scale, databases, repeat))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES))
+    parser.add_argument("--max-databases", type=int)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--bindir", help="Directory with PostgreSQL binaries")
+    parser.add_argument("--output", help="Store the results as JSON")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args()
+
+    # The driver logs every role and database at the info level
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    results = run(args.scales, args.max_databases, args.repeat, args.bindir)
+    print(stats.format_table(results, EXTRA_COLUMNS))
+    if args.output:
+        stats.save_results(args.output, results, benchmark="reconcile")
+
+
+if __name__ == "__main__":
+    main()
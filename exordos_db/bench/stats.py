@@ -0,0 +1,136 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import json
+import platform
+import time
+import typing as tp
+
+
+def percentile(values: tp.Sequence[float], percent: float) -> float:
+    """Nearest-rank percentile of the sorted values."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Result:
+    """Throughput and latency of one benchmark case.
+
+    `latencies` are durations of single operations in seconds, an operation
+    may process several items (a batch), `items` is the total of them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        latencies: tp.Iterable[float],
+        items: int,
+        elapsed: float,
+        params: dict[str, tp.Any] | None = None,
+        extra: dict[str, tp.Any] | None = None,
+    ) -> None:
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.items = items
+        self.elapsed = elapsed
+        self.params = params or {}
+        self.extra = extra or {}
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def p50(self) -> float:
+        return percentile(self.latencies, 50)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.latencies, 95)
+
+    @property
+    def p99(self) -> float:
+        return percentile(self.latencies, 99)
+
+    def dump(self) -> dict[str, tp.Any]:
+        return {
+            "name": self.name,
+            "params": self.params,
+            "operations": len(self.latencies),
+            "items": self.items,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "p50": self.p50,
+            "p95": self.p95,
+            "p99": self.p99,
+            **self.extra,
+        }
+
+
+def measure(
+    name: str,
+    func: tp.Callable[[tp.Any], tp.Any],
+    args: tp.Iterable[tp.Any],
+    items_per_call: int = 1,
+    params: dict[str, tp.Any] | None = None,
+) -> Result:
+    """Call `func` for each of `args` and collect the durations."""
+    latencies: list[float] = []
+    started_at = time.perf_counter()
+    for arg in args:
+        call_started_at = time.perf_counter()
+        func(arg)
+        latencies.append(time.perf_counter() - call_started_at)
+    elapsed = time.perf_counter() - started_at
+    return Result(
+        name,
+        latencies,
+        items=len(latencies) * items_per_call,
+        elapsed=elapsed,
+        params=params,
+    )
+
+
+def format_table(results: tp.Iterable[Result], extra: tp.Sequence[str] = ()) -> str:
+    """Format results as a text table, `extra` are keys of `Result.extra`."""
+    header = (
+        f"{'case':<40} {'items/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"
+    )
+    lines = [header + "".join(f" {name:>20}" for name in extra)]
+    for result in results:
+        lines.append(
+            f"{result.name:<40} {result.throughput:>12.1f} "
+            f"{result.p50 * 1000:>10.3f} {result.p95 * 1000:>10.3f} "
+            f"{result.p99 * 1000:>10.3f}"
+            + "".join(f" {result.extra.get(name, ''):>20}" for name in extra)
+        )
+    return "\n".join(lines)
+
+
+def save_results(path: str, results: tp.Iterable[Result], **meta: tp.Any) -> None:
+    """Store results as JSON to compare runs before and after a change."""
+    report = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        **meta,
+        "results": [result.dump() for result in results],
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
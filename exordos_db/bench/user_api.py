@@ -0,0 +1,661 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Load test of the user API without IAM.
+
+The application of `build_wsgi_application` is served by 1..N bjoern
+workers forked like `exordos-db-user-api` does. Authentication goes through
+`SignedTokenDriver` which trusts tokens signed with a test key, so no IAM is
+needed. Client processes send a weighted mix of create, list and get requests
+for instances, users and databases, every client in its own project.
+Throughput and latency percentiles are reported per route:
+
+    exordos-db-bench-user-api --workers 1 2 4 --clients 16 \\
+        --mix create=1,list=2,get=7
+"""
+
+import argparse
+import collections
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+import typing as tp
+import uuid as sys_uuid
+
+import bjoern
+from gcl_iam import algorithms
+from gcl_iam import drivers as iam_drivers
+from gcl_iam import exceptions as iam_exceptions
+from gcl_iam import tokens
+from restalchemy.storage.sql import engines
+
+from exordos_db.bench import postgres as local_postgres
+from exordos_db.bench import stats
+from exordos_db.common.api.middlewares import metrics as metrics_mw
+from exordos_db.user_api.api import app
+from exordos_db.user_api.dm import models
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = (1, 2, 4)
+DEFAULT_CLIENTS = 8
+DEFAULT_DURATION = 10
+DEFAULT_POOL_SIZE = 2
+DEFAULT_SEED = 10
+DEFAULT_MIX = "create=1,list=2,get=7"
+DEFAULT_PAGE_LIMIT = 100
+DEFAULT_KEY = "exordos-db-bench-key"
+DEFAULT_AUDIENCE = "exordos-db-bench"
+OPERATIONS = ("create", "list", "get")
+RESOURCES = ("instances", "users", "databases")
+INSTANCES_PATH = "/v1/types/postgres/instances/"
+VERSIONS_PATH = "/v1/types/postgres/versions/"
+EXTRA_COLUMNS = ("requests", "errors")
+STARTUP_TIMEOUT = 30
+
+# Method and route template of a request
+Route = tuple[str, str]
+
+
+class SignedTokenDriver(iam_drivers.AbstractAuthDriver):
+    """IAM driver trusting tokens signed with a shared key.
+
+    The signature, the audience and the expiration are verified like for
+    IAM tokens, the introspection info is built from the token claims
+    instead of being requested from IAM. For tests and benchmarks only.
+    """
+
+    def __init__(
+        self,
+        key: str = DEFAULT_KEY,
+        audience: str = DEFAULT_AUDIENCE,
+        permissions: tp.Iterable[str] = ("*.*.*",),
+    ) -> None:
+        self._algorithm = algorithms.HS256(key=key)
+        self._audience = audience
+        self._permissions = list(permissions)
+
+    def issue_token(
+        self,
+        project_id: sys_uuid.UUID,
+        user_uuid: sys_uuid.UUID | None = None,
+        ttl: int = 3600,
+    ) -> str:
+        now = int(time.time())
+        return self._algorithm.encode(
+            {
+                "exp": now + ttl,
+                "iat": now,
+                "auth_time": now,
+                "jti": str(sys_uuid.uuid4()),
+                "iss": "exordos-db-bench",
+                "aud": self._audience,
+                "sub": str(user_uuid or sys_uuid.uuid4()),
+                "typ": "Bearer",
+                "otp": False,
+                "project_id": str(project_id),
+            }
+        )
+
+    def get_algorithm(
+        self, token_info: tokens.UnverifiedToken
+    ) -> algorithms.AbstractAlgorithm:
+        if token_info.audience_name != self._audience:
+            raise iam_exceptions.TokenAudienceMismatchError(
+                token_audience=token_info.audience_name,
+                service_audience=self._audience,
+            )
+        return self._algorithm
+
+    def get_introspection_info(
+        self, token_info: tokens.UnverifiedToken, otp_code: str | None = None
+    ) -> dict[str, tp.Any]:
+        claims = token_info.token_info
+        return {
+            "user_info": {
+                "uuid": claims["sub"],
+                "name": "bench",
+                "first_name": "bench",
+                "last_name": "bench",
+                "email": "bench@example.com",
+                "type": "user",
+            },
+            "project_id": claims["project_id"],
+            "otp_verified": True,
+            "permissions": list(self._permissions),
+        }
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Parse weights of operations like `create=1,list=2,get=7`."""
+    mix: dict[str, float] = {}
+    for item in value.split(","):
+        operation, _, weight = item.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        mix[operation] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("All weights of the mix are zero")
+    return mix
+
+
+def instance_path(instance_uuid: sys_uuid.UUID) -> str:
+    return f"{INSTANCES_PATH}{instance_uuid}"
+
+
+def user_path(instance_uuid: sys_uuid.UUID, user_uuid: sys_uuid.UUID) -> str:
+    return f"{instance_path(instance_uuid)}/users/{user_uuid}"
+
+
+class Project:
+    """Objects of one project the client knows about."""
+
+    def __init__(self, project_id: sys_uuid.UUID, version_uuid: sys_uuid.UUID) -> None:
+        self.project_id = project_id
+        self.version_uuid = version_uuid
+        # Instance UUID -> {"users": [...], "databases": [...]}
+        self.instances: dict[sys_uuid.UUID, dict[str, list[sys_uuid.UUID]]] = {}
+
+    def add_instance(self, instance_uuid: sys_uuid.UUID) -> None:
+        self.instances[instance_uuid] = {"users": [], "databases": []}
+
+    def pick_instance(self, rnd: random.Random) -> sys_uuid.UUID:
+        return rnd.choice(list(self.instances))
+
+
+def seed_projects(
+    connection_url: str,
+    projects: tp.Iterable[sys_uuid.UUID],
+    instances: int,
+    version_name: str,
+) -> list[Project]:
+    """Create a version and instances with a user and a database each.
+
+    Runs in a child process, so the parent doesn't hold DB connections
+    over the fork of the workers.
+    """
+    local_postgres.prepare_database(connection_url)
+    version = models.PGVersion(name=version_name, image="bench-image")
+    version.insert()
+    result = []
+    for project_id in projects:
+        project = Project(project_id, version.uuid)
+        for i in range(instances):
+            instance = models.PGInstance(
+                name=f"seed-{i}",
+                project_id=project_id,
+                cpu=1,
+                ram=1024,
+                disk_size=10,
+                nodes_number=1,
+                sync_replica_number=0,
+                version=version,
+            )
+            instance.insert()
+            user = models.PGUser(
+                name=f"seed_{i}",
+                password="bench-password",
+                instance=instance,
+                project_id=project_id,
+            )
+            user.insert()
+            database = models.PGDatabase(
+                name=f"seed_{i}",
+                owner=user,
+                instance=instance,
+                project_id=project_id,
+            )
+            database.insert()
+            project.add_instance(instance.uuid)
+            project.instances[instance.uuid]["users"].append(user.uuid)
+            project.instances[instance.uuid]["databases"].append(database.uuid)
+        result.append(project)
+    return result
+
+
+def _serve(
+    wsgi_app: tp.Callable, host: str, port: int, connection_url: str, pool_size: int
+) -> None:
+    # Like `BjoernService`, the engine is configured after the fork
+    engines.engine_factory.configure_factory(
+        db_url=connection_url,
+        config={"min_size": 1, "max_size": pool_size},
+    )
+    bjoern.listen(wsgi_app=wsgi_app, host=host, port=port, reuse_port=True)
+    try:
+        bjoern.run()
+    except KeyboardInterrupt:
+        pass
+
+
+class Workers:
+    """Bjoern workers forked from this process sharing one port."""
+
+    def __init__(
+        self,
+        wsgi_app: tp.Callable,
+        connection_url: str,
+        count: int,
+        pool_size: int,
+        host: str = "127.0.0.1",
+    ) -> None:
+        self._wsgi_app = wsgi_app
+        self._connection_url = connection_url
+        self._count = count
+        self._pool_size = pool_size
+        self.host = host
+        self.port = get_free_port(host)
+        self._processes: list[multiprocessing.process.BaseProcess] = []
+
+    def start(self) -> None:
+        ctx = multiprocessing.get_context("fork")
+        for _ in range(self._count):
+            process = ctx.Process(
+                target=_serve,
+                args=(
+                    self._wsgi_app,
+                    self.host,
+                    self.port,
+                    self._connection_url,
+                    self._pool_size,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._wait_ready()
+
+    def _wait_ready(self) -> None:
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError(f"Workers aren't listening on {self.host}:{self.port}")
+
+    def stop(self) -> None:
+        for process in self._processes:
+            if process.is_alive() and process.pid is not None:
+                os.kill(process.pid, signal.SIGINT)
+        for process in self._processes:
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self._processes = []
+
+    def __enter__(self) -> "Workers":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+
+def get_free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class Client:
+    """Sends requests of the mix over a keep-alive connection."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        token: str,
+        project: Project,
+        mix: dict[str, float],
+        page_limit: int,
+        seed: int | None = None,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        self._project = project
+        self._page_limit = page_limit
+        self._rnd = random.Random(seed)
+        self._operations = [
+            (operation, resource)
+            for operation in OPERATIONS
+            for resource in RESOURCES
+            if mix.get(operation)
+        ]
+        self._weights = [mix[operation] for operation, _ in self._operations]
+        self._conn: http.client.HTTPConnection | None = None
+        # (method, route) -> [latency, ...]
+        self.latencies: collections.defaultdict[Route, list[float]] = (
+            collections.defaultdict(list)
+        )
+        self.errors: collections.Counter[Route] = collections.Counter()
+
+    def _request(
+        self, method: str, path: str, body: dict[str, tp.Any] | None = None
+    ) -> tp.Any:
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self._host, self._port)
+        conn = self._conn
+        route = (
+            method,
+            metrics_mw.get_route(path.split("?")[0], app.get_api_application()),
+        )
+        started_at = time.perf_counter()
+        try:
+            conn.request(
+                method,
+                path,
+                body=json.dumps(body) if body is not None else None,
+                headers=self._headers,
+            )
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._conn = None
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append(time.perf_counter() - started_at)
+        if response.status >= 400:
+            self.errors[route] += 1
+            LOG.debug("%s %s: %s %s", method, path, response.status, data[:200])
+            return None
+        return json.loads(data) if data else None
+
+    def _collection_path(self, resource: str, instance_uuid: sys_uuid.UUID) -> str:
+        if resource == "instances":
+            return INSTANCES_PATH
+        return f"{instance_path(instance_uuid)}/{resource}/"
+
+    def _create(self, resource: str, instance_uuid: sys_uuid.UUID) -> None:
+        name = f"b{sys_uuid.uuid4().hex[:12]}"
+        path = self._collection_path(resource, instance_uuid)
+        body: dict[str, tp.Any]
+        if resource == "instances":
+            body = {
+                "name": name,
+                "cpu": 1,
+                "ram": 1024,
+                "disk_size": 10,
+                "nodes_number": 1,
+                "sync_replica_number": 0,
+                "version": f"{VERSIONS_PATH}{self._project.version_uuid}",
+            }
+        elif resource == "users":
+            body = {"name": name, "password": "bench-password"}
+        else:
+            users = self._project.instances[instance_uuid]["users"]
+            if not users:
+                return
+            owner = user_path(instance_uuid, self._rnd.choice(users))
+            body = {"name": name, "owner": owner}
+
+        created = self._request("POST", path, body)
+        if created is None:
+            return
+        created_uuid = sys_uuid.UUID(created["uuid"])
+        if resource == "instances":
+            self._project.add_instance(created_uuid)
+        else:
+            self._project.instances[instance_uuid][resource].append(created_uuid)
+
+    def _list(self, resource: str, instance_uuid: sys_uuid.UUID) -> None:
+        path = self._collection_path(resource, instance_uuid)
+        self._request("GET", f"{path}?page_limit={self._page_limit}")
+
+    def _get(self, resource: str, instance_uuid: sys_uuid.UUID) -> None:
+        if resource == "instances":
+            self._request("GET", instance_path(instance_uuid))
+            return
+        uuids = self._project.instances[instance_uuid][resource]
+        if uuids:
+            path = self._collection_path(resource, instance_uuid)
+            self._request("GET", f"{path}{self._rnd.choice(uuids)}")
+
+    def step(self) -> None:
+        operation, resource = self._rnd.choices(self._operations, self._weights)[0]
+        instance_uuid = self._project.pick_instance(self._rnd)
+        getattr(self, f"_{operation}")(resource, instance_uuid)
+
+    def run(self, deadline: float) -> None:
+        try:
+            while time.monotonic() < deadline:
+                self.step()
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+
+
+def _run_client(client: Client, deadline: float) -> Client:
+    client.run(deadline)
+    return client
+
+
+def drive(clients: list[Client], duration: float) -> tuple[list[Client], float]:
+    """Run every client in its own process, so they don't share the GIL.
+
+    Returns the clients with the collected latencies and the elapsed time.
+    """
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(len(clients)) as pool:
+        started_at = time.perf_counter()
+        deadline = time.monotonic() + duration
+        clients = pool.starmap(_run_client, [(client, deadline) for client in clients])
+        return clients, time.perf_counter() - started_at
+
+
+def collect_results(
+    clients: tp.Iterable[Client], elapsed: float, params: dict[str, tp.Any]
+) -> list[stats.Result]:
+    latencies: collections.defaultdict[Route, list[float]] = collections.defaultdict(
+        list
+    )
+    errors: collections.Counter[Route] = collections.Counter()
+    for client in clients:
+        for key, values in client.latencies.items():
+            latencies[key].extend(values)
+        errors.update(client.errors)
+
+    suffix = f"[workers={params['workers']}]"
+    results = []
+    for method, route in sorted(latencies.keys() | errors.keys()):
+        values = latencies[(method, route)]
+        results.append(
+            stats.Result(
+                f"{method} {route}{suffix}",
+                values,
+                items=len(values),
+                elapsed=elapsed,
+                params={**params, "method": method, "route": route},
+                extra={"requests": len(values), "errors": errors[(method, route)]},
+            )
+        )
+    total = [value for values in latencies.values() for value in values]
+    results.append(
+        stats.Result(
+            f"total{suffix}",
+            total,
+            items=len(total),
+            elapsed=elapsed,
+            params=params,
+            extra={"requests": len(total), "errors": sum(errors.values())},
+        )
+    )
+    return results
+
+
+def bench_workers(
+    wsgi_app: tp.Callable,
+    driver: SignedTokenDriver,
+    connection_url: str,
+    projects: list[Project],
+    workers: int,
+    clients_number: int,
+    options: dict[str, tp.Any],
+) -> list[stats.Result]:
+    params = {
+        "workers": workers,
+        "clients": clients_number,
+        "pool_size": options["pool_size"],
+        "mix": options["mix"],
+    }
+    with Workers(wsgi_app, connection_url, workers, options["pool_size"]) as server:
+        clients = [
+            Client(
+                server.host,
+                server.port,
+                driver.issue_token(project.project_id),
+                project,
+                options["mix"],
+                options["page_limit"],
+                seed=i,
+            )
+            for i, project in enumerate(projects)
+        ]
+        clients, elapsed = drive(clients, options["duration"])
+    return collect_results(clients, elapsed, params)
+
+
+def run(
+    workers: tp.Iterable[int] = DEFAULT_WORKERS,
+    clients: int = DEFAULT_CLIENTS,
+    duration: float = DEFAULT_DURATION,
+    mix: str = DEFAULT_MIX,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    seed: int = DEFAULT_SEED,
+    page_limit: int = DEFAULT_PAGE_LIMIT,
+    connection_url: str | None = None,
+    bindir: str | None = None,
+) -> list[stats.Result]:
+    options = {
+        "duration": duration,
+        "mix": parse_mix(mix),
+        "pool_size": pool_size,
+        "page_limit": page_limit,
+    }
+    postgres = None
+    try:
+        if connection_url is None:
+            postgres = local_postgres.LocalPostgres(bindir=bindir)
+            postgres.start()
+            connection_url = postgres.connection_url
+
+        ctx = multiprocessing.get_context("fork")
+        project_ids = [sys_uuid.uuid4() for _ in range(clients)]
+        with ctx.Pool(1) as pool:
+            projects = pool.apply(
+                seed_projects,
+                (connection_url, project_ids, seed, f"bench-{project_ids[0]}"),
+            )
+
+        driver = SignedTokenDriver()
+        # Built once before the fork like in `exordos-db-user-api`
+        wsgi_app = app.build_wsgi_application(driver)
+
+        results: list[stats.Result] = []
+        for count in workers:
+            results.extend(
+                bench_workers(
+                    wsgi_app,
+                    driver,
+                    connection_url,
+                    projects,
+                    count,
+                    clients,
+                    options,
+                )
+            )
+        return results
+    finally:
+        if postgres is not None:
+            postgres.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=list(DEFAULT_WORKERS))
+    parser.add_argument(
+        "--clients",
+        type=int,
+        default=DEFAULT_CLIENTS,
+        help="Concurrent clients, each in its own project",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=DEFAULT_DURATION,
+        help="Seconds of load for every number of workers",
+    )
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help="Weights of operations, every operation is spread over "
+        "instances, users and databases evenly",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help="Max size of the DB pool of every worker",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help="Instances created in every project before the load",
+    )
+    parser.add_argument("--page-limit", type=int, default=DEFAULT_PAGE_LIMIT)
+    parser.add_argument(
+        "--connection-url", help="An empty database instead of a throwaway one"
+    )
+    parser.add_argument("--bindir", help="Directory with PostgreSQL binaries")
+    parser.add_argument("--output", help="Store the results as JSON")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    results = run(
+        args.workers,
+        args.clients,
+        args.duration,
+        args.mix,
+        args.pool_size,
+        args.seed,
+        args.page_limit,
+        args.connection_url,
+        args.bindir,
+    )
+    print(stats.format_table(results, EXTRA_COLUMNS))
+    if args.output:
+        stats.save_results(args.output, results, benchmark="user_api")
+
+
+if __name__ == "__main__":
+    main()
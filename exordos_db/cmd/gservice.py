@@ -23,6 +23,7 @@ from restalchemy.common import config_opts as ra_config_opts
 from restalchemy.storage.sql import engines
 
 from exordos_db.common import log as infra_log
+from exordos_db.common import tracing
 
 DOMAIN = "gservice"
 
@@ -32,6 +33,7 @@ ra_config_opts.register_posgresql_db_opts(CONF)
 
 def init_common_conf(CONF):
     infra_log.configure()
+    tracing.configure(DOMAIN)
     engines.engine_factory.configure_postgresql_factory(CONF)
 
 
@@ -14,18 +14,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import gc
 import logging
 import sys
 
 from gcl_looper.services import bjoern_service
-from gcl_looper.services import hub
 from oslo_config import cfg
 from restalchemy.common import config_opts as ra_config_opts
 from restalchemy.storage.sql import engines
 
 from exordos_db.orch_api.api import app
+from exordos_db.orch_api import notifier
+from exordos_db.common.api.middlewares import compression as compression_mw
 from exordos_db.common import config
 from exordos_db.common import log as infra_log
+from exordos_db.services import hub
+from exordos_db.services import wsgi
 
 api_cli_opts = [
     cfg.StrOpt(
@@ -43,6 +47,22 @@ api_cli_opts = [
         default=1,
         help="How many http servers should be started",
     ),
+    cfg.IntOpt(
+        "watch-bind-port",
+        default=11013,
+        help=(
+            "The port of the server for long polling requests of agents, 0 disables it"
+        ),
+    ),
+    cfg.IntOpt(
+        "watch-max-requests",
+        default=256,
+        min=1,
+        help=(
+            "How many long polling requests are served at once, "
+            "the next ones are rejected with 503"
+        ),
+    ),
 ]
 
 
@@ -50,6 +70,7 @@ DOMAIN = "orch_api"
 
 CONF = cfg.CONF
 CONF.register_cli_opts(api_cli_opts, DOMAIN)
+CONF.register_cli_opts(compression_mw.compression_opts, DOMAIN)
 ra_config_opts.register_posgresql_db_opts(CONF)
 
 
@@ -63,9 +84,15 @@ def main():
 
     serv_hub = hub.ProcessHubService()
 
+    # Built before fork, the workers share it copy-on-write
+    wsgi_app = app.build_wsgi_application(
+        compression_encodings=CONF[DOMAIN].compression_encodings,
+        compression_min_size=CONF[DOMAIN].compression_min_size,
+    )
+
     for _ in range(CONF[DOMAIN].workers):
         service = bjoern_service.BjoernService(
-            wsgi_app=app.build_wsgi_application(),
+            wsgi_app=wsgi_app,
             host=CONF[DOMAIN].bind_host,
             port=CONF[DOMAIN].bind_port,
             bjoern_kwargs=dict(reuse_port=True),
@@ -77,7 +104,26 @@ def main():
 
         serv_hub.add_service(service)
 
-    if CONF[DOMAIN].workers > 1:
+    if CONF[DOMAIN].watch_bind_port:
+        watch_service = wsgi.ThreadingWSGIService(
+            wsgi_app=wsgi_app,
+            host=CONF[DOMAIN].bind_host,
+            port=CONF[DOMAIN].watch_bind_port,
+            max_threads=CONF[DOMAIN].watch_max_requests,
+        )
+
+        watch_service.add_setup(
+            lambda: engines.engine_factory.configure_postgresql_factory(conf=CONF)
+        )
+        watch_service.add_setup(lambda: notifier.configure(CONF.db.connection_url))
+
+        serv_hub.add_service(watch_service)
+
+    # Objects created so far move to the permanent generation, so the GC
+    # of workers doesn't touch the shared memory pages
+    gc.freeze()
+
+    if CONF[DOMAIN].workers > 1 or CONF[DOMAIN].watch_bind_port:
         serv_hub.start()
     else:
         service.start()
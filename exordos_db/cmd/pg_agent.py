@@ -0,0 +1,144 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import sys
+import typing as tp
+import uuid as sys_uuid
+
+import bazooka
+from oslo_config import cfg
+from restalchemy.storage.sql import engines
+from gcl_sdk.agents.universal import constants as c
+from gcl_sdk.agents.universal import utils as ua_utils
+from gcl_sdk.agents.universal.cmd import universal_agent as ua_cmd
+from gcl_sdk.common import config
+from gcl_sdk.common import log as infra_log
+from gcl_sdk.common import utils
+
+from exordos_db.agent.universal import orch
+from exordos_db.agent.universal import service
+from exordos_db.common import tracing
+
+# The agent options are registered by the SDK command
+DOMAIN = ua_cmd.DOMAIN
+CONF = ua_cmd.CONF
+
+pg_agent_opts = [
+    cfg.StrOpt(
+        "orch_watch_endpoint",
+        default=None,
+        help=(
+            "Endpoint of the Orch API for long polling of the payload, "
+            "the payload is polled every iteration if it isn't set"
+        ),
+    ),
+    cfg.FloatOpt(
+        "orch_watch_timeout",
+        default=30,
+        help="How long the Orch API may hold a long polling request",
+    ),
+]
+
+CONF.register_cli_opts(pg_agent_opts, DOMAIN)
+
+
+def load_drivers(
+    driver_names: tp.Iterable[str] | None,
+    get_kinds: tp.Callable[[tp.Any], tp.Iterable[str]],
+) -> list[tp.Any]:
+    drivers = []
+    kinds: set[str] = set()
+    for driver_name in driver_names or ():
+        driver_class = utils.load_from_entry_point(c.EP_UNIVERSAL_AGENT, driver_name)
+        driver = ua_cmd.load_driver(driver_class)
+
+        driver_kinds = set(get_kinds(driver))
+        if driver_kinds & kinds:
+            raise ValueError(f"Driver {driver_name} has duplicate kinds")
+        kinds |= driver_kinds
+
+        drivers.append(driver)
+    return drivers
+
+
+def main() -> None:
+    # Get the config file path
+    for i, arg in enumerate(sys.argv):
+        if arg == "--config-file":
+            config_file = sys.argv[i + 1]
+            break
+    else:
+        raise FileNotFoundError("Unable to find config file")
+
+    # Parse config
+    need_db = ua_cmd.register_db_opts(config_file)
+    config.parse(sys.argv[1:])
+
+    # Configure logging
+    infra_log.configure()
+    log = logging.getLogger(__name__)
+    tracing.configure("pg_agent")
+
+    # Enable encrypted communication with the orchestrator APIs.
+    if CONF[DOMAIN].orch_secure_communication:
+        encryptor = ua_utils.get_encryptor(CONF[DOMAIN].private_key_path)
+    else:
+        encryptor = None
+
+    orch_client = orch.HttpOrchClient(
+        orch_endpoint=CONF[DOMAIN].orch_endpoint,
+        status_endpoint=CONF[DOMAIN].status_endpoint,
+        http_client=bazooka.Client(default_timeout=20),
+        encryptor=encryptor,
+        watch_endpoint=CONF[DOMAIN].orch_watch_endpoint,
+        watch_timeout=CONF[DOMAIN].orch_watch_timeout,
+    )
+
+    # Detect the agent UUID.
+    if CONF[DOMAIN].uuid:
+        agent_uuid = sys_uuid.UUID(CONF[DOMAIN].uuid)
+    elif CONF[DOMAIN].uuid5_name:
+        agent_uuid = sys_uuid.uuid5(ua_utils.system_uuid(), CONF[DOMAIN].uuid5_name)
+    else:
+        agent_uuid = ua_utils.system_uuid()
+
+    if need_db:
+        engines.engine_factory.configure_postgresql_factory(CONF)
+
+    caps_drivers = load_drivers(
+        CONF[DOMAIN].caps_drivers, lambda d: d.get_capabilities()
+    )
+    facts_drivers = load_drivers(CONF[DOMAIN].facts_drivers, lambda d: d.get_facts())
+    for driver in caps_drivers + facts_drivers:
+        log.info("Loaded driver: %s", driver.__class__.__name__)
+
+    agent_service = service.UniversalAgentService(
+        agent_uuid=agent_uuid,
+        orch_client=orch_client,
+        caps_drivers=caps_drivers,
+        facts_drivers=facts_drivers,
+        payload_path=CONF[DOMAIN].payload_path,
+        iter_min_period=3,
+    )
+
+    agent_service.start()
+
+    log.info("Bye!!!")
+
+
+if __name__ == "__main__":
+    main()
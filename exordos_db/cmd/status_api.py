@@ -14,18 +14,21 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import gc
 import logging
 import sys
 
 from gcl_looper.services import bjoern_service
-from gcl_looper.services import hub
 from oslo_config import cfg
 from restalchemy.common import config_opts as ra_config_opts
 from restalchemy.storage.sql import engines
 
 from exordos_db.status_api.api import app
+from exordos_db.common.api.middlewares import compression as compression_mw
 from exordos_db.common import config
 from exordos_db.common import log as infra_log
+from exordos_db.common import tracing
+from exordos_db.services import hub
 
 api_cli_opts = [
     cfg.StrOpt(
@@ -50,6 +53,7 @@ DOMAIN = "status_api"
 
 CONF = cfg.CONF
 CONF.register_cli_opts(api_cli_opts, DOMAIN)
+CONF.register_cli_opts(compression_mw.compression_opts, DOMAIN)
 ra_config_opts.register_posgresql_db_opts(CONF)
 
 
@@ -60,6 +64,7 @@ def main():
     # Configure logging
     infra_log.configure()
     log = logging.getLogger(__name__)
+    tracing.configure(DOMAIN)
 
     engines.engine_factory.configure_postgresql_factory(CONF)
 
@@ -71,9 +76,15 @@ def main():
 
     serv_hub = hub.ProcessHubService()
 
+    # Built before fork, the workers share it copy-on-write
+    wsgi_app = app.build_wsgi_application(
+        compression_encodings=CONF[DOMAIN].compression_encodings,
+        compression_min_size=CONF[DOMAIN].compression_min_size,
+    )
+
     for _ in range(CONF[DOMAIN].workers):
         service = bjoern_service.BjoernService(
-            wsgi_app=app.build_wsgi_application(),
+            wsgi_app=wsgi_app,
             host=CONF[DOMAIN].bind_host,
             port=CONF[DOMAIN].bind_port,
             bjoern_kwargs=dict(reuse_port=True),
@@ -85,6 +96,10 @@ def main():
 
         serv_hub.add_service(service)
 
+    # Objects created so far move to the permanent generation, so the GC
+    # of workers doesn't touch the shared memory pages
+    gc.freeze()
+
     if CONF[DOMAIN].workers > 1:
         serv_hub.start()
     else:
@@ -0,0 +1,216 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import sys
+import typing as tp
+
+from oslo_config import cfg
+
+from exordos_db.common import tracing
+
+cli_opts = [
+    cfg.MultiStrOpt(
+        "span-file",
+        required=True,
+        help="Span file of a service, repeat for every service and node",
+    ),
+    cfg.StrOpt(
+        "instance",
+        required=True,
+        help="UUID of the instance",
+    ),
+    cfg.StrOpt(
+        "generation",
+        default=None,
+        help="Instance `updated_at` after the change, the last change if not set",
+    ),
+]
+
+CONF = cfg.CONF
+CONF.register_cli_opts(cli_opts)
+
+# Stages of every node after the build
+NODE_STAGES = ("fetch", "apply", "report", "status")
+
+# A span loaded from a span file, see `tracing.Span.dump()`
+SpanDict = dict[str, tp.Any]
+
+
+def _parse_generation(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value)
+
+
+def find_change(
+    spans: list[SpanDict], instance: str, generation: str | None = None
+) -> SpanDict | None:
+    """Return the API span of the change, the last one by default."""
+    changes = [
+        s
+        for s in spans
+        if s["name"] == "api"
+        and s["attributes"].get("instance") == instance
+        and s["trace_id"] is not None
+    ]
+    if generation is not None:
+        generation = tracing.format_generation(_parse_generation(generation))
+        changes = [s for s in changes if s["attributes"]["generation"] == generation]
+    return changes[-1] if changes else None
+
+
+def find_build(spans: list[SpanDict], change: SpanDict) -> SpanDict | None:
+    """Return the first build of the change or of a later one it's merged to.
+
+    The builder sees only the last generation of the instance, so changes
+    made in a row are built at once.
+    """
+    instance = change["attributes"]["instance"]
+    generation = _parse_generation(change["attributes"]["generation"])
+    for s in spans:
+        if (
+            s["name"] == "build"
+            and s["attributes"].get("instance") == instance
+            and _parse_generation(s["attributes"]["generation"]) >= generation
+        ):
+            return s
+    return None
+
+
+def _belongs(span: SpanDict, trace_id: str) -> bool:
+    return span["trace_id"] == trace_id or trace_id in span["links"]
+
+
+def _path_end(path: list[SpanDict]) -> float:
+    # The status span is nested in the report one
+    return max(s["end"] for s in path)
+
+
+def find_node_path(
+    spans: list[SpanDict], trace_id: str, after: float
+) -> list[SpanDict]:
+    """Return the first span of every node stage in order.
+
+    The path stops at the first stage which isn't reached yet.
+    """
+    path = []
+    for stage in NODE_STAGES:
+        for s in spans:
+            if s["name"] == stage and s["end"] >= after and _belongs(s, trace_id):
+                path.append(s)
+                after = s["start"]
+                break
+        else:
+            break
+    return path
+
+
+def critical_path(
+    spans: list[SpanDict], instance: str, generation: str | None = None
+) -> tuple[SpanDict | None, SpanDict | None, list[tuple[str, list[SpanDict]]]]:
+    """Return the change, its build and node paths, the critical one first.
+
+    The node with the least reached stages is critical, the one which
+    finished last among equal ones.
+    """
+    change = find_change(spans, instance, generation)
+    if change is None:
+        return None, None, []
+
+    build = find_build(spans, change)
+    if build is None:
+        return change, None, []
+
+    paths = []
+    for node, resource_hash in build["attributes"].get("targets", {}).items():
+        trace_id = tracing.resource_trace_id(node, resource_hash)
+        paths.append((node, find_node_path(spans, trace_id, build["end"])))
+    paths.sort(key=lambda p: (len(p[1]), -_path_end(p[1]) if p[1] else 0))
+    return change, build, paths
+
+
+def format_rows(change: SpanDict, stages: list[SpanDict]) -> list[str]:
+    """Format stages of the path, waits are counted from the previous end.
+
+    Long polling starts before the change, so a stage overlapping the
+    previous one starts no earlier than the previous one ends. A stage
+    nested in the previous one, like the status of the report, is kept
+    as is.
+    """
+    origin = change["start"]
+    previous_end = None
+    lines = [
+        (
+            f"{'stage':<8} {'component':<12} {'start, s':>10} {'wait, s':>10} "
+            f"{'duration, s':>12}"
+        )
+    ]
+    for s in stages:
+        start = s["start"]
+        if previous_end is not None and s["end"] > previous_end:
+            start = max(start, previous_end)
+        wait = "" if previous_end is None else f"{max(start - previous_end, 0):.3f}"
+        lines.append(
+            f"{s['name']:<8} {s['component'] or '':<12} {start - origin:>10.3f} "
+            f"{wait:>10} {s['end'] - start:>12.3f}"
+        )
+        previous_end = max(previous_end or 0, s["end"])
+    return lines
+
+
+def main() -> int:
+    # Parse command-line options
+    CONF(sys.argv[1:])
+
+    spans = tracing.load_spans(CONF.span_file)
+    change, build, paths = critical_path(spans, CONF.instance, CONF.generation)
+    if change is None:
+        print(f"No changes of instance {CONF.instance} are found")
+        return 1
+
+    generation = change["attributes"]["generation"]
+    print(f"Change of instance {CONF.instance} at {generation}")
+    if build is None:
+        print("\n".join(format_rows(change, [change])))
+        print("Not built yet")
+        return 0
+
+    if build["attributes"]["generation"] != generation:
+        print(f"Built at the later generation {build['attributes']['generation']}")
+
+    if not paths:
+        print("\n".join(format_rows(change, [change, build])))
+        print("No node resources are built")
+        return 0
+
+    node, path = paths[0]
+    print(f"Critical path through node resource {node}:")
+    print("\n".join(format_rows(change, [change, build, *path])))
+    if len(path) < len(NODE_STAGES):
+        print(f"Waiting for {NODE_STAGES[len(path)]}")
+    else:
+        print(f"Done in {_path_end(path) - change['start']:.3f}s")
+
+    for node, path in paths[1:]:
+        if len(path) < len(NODE_STAGES):
+            state = f"waiting for {NODE_STAGES[len(path)]}"
+        else:
+            state = f"done in {_path_end(path) - change['start']:.3f}s"
+        print(f"Node resource {node}: {state}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
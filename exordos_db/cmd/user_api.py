@@ -14,20 +14,26 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import gc
 import logging
 import sys
 
 from gcl_looper.services import bjoern_service
-from gcl_looper.services import hub
-from gcl_iam import drivers
 from gcl_iam import opts as iam_opts
 from oslo_config import cfg
 from restalchemy.common import config_opts as ra_config_opts
 from restalchemy.storage.sql import engines
 
+from exordos_db.common.api import drivers
+from exordos_db.common.api.middlewares import compression as compression_mw
+from exordos_db.common.api.middlewares import metrics as metrics_mw
 from exordos_db.user_api.api import app
 from exordos_db.common import config
+from exordos_db.common.pg_auth import passwd
 from exordos_db.common import log as infra_log
+from exordos_db.common import tracing
+from exordos_db.services import hub
+from exordos_db.services import wsgi
 
 api_cli_opts = [
     cfg.StrOpt(
@@ -40,11 +46,48 @@ api_cli_opts = [
         default=8080,
         help="The port to bind to",
     ),
+    cfg.StrOpt(
+        "metrics-bind-host",
+        default="127.0.0.1",
+        help="The host IP of the metrics server to bind to",
+    ),
+    cfg.IntOpt(
+        "metrics-bind-port",
+        default=8081,
+        help="The port of the metrics server, 0 disables it",
+    ),
     cfg.IntOpt(
         "workers",
         default=1,
         help="How many http servers should be started",
     ),
+    cfg.IntOpt(
+        "password-hash-workers",
+        default=0,
+        min=0,
+        help=(
+            "How many processes of a worker hash passwords of imported users, "
+            "0 means the number of CPUs"
+        ),
+    ),
+    cfg.IntOpt(
+        "iam-cache-size",
+        default=1024,
+        min=0,
+        help="How many token introspection results to cache per worker",
+    ),
+    cfg.IntOpt(
+        "iam-cache-ttl",
+        default=60,
+        min=0,
+        help="Max time in seconds to cache a token introspection result",
+    ),
+    cfg.IntOpt(
+        "iam-jwks-retry-interval",
+        default=30,
+        min=0,
+        help="Time in seconds to use the previous IAM keys after a failed refresh",
+    ),
 ]
 
 
@@ -52,6 +95,7 @@ DOMAIN = "user_api"
 
 CONF = cfg.CONF
 CONF.register_cli_opts(api_cli_opts, DOMAIN)
+CONF.register_cli_opts(compression_mw.compression_opts, DOMAIN)
 ra_config_opts.register_posgresql_db_opts(CONF)
 iam_opts.register_iam_cli_opts(CONF)
 
@@ -63,6 +107,7 @@ def main():
     # Configure logging
     infra_log.configure()
     log = logging.getLogger(__name__)
+    tracing.configure(DOMAIN)
 
     log.info(
         "Start service on %s:%s",
@@ -71,15 +116,28 @@ def main():
     )
 
     service_hub = hub.ProcessHubService()
-    iam_driver = drivers.HttpDriver(
+    iam_driver = drivers.CachedHttpDriver(
         CONF.iam.iam_endpoint,
         CONF.iam.audience,
         CONF.iam.hs256_jwks_decryption_key,
+        introspection_cache_size=CONF[DOMAIN].iam_cache_size,
+        introspection_cache_ttl=CONF[DOMAIN].iam_cache_ttl,
+        jwks_retry_interval=CONF[DOMAIN].iam_jwks_retry_interval,
+    )
+
+    # The pool itself is started by a worker on the first import
+    passwd.configure_executor(CONF[DOMAIN].password_hash_workers or None)
+
+    # Built before fork, the workers share it copy-on-write
+    wsgi_app = app.build_wsgi_application(
+        iam_driver,
+        compression_encodings=CONF[DOMAIN].compression_encodings,
+        compression_min_size=CONF[DOMAIN].compression_min_size,
     )
 
     for _ in range(CONF[DOMAIN].workers):
         service = bjoern_service.BjoernService(
-            wsgi_app=app.build_wsgi_application(iam_driver),
+            wsgi_app=wsgi_app,
             host=CONF[DOMAIN].bind_host,
             port=CONF[DOMAIN].bind_port,
             bjoern_kwargs=dict(reuse_port=True),
@@ -91,6 +149,20 @@ def main():
 
         service_hub.add_service(service)
 
+    # The API is public so the metrics are served apart from it
+    if CONF[DOMAIN].metrics_bind_port:
+        service_hub.add_service(
+            wsgi.ThreadingWSGIService(
+                wsgi_app=metrics_mw.build_metrics_application(),
+                host=CONF[DOMAIN].metrics_bind_host,
+                port=CONF[DOMAIN].metrics_bind_port,
+            )
+        )
+
+    # Objects created so far move to the permanent generation, so the GC
+    # of workers doesn't touch the shared memory pages
+    gc.freeze()
+
     service_hub.start()
 
     log.info("Bye!!!")
@@ -0,0 +1,102 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""WAL recovery commands run by PostgreSQL and Patroni on the node.
+
+    restore_command = exordos-db-wal fetch <instance> %f %p
+
+`archive_command` is `exordos-db-wal-archived`, see `wal_archived`.
+
+The backup storage is read from the PG driver section of the agent config,
+the commands fail if it isn't configured.
+"""
+
+import argparse
+import configparser
+import sys
+
+from oslo_config import cfg
+
+from exordos_db.agent.universal.drivers import pg_backup
+from exordos_db.agent.universal.drivers import pg_wal
+
+DEFAULT_AGENT_CONFIG = "/etc/exordos_db/exordos_pg_agent.conf"
+AGENT_DRIVER_SECTION = "PGCapabilityDriver"
+
+
+def add_command_parsers(subparsers: argparse._SubParsersAction) -> None:
+    parser = subparsers.add_parser("fetch", help="Fetch the archived WAL file")
+    parser.add_argument("instance")
+    parser.add_argument("wal_file")
+    parser.add_argument("path")
+
+    parser = subparsers.add_parser(
+        "restore-base", help="Restore the physical backup to the data directory"
+    )
+    parser.add_argument("instance")
+    parser.add_argument("backup")
+    parser.add_argument("--datadir", required=True)
+    parser.add_argument("--waldir", default=None)
+
+
+cli_opts = [
+    cfg.StrOpt(
+        "agent-config",
+        default=DEFAULT_AGENT_CONFIG,
+        help="Config of the PG agent with the backup storage",
+    ),
+    cfg.SubCommandOpt("command", handler=add_command_parsers),
+]
+
+CONF = cfg.CONF
+CONF.register_cli_opts(cli_opts)
+
+
+def load_storage(config_file: str) -> pg_backup.AbstractStorage | None:
+    # The agent passes the driver section as is, see `load_driver` of the SDK
+    parser = configparser.ConfigParser()
+    parser.read(config_file)
+    storage_url = parser.get(AGENT_DRIVER_SECTION, "backup_storage", fallback=None)
+    return pg_backup.get_storage(storage_url) if storage_url else None
+
+
+def main() -> int:
+    # Parse command-line options
+    CONF(sys.argv[1:])
+
+    storage = load_storage(CONF.agent_config)
+    if storage is None:
+        print(pg_backup.NO_STORAGE_ERROR, file=sys.stderr)
+        return 1
+    command = CONF.command
+    if command.name == "fetch":
+        # PostgreSQL asks for files which don't exist at the end of the archive
+        if not pg_wal.fetch(storage, command.instance, command.wal_file, command.path):
+            return 1
+    elif command.name == "restore-base":
+        pg_backup.restore_base_backup(
+            storage,
+            command.instance,
+            command.backup,
+            command.datadir,
+            waldir=command.waldir,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""`archive_command` of PostgreSQL, it runs for every WAL file:
+
+    archive_command = exordos-db-wal-archived <instance> %f
+
+Only the standard library is imported, see `pg_wal_client`, so the command
+doesn't delay archiving by the startup of the service modules.
+"""
+
+import argparse
+import sys
+
+from exordos_db.agent.universal.drivers import pg_wal_client
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Wait until the WAL file is archived by the agent"
+    )
+    parser.add_argument("instance")
+    parser.add_argument("wal_file")
+    parser.add_argument("--timeout", type=float, default=pg_wal_client.DEFAULT_TIMEOUT)
+    parser.add_argument("--socket", default=pg_wal_client.SOCKET_PATH)
+    args = parser.parse_args()
+
+    try:
+        archived = pg_wal_client.wait_archived(
+            args.instance, args.wal_file, args.timeout, socket_path=args.socket
+        )
+    except OSError as e:
+        print(f"Unable to reach the agent: {e}", file=sys.stderr)
+        return 1
+    if not archived:
+        print(f"WAL {args.wal_file} isn't archived yet", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import contextlib
+import json
+import re
+import typing as tp
+
+from restalchemy.api import applications
+from restalchemy.api import contexts
+import webob
+
+SPECIFICATION_PATH_RE = re.compile(r"^/specifications/(?P<version>[^/]+)/?$")
+
+
+class OpenApiApplication(applications.OpenApiApplication):
+    """OpenAPI application serving pre-serialized specifications.
+
+    The specifications don't change at runtime so they are built once,
+    `build_specifications` is expected to be called in the parent process
+    before the workers are forked. Only the server URL depends on the
+    request, the serialized body is cached per host.
+
+    `specification_context` is a callable taking a request and returning
+    a context manager with the context the controllers expect from the
+    middlewares, it's used to build the specifications outside of requests.
+    """
+
+    __max_cached_bodies__ = 16
+
+    def __init__(
+        self,
+        route_class: type,
+        openapi_engine: tp.Any,
+        specification_context: (
+            tp.Callable[[webob.Request], tp.ContextManager[tp.Any]] | None
+        ) = None,
+    ) -> None:
+        super().__init__(route_class, openapi_engine)
+        self._specification_context = specification_context or (
+            lambda req: contextlib.nullcontext()
+        )
+        self._specifications: dict[str, tuple[dict[str, tp.Any], str]] = {}
+        self._specification_bodies: dict[tuple[str, str], bytes] = {}
+
+    def _build_specification(
+        self, version: str, req: webob.Request
+    ) -> tuple[dict[str, tp.Any], str]:
+        req.application = self
+        req.api_context = contexts.RequestContext(req)
+        spec = self.openapi_engine.build_openapi_specification(
+            version=version, request=req
+        )
+        # Servers without an explicit URL get the URL of the request
+        return spec, req.host_url
+
+    def build_specifications(self) -> None:
+        for version in self.openapi_engine.list_supported_openapi_versions():
+            req = webob.Request.blank(f"/specifications/{version}")
+            with self._specification_context(req):
+                self._specifications[version] = self._build_specification(version, req)
+
+    def _get_specification_body(self, version: str, req: webob.Request) -> bytes:
+        key = (version, req.host_url)
+        cached = self._specification_bodies.get(key)
+        if cached is not None:
+            return cached
+
+        if version not in self._specifications:
+            self._specifications[version] = self._build_specification(version, req)
+        spec, host_url = self._specifications[version]
+
+        servers = [
+            dict(server, url=req.host_url) if server["url"] == host_url else server
+            for server in spec.get("servers", [])
+        ]
+        body = json.dumps(dict(spec, servers=servers), separators=(",", ":"))
+
+        # The host is controlled by clients, keep the cache bounded
+        if len(self._specification_bodies) >= self.__max_cached_bodies__:
+            self._specification_bodies.clear()
+        self._specification_bodies[key] = body.encode("utf-8")
+        return self._specification_bodies[key]
+
+    def process_request(self, req: webob.Request) -> webob.Response:
+        match = SPECIFICATION_PATH_RE.match(req.path_info)
+        if (
+            req.method != "GET"
+            or match is None
+            or match.group("version")
+            not in self.openapi_engine.list_supported_openapi_versions()
+        ):
+            return super().process_request(req)
+
+        return webob.Response(
+            body=self._get_specification_body(match.group("version"), req),
+            content_type="application/json",
+            charset=None,
+        )
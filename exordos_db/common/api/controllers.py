@@ -0,0 +1,384 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import base64
+import hashlib
+import json
+import typing as tp
+import uuid
+
+from restalchemy.api import constants as ra_constants
+from restalchemy.api import controllers as ra_controllers
+from restalchemy.common import exceptions as exc
+from restalchemy.dm import filters as dm_filters
+from restalchemy.dm import models
+import webob
+
+from exordos_db.common.api import packers
+
+if tp.TYPE_CHECKING:
+    from restalchemy.api.controllers import BaseResourceController as _Controller
+else:
+    _Controller = object
+
+
+def is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def iter_models(
+    model: type[models.Model],
+    filters: tp.Any,
+    order_by: dict[str, str] | None = None,
+    chunk_size: int = 100,
+) -> tp.Iterator[models.Model]:
+    """Iterate over models fetched page by page.
+
+    Every page is a keyset range query in its own short-lived session, so
+    only `chunk_size` rows are held in memory at once and no connection is
+    held while the previous page is written to the client. Only the first
+    key of `order_by` is used, like for the paginated requests.
+    """
+    sort_col, sort_dir = next(iter(order_by.items())) if order_by else (None, "asc")
+    id_name = model.get_id_property_name()
+    order_by = {sort_col: sort_dir} if sort_col else {}
+    order_by.setdefault(id_name, "asc")
+
+    page_filters = filters
+    while True:
+        page = model.objects.get_all(
+            filters=page_filters, limit=chunk_size, order_by=order_by
+        )
+        yield from page
+        if len(page) < chunk_size:
+            return
+
+        last = page[-1]
+        cursor = PaginationCursorFilterBuilder(
+            model,
+            getattr(last, id_name),
+            getattr(last, sort_col) if sort_col else None,
+            sort_col,
+            sort_dir,
+        )
+        page_filters = dm_filters.AND(cursor.build_filter(), filters)
+
+
+def is_ndjson_accepted(req: webob.Request) -> bool:
+    offers = req.accept.acceptable_offers(
+        [
+            ra_constants.CONTENT_TYPE_APPLICATION_JSON,
+            packers.CONTENT_TYPE_APPLICATION_NDJSON,
+        ]
+    )
+    return bool(offers) and offers[0][0] == packers.CONTENT_TYPE_APPLICATION_NDJSON
+
+
+def get_etag(body: tp.Any, variant: str = "") -> str | None:
+    """Build an ETag from UUIDs and update timestamps of the models.
+
+    The `variant` identifies the representation of the models, like its
+    content type and fields. Returns None if the body isn't a timestamped
+    model or a list of them.
+    """
+    items = body if isinstance(body, list) else [body]
+    if not all(isinstance(i, models.ModelWithTimestamp) for i in items):
+        return None
+
+    digest = hashlib.sha256(f"{variant};".encode())
+    for item in items:
+        digest.update(f"{item.get_id()}:{item.updated_at.isoformat()};".encode())
+    return digest.hexdigest()[:32]
+
+
+class NotModifiedPacker:
+    """Packer of `304 Not Modified` responses, they have no body."""
+
+    def __init__(
+        self, resource_type: tp.Any, request: webob.Request | None = None
+    ) -> None:
+        pass
+
+    def pack(self, obj: tp.Any) -> None:
+        return None
+
+
+class ETagMixin(_Controller):
+    """Conditional GET support based on the `If-None-Match` header.
+
+    The ETag is computed before serialization so an unchanged resource or
+    collection is answered with `304 Not Modified` without packing the body.
+    The response is still built by the next classes, so headers like the
+    pagination ones are the same as in a `200 OK` response.
+    """
+
+    _not_modified = False
+
+    def get_packer(self, content_type: str, resource_type: tp.Any = None) -> tp.Any:
+        if self._not_modified:
+            return NotModifiedPacker(resource_type, request=self._req)
+        return super().get_packer(content_type, resource_type=resource_type)
+
+    def _get_etag_variant(self) -> str:
+        content_type = (
+            packers.CONTENT_TYPE_APPLICATION_NDJSON
+            if is_ndjson_accepted(self._req)
+            else ra_constants.CONTENT_TYPE_APPLICATION_JSON
+        )
+        # Fields depend on the permissions and the requested fields
+        fields = sorted(
+            name
+            for name, field in self.get_resource().get_fields_by_request(self._req)
+            if field.is_public()
+        )
+        return f"{content_type};{','.join(fields)}"
+
+    def _create_response(
+        self,
+        body: tp.Any,
+        status: int,
+        headers: dict[str, str],
+        *args: tp.Any,
+        **kwargs: tp.Any,
+    ) -> webob.Response:
+        if self._req.method != "GET" or status != 200 or body is None:
+            return super()._create_response(body, status, headers, *args, **kwargs)
+
+        etag = get_etag(body, self._get_etag_variant())
+        if etag is None:
+            return super()._create_response(body, status, headers, *args, **kwargs)
+
+        headers["ETag"] = f'"{etag}"'
+        headers["Vary"] = "Accept"
+        if etag not in self._req.if_none_match:
+            return super()._create_response(body, status, headers, *args, **kwargs)
+
+        self._not_modified = True
+        try:
+            response = super()._create_response(body, status, headers, *args, **kwargs)
+        finally:
+            self._not_modified = False
+        return webob.Response(
+            status=304,
+            headerlist=[
+                (name, value)
+                for name, value in response.headerlist
+                if name not in ("Content-Type", "Content-Length")
+            ],
+        )
+
+
+class PaginationCursorFilterBuilder(ra_controllers.PaginationFilterBuilder):
+    """Cursor filter with the sort value taken from the token.
+
+    Unlike the parent class it doesn't read the marker row from the database.
+    """
+
+    def __init__(
+        self,
+        model: type[models.Model],
+        marker_id: tp.Any,
+        sort_value: tp.Any,
+        sort_column: str | None,
+        sort_direction: str,
+    ) -> None:
+        self._sort_value = sort_value
+        super().__init__(model, marker_id, sort_column, sort_direction)
+
+    def _fetch_sort_val(self, model: tp.Any) -> tp.Any:
+        return self._sort_value
+
+
+class KeysetPaginationMixin(_Controller):
+    """Keyset pagination ordered by `(created_at, uuid)` by default.
+
+    `X-Pagination-Marker` is an opaque token carrying the sort key, the sort
+    value and the UUID of the last row of the page, so the next page is a
+    single indexed range scan whatever its depth. Plain UUID markers are
+    still accepted for backward compatibility.
+    """
+
+    __default_sort__: tp.ClassVar[dict[str, str]] = {"created_at": "asc"}
+
+    _pagination_cursor: tuple[tp.Any, str | None, tp.Any] | None = None
+    _order_by: dict[str, str] | None = None
+
+    def _get_sort(self, order_by: dict[str, str] | None) -> tuple[str | None, str]:
+        if order_by:
+            return next(iter(order_by.items()))
+        return None, "asc"
+
+    def _get_property_type(self, name: str) -> tp.Any:
+        return self.model.properties.properties[name].get_property_type()
+
+    def _encode_marker(
+        self, model: models.Model, order_by: dict[str, str] | None
+    ) -> str:
+        sort_col, _ = self._get_sort(order_by)
+        id_name = self.model.get_id_property_name()
+        cursor = {"id": str(getattr(model, id_name))}
+        if sort_col:
+            cursor["k"] = sort_col
+            cursor["v"] = self._get_property_type(sort_col).to_simple_type(
+                getattr(model, sort_col)
+            )
+        token = base64.urlsafe_b64encode(
+            json.dumps(cursor, separators=(",", ":")).encode()
+        )
+        return token.decode().rstrip("=")
+
+    def _decode_marker(self, token: str) -> tuple[tp.Any, str | None, tp.Any]:
+        try:
+            padding = "=" * (-len(token) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(token + padding))
+            marker_id = self._parse_resource_uuid(
+                "uuid", cursor["id"], self.get_resource().get_id_type()
+            )
+            sort_col = cursor.get("k")
+            sort_value = None
+            if sort_col is not None:
+                sort_value = self._get_property_type(sort_col).from_simple_type(
+                    cursor["v"]
+                )
+        except (ValueError, TypeError, KeyError, exc.ParseError):
+            raise exc.ParseError(value=token)
+        return marker_id, sort_col, sort_value
+
+    def _prepare_pagination_meta(self) -> None:
+        params = self._req.api_context.params
+        token = params.get(self._param_page_marker)
+        if not token or is_uuid(token):
+            # Markers issued before the opaque tokens are plain UUIDs
+            return super()._prepare_pagination_meta()
+
+        limit = params.get(self._param_page_limit, 0)
+        try:
+            self._pagination_limit = int(limit)
+            if self._pagination_limit < 0:
+                raise ValueError()
+        except ValueError:
+            raise exc.ParseError(value=limit)
+
+        self._pagination_cursor = self._decode_marker(token)
+        self._pagination_marker = self._pagination_cursor[0]
+
+    def _build_pagination_with_cursor(
+        self, filters: tp.Any, order_by: dict[str, str] | None
+    ) -> tuple[tp.Any, dict[str, str] | None]:
+        sort_col, sort_dir = self._get_sort(order_by)
+        cursor = self._pagination_cursor
+        if (
+            cursor is None
+            or cursor[0] != self._pagination_marker
+            or cursor[1] != sort_col
+        ):
+            return super()._build_pagination_with_cursor(filters, order_by)
+
+        # Skip the parent cursor building, it reads the marker row
+        self._pagination_marker = None
+        try:
+            filters, order_by = super()._build_pagination_with_cursor(filters, order_by)
+        finally:
+            self._pagination_marker = cursor[0]
+
+        builder = PaginationCursorFilterBuilder(
+            self.model, cursor[0], cursor[2], sort_col, sort_dir
+        )
+        return dm_filters.AND(builder.build_filter(), filters), order_by
+
+    def _create_response(
+        self,
+        body: tp.Any,
+        status: int,
+        headers: dict[str, str],
+        *args: tp.Any,
+        **kwargs: tp.Any,
+    ) -> webob.Response:
+        response = super()._create_response(body, status, headers, *args, **kwargs)
+        if self._header_page_marker in response.headers:
+            response.headers[self._header_page_marker] = self._encode_marker(
+                body[-1], self._order_by
+            )
+        return response
+
+    def _process_storage_filters(
+        self, filters: tp.Any, order_by: dict[str, str] | None = None
+    ) -> tp.Any:
+        self._order_by = order_by
+        result = super()._process_storage_filters(filters, order_by=order_by)
+        if len(result):
+            # The next storage request of the same page continues from here
+            sort_col, _ = self._get_sort(order_by)
+            last = result[-1]
+            self._pagination_cursor = (
+                getattr(last, self.model.get_id_property_name()),
+                sort_col,
+                getattr(last, sort_col) if sort_col else None,
+            )
+        return result
+
+
+class NDJSONStreamingMixin(_Controller):
+    """Stream collections as NDJSON on `Accept: application/x-ndjson`.
+
+    Without `page_limit` rows are read page by page and serialized while
+    the response is written, so the memory of the worker doesn't depend on
+    the collection size.
+    """
+
+    __stream_chunk_size__ = 100
+
+    _ndjson = False
+
+    def do_collection(self, parent_resource: tp.Any = None) -> webob.Response:
+        self._ndjson = self._req.method == "GET" and is_ndjson_accepted(self._req)
+        return super().do_collection(parent_resource=parent_resource)
+
+    def _process_storage_filters(
+        self, filters: tp.Any, order_by: dict[str, str] | None = None
+    ) -> tp.Any:
+        if self._ndjson and not self._pagination_limit:
+            self._validate_params(filters, order_by)
+            return iter_models(
+                self.model, filters, order_by, self.__stream_chunk_size__
+            )
+        return super()._process_storage_filters(filters, order_by=order_by)
+
+    def _create_response(
+        self,
+        body: tp.Any,
+        status: int,
+        headers: dict[str, str],
+        *args: tp.Any,
+        **kwargs: tp.Any,
+    ) -> webob.Response:
+        if not self._ndjson:
+            return super()._create_response(body, status, headers, *args, **kwargs)
+
+        headers["Content-Type"] = packers.CONTENT_TYPE_APPLICATION_NDJSON
+        if isinstance(body, list):
+            return super()._create_response(body, status, headers, *args, **kwargs)
+
+        packer = self.get_packer(packers.CONTENT_TYPE_APPLICATION_NDJSON)
+        return webob.Response(
+            app_iter=packer.iter_pack(body),
+            status=status,
+            headerlist=list(headers.items()),
+        )
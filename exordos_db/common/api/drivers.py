@@ -0,0 +1,165 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import copy
+import hashlib
+import logging
+import threading
+import time
+import typing as tp
+
+from gcl_iam import algorithms
+from gcl_iam import drivers
+from gcl_iam import exceptions
+from gcl_iam import tokens
+import prometheus_client
+
+LOG = logging.getLogger(__name__)
+
+INTROSPECTION_CACHE_HITS = prometheus_client.Counter(
+    "exordos_db_iam_introspection_cache_hits",
+    "Token introspections served from the local cache",
+)
+INTROSPECTION_CACHE_MISSES = prometheus_client.Counter(
+    "exordos_db_iam_introspection_cache_misses",
+    "Token introspections requested from IAM",
+)
+
+
+class CachedHttpDriver(drivers.HttpDriver):
+    """IAM driver caching token introspection results.
+
+    Tokens are verified locally (signature, audience and expiration) with
+    the keys from IAM JWKS decrypted by `hs256_jwks_decryption_key` before
+    the introspection is requested. So the introspection result of a valid
+    token is cached by the token hash until the token expires or
+    `introspection_cache_ttl` passes, whichever comes first. The least
+    recently used entries are evicted above `introspection_cache_size`.
+    Requests with an OTP code always go to IAM.
+
+    If IAM JWKS can't be fetched the previous keys are used and the fetch
+    isn't retried for `jwks_retry_interval` seconds, so requests don't wait
+    for IAM timeouts one after another.
+    """
+
+    def __init__(
+        self,
+        *args: tp.Any,
+        introspection_cache_size: int = 1024,
+        introspection_cache_ttl: float = 60,
+        jwks_retry_interval: float = 30,
+        **kwargs: tp.Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self._introspection_cache_size = introspection_cache_size
+        self._introspection_cache_ttl = introspection_cache_ttl
+        self._introspection_cache: collections.OrderedDict[
+            str, tuple[float, dict[str, tp.Any]]
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._jwks_retry_interval = jwks_retry_interval
+        self._last_algorithm: algorithms.AbstractAlgorithm | None = None
+        self._jwks_failed_at: float | None = None
+
+    @staticmethod
+    def _get_cache_key(token_info: tokens.UnverifiedToken) -> str:
+        return hashlib.sha256(token_info.token.encode()).hexdigest()
+
+    def _get_expiration(self, token_info: tokens.UnverifiedToken) -> float:
+        expiration = time.time() + self._introspection_cache_ttl
+        try:
+            return min(expiration, token_info.expiration_datetime.timestamp())
+        except (AttributeError, KeyError):
+            return expiration
+
+    def _cache_get(self, key: str) -> dict[str, tp.Any] | None:
+        with self._lock:
+            entry = self._introspection_cache.get(key)
+            if entry is None:
+                return None
+
+            expiration, info = entry
+            if expiration <= time.time():
+                del self._introspection_cache[key]
+                return None
+
+            self._introspection_cache.move_to_end(key)
+            return info
+
+    def _cache_set(self, key: str, expiration: float, info: dict[str, tp.Any]) -> None:
+        with self._lock:
+            self._introspection_cache[key] = (expiration, info)
+            self._introspection_cache.move_to_end(key)
+            while len(self._introspection_cache) > self._introspection_cache_size:
+                self._introspection_cache.popitem(last=False)
+
+    def get_introspection_info(
+        self, token_info: tokens.UnverifiedToken, otp_code: str | None = None
+    ) -> dict[str, tp.Any]:
+        # One-time codes must be checked by IAM every time
+        if otp_code is not None:
+            return super().get_introspection_info(token_info, otp_code=otp_code)
+
+        key = self._get_cache_key(token_info)
+        info = self._cache_get(key)
+        if info is not None:
+            INTROSPECTION_CACHE_HITS.inc()
+            # The IAM engine amends the returned info
+            return copy.deepcopy(info)
+
+        INTROSPECTION_CACHE_MISSES.inc()
+        info = super().get_introspection_info(token_info, otp_code=otp_code)
+        if info:
+            self._cache_set(key, self._get_expiration(token_info), info)
+            return copy.deepcopy(info)
+        return info
+
+    def _is_jwks_retry_delayed(self) -> bool:
+        return (
+            self._jwks_failed_at is not None
+            and time.monotonic() - self._jwks_failed_at < self._jwks_retry_interval
+        )
+
+    def get_algorithm(
+        self, token_info: tokens.UnverifiedToken
+    ) -> algorithms.AbstractAlgorithm:
+        if self._last_algorithm is not None and self._is_jwks_retry_delayed():
+            if token_info.audience_name != self._audience:
+                raise exceptions.TokenAudienceMismatchError(
+                    token_audience=token_info.audience_name,
+                    service_audience=self._audience,
+                )
+            return self._last_algorithm
+
+        try:
+            algorithm = super().get_algorithm(token_info)
+        except exceptions.TokenAudienceMismatchError:
+            raise
+        except Exception:
+            # Keep verifying tokens locally while IAM JWKS is unavailable
+            if self._last_algorithm is None:
+                raise
+            self._jwks_failed_at = time.monotonic()
+            LOG.exception(
+                "Unable to refresh IAM keys, use the previous ones for %ss:",
+                self._jwks_retry_interval,
+            )
+            return self._last_algorithm
+
+        self._jwks_failed_at = None
+        self._last_algorithm = algorithm
+        return algorithm
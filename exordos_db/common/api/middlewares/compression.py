@@ -0,0 +1,161 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import logging
+import typing as tp
+import zlib
+
+from oslo_config import cfg
+from restalchemy.api import middlewares
+import webob
+import zstandard
+
+LOG = logging.getLogger(__name__)
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+DEFAULT_ENCODINGS = (ZSTD, GZIP)
+DEFAULT_MIN_SIZE = 1024
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/openmetrics-text",
+    "text/",
+)
+
+
+class Encoder(tp.Protocol):
+    def compress(self, data: bytes, /) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+ENCODERS: dict[str, tp.Callable[[], Encoder]] = {
+    GZIP: lambda: zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS),
+    ZSTD: lambda: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj(),
+}
+
+compression_opts = [
+    cfg.ListOpt(
+        "compression-encodings",
+        default=list(DEFAULT_ENCODINGS),
+        help=(
+            "Response encodings in order of preference, supported: "
+            f"{', '.join(ENCODERS)}. Empty list disables compression"
+        ),
+    ),
+    cfg.IntOpt(
+        "compression-min-size",
+        default=DEFAULT_MIN_SIZE,
+        min=0,
+        help="Responses smaller than this size in bytes aren't compressed",
+    ),
+]
+
+
+def iter_encode(app_iter: tp.Iterable[bytes], encoder: Encoder) -> tp.Iterator[bytes]:
+    try:
+        for chunk in app_iter:
+            data = encoder.compress(chunk)
+            if data:
+                yield data
+        yield encoder.flush()
+    finally:
+        if hasattr(app_iter, "close"):
+            app_iter.close()
+
+
+class CompressionMiddleware(middlewares.Middleware):
+    """Compress responses with the encoding negotiated by `Accept-Encoding`.
+
+    Responses with a known length below `min_size` are sent as is, streamed
+    responses are compressed chunk by chunk while they are sent.
+    """
+
+    def __init__(
+        self,
+        application: tp.Callable,
+        encodings: tp.Iterable[str] = DEFAULT_ENCODINGS,
+        min_size: int = DEFAULT_MIN_SIZE,
+    ) -> None:
+        super().__init__(application)
+        for encoding in encodings:
+            if encoding not in ENCODERS:
+                raise ValueError(f"Unsupported encoding: {encoding}")
+        self._encodings = list(encodings)
+        self._min_size = min_size
+
+    def _get_encoding(self, req: webob.Request) -> str | None:
+        # No header means the client doesn't expect encoded responses
+        if not self._encodings or "Accept-Encoding" not in req.headers:
+            return None
+
+        offers = req.accept_encoding.acceptable_offers(self._encodings)
+        return offers[0][0] if offers else None
+
+    @staticmethod
+    def _is_compressible(response: webob.Response) -> bool:
+        content_type = response.content_type or ""
+        return (
+            200 <= response.status_code
+            and response.status_code != 204
+            and "Content-Encoding" not in response.headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+
+    @staticmethod
+    def _weaken_etag(response: webob.Response) -> None:
+        # The encoded body differs byte by byte from the original one
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            response.headers["ETag"] = f"W/{etag}"
+
+    def process_request(self, req: webob.Request) -> webob.Response:
+        response = req.get_response(self.application)
+        if response.status_code == 304:
+            # Keep the validator the same as in the encoded 200 response
+            if self._get_encoding(req) is not None:
+                self._weaken_etag(response)
+            return response
+
+        if req.method == "HEAD" or not self._is_compressible(response):
+            return response
+
+        response.vary = tuple(response.vary or ()) + ("Accept-Encoding",)
+        encoding = self._get_encoding(req)
+        if encoding is None:
+            return response
+
+        length = response.content_length
+        if length is not None and length < self._min_size:
+            return response
+
+        encoder = ENCODERS[encoding]()
+        if length is not None:
+            response.body = encoder.compress(response.body) + encoder.flush()
+        else:
+            response.app_iter = iter_encode(response.app_iter, encoder)
+            response.content_length = None
+
+        response.content_encoding = encoding
+        self._weaken_etag(response)
+        return response
@@ -0,0 +1,216 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import os
+import pwd
+import time
+import typing as tp
+
+import prometheus_client
+from prometheus_client import multiprocess
+from restalchemy.api import middlewares
+from restalchemy.api import routes
+from restalchemy.storage.sql import engines
+import webob
+
+LOG = logging.getLogger(__name__)
+
+METRICS_PATH = "/metrics"
+# Set by the service unit, the directory is shared by all workers
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# The route label of requests not matching any route
+OTHER_ROUTE = "other"
+
+REQUEST_LATENCY = prometheus_client.Histogram(
+    "exordos_db_http_request_duration_seconds",
+    "HTTP request latency",
+    ("method", "route", "status"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = prometheus_client.Gauge(
+    "exordos_db_http_requests_in_progress",
+    "HTTP requests in progress",
+    ("method",),
+    multiprocess_mode="livesum",
+)
+REQUEST_ERRORS = prometheus_client.Counter(
+    "exordos_db_http_request_errors",
+    "HTTP requests finished with an error",
+    ("method", "route", "status"),
+)
+DB_POOL_SIZE = prometheus_client.Gauge(
+    "exordos_db_db_pool_size",
+    "Connections opened by the DB pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_AVAILABLE = prometheus_client.Gauge(
+    "exordos_db_db_pool_available",
+    "Idle connections in the DB pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITING = prometheus_client.Gauge(
+    "exordos_db_db_pool_requests_waiting",
+    "Requests waiting for a DB pool connection",
+    multiprocess_mode="livesum",
+)
+
+
+def get_route(path: str, route_class: type[routes.Route]) -> str:
+    """Return the route template to keep metric labels cardinality low.
+
+    The path is matched against the route tree the same way the application
+    dispatches it, resource ids are replaced by `{id}`. Anything not
+    matching a route, like a scan by random paths, gets one `other` label.
+    """
+    segments = path.split("/")[1:]
+    template = [""]
+    route = route_class
+    while segments:
+        name = segments.pop(0)
+        if not segments:
+            # Collection or resource method
+            template.append("{id}" if name else "")
+            return "/".join(template)
+        if not name:
+            return OTHER_ROUTE
+
+        if route.is_route(name):
+            route = route.get_route(name)
+            if route.is_resource_route():
+                return OTHER_ROUTE
+            template.append(name)
+            continue
+
+        template.append("{id}")
+        name = segments.pop(0)
+        if name == "actions" and segments:
+            action_name = segments.pop(0)
+            if not route.is_action(action_name) or segments not in ([], ["invoke"]):
+                return OTHER_ROUTE
+            return "/".join(template + [name, action_name] + segments)
+
+        # Intermediate resource route
+        if not segments or not route.is_route(name):
+            return OTHER_ROUTE
+        route = route.get_route(name)
+        if route.is_collection_route():
+            return OTHER_ROUTE
+        template.append(name)
+
+    return OTHER_ROUTE
+
+
+def get_registry() -> prometheus_client.CollectorRegistry:
+    if MULTIPROC_DIR_ENV not in os.environ:
+        return prometheus_client.REGISTRY
+
+    # Aggregate metrics of all worker processes
+    registry = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def build_metrics_application() -> tp.Callable:
+    """Return a WSGI application serving only the metrics."""
+    return prometheus_client.make_wsgi_app(get_registry())
+
+
+def prepare_multiproc_dir(owner: str | None = None) -> None:
+    """Empty the multiprocess directory and give it to the workers.
+
+    Files of the previous run would be summed with the new ones. Workers
+    downgraded to `owner` after fork create their files in the directory,
+    so it's owned by them.
+    """
+    directory = os.environ.get(MULTIPROC_DIR_ENV)
+    if directory is None:
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+    if owner is not None and os.getuid() == 0:
+        user = pwd.getpwnam(owner)
+        os.chown(directory, user.pw_uid, user.pw_gid)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop live gauges of a stopped worker, its files stay in the dir."""
+    if MULTIPROC_DIR_ENV in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+class PrometheusMetricsMiddleware(middlewares.Middleware):
+    """Collect request metrics and expose them on the /metrics endpoint.
+
+    Pass `metrics_path=None` to serve the metrics by a separate application
+    if the API is public, the endpoint isn't protected by the auth.
+    """
+
+    def __init__(
+        self,
+        application: tp.Callable,
+        route_class: type[routes.Route],
+        metrics_path: str | None = METRICS_PATH,
+    ) -> None:
+        super().__init__(application)
+        self._route_class = route_class
+        self._metrics_path = metrics_path
+
+    def _observe_db_pool(self) -> None:
+        try:
+            pool = getattr(engines.engine_factory.get_engine(), "_pool", None)
+        except ValueError:
+            # The engine isn't configured yet
+            return
+
+        if pool is None or not hasattr(pool, "get_stats"):
+            return
+
+        stats = pool.get_stats()
+        DB_POOL_SIZE.set(stats.get("pool_size", 0))
+        DB_POOL_AVAILABLE.set(stats.get("pool_available", 0))
+        DB_POOL_WAITING.set(stats.get("requests_waiting", 0))
+
+    def _metrics_response(self) -> webob.Response:
+        return webob.Response(
+            body=prometheus_client.generate_latest(get_registry()),
+            content_type=prometheus_client.CONTENT_TYPE_LATEST.split(";")[0],
+            charset="utf-8",
+        )
+
+    def process_request(self, req: webob.Request) -> webob.Response:
+        if self._metrics_path is not None and req.path == self._metrics_path:
+            return self._metrics_response()
+
+        route = get_route(req.path, self._route_class)
+        status = 500
+        start = time.monotonic()
+        with REQUESTS_IN_PROGRESS.labels(req.method).track_inprogress():
+            try:
+                response = req.get_response(self.application)
+                status = response.status_code
+                return response
+            finally:
+                REQUEST_LATENCY.labels(req.method, route, status).observe(
+                    time.monotonic() - start
+                )
+                if status >= 400:
+                    REQUEST_ERRORS.labels(req.method, route, status).inc()
+                self._observe_db_pool()
@@ -0,0 +1,43 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import typing as tp
+
+import orjson
+from restalchemy.api import packers
+
+CONTENT_TYPE_APPLICATION_NDJSON = "application/x-ndjson"
+
+
+class NDJSONPacker(packers.JSONPacker):
+    """Newline delimited JSON, one resource per line."""
+
+    def iter_pack(self, obj: tp.Iterable[tp.Any]) -> tp.Iterator[bytes]:
+        for resource in obj:
+            yield (
+                orjson.dumps(
+                    self.pack_resource(resource), option=orjson.OPT_NON_STR_KEYS
+                )
+                + b"\n"
+            )
+
+    def pack(self, obj: tp.Any) -> tp.Any:
+        if isinstance(obj, list):
+            return b"".join(self.iter_pack(obj))
+        return super().pack(obj)
+
+
+packers.set_packer(CONTENT_TYPE_APPLICATION_NDJSON, NDJSONPacker)
@@ -22,3 +22,5 @@ PATRONI_DIR = "/var/lib/postgresql/patroni"
 PATRONI_CONFIG_FILE = f"{PATRONI_DIR}/patroni.yml"
 PATRONI_API_PORT = 8008
 PATRONI_API_ENDPOINT = f"http://127.0.0.1:{PATRONI_API_PORT}"
+PATRONI_API_USERNAME = "patroni"
+PATRONI_API_PASSWORD = "patroni"
@@ -15,13 +15,32 @@
 #    under the License.
 
 import base64
+from concurrent import futures
+from concurrent.futures import process
 import hashlib
 import hmac
+import os
 import re
 from secrets import token_bytes
+import threading
+import typing as tp
 
 from exordos_db.common.pg_auth import saslprep
 
+DEFAULT_ITERATIONS = 4096
+# Smaller batches are hashed in the calling process, starting workers
+# costs more than hashing a few passwords
+MIN_PARALLEL_BATCH = 4
+
+# The pool is shared by all batches of the process and started on the first
+# parallel batch, so the API workers fork their own pools after they start
+_executor: futures.ProcessPoolExecutor | None = None
+_executor_workers: int | None = None
+_executor_lock = threading.Lock()
+
+# `(password, salt_bytes, iterations)` of a batch
+ScramItem = tuple[str, bytes | None, int]
+
 
 def verify_password(role, password, verifier, method="scram-sha-256"):
     """
@@ -64,7 +83,11 @@ def _md5_password(role, password):
     )
 
 
-def scram_sha_256(password, salt_bytes=None, iterations=4096):
+def scram_sha_256(
+    password: str,
+    salt_bytes: bytes | None = None,
+    iterations: int = DEFAULT_ITERATIONS,
+) -> str:
     """
     Build a SCRAM-SHA-256 password verifier.
 
@@ -72,8 +95,8 @@ def scram_sha_256(password, salt_bytes=None, iterations=4096):
     """
     if salt_bytes is None:
         salt_bytes = token_bytes(16)
-    password = saslprep.saslprep(password).encode("utf-8")
-    salted_password = hashlib.pbkdf2_hmac("sha256", password, salt_bytes, iterations)
+    prepared = saslprep.saslprep(password).encode("utf-8")
+    salted_password = hashlib.pbkdf2_hmac("sha256", prepared, salt_bytes, iterations)
     stored_key = hmac.new(salted_password, b"Client Key", "sha256").digest()
     stored_key = hashlib.sha256(stored_key).digest()
     server_key = hmac.new(salted_password, b"Server Key", "sha256").digest()
@@ -83,3 +106,67 @@ def scram_sha_256(password, salt_bytes=None, iterations=4096):
         base64.b64encode(stored_key).decode("ascii"),
         base64.b64encode(server_key).decode("ascii"),
     )
+
+
+def _scram_sha_256_item(item: ScramItem) -> str:
+    return scram_sha_256(*item)
+
+
+def configure_executor(max_workers: int | None = None) -> None:
+    """Set the number of processes hashing batches, CPUs by default.
+
+    The running pool is shut down, the next batch starts a new one.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+        _executor_workers = max_workers
+
+
+def _get_executor_workers() -> int:
+    return _executor_workers or os.cpu_count() or 1
+
+
+def _get_executor() -> futures.ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = futures.ProcessPoolExecutor(max_workers=_get_executor_workers())
+        return _executor
+
+
+def _drop_executor(executor: futures.ProcessPoolExecutor) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+
+
+def scram_sha_256_batch(
+    items: tp.Iterable[ScramItem], processes: int | None = None
+) -> list[str]:
+    """
+    Build SCRAM-SHA-256 verifiers of `(password, salt_bytes, iterations)`
+    tuples in the shared pool. The batch is split for `processes` workers,
+    all workers of the pool by default.
+
+    SASLprep and the HMACs around PBKDF2 hold the GIL, so the batch is
+    spread over processes rather than threads. Verifiers are returned in
+    the order of the items, a random salt is used for `None` salts as in
+    `scram_sha_256`.
+    """
+    items = list(items)
+    workers = min(processes or _get_executor_workers(), len(items))
+    if workers <= 1 or len(items) < MIN_PARALLEL_BATCH:
+        return [_scram_sha_256_item(item) for item in items]
+
+    chunksize = max(len(items) // (workers * 4), 1)
+    executor = _get_executor()
+    try:
+        return list(executor.map(_scram_sha_256_item, items, chunksize=chunksize))
+    except process.BrokenProcessPool:
+        # A worker has died, the next batch starts a new pool
+        _drop_executor(executor)
+        raise
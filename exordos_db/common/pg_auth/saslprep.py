@@ -32,8 +32,14 @@ except ImportError:
 
 else:
     HAVE_STRINGPREP = True
+    import functools
+    import typing as tp
     import unicodedata
 
+    # Non-ASCII strings prepared recently, `verify_password` prepares the
+    # same password again and again
+    CACHE_SIZE = 256
+
     # RFC4013 section 2.3 prohibited output.
     _PROHIBITED = (
         # A strict reading of RFC 4013 requires table c12 here, but
@@ -69,6 +75,19 @@ else:
         if not isinstance(data, str):
             return data
 
+        # None of the mapping, normalization and bidi rules change printable
+        # ASCII and the only prohibited ASCII characters are the controls
+        if data.isascii():
+            if not data.isprintable():
+                raise ValueError("SASLprep: failed prohibited character check")
+            return data
+
+        return _saslprep(data, prohibit_unassigned_code_points)
+
+    @functools.lru_cache(maxsize=CACHE_SIZE)
+    def _saslprep(data: str, prohibit_unassigned_code_points: bool) -> str:
+        """The full SASLprep, results of valid strings are cached."""
+        prohibited: tuple[tp.Callable[[str], bool], ...]
         if prohibit_unassigned_code_points:
             prohibited = _PROHIBITED + (stringprep.in_table_a1,)
         else:
@@ -91,6 +110,9 @@ else:
         # RFC3454 section 2, step 2 - Normalize
         # RFC4013 section 2.2 normalization
         data = unicodedata.ucd_3_2_0.normalize("NFKC", data)
+        if not data:
+            # Everything is mapped to nothing
+            return data
 
         in_table_d1 = stringprep.in_table_d1
         if in_table_d1(data[0]):
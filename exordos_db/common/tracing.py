@@ -0,0 +1,244 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Spans of the reconcile pipeline exported to a local file.
+
+A change of an instance goes through the user API, the builder, the agent
+and the status API, the components don't share any request context. So
+the trace context is derived from what every stage already has:
+
+- the user API and the builder know the instance generation, its
+  `updated_at`, the trace of a change is `change_trace_id()`;
+- the builder turns the generation into target resources of the nodes,
+  the agent and the status API see only the resource hash, the trace of a
+  node resource is `resource_trace_id()`. The build span links to traces
+  of the node resources, the following spans belong to or link to them.
+
+Spans are appended to `[tracing] span_file` as JSON lines, see
+`exordos-db-trace` to print the critical path of a change.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+import typing as tp
+import uuid as sys_uuid
+
+from oslo_config import cfg
+
+tracing_opts = [
+    cfg.StrOpt(
+        "span_file",
+        default=None,
+        help="Append spans to this file as JSON lines, disabled if not set",
+    ),
+]
+
+cfg.CONF.register_cli_opts(tracing_opts, "tracing")
+
+
+def format_generation(generation: tp.Any) -> str:
+    if isinstance(generation, datetime.datetime):
+        return generation.astimezone(datetime.timezone.utc).isoformat()
+    return str(generation)
+
+
+def change_trace_id(instance_uuid: tp.Any, generation: tp.Any) -> str:
+    """Trace of the instance change, `generation` is its `updated_at`."""
+    return sys_uuid.uuid5(
+        sys_uuid.UUID(str(instance_uuid)), format_generation(generation)
+    ).hex
+
+
+def resource_trace_id(resource_uuid: tp.Any, resource_hash: str) -> str:
+    """Trace of the target resource with the given hash."""
+    return sys_uuid.uuid5(sys_uuid.UUID(str(resource_uuid)), resource_hash).hex
+
+
+class Span:
+    """A timed stage of a trace, `links` are IDs of related traces."""
+
+    recording = True
+    dropped = False
+
+    def __init__(
+        self,
+        name: str,
+        component: str | None,
+        trace_id: str | None = None,
+        parent_id: str | None = None,
+        **attributes: tp.Any,
+    ) -> None:
+        self.name = name
+        self.component = component
+        self.trace_id = trace_id
+        self.span_id = sys_uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.links: list[str] = []
+        self.start = time.time()
+        self.end: float | None = None
+
+    def set_attribute(self, name: str, value: tp.Any) -> None:
+        self.attributes[name] = value
+
+    def add_link(self, trace_id: str) -> None:
+        self.links.append(trace_id)
+
+    def drop(self) -> None:
+        """Don't export the span, e.g. nothing has changed."""
+        self.dropped = True
+
+    def dump(self) -> dict[str, tp.Any]:
+        return {
+            "name": self.name,
+            "component": self.component,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "end": self.end,
+            "attributes": self.attributes,
+            "links": self.links,
+        }
+
+
+class NoopSpan:
+    """Span of a disabled tracer, all changes are ignored."""
+
+    recording = False
+    trace_id: str | None = None
+
+    def set_attribute(self, name: str, value: tp.Any) -> None:
+        pass
+
+    def add_link(self, trace_id: str) -> None:
+        pass
+
+    def drop(self) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class FileExporter:
+    """Append spans to a file as JSON lines.
+
+    Every span is written by a single `write` to a file opened with
+    `O_APPEND`, so forked workers may share the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.dump(), default=str, separators=(",", ":"))
+        os.write(self._fd, (line + "\n").encode())
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class Tracer:
+    def __init__(
+        self, component: str | None = None, exporter: FileExporter | None = None
+    ) -> None:
+        self.component = component
+        self._exporter = exporter
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    def _stack(self) -> list[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def span(
+        self, name: str, trace_id: str | None = None, **attributes: tp.Any
+    ) -> tp.Iterator[Span | NoopSpan]:
+        """Time the block, the trace is inherited from the enclosing span."""
+        if self._exporter is None:
+            yield NOOP_SPAN
+            return
+
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if parent is not None and trace_id is None:
+            trace_id = parent.trace_id
+        span = Span(
+            name,
+            self.component,
+            trace_id=trace_id,
+            parent_id=parent.span_id if parent is not None else None,
+            **attributes,
+        )
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_attribute("error", repr(e))
+            raise
+        finally:
+            stack.pop()
+            span.end = time.time()
+            if not span.dropped:
+                self._exporter.export(span)
+
+
+_tracer = Tracer()
+
+
+def configure(component: str, span_file: str | None = None) -> None:
+    """Set up the tracer of the service, `span_file` defaults to the config."""
+    global _tracer
+    if span_file is None:
+        span_file = cfg.CONF.tracing.span_file
+    exporter = FileExporter(span_file) if span_file else None
+    _tracer = Tracer(component, exporter)
+
+
+def is_enabled() -> bool:
+    return _tracer.enabled
+
+
+def span(
+    name: str, trace_id: str | None = None, **attributes: tp.Any
+) -> tp.ContextManager[Span | NoopSpan]:
+    return _tracer.span(name, trace_id=trace_id, **attributes)
+
+
+def load_spans(paths: tp.Iterable[str]) -> list[dict[str, tp.Any]]:
+    """Read spans from files of all components, skipping broken lines."""
+    spans = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    # The last line of a killed service may be cut
+                    continue
+    spans.sort(key=lambda s: s["start"])
+    return spans
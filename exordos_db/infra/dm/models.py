@@ -50,6 +50,7 @@ class PGInstance(models.PGInstance, ua_models.InstanceWithDerivativesMixin):
                 "cpu",
                 "ram",
                 "disk_size",
+                "wal_disk_size",
                 "nodes_number",
                 "sync_replica_number",
                 "version",
@@ -82,6 +83,23 @@ class PGInstance(models.PGInstance, ua_models.InstanceWithDerivativesMixin):
 
         return config
 
+    def get_disk_spec(self) -> sdk_models.SetDisksSpec:
+        disks = [
+            {
+                "size": ROOT_DISK_SIZE,
+                "image": self.version.image,
+                "label": "root",
+            },
+            {
+                "size": self.disk_size,
+                "label": "data",
+            },
+        ]
+        if self.wal_disk_size:
+            disks.append({"size": self.wal_disk_size, "label": "wal"})
+
+        return sdk_models.SetDisksSpec(disks=disks)
+
     def get_infra(
         self,
         project_id: sys_uuid.UUID,
@@ -94,19 +112,7 @@ class PGInstance(models.PGInstance, ua_models.InstanceWithDerivativesMixin):
             name=f"dbaas-dp-{self.uuid}",
             cores=self.cpu,
             ram=self.ram,
-            disk_spec=sdk_models.SetDisksSpec(
-                disks=[
-                    {
-                        "size": ROOT_DISK_SIZE,
-                        "image": self.version.image,
-                        "label": "root",
-                    },
-                    {
-                        "size": self.disk_size,
-                        "label": "data",
-                    },
-                ]
-            ),
+            disk_spec=self.get_disk_spec(),
             replicas=self.nodes_number,
             project_id=project_id,
             status=sdk_c.NodeStatus.NEW.value,
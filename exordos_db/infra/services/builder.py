@@ -19,6 +19,7 @@ import uuid as sys_uuid
 import typing as tp
 import uuid
 
+import yaml
 from oslo_config import cfg
 from gcl_looper.services.oslo import base as oslo_base
 from gcl_sdk.infra.services import builder
@@ -29,7 +30,10 @@ from gcl_sdk.agents.universal.drivers import core as core_drivers
 from gcl_sdk.common.oslo import types as sdk_cfg_types
 from restalchemy.dm import filters as dm_filters
 
+from exordos_db.common import constants as c
 from exordos_db.infra.dm import models
+from exordos_db.infra.services import rolling
+from exordos_db.user_api.dm import models as user_models
 
 LOG = logging.getLogger(__name__)
 NODE_KIND = sdk_models.Node.get_resource_kind()
@@ -37,6 +41,15 @@ NODE_SET_KIND = sdk_models.NodeSet.get_resource_kind()
 CONFIG_KIND = sdk_models.Config.get_resource_kind()
 
 PATRONI_RAFT_PORT = 5010
+# Mount point of the dedicated WAL disk is prepared by the node bootstrap,
+# pg_wal is a subdirectory since initdb requires an empty directory
+PATRONI_WAL_DIR = "/var/lib/postgresql/patroni/wal/pg_wal"
+PATRONI_DATA_DIR = "/var/lib/postgresql/patroni/data/"
+# Patroni default, 0 means the node is never synchronous
+DEFAULT_SYNC_PRIORITY = 1
+# Standbys are reordered only if their flush lags differ at least by this,
+# so close ones don't swap priorities and reload Patroni on every jitter
+SYNC_PRIORITY_MIN_LAG_DIFF_MS = 20
 
 
 PATRONI_CONF_TEMPLATE = """\
@@ -45,18 +58,18 @@ namespace: /db/
 name: "{node_name}"
 
 restapi:
-  listen: "0.0.0.0:8008"
-  connect_address: "{node_ip}:8008"
+  listen: "0.0.0.0:{patroni_api_port}"
+  connect_address: "{node_ip}:{patroni_api_port}"
   authentication:
-    username: patroni
-    password: patroni
+    username: {patroni_api_username}
+    password: {patroni_api_password}
 
 raft:
   data_dir: /var/lib/postgresql/patroni/raft/
   self_addr: "{node_ip}:5010"
   partner_addrs: {raft_partner_addrs}
 
-bootstrap:
+bootstrap:{recovery}
   dcs:
     ttl: 30
     loop_wait: 10
@@ -98,12 +111,12 @@ bootstrap:
   - encoding: UTF8
   - data-checksums
   - auth-local: peer
-  - auth-host: scram-sha-256
+  - auth-host: scram-sha-256{initdb_waldir}
 
 postgresql:
   listen: "0.0.0.0:5432"
   connect_address: "{node_ip}:5432"
-  data_dir: /var/lib/postgresql/patroni/data/
+  data_dir: {data_dir}
   bin_dir: /usr/sbin
   pgpass: /tmp/pgpass0
   authentication:
@@ -115,11 +128,18 @@ postgresql:
       password: my-super-password
     rewind:
       username: dbaas_rewinder
-      password: rewind_password
+      password: rewind_password{basebackup}
   parameters:
     unix_socket_directories: '/var/run/postgresql,/tmp'
     io_method: 'io_uring'
+    # Query statistics for the top queries API
+    shared_preload_libraries: 'pg_stat_statements'
+    pg_stat_statements.track: 'top'
+    pg_stat_statements.max: 5000
+    track_io_timing: 'on'
   pg_hba:
+  # Physical backups are made by the agent with pg_basebackup
+  - local replication postgres peer map=exordos_map
   - host replication dbaas_replicator 0.0.0.0/0 scram-sha-256
   - host all all 0.0.0.0/0 scram-sha-256
   - local all all peer map=exordos_map
@@ -136,8 +156,69 @@ tags:
   noloadbalance: false
   clonefrom: false
   nosync: false
+  sync_priority: {sync_priority}
 """
 
+# Custom bootstrap of instances created by point-in-time recovery, the
+# cluster is restored from a physical backup of the source instance and
+# its archived WAL, see `exordos_db.cmd.wal`
+PATRONI_RECOVERY_TEMPLATE = """
+  method: exordos_recovery
+  exordos_recovery:
+    command: "exordos-db-wal restore-base {source} {backup} --datadir {data_dir}{waldir}"
+    no_params: true
+    keep_existing_recovery_conf: false
+    recovery_conf:
+      restore_command: "exordos-db-wal fetch {source} %f %p"
+      recovery_target_action: promote
+      recovery_target_timeline: latest{target_time}"""
+
+
+def get_sync_priorities(
+    node_uuids: tp.Collection[str],
+    latency: dict[str, dict[str, tp.Any]],
+    rendered: dict[str, int],
+) -> dict[str, int]:
+    """Return Patroni `sync_priority` tag value for every node.
+
+    Standbys with lower flush lag measured by the primary get higher
+    priority, so Patroni prefers the fastest ones as synchronous. The
+    rendered order is kept unless a standby is faster than the one ahead
+    of it by `SYNC_PRIORITY_MIN_LAG_DIFF_MS`. Nodes without measurements,
+    like idle standbys and the primary, keep their places.
+    """
+    order = sorted(
+        node_uuids, key=lambda u: (-rendered.get(u, DEFAULT_SYNC_PRIORITY), u)
+    )
+    lags = {
+        u: lag["flush_lag_ms"]
+        for u in order
+        if (lag := latency.get(u)) and lag.get("flush_lag_ms") is not None
+    }
+
+    # Reorder measured standbys in their places, a standby passes the one
+    # ahead of it only if it's noticeably faster
+    places = [idx for idx, u in enumerate(order) if u in lags]
+    measured = [order[idx] for idx in places]
+    moved = True
+    while moved:
+        moved = False
+        for idx in range(1, len(measured)):
+            ahead, node = measured[idx - 1], measured[idx]
+            if lags[node] + SYNC_PRIORITY_MIN_LAG_DIFF_MS <= lags[ahead]:
+                measured[idx - 1], measured[idx] = node, ahead
+                moved = True
+
+    new_order = list(order)
+    for idx, node in zip(places, measured):
+        new_order[idx] = node
+    if new_order == order:
+        return {u: rendered.get(u, DEFAULT_SYNC_PRIORITY) for u in node_uuids}
+    return {
+        u: DEFAULT_SYNC_PRIORITY + len(new_order) - 1 - idx
+        for idx, u in enumerate(new_order)
+    }
+
 
 class CoreInfraBuilder(builder.CoreInfraBuilder, oslo_base.OsloConfigurableService):
     def __init__(
@@ -161,6 +242,7 @@ class CoreInfraBuilder(builder.CoreInfraBuilder, oslo_base.OsloConfigurableServi
             config="/v1/config/configs/",
         )
         self._cclient = self.core_driver._client._client
+        self._resizer = rolling.RollingResizer(self._cclient)
 
     @classmethod
     def svc_get_config_opts(cls) -> tp.Collection[cfg.Opt]:
@@ -221,6 +303,9 @@ class CoreInfraBuilder(builder.CoreInfraBuilder, oslo_base.OsloConfigurableServi
             elif actual.get_resource_kind() == CONFIG_KIND:
                 configs.append(actual)
 
+        if nodeset is None:
+            raise ValueError(f"Instance {instance.uuid} has no node set")
+
         if nodeset.nodes:
             instance.ipsv4 = [node["ipv4"] for node in nodeset.nodes.values()]
 
@@ -258,6 +343,33 @@ class CoreInfraBuilder(builder.CoreInfraBuilder, oslo_base.OsloConfigurableServi
                     key.delete()
 
         sync_mode = "true" if instance.sync_replica_number else "false"
+        sync_priorities = get_sync_priorities(
+            nodeset.nodes.keys(),
+            self._get_replication_latency([instance.uuid])[instance.uuid],
+            self._get_rendered_sync_priorities([instance.uuid])[instance.uuid],
+        )
+
+        initdb_waldir = basebackup = recovery_waldir = ""
+        if instance.wal_disk_size:
+            initdb_waldir = f"\n  - waldir: {PATRONI_WAL_DIR}"
+            basebackup = f"\n  basebackup:\n  - waldir: {PATRONI_WAL_DIR}"
+            recovery_waldir = f" --waldir {PATRONI_WAL_DIR}"
+
+        recovery = ""
+        if instance.recovery_backup is not None:
+            target_time = ""
+            if instance.recovery_target_time is not None:
+                target_time = (
+                    "\n      recovery_target_time: "
+                    f"'{instance.recovery_target_time.isoformat()}'"
+                )
+            recovery = PATRONI_RECOVERY_TEMPLATE.format(
+                source=instance.recovery_source,
+                backup=instance.recovery_backup,
+                data_dir=PATRONI_DATA_DIR,
+                waldir=recovery_waldir,
+                target_time=target_time,
+            )
 
         # Just recreate configs, it'll be updated in DB if already exist
         for node_uuid, node in nodeset.nodes.items():
@@ -269,6 +381,14 @@ class CoreInfraBuilder(builder.CoreInfraBuilder, oslo_base.OsloConfigurableServi
                 sync_mode=sync_mode,
                 sync_replica_number=instance.sync_replica_number,
                 on_change=instance.OnReloadFunc,
+                patroni_api_port=c.PATRONI_API_PORT,
+                patroni_api_username=c.PATRONI_API_USERNAME,
+                patroni_api_password=c.PATRONI_API_PASSWORD,
+                sync_priority=sync_priorities[node_uuid],
+                initdb_waldir=initdb_waldir,
+                basebackup=basebackup,
+                recovery=recovery,
+                data_dir=PATRONI_DATA_DIR,
             )
             config = instance._create_config(
                 uuid.UUID(node_uuid), self._project_id, content
@@ -282,21 +402,15 @@ class CoreInfraBuilder(builder.CoreInfraBuilder, oslo_base.OsloConfigurableServi
                 # We already regenerated them earlier
                 continue
             elif target.get_resource_kind() == NODE_SET_KIND:
-                target.cores = instance.cpu
-                target.ram = instance.ram
-                target.disk_spec = sdk_models.SetDisksSpec(
-                    disks=[
-                        {
-                            "size": models.ROOT_DISK_SIZE,
-                            "image": instance.version.image,
-                            "label": "root",
-                        },
-                        {
-                            "size": instance.disk_size,
-                            "label": "data",
-                        },
-                    ]
-                )
+                # Nodes are resized one by one by the rolling resizer, the
+                # node set is updated only when all nodes are done
+                if (target.cores, target.ram) == (
+                    instance.cpu,
+                    instance.ram,
+                ) or self._resizer.is_completed(instance, nodeset):
+                    target.cores = instance.cpu
+                    target.ram = instance.ram
+                target.disk_spec = instance.get_disk_spec()
                 target.replicas = instance.nodes_number
                 tgt_nodeset = target
             else:
@@ -312,6 +426,133 @@ class CoreInfraBuilder(builder.CoreInfraBuilder, oslo_base.OsloConfigurableServi
 
         return (tgt_nodeset, *new_objects)
 
+    def _get_replication_latency(
+        self, instance_uuids: tp.Collection[sys_uuid.UUID]
+    ) -> dict[sys_uuid.UUID, dict[str, dict[str, tp.Any]]]:
+        """Return replication latency reported by nodes of the instances."""
+        latency: dict[sys_uuid.UUID, dict[str, dict[str, tp.Any]]] = {
+            u: {} for u in instance_uuids
+        }
+        node_targets = ua_models.TargetResource.objects.get_all(
+            filters={
+                "master": dm_filters.In(instance_uuids),
+                "kind": dm_filters.EQ(user_models.PG_INSTANCE_NODE_KIND),
+            },
+        )
+        if not node_targets:
+            return latency
+
+        masters = {t.uuid: t.master for t in node_targets}
+        nodes = {
+            str(res.node): masters[res.uuid]
+            for res in ua_models.Resource.objects.get_all(
+                filters={
+                    "uuid": dm_filters.In(masters.keys()),
+                    "kind": dm_filters.EQ(user_models.PG_INSTANCE_NODE_KIND),
+                },
+            )
+        }
+        # Only the primary reports it, along with its statistics
+        for node, stats in user_models.get_agent_stats(nodes).items():
+            latency[nodes[node]].update(stats.get("replication_latency", {}))
+        return latency
+
+    def _get_rendered_sync_priorities(
+        self, instance_uuids: tp.Collection[sys_uuid.UUID]
+    ) -> dict[sys_uuid.UUID, dict[str, int]]:
+        rendered: dict[sys_uuid.UUID, dict[str, int]] = {u: {} for u in instance_uuids}
+        configs = ua_models.TargetResource.objects.get_all(
+            filters={
+                "master": dm_filters.In(instance_uuids),
+                "kind": dm_filters.EQ(CONFIG_KIND),
+            },
+        )
+        for config in configs:
+            content = yaml.safe_load(config.value["body"]["content"])
+            rendered[config.master][content["name"]] = content["tags"].get(
+                "sync_priority", DEFAULT_SYNC_PRIORITY
+            )
+        return rendered
+
+    def _actualize_sync_priorities(
+        self, instances: dict[sys_uuid.UUID, models.PGInstance]
+    ) -> None:
+        # Patroni has nothing to choose from otherwise
+        candidates = [
+            i.uuid
+            for i in instances.values()
+            if 0 < i.sync_replica_number < i.nodes_number - 1
+        ]
+        if not candidates:
+            return
+
+        rendered = self._get_rendered_sync_priorities(candidates)
+        latency = self._get_replication_latency(candidates)
+        for instance_uuid in candidates:
+            instance = instances[instance_uuid]
+            try:
+                priorities = get_sync_priorities(
+                    rendered[instance_uuid],
+                    latency[instance_uuid],
+                    rendered[instance_uuid],
+                )
+                if rendered[instance_uuid] != priorities:
+                    # Trigger actualization to render the new priorities
+                    instance.update(force=True)
+            except Exception:
+                LOG.exception(
+                    "Error actualizing sync priorities of instance %s",
+                    instance.uuid,
+                )
+
+    def _actualize_rolling_resizes(
+        self, instances: dict[sys_uuid.UUID, models.PGInstance]
+    ) -> None:
+        target_nodesets = ua_models.TargetResource.objects.get_all(
+            filters={
+                "uuid": dm_filters.In(instances.keys()),
+                "kind": dm_filters.EQ(NODE_SET_KIND),
+            },
+        )
+        resizing = {
+            t.uuid
+            for t in target_nodesets
+            if (t.value["cores"], t.value["ram"])
+            != (instances[t.uuid].cpu, instances[t.uuid].ram)
+        }
+        if not resizing:
+            return
+
+        actual_nodesets = ua_models.Resource.objects.get_all(
+            filters={
+                "uuid": dm_filters.In(resizing),
+                "kind": dm_filters.EQ(NODE_SET_KIND),
+            },
+        )
+        for res in actual_nodesets:
+            instance = instances[res.uuid]
+            nodeset = sdk_models.NodeSet.from_ua_resource(res)
+            try:
+                if self._resizer.step(instance, nodeset):
+                    # Trigger actualization to update the node set
+                    instance.update(force=True)
+            except Exception:
+                LOG.exception("Error resizing instance %s", instance.uuid)
+
+    def _model_iteration(self) -> None:
+        super()._model_iteration()
+
+        instances = {i.uuid: i for i in self._instance_model.objects.get_all()}
+        if not instances:
+            return
+
+        try:
+            self._actualize_rolling_resizes(instances)
+        except Exception:
+            LOG.exception("Error actualizing rolling resizes")
+
+        self._actualize_sync_priorities(instances)
+
     def pre_delete_instance_resource(self, resource):
         # Get actual nodeset to clean private keys of it's nodes
         target_resources = ua_models.TargetResource.objects.get_all(
@@ -0,0 +1,345 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import time
+import typing as tp
+import uuid as sys_uuid
+
+import requests
+from gcl_sdk.clients.http import base as http_base
+from gcl_sdk.infra import constants as sdk_c
+from gcl_sdk.infra.dm import models as sdk_models
+from requests.auth import HTTPBasicAuth
+
+from exordos_db.common import constants as c
+from exordos_db.infra.dm import models
+
+LOG = logging.getLogger(__name__)
+
+NODES_COLLECTION = "/v1/compute/nodes/"
+PATRONI_LEADER_ROLES = ("leader", "standby_leader")
+PATRONI_RUNNING_STATES = ("running", "streaming")
+# Same as `maximum_lag_on_failover` in the Patroni configuration
+MAX_REPLICA_LAG = 1048576
+PATRONI_TIMEOUT = 5
+# A step not done in time is retried
+STEP_TIMEOUT = 1800
+
+# Kinds of rolling steps
+RESIZE = "resize"
+SWITCHOVER = "switchover"
+
+
+class RollingStep:
+    """The step in flight, `node` is the resized node or the new leader."""
+
+    def __init__(
+        self,
+        kind: str,
+        node: str,
+        timeout: float = STEP_TIMEOUT,
+        start_time: str | None = None,
+    ) -> None:
+        self.kind = kind
+        self.node = node
+        self.deadline = time.monotonic() + timeout
+        # Start time of PostgreSQL on the resized node before the resize
+        self.start_time = start_time
+        # The resized node has been seen not ACTIVE, Core started the resize
+        self.left_active = False
+
+    def __repr__(self) -> str:
+        return f"{self.kind} of {self.node}"
+
+    def is_expired(self) -> bool:
+        return time.monotonic() > self.deadline
+
+
+class PatroniClusterClient:
+    """Client for Patroni REST API of the instance nodes."""
+
+    def __init__(self, ips: tp.Collection[str]) -> None:
+        self._ips = ips
+        self._client = requests.Session()
+        self._client.auth = HTTPBasicAuth(
+            c.PATRONI_API_USERNAME, c.PATRONI_API_PASSWORD
+        )
+
+    def _url(self, ip: str, path: str) -> str:
+        return f"http://{ip}:{c.PATRONI_API_PORT}/{path}"
+
+    def get_cluster(self) -> dict[str, tp.Any]:
+        # Any member knows the whole cluster state from the DCS
+        for ip in self._ips:
+            try:
+                response = self._client.get(
+                    self._url(ip, "cluster"), timeout=PATRONI_TIMEOUT
+                )
+                response.raise_for_status()
+                return response.json()
+            except requests.RequestException:
+                LOG.warning("Patroni on %s is not available", ip)
+        raise RuntimeError("Patroni cluster is not available")
+
+    def get_start_time(self, ip: str) -> str | None:
+        """Return the start time of PostgreSQL on the member, if it's known."""
+        try:
+            response = self._client.get(
+                self._url(ip, "patroni"), timeout=PATRONI_TIMEOUT
+            )
+            response.raise_for_status()
+        except requests.RequestException:
+            LOG.warning("Patroni on %s is not available", ip)
+            return None
+        return response.json().get("postmaster_start_time")
+
+    def switchover(self, ip: str, leader: str, candidate: str) -> None:
+        response = self._client.post(
+            self._url(ip, "switchover"),
+            json={"leader": leader, "candidate": candidate},
+            timeout=PATRONI_TIMEOUT,
+        )
+        response.raise_for_status()
+
+
+class RollingResizer:
+    """Resize instance nodes one by one, switching over the primary last.
+
+    Every step is derived from the actual node sizes in Core and the
+    Patroni cluster state. At most one step is in flight and the next one
+    starts only after it is finished:
+
+    1. Wait until all nodes are active and all replicas caught up.
+    2. Resize replicas.
+    3. Switch over to the most caught up replica.
+    4. Resize the old primary which is a replica now.
+
+    A resize is finished when Core reports the node ACTIVE with the new
+    size and Patroni sees it running with an acceptable lag after a restart.
+    The restart is known from the node having left ACTIVE or from the new
+    start time of PostgreSQL, so a resize done between two iterations
+    isn't missed. A switchover is finished when the candidate is the
+    leader. A step not done in `step_timeout` seconds is retried. Core
+    node sets have a single size for all nodes, so nodes are resized
+    through the node API, the node set target is updated once all steps
+    are done.
+
+    Steps in flight are kept in memory only. After a restart of the service
+    a resized node which isn't ACTIVE or healthy yet is waited for again,
+    a switchover is planned again from the Patroni cluster state.
+
+    The primary is unavailable only for the switchover.
+    """
+
+    def __init__(
+        self,
+        core_client: http_base.CollectionBaseClient,
+        step_timeout: float = STEP_TIMEOUT,
+    ) -> None:
+        self._cclient = core_client
+        self._step_timeout = step_timeout
+        # Instance uuid -> the step in flight
+        self._steps: dict[sys_uuid.UUID, RollingStep] = {}
+
+    def _get_nodes(self, nodeset: sdk_models.NodeSet) -> dict[str, dict[str, tp.Any]]:
+        return {
+            node_uuid: self._cclient.get(NODES_COLLECTION, sys_uuid.UUID(node_uuid))
+            for node_uuid in nodeset.nodes
+        }
+
+    @staticmethod
+    def _is_resized(instance: models.PGInstance, node: dict[str, tp.Any]) -> bool:
+        return node["cores"] == instance.cpu and node["ram"] == instance.ram
+
+    def is_completed(
+        self, instance: models.PGInstance, nodeset: sdk_models.NodeSet
+    ) -> bool:
+        if instance.uuid in self._steps:
+            return False
+        return all(
+            self._is_resized(instance, n) for n in self._get_nodes(nodeset).values()
+        )
+
+    @staticmethod
+    def _is_healthy(member: dict[str, tp.Any]) -> bool:
+        if member.get("state") not in PATRONI_RUNNING_STATES:
+            return False
+        if member["role"] in PATRONI_LEADER_ROLES:
+            return True
+        lag = member.get("lag", 0)
+        return isinstance(lag, int) and lag <= MAX_REPLICA_LAG
+
+    def _resize(
+        self,
+        instance: models.PGInstance,
+        patroni: PatroniClusterClient,
+        node_uuid: str,
+        node: dict[str, tp.Any],
+    ) -> None:
+        start_time = patroni.get_start_time(node["ipv4"])
+        LOG.info(
+            "Resizing node %s of instance %s to %s cores and %s MB of RAM",
+            node_uuid,
+            instance.uuid,
+            instance.cpu,
+            instance.ram,
+        )
+        self._cclient.update(
+            NODES_COLLECTION,
+            sys_uuid.UUID(node_uuid),
+            cores=instance.cpu,
+            ram=instance.ram,
+        )
+        self._steps[instance.uuid] = RollingStep(
+            RESIZE, node_uuid, self._step_timeout, start_time
+        )
+
+    def _switchover(
+        self,
+        instance: models.PGInstance,
+        patroni: PatroniClusterClient,
+        member: dict[str, tp.Any],
+        candidate: str,
+    ) -> None:
+        leader = member["name"]
+        LOG.info(
+            "Instance %s: switchover from %s to %s", instance.uuid, leader, candidate
+        )
+        patroni.switchover(member["host"], leader, candidate)
+        self._steps[instance.uuid] = RollingStep(
+            SWITCHOVER, candidate, self._step_timeout
+        )
+
+    def _restore_step(
+        self,
+        instance: models.PGInstance,
+        nodes: dict[str, dict[str, tp.Any]],
+        members: dict[str, dict[str, tp.Any]],
+    ) -> RollingStep | None:
+        """Return the resize in flight lost with a restart of the service.
+
+        Such a node already has the new size in Core but isn't ACTIVE or
+        healthy in Patroni yet.
+        """
+        for node_uuid, node in sorted(nodes.items()):
+            member = members.get(node_uuid)
+            if not self._is_resized(instance, node):
+                continue
+            if node["status"] == sdk_c.NodeStatus.ACTIVE.value and (
+                member is not None and self._is_healthy(member)
+            ):
+                continue
+            step = RollingStep(RESIZE, node_uuid, self._step_timeout)
+            step.left_active = True
+            return step
+        return None
+
+    def _is_step_done(
+        self,
+        instance: models.PGInstance,
+        step: RollingStep,
+        patroni: PatroniClusterClient,
+        nodes: dict[str, dict[str, tp.Any]],
+        members: dict[str, dict[str, tp.Any]],
+    ) -> bool:
+        member = members.get(step.node)
+        if step.kind == SWITCHOVER:
+            return member is not None and member["role"] in PATRONI_LEADER_ROLES
+
+        node = nodes.get(step.node)
+        if node is None:
+            # The node is gone with a shrink of the instance
+            return True
+        if node["status"] != sdk_c.NodeStatus.ACTIVE.value:
+            step.left_active = True
+            return False
+        if (
+            not self._is_resized(instance, node)
+            or member is None
+            or not self._is_healthy(member)
+        ):
+            return False
+        if step.left_active:
+            return True
+        # Core may have accepted the new size without restarting the node yet
+        return patroni.get_start_time(node["ipv4"]) not in (None, step.start_time)
+
+    def step(self, instance: models.PGInstance, nodeset: sdk_models.NodeSet) -> bool:
+        """Do the next step of the workflow, return True if completed."""
+        nodes = self._get_nodes(nodeset)
+        patroni = PatroniClusterClient([n["ipv4"] for n in nodeset.nodes.values()])
+        members = {m["name"]: m for m in patroni.get_cluster()["members"]}
+
+        step = self._steps.get(instance.uuid)
+        if step is None:
+            step = self._restore_step(instance, nodes, members)
+            if step is not None:
+                LOG.info("Instance %s: %s is in flight", instance.uuid, step)
+                self._steps[instance.uuid] = step
+        if step is not None:
+            if self._is_step_done(instance, step, patroni, nodes, members):
+                LOG.info("Instance %s: %s is done", instance.uuid, step)
+                del self._steps[instance.uuid]
+            elif not step.is_expired():
+                LOG.debug("Instance %s: waiting for %s", instance.uuid, step)
+                return False
+            else:
+                LOG.warning(
+                    "Instance %s: %s isn't done in %s seconds, retrying",
+                    instance.uuid,
+                    step,
+                    self._step_timeout,
+                )
+                del self._steps[instance.uuid]
+                if step.kind == RESIZE and step.node in nodes:
+                    self._resize(instance, patroni, step.node, nodes[step.node])
+                    return False
+                # The switchover is planned again from the cluster state
+
+        pending = {u for u, n in nodes.items() if not self._is_resized(instance, n)}
+        if not pending:
+            return True
+
+        if any(n["status"] != sdk_c.NodeStatus.ACTIVE.value for n in nodes.values()):
+            LOG.debug("Instance %s: waiting for nodes to be active", instance.uuid)
+            return False
+
+        if len(members) < len(nodes) or not all(
+            self._is_healthy(m) for m in members.values()
+        ):
+            LOG.debug("Instance %s: waiting for replicas", instance.uuid)
+            return False
+
+        leaders = [n for n, m in members.items() if m["role"] in PATRONI_LEADER_ROLES]
+        replicas = sorted(pending - set(leaders))
+        if replicas:
+            self._resize(instance, patroni, replicas[0], nodes[replicas[0]])
+            return False
+
+        # Only the primary is left
+        leader = leaders[0]
+        candidates = sorted(
+            (m for n, m in members.items() if n not in pending),
+            key=lambda m: m.get("lag", 0),
+        )
+        if not candidates:
+            # Single node instance, downtime can't be avoided
+            self._resize(instance, patroni, leader, nodes[leader])
+            return False
+
+        self._switchover(instance, patroni, members[leader], candidates[0]["name"])
+        return False
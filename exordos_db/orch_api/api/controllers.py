@@ -14,8 +14,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+import time
+import typing as tp
+
 from oslo_config import cfg
+from restalchemy.api import actions
 from restalchemy.api import controllers
+from restalchemy.common import exceptions as exc
+from gcl_sdk.agents.universal.dm import models
+from gcl_sdk.agents.universal.orch_api import controllers as orch_controllers
+
+from exordos_db.orch_api import notifier
 
 DOMAIN = "orch_api"
 CONF = cfg.CONF
@@ -25,3 +35,68 @@ class ApiEndpointController(controllers.RoutesListController):
     """Controller for /v1/ endpoint"""
 
     __TARGET_PATH__ = "/v1/"
+
+
+@contextlib.contextmanager
+def released_session(context: tp.Any) -> tp.Iterator[None]:
+    """Return the connection of the request session to the pool meanwhile.
+
+    The session is committed and closed, a new session is started on exit.
+    """
+    context.get_session().commit()
+    context.session_close()
+    try:
+        yield
+    finally:
+        context.start_new_session()
+
+
+class UniversalAgentsController(orch_controllers.UniversalAgentsController):
+    """Controller for /v1/agents/ endpoint"""
+
+    __watch_default_timeout__ = 30
+    __watch_max_timeout__ = 60
+
+    def _parse_timeout(self, timeout: str | float) -> float:
+        try:
+            timeout = float(timeout)
+            if timeout < 0:
+                raise ValueError()
+        except ValueError:
+            raise exc.ParseError(value=timeout)
+        return min(timeout, self.__watch_max_timeout__)
+
+    @actions.get
+    def watch_payload(
+        self,
+        resource: models.UniversalAgent,
+        hash: str = "",
+        version: str = "0",
+        timeout: str = "",
+    ) -> dict[str, tp.Any]:
+        """Long poll version of `get_payload`.
+
+        Blocks until the payload differs from the one the agent holds or
+        the timeout expires. The light payload with the same hash is
+        returned on timeout. Without the notifier the payload is returned
+        at once like `get_payload` does.
+
+        Only changes of the target resources of the agent wake the request,
+        the actual resources in the payload are reported by the agent itself.
+        """
+        wait_timeout = self._parse_timeout(timeout or self.__watch_default_timeout__)
+        payload_notifier = notifier.get_notifier()
+        keys = (str(resource.uuid),)
+        deadline = time.monotonic() + wait_timeout
+
+        while True:
+            if payload_notifier is not None:
+                generation = payload_notifier.get_generation(keys)
+
+            payload = resource.get_payload(hash=hash, version=int(version))
+            remaining = deadline - time.monotonic()
+            if payload_notifier is None or payload.hash != hash or remaining <= 0:
+                return payload.dump_to_simple_view()
+
+            with released_session(self._req.context):
+                payload_notifier.wait(keys, generation, remaining)
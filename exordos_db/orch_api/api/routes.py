@@ -20,10 +20,24 @@ from gcl_sdk.agents.universal.orch_api import routes as orch_routes
 from exordos_db.orch_api.api import controllers
 
 
+class UniversalAgentsWatchPayloadAction(routes.Action):
+    """Handler for /v1/agents/<uuid>/actions/watch_payload endpoint"""
+
+    __controller__ = controllers.UniversalAgentsController
+
+
+class UniversalAgentsRoute(orch_routes.UniversalAgentsRoute):
+    """Handler for /v1/agents/ endpoint"""
+
+    __controller__ = controllers.UniversalAgentsController
+
+    watch_payload = routes.action(UniversalAgentsWatchPayloadAction)
+
+
 class ApiEndpointRoute(routes.Route):
     """Handler for /v1/ endpoint"""
 
     __controller__ = controllers.ApiEndpointController
     __allow_methods__ = [routes.FILTER]
 
-    agents = routes.route(orch_routes.UniversalAgentsRoute)
+    agents = routes.route(UniversalAgentsRoute)
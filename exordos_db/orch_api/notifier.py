@@ -0,0 +1,128 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import collections
+import logging
+import threading
+import time
+import typing as tp
+
+import psycopg
+
+LOG = logging.getLogger(__name__)
+
+# Triggers of the target resources notify this channel with the UUID of the
+# agent the resource belongs to.
+CHANNEL = "ua_payload"
+
+# The reconnect epoch and the change counters of the keys
+Generation = tuple[int, tuple[int, ...]]
+
+_notifier: "PayloadNotifier | None" = None
+
+
+class PayloadNotifier:
+    """Wake up requests waiting for changes of agent payloads.
+
+    A single connection per process listens to the notifications so the
+    waiting requests don't hold database connections. Every notification
+    bumps the generation of its UUID, a waiter compares the generations of
+    its UUIDs with the ones taken before reading the payload.
+    """
+
+    def __init__(
+        self,
+        connection_url: str,
+        reconnect_period: float = 1,
+        ping_period: float = 30,
+    ) -> None:
+        self._connection_url = connection_url
+        self._reconnect_period = reconnect_period
+        self._ping_period = ping_period
+        self._cond = threading.Condition()
+        # The number of keys is bounded by the number of agents
+        self._generations: collections.Counter[str] = collections.Counter()
+        # Bumped on every reconnect since notifications may be lost meanwhile
+        self._epoch = 0
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._listen, name="payload-notifier", daemon=True
+            )
+            self._thread.start()
+
+    def _wake_all(self) -> None:
+        with self._cond:
+            self._epoch += 1
+            self._cond.notify_all()
+
+    def _notify(self, key: str) -> None:
+        with self._cond:
+            self._generations[key] += 1
+            self._cond.notify_all()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                with psycopg.connect(self._connection_url, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    LOG.info("Listening to %s notifications", CHANNEL)
+                    self._wake_all()
+                    while True:
+                        for notify in conn.notifies(timeout=self._ping_period):
+                            self._notify(notify.payload)
+                        # Detect broken connections while nothing happens
+                        conn.execute("SELECT 1")
+            except Exception:
+                LOG.exception("Unable to listen to %s notifications", CHANNEL)
+            self._wake_all()
+            time.sleep(self._reconnect_period)
+
+    def _get_generation(self, keys: tp.Collection[str]) -> Generation:
+        return (self._epoch, tuple(self._generations[k] for k in keys))
+
+    def get_generation(self, keys: tp.Collection[str]) -> Generation:
+        """Return an opaque generation of the keys to pass to `wait`."""
+        with self._cond:
+            return self._get_generation(keys)
+
+    def wait(
+        self, keys: tp.Collection[str], generation: Generation, timeout: float
+    ) -> bool:
+        """Wait until any of the keys changes since the generation.
+
+        Returns False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._get_generation(keys) != generation, timeout
+            )
+
+
+def configure(connection_url: str) -> None:
+    global _notifier
+    _notifier = PayloadNotifier(connection_url)
+    _notifier.start()
+
+
+def get_notifier() -> PayloadNotifier | None:
+    """Return the process notifier or None if it isn't configured."""
+    return _notifier
@@ -46,11 +46,15 @@ class PGInstanceNode(
     sync_replica_number = properties.property(
         ra_types.Integer(min_value=0, max_value=15)
     )
+    parameters = properties.property(ra_types.Dict(), default=lambda: {})
+    instance = properties.property(ra_types.AllowNone(ra_types.UUID()), default=None)
+    backups = properties.property(ra_types.Dict(), default=lambda: {})
+    restores = properties.property(ra_types.Dict(), default=lambda: {})
 
     @classmethod
     def get_resource_kind(cls) -> str:
         """Return the resource kind."""
-        return "pg_instance_node"
+        return models.PG_INSTANCE_NODE_KIND
 
     def get_resource_target_fields(self) -> tp.Collection[str]:
         """Return the collection of target fields.
@@ -65,6 +69,10 @@ class PGInstanceNode(
                 "nodes_number",
                 "databases",
                 "users",
+                "parameters",
+                "instance",
+                "backups",
+                "restores",
             )
         )
 
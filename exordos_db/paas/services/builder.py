@@ -14,6 +14,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+import functools
 import logging
 import uuid as sys_uuid
 import typing as tp
@@ -24,7 +26,9 @@ from gcl_sdk.paas.services import builder
 from gcl_sdk.infra.dm import models as sdk_models
 from gcl_sdk.agents.universal.dm import models as ua_models
 
+from exordos_db.common import tracing
 from exordos_db.paas.dm import models
+from exordos_db.user_api.dm import models as user_models
 
 LOG = logging.getLogger(__name__)
 NODE_KIND = sdk_models.Node.get_resource_kind()
@@ -63,6 +67,67 @@ class PGInstanceBuilder(PaaSBuilder, oslo_base.OsloConfigurableService):
     ):
         super().__init__(instance_model)
 
+    def _trace_build(
+        self,
+        action: str,
+        instance: ua_models.InstanceWithDerivativesMixin,
+        build: tp.Callable[[], tp.Collection[ua_models.TargetResourceKindAwareMixin]],
+    ) -> tp.Collection[ua_models.TargetResourceKindAwareMixin]:
+        """Continue the trace of the instance change with the build span.
+
+        The span links to traces of the built node resources, the agents
+        and the status API know only their hashes.
+        """
+        with tracing.span(
+            "build",
+            trace_id=tracing.change_trace_id(instance.uuid, instance.updated_at),
+            action=action,
+            instance=str(instance.uuid),
+            generation=tracing.format_generation(instance.updated_at),
+        ) as span:
+            derivatives = build()
+            if span.recording:
+                targets = {}
+                for derivative in derivatives:
+                    resource = derivative.to_ua_resource()
+                    targets[str(resource.uuid)] = resource.hash
+                    span.add_link(
+                        tracing.resource_trace_id(resource.uuid, resource.hash)
+                    )
+                span.set_attribute("targets", targets)
+            return derivatives
+
+    def create_instance_derivatives(
+        self, instance: ua_models.InstanceWithDerivativesMixin
+    ) -> tp.Collection[ua_models.TargetResourceKindAwareMixin]:
+        return self._trace_build(
+            "create",
+            instance,
+            functools.partial(super().create_instance_derivatives, instance),
+        )
+
+    def update_instance_derivatives(
+        self,
+        instance: ua_models.InstanceWithDerivativesMixin,
+        resource: ua_models.TargetResourceKindAwareMixin,
+        derivative_pairs: tp.Collection[
+            tuple[
+                ua_models.TargetResourceKindAwareMixin,
+                ua_models.TargetResourceKindAwareMixin | None,
+            ]
+        ],
+    ) -> tp.Collection[ua_models.TargetResourceKindAwareMixin]:
+        return self._trace_build(
+            "update",
+            instance,
+            functools.partial(
+                super().update_instance_derivatives,
+                instance,
+                resource,
+                derivative_pairs,
+            ),
+        )
+
     def _get_users(self, instance):
         return {
             u.name: {
@@ -75,6 +140,111 @@ class PGInstanceBuilder(PaaSBuilder, oslo_base.OsloConfigurableService):
     def _get_databases(self, instance):
         return {d.name: {"owner": d.owner.name} for d in instance.get_databases()}
 
+    def _choose_backup_node(
+        self,
+        instance: models.PGInstance,
+        node_resources: list[ua_models.Resource],
+        node_uuids: list[str],
+    ) -> sys_uuid.UUID | None:
+        """Return the agent of the replica with the least lag.
+
+        Standbys are known from the replication latency reported by the
+        primary along with its statistics, None is returned until it's
+        reported. A single node instance is backed up by its only node.
+        """
+        if instance.nodes_number == 1:
+            return self.agent_uuid_by_node(uuid.UUID(node_uuids[0]))
+
+        latency = {}
+        nodes = [res.node for res in node_resources]
+        for stats in user_models.get_agent_stats(nodes).values():
+            latency.update(stats.get("replication_latency", {}))
+
+        standbys = sorted(
+            (lag.get("flush_lag_ms") is None, lag.get("flush_lag_ms") or 0, node)
+            for node, lag in latency.items()
+            if node in node_uuids
+        )
+        if not standbys:
+            return None
+        return self.agent_uuid_by_node(uuid.UUID(standbys[0][2]))
+
+    def _actualize_backups(
+        self,
+        instance: models.PGInstance,
+        databases: dict[str, dict[str, str]],
+        node_uuids: list[str],
+    ) -> tuple[dict[str, dict[str, tp.Any]], dict[str, dict[str, tp.Any]]]:
+        """Schedule new backups and update ones reported by the nodes.
+
+        Return backups and restores of the node resources.
+        """
+        node_resources = instance.get_node_resources()
+        reported_backups = {}
+        reported_restores = {}
+        for res in node_resources:
+            reported_backups.update(res.value.get("backup_status", {}))
+            reported_restores.update(res.value.get("restore_status", {}))
+
+        backups = {}
+        restores = {}
+        for backup in instance.get_backups():
+            key = str(backup.uuid)
+            if backup.node is None:
+                node = self._choose_backup_node(instance, node_resources, node_uuids)
+                if node is None:
+                    LOG.info("No replica of instance %s is known yet", instance.uuid)
+                    continue
+                backup.node = node
+                # Physical backups are made of the whole cluster
+                if backup.kind == user_models.PGBackupKind.LOGICAL.value:
+                    backup.databases = sorted(databases)
+                backup.jobs = backup.jobs or instance.cpu
+                backup.status = user_models.PGStatus.IN_PROGRESS.value
+                backup.update()
+            elif backup.status == user_models.PGStatus.IN_PROGRESS.value:
+                reported = reported_backups.get(key, {})
+                if reported.get("status", backup.status) != backup.status:
+                    backup.status = reported["status"]
+                    backup.size = reported.get("size")
+                    if backup.status == user_models.PGStatus.ACTIVE.value:
+                        backup.completed_at = datetime.datetime.now(
+                            datetime.timezone.utc
+                        )
+                    backup.update()
+
+            # The primary prunes WAL only when physical backups are done
+            backups[key] = {
+                "node": str(backup.node),
+                "kind": backup.kind,
+                "status": backup.status,
+                "databases": backup.databases,
+                "jobs": backup.jobs,
+            }
+
+            if backup.restore_status not in (
+                user_models.PGStatus.NEW.value,
+                user_models.PGStatus.IN_PROGRESS.value,
+            ):
+                continue
+
+            requested_at = backup.restore_requested_at.isoformat()
+            reported = reported_restores.get(key, {})
+            if (
+                reported.get("requested_at") == requested_at
+                and reported["status"] != user_models.PGStatus.IN_PROGRESS.value
+            ):
+                backup.restore_status = reported["status"]
+                backup.update()
+                continue
+
+            if backup.restore_status == user_models.PGStatus.NEW.value:
+                backup.restore_status = user_models.PGStatus.IN_PROGRESS.value
+                backup.update()
+            restores[key] = {"requested_at": requested_at, "jobs": backup.jobs}
+
+        return backups, restores
+
     def create_paas_objects(
         self, instance: models.PGInstance
     ) -> tp.Collection[ua_models.TargetResourceKindAwareMixin]:
@@ -104,17 +274,24 @@ class PGInstanceBuilder(PaaSBuilder, oslo_base.OsloConfigurableService):
         nodeset = instance.get_actual_nodeset()
         nodes_by_idx = list(nodeset.nodes.keys())
 
+        backups, restores = self._actualize_backups(
+            instance, databases, nodes_by_idx[: instance.nodes_number]
+        )
+
         # Just recreate entities, it'll be updated in DB if already exist
         for i in range(instance.nodes_number):
             actual_resources.append(
                 models.PGInstanceNode(
                     uuid=PaaSBuilder.agent_uuid_by_node(uuid.UUID(nodes_by_idx[i])),
                     name=instance.name,
-                    instance=instance,
+                    instance=instance.uuid,
                     nodes_number=instance.nodes_number,
                     sync_replica_number=instance.sync_replica_number,
                     users=users,
                     databases=databases,
+                    parameters=instance.parameters,
+                    backups=backups,
+                    restores=restores,
                 )
             )
 
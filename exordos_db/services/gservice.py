@@ -30,6 +30,7 @@ from gcl_sdk.agents.universal.services import scheduler as scheduler_service
 from gcl_sdk.agents.universal import utils as ua_utils
 from gcl_sdk.agents.universal.drivers import core as core_drivers
 from gcl_sdk.common.oslo import types as sdk_cfg_types
+from exordos_db.agent.universal import payload as ua_payload
 from exordos_db.common import constants as cc
 
 LOG = logging.getLogger(__name__)
@@ -50,7 +51,11 @@ class InfraScheduler(
         ]
 
 
-class UAgent(agent_service.UniversalAgentService, oslo_base.OsloConfigurableService):
+class UAgent(
+    ua_payload.PayloadCacheMixin,
+    agent_service.UniversalAgentService,
+    oslo_base.OsloConfigurableService,
+):
     def __init__(
         self,
         *args,
@@ -77,7 +82,7 @@ class UAgent(agent_service.UniversalAgentService, oslo_base.OsloConfigurableServ
         ]
 
         facts_drivers = []
-        payload_path = os.path.join(cc.WORK_DIR, "infra_agent_payload.json")
+        payload_path = os.path.join(cc.WORK_DIR, "infra_agent_payload.bin")
         return super().__init__(
             *args,
             agent_uuid=agent_uuid,
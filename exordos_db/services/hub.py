@@ -0,0 +1,50 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+
+from gcl_looper.services import hub
+
+from exordos_db.common.api.middlewares import metrics
+
+LOG = logging.getLogger(__name__)
+
+
+class ProcessHubService(hub.ProcessHubService):
+    """Process hub dropping metrics of the workers which have exited.
+
+    Live gauges of the workers are summed from the files of the
+    multiprocess directory, the files of exited workers have to be removed.
+    The directory is emptied on start and given to the user the workers
+    are downgraded to, they create their files after fork.
+    """
+
+    def _setup(self) -> None:
+        owners = [s.__mp_downgrade_user__ for s in self._services]
+        metrics.prepare_multiproc_dir(next(filter(None, owners), None))
+        super()._setup()
+
+    def _iteration(self) -> None:
+        for instance in self._instances.values():
+            if instance.pid is not None and not instance.is_alive():
+                metrics.mark_process_dead(instance.pid)
+        super()._iteration()
+
+    def stop(self) -> None:
+        super().stop()
+        for instance in self._instances.values():
+            if instance.pid is not None:
+                metrics.mark_process_dead(instance.pid)
@@ -0,0 +1,127 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import logging
+import socketserver
+import threading
+import typing as tp
+from wsgiref import simple_server
+
+from gcl_looper.services import base
+
+LOG = logging.getLogger(__name__)
+
+
+# Sent without reading the request when all the threads are busy
+OVERLOADED_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Length: 0\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+)
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, simple_server.WSGIServer):
+    """WSGI server with a thread per request, up to `max_threads` at once."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, *args: tp.Any, max_threads: int = 256, **kwargs: tp.Any) -> None:
+        self._slots = threading.BoundedSemaphore(max_threads)
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request: tp.Any, client_address: tp.Any) -> None:
+        if not self._slots.acquire(blocking=False):
+            LOG.warning("All threads are busy, reject request of %s", client_address)
+            try:
+                request.sendall(OVERLOADED_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request: tp.Any, client_address: tp.Any) -> None:
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
+class LoggingWSGIRequestHandler(simple_server.WSGIRequestHandler):
+    def log_message(self, format: str, *args: tp.Any) -> None:
+        # Requests are logged by the logging middleware
+        LOG.debug(format, *args)
+
+
+class ThreadingWSGIService(base.AbstractService):
+    """WSGI server serving every request in its own thread.
+
+    Bjoern serves requests one by one in a worker, so it isn't suitable for
+    requests waiting for events like long polling. Requests above
+    `max_threads` served at once are answered with 503.
+    """
+
+    __mp_downgrade_user__ = "nobody"
+
+    def __init__(
+        self,
+        wsgi_app: tp.Callable,
+        host: str,
+        port: int,
+        max_threads: int = 256,
+    ) -> None:
+        super().__init__()
+        self._wsgi_app = wsgi_app
+        self._host = host
+        self._port = port
+        self._max_threads = max_threads
+        self._server: ThreadingWSGIServer | None = None
+
+    def _setup(self) -> None:
+        self._server = ThreadingWSGIServer(
+            (self._host, self._port),
+            LoggingWSGIRequestHandler,
+            max_threads=self._max_threads,
+        )
+        self._server.set_app(self._wsgi_app)
+        return super()._setup()
+
+    def _loop(self) -> None:
+        server = self._server
+        if server is None:
+            return
+
+        LOG.info("Threading WSGI server: %s:%s", self._host, self._port)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        # `shutdown` waits for `serve_forever` so it can't be called from
+        # a signal handler of the serving thread
+        threading.Thread(target=self._server.shutdown, daemon=True).start()
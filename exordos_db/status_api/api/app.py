@@ -14,7 +14,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from restalchemy.api import applications
+import typing as tp
+
 from restalchemy.api import middlewares
 from restalchemy.api import routes
 from restalchemy.api.middlewares import errors as errors_mw
@@ -23,6 +24,9 @@ from restalchemy.openapi import structures as openapi_structures
 from restalchemy.openapi import engines as openapi_engines
 from gcl_sdk.agents.universal.api import middlewares as sdk_mw
 
+from exordos_db.common.api import applications
+from exordos_db.common.api.middlewares import compression as compression_mw
+from exordos_db.common.api.middlewares import metrics as metrics_mw
 from exordos_db.status_api.api import routes as app_routes
 from exordos_db.status_api.api import versions
 from exordos_db import version
@@ -59,12 +63,19 @@ def get_openapi_engine():
     return openapi_engine
 
 
-def build_wsgi_application():
+def build_wsgi_application(
+    compression_encodings: tp.Iterable[str] = compression_mw.DEFAULT_ENCODINGS,
+    compression_min_size: int = compression_mw.DEFAULT_MIN_SIZE,
+) -> tp.Callable:
+    application = applications.OpenApiApplication(
+        route_class=get_api_application(),
+        openapi_engine=get_openapi_engine(),
+    )
+    # Built once, workers forked from the parent share them
+    application.build_specifications()
+
     return middlewares.attach_middlewares(
-        applications.OpenApiApplication(
-            route_class=get_api_application(),
-            openapi_engine=get_openapi_engine(),
-        ),
+        application,
         [
             middlewares.configure_middleware(
                 sdk_mw.SdkContextMiddleware,
@@ -72,5 +83,14 @@ def build_wsgi_application():
             ),
             errors_mw.ErrorsHandlerMiddleware,
             logging_mw.LoggingMiddleware,
+            middlewares.configure_middleware(
+                metrics_mw.PrometheusMetricsMiddleware,
+                route_class=get_api_application(),
+            ),
+            middlewares.configure_middleware(
+                compression_mw.CompressionMiddleware,
+                encodings=compression_encodings,
+                min_size=compression_min_size,
+            ),
         ],
     )
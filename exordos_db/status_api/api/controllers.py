@@ -13,10 +13,48 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+
+import typing as tp
+
+from restalchemy.api import constants
 from restalchemy.api import controllers
+from restalchemy.api import field_permissions as field_p
+from restalchemy.api import resources
+from gcl_sdk.agents.universal.api import controllers as sdk_controllers
+from gcl_sdk.agents.universal.dm import models as ua_models
+
+from exordos_db.status_api.dm import models
 
 
 class ApiEndpointController(controllers.RoutesListController):
     """Controller for /v1/ endpoint"""
 
     __TARGET_PATH__ = "/v1/"
+
+
+class StatusReportsController(sdk_controllers.BaseSdkNestedResourceController):
+    """Controller for /v1/agents/<uuid>/reports/ endpoint"""
+
+    __resource__ = resources.ResourceByRAModel(
+        model_class=models.StatusReport,
+        process_filters=True,
+        convert_underscore=False,
+        fields_permissions=field_p.FieldsPermissions(
+            default=field_p.Permissions.RW,
+            fields={
+                "uuid": {constants.ALL: field_p.Permissions.RO},
+                "changed": {constants.ALL: field_p.Permissions.RO},
+            },
+        ),
+    )
+
+    def create(
+        self, parent_resource: ua_models.UniversalAgent, **kwargs: tp.Any
+    ) -> models.StatusReport:
+        report = models.StatusReport(uuid=parent_resource.uuid, **kwargs)
+        report.apply(parent_resource)
+
+        # Don't send the reported resources and stats back
+        report.resources = []
+        report.stats = None
+        return report
@@ -20,11 +20,25 @@ from gcl_sdk.agents.universal.status_api import routes as status_routes
 from exordos_db.status_api.api import controllers
 
 
+class StatusReportsRoute(routes.Route):
+    """Handler for /v1/agents/<uuid>/reports/ endpoint"""
+
+    __allow_methods__ = [routes.CREATE]
+    __controller__ = controllers.StatusReportsController
+
+
+class UniversalAgentsRoute(status_routes.UniversalAgentsRoute):
+    """Handler for /v1/agents/ endpoint"""
+
+    # route to /v1/agents/<uuid>/reports/
+    reports = routes.route(StatusReportsRoute, resource_route=True)
+
+
 class ApiEndpointRoute(routes.Route):
     """Handler for /v1/ endpoint"""
 
     __controller__ = controllers.ApiEndpointController
     __allow_methods__ = [routes.FILTER]
 
-    agents = routes.route(status_routes.UniversalAgentsRoute)
+    agents = routes.route(UniversalAgentsRoute)
     kind = routes.route(status_routes.KindRoute)
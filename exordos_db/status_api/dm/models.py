@@ -0,0 +1,183 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import typing as tp
+
+from restalchemy.common import exceptions as exc
+from restalchemy.dm import filters as dm_filters
+from restalchemy.dm import models
+from restalchemy.dm import properties
+from restalchemy.dm import types
+from restalchemy.storage.sql import engines
+from restalchemy.storage.sql import orm
+from gcl_sdk.agents.universal.dm import models as ua_models
+
+from exordos_db.common import tracing
+
+LOG = logging.getLogger(__name__)
+
+
+class OutOfSyncReportError(exc.RestAlchemyException):
+    message = (
+        "Report of agent %(agent)s follows %(previous)s, but the last "
+        "accepted one is %(last)s, send the full report"
+    )
+    code = 409
+
+
+class AgentStatusReport(
+    models.ModelWithUUID,
+    models.ModelWithTimestamp,
+    orm.SQLStorableMixin,
+):
+    """The last status report accepted from an agent.
+
+    `uuid` is the UUID of the agent.
+    """
+
+    __tablename__ = "ua_agent_status_reports"
+
+    hash = properties.property(types.String(max_length=256), default="")
+    # The last statistics of the agent, they aren't a part of the hash
+    stats = properties.property(types.Dict(), default=dict)
+
+
+class StatusReport(models.ModelWithUUID):
+    """Actual state of all resources of an agent.
+
+    hash - hash of the report, the report is skipped if it's the same as
+        the last accepted one.
+    previous_hash - hash of the last report accepted from the agent, the
+        report is rejected if it's another one. Empty for the full report,
+        it's applied even if the hash is the same.
+    resources - all actual resources of the agent in the simple view.
+    stats - statistics of the agent, sent only if they changed.
+    changed - how many resources were created, updated or deleted.
+    """
+
+    hash = properties.property(types.String(max_length=256), required=True)
+    previous_hash = properties.property(types.String(max_length=256), default="")
+    resources = properties.property(types.List(), default=list)
+    stats = properties.property(types.AllowNone(types.Dict()), default=None)
+    changed = properties.property(types.Integer(), default=0)
+
+    def _get_reported_resources(
+        self, agent: ua_models.UniversalAgent
+    ) -> dict[tuple[tp.Any, str], ua_models.Resource]:
+        reported = {}
+        for value in self.resources:
+            resource = ua_models.Resource.restore_from_simple_view(**value)
+            resource.node = agent.node
+            reported[(resource.uuid, resource.kind)] = resource
+        return reported
+
+    def apply(self, agent: ua_models.UniversalAgent) -> None:
+        """Upsert changed resources of the agent in a single transaction."""
+        with tracing.span("status", agent=str(agent.uuid)) as span:
+            changed = self._apply(agent)
+            if not changed:
+                span.drop()
+                return
+
+            resources = {}
+            for resource in changed:
+                resources[str(resource.uuid)] = resource.hash
+                span.add_link(tracing.resource_trace_id(resource.uuid, resource.hash))
+            span.set_attribute("resources", resources)
+
+    def _apply(
+        self, agent: ua_models.UniversalAgent
+    ) -> list[ua_models.Resource] | None:
+        """Return created and updated resources, None if nothing to do.
+
+        Raise `OutOfSyncReportError` if the agent missed the last accepted
+        report, so it has to send the full one.
+        """
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            last_report = AgentStatusReport.objects.get_one_or_none(
+                filters={"uuid": dm_filters.EQ(agent.uuid)},
+                session=session,
+                locked=True,
+            )
+            last_hash = "" if last_report is None else last_report.hash
+            if self.previous_hash and self.previous_hash != last_hash:
+                LOG.warning(
+                    "Agent %s reports after %s, the last accepted is %s",
+                    agent.uuid,
+                    self.previous_hash,
+                    last_hash,
+                )
+                raise OutOfSyncReportError(
+                    agent=agent.uuid, previous=self.previous_hash, last=last_hash
+                )
+
+            # The full report is applied to repair resources changed aside
+            if (
+                self.previous_hash
+                and last_report is not None
+                and last_report.hash == self.hash
+            ):
+                if self.stats is not None:
+                    last_report.stats = self.stats
+                    last_report.update(session=session)
+                return None
+
+            reported = self._get_reported_resources(agent)
+            actual = {
+                (r.uuid, r.kind): r
+                for r in ua_models.Resource.objects.get_all(
+                    filters={
+                        "node": dm_filters.EQ(agent.node),
+                        "kind": dm_filters.In(agent.list_kinds),
+                    },
+                    session=session,
+                )
+            }
+
+            new = [reported[k] for k in reported.keys() - actual.keys()]
+            outdated = [actual[k] for k in actual.keys() - reported.keys()]
+            session.batch_insert(new)
+            session.batch_delete(outdated)
+            self.changed = len(new) + len(outdated)
+            changed = list(new)
+
+            for key in reported.keys() & actual.keys():
+                resource, origin = reported[key], actual[key]
+                if resource.full_hash == origin.full_hash:
+                    continue
+
+                origin.value = resource.value
+                origin.hash = resource.hash
+                origin.full_hash = resource.full_hash
+                origin.status = resource.status
+                origin.update(session=session)
+                self.changed += 1
+                changed.append(origin)
+
+            if last_report is None:
+                last_report = AgentStatusReport(
+                    uuid=agent.uuid, hash=self.hash, stats=self.stats or {}
+                )
+                last_report.insert(session=session)
+            else:
+                last_report.hash = self.hash
+                if self.stats is not None:
+                    last_report.stats = self.stats
+                last_report.update(session=session)
+
+        return changed
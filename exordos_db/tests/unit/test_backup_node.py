@@ -0,0 +1,59 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from exordos_db.paas.services import builder
+
+PRIMARY, FAST, SLOW = (str(sys_uuid.UUID(int=i)) for i in range(1, 4))
+
+
+def choose_backup_node(nodes_number, latency):
+    instance = mock.Mock(nodes_number=nodes_number)
+    resources = [mock.Mock(node=n) for n in (PRIMARY, FAST, SLOW)]
+    # Only the primary reports the latency of standbys
+    stats = {PRIMARY: {"replication_latency": latency}, FAST: {}, SLOW: {}}
+    with mock.patch.object(
+        builder.user_models, "get_agent_stats", return_value=stats
+    ) as get_agent_stats:
+        node = builder.PGInstanceBuilder._choose_backup_node(
+            builder.PGInstanceBuilder, instance, resources, [PRIMARY, FAST, SLOW]
+        )
+    if nodes_number > 1:
+        get_agent_stats.assert_called_once_with([PRIMARY, FAST, SLOW])
+    return node
+
+
+class BackupNodeTestCase(unittest.TestCase):
+    def test_least_lagging_standby(self):
+        node = choose_backup_node(
+            3, {SLOW: {"flush_lag_ms": 50}, FAST: {"flush_lag_ms": 5}}
+        )
+
+        self.assertEqual(
+            node, builder.PaaSBuilder.agent_uuid_by_node(sys_uuid.UUID(FAST))
+        )
+
+    def test_no_standby_known(self):
+        self.assertIsNone(choose_backup_node(3, {}))
+
+    def test_single_node(self):
+        self.assertEqual(
+            choose_backup_node(1, {}),
+            builder.PaaSBuilder.agent_uuid_by_node(sys_uuid.UUID(PRIMARY)),
+        )
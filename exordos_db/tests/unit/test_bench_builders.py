@@ -0,0 +1,54 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from unittest import mock
+
+from exordos_db.bench import builders
+
+
+class FakePipeline:
+    def __init__(self):
+        # Left by the previous phases
+        self.counter = mock.Mock(queries=100)
+        self.harness_queries = 40
+        self.core = mock.Mock(requests={"get": 7})
+
+    def reset(self):
+        pass
+
+    def run_round(self):
+        # 2 of 5 queries register node agents like the nodes do on boot
+        self.counter.queries += 5
+        self.harness_queries += 2
+        self.core.requests["get"] += 1
+
+    def get_service_results(self, phase, items, params):
+        return []
+
+
+class MeasurePhaseTest(unittest.TestCase):
+    def test_harness_queries_excluded(self):
+        pipeline = FakePipeline()
+
+        [result] = builders.measure_phase(
+            pipeline, "steady", ["instance"], {}, rounds=3
+        )
+
+        self.assertEqual(3, result.extra["rounds"])
+        self.assertEqual(9, result.extra["queries"])
+        self.assertEqual(3, result.extra["core_requests"])
@@ -0,0 +1,95 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from exordos_db.agent.universal.drivers import pg as pg_driver
+from exordos_db.bench import patroni as fake_patroni
+from exordos_db.bench import reconcile
+from exordos_db.common import constants
+
+
+class FakePatroniTest(unittest.TestCase):
+    def setUp(self):
+        self.patroni = fake_patroni.FakePatroni({"max_connections": 100})
+        self.patroni.start()
+        self.addCleanup(self.patroni.stop)
+        for name, value in (
+            ("PATRONI_API_ENDPOINT", self.patroni.endpoint),
+            ("PATRONI_CONFIG_FILE", self.patroni.config_file),
+        ):
+            patcher = mock.patch.object(constants, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_driver_client(self):
+        client = pg_driver.PatroniClient()
+
+        self.assertEqual(client.bootstrap_parameters, {"max_connections": 100})
+        self.assertEqual(client.name, self.patroni.name)
+        self.assertTrue(client.is_primary())
+        client.config_patch(
+            {"postgresql": {"parameters": {"max_connections": None, "a": "1"}}}
+        )
+        self.assertEqual(client.config_get()["postgresql"]["parameters"], {"a": "1"})
+        self.assertEqual(client.get_cluster()["members"][0]["role"], "leader")
+        self.assertEqual(self.patroni.requests["PATCH /config"], 1)
+        self.assertEqual(self.patroni.requests["GET /config"], 1)
+
+    def test_stop_removes_files(self):
+        config_file = self.patroni.config_file
+
+        self.patroni.stop()
+
+        self.assertFalse(os.path.exists(config_file))
+        self.assertFalse(os.path.exists(os.path.dirname(config_file)))
+        self.assertRaises(RuntimeError, getattr, self.patroni, "endpoint")
+
+
+class ReconcileBenchmarkTest(unittest.TestCase):
+    @mock.patch.object(pg_driver, "ClientsSingleton")
+    def test_build_instance(self, clients):
+        instance = reconcile.build_instance(
+            sys_uuid.uuid4(), users=2, databases=3, prefix="p"
+        )
+
+        self.assertEqual(sorted(instance.users), ["p_user_0", "p_user_1"])
+        self.assertEqual(
+            [d["owner"] for d in instance.databases.values()],
+            ["p_user_0", "p_user_1", "p_user_0"],
+        )
+
+    def test_measure_cycles(self):
+        patroni = fake_patroni.FakePatroni()
+        calls = iter((1, 3))
+
+        def cycle():
+            queries = next(calls)
+            reconcile.CountingCursor.queries += queries
+            patroni.count("GET", "/")
+
+        result = reconcile.measure_cycles(
+            "noop", cycle, patroni, repeat=2, items=5, params={"users": 5}
+        )
+
+        self.assertEqual(result.items, 10)
+        self.assertEqual(len(result.latencies), 2)
+        self.assertEqual(result.params, {"users": 5})
+        self.assertEqual(result.extra["queries_per_cycle"], 3)
+        self.assertEqual(result.extra["patroni_per_cycle"], 1)
@@ -0,0 +1,135 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import http.server
+import json
+import threading
+import unittest
+import uuid as sys_uuid
+
+from gcl_iam import exceptions as iam_exceptions
+from gcl_iam import tokens
+
+from exordos_db.bench import user_api
+
+PROJECT_ID = sys_uuid.UUID(int=1)
+INSTANCE = sys_uuid.UUID(int=2)
+USER = sys_uuid.UUID(int=3)
+STEPS = 50
+
+
+class SignedTokenDriverTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = user_api.SignedTokenDriver()
+        self.token = tokens.UnverifiedToken(self.driver.issue_token(PROJECT_ID))
+
+    def test_token_verified(self):
+        algorithm = self.driver.get_algorithm(self.token)
+        claims = algorithm.decode(self.token.token, audience=user_api.DEFAULT_AUDIENCE)
+
+        info = self.driver.get_introspection_info(self.token)
+
+        self.assertEqual(info["project_id"], str(PROJECT_ID))
+        self.assertEqual(info["user_info"]["uuid"], claims["sub"])
+        self.assertEqual(info["permissions"], ["*.*.*"])
+
+    def test_other_audience(self):
+        driver = user_api.SignedTokenDriver(audience="other")
+
+        self.assertRaises(
+            iam_exceptions.TokenAudienceMismatchError,
+            driver.get_algorithm,
+            self.token,
+        )
+
+
+class ParseMixTest(unittest.TestCase):
+    def test_weights(self):
+        self.assertEqual(
+            user_api.parse_mix("create=1, get"), {"create": 1.0, "get": 1.0}
+        )
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, user_api.parse_mix, "delete=1")
+        self.assertRaises(ValueError, user_api.parse_mix, "create=0,get=0")
+
+
+class FakeUserApiHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and bodies are written separately
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply(200, [])
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if "/databases/" in self.path:
+            self._reply(409, {})
+        else:
+            self._reply(201, {"uuid": str(sys_uuid.uuid4())})
+
+
+class ClientTest(unittest.TestCase):
+    def setUp(self):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeUserApiHandler)
+        self.addCleanup(server.server_close)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        self.project = user_api.Project(PROJECT_ID, sys_uuid.uuid4())
+        self.project.add_instance(INSTANCE)
+        self.project.instances[INSTANCE]["users"].append(USER)
+        host, port = server.server_address[:2]
+        self.client = user_api.Client(
+            host,
+            port,
+            "token",
+            self.project,
+            user_api.parse_mix("create=1,list=1,get=1"),
+            page_limit=10,
+            seed=0,
+        )
+
+    def test_requests_by_route(self):
+        for _ in range(STEPS):
+            self.client.step()
+
+        created = ("POST", user_api.INSTANCES_PATH)
+        self.assertGreater(len(self.client.latencies[created]), 0)
+        self.assertEqual(
+            len(self.project.instances), 1 + len(self.client.latencies[created])
+        )
+        self.assertEqual({method for method, _ in self.client.errors}, {"POST"})
+
+        results = user_api.collect_results([self.client], 1, {"workers": 1})
+
+        total = results[-1]
+        self.assertEqual(total.name, "total[workers=1]")
+        self.assertEqual(
+            total.extra["requests"],
+            sum(len(v) for v in self.client.latencies.values()),
+        )
+        self.assertEqual(total.extra["errors"], sum(self.client.errors.values()))
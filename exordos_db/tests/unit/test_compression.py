@@ -0,0 +1,152 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import gzip
+import unittest
+from unittest import mock
+
+import webob
+import zstandard
+
+from exordos_db.common.api.middlewares import compression
+
+BODY = b'{"items": [' + b", ".join(b'"item"' for _ in range(500)) + b"]}"
+ETAG = '"abc"'
+
+
+def decompress_zstd(data):
+    # Frames of a streaming compressor don't have the content size
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+class Stream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.close = mock.Mock()
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+
+def application(environ, start_response):
+    req = webob.Request(environ)
+    if req.if_none_match and ETAG.strip('"') in req.if_none_match:
+        response = webob.Response(status=304)
+        response.headers["ETag"] = ETAG
+    elif req.path == "/stream":
+        response = webob.Response(content_type="application/x-ndjson")
+        response.app_iter = Stream([BODY[:100], BODY[100:]])
+        response.content_length = None
+    elif req.path == "/image":
+        response = webob.Response(body=BODY, content_type="image/png")
+    else:
+        response = webob.Response(body=BODY, content_type="application/json")
+        response.headers["ETag"] = ETAG
+    return response(environ, start_response)
+
+
+class CompressionMiddlewareTestCase(unittest.TestCase):
+    def setUp(self):
+        self.middleware = compression.CompressionMiddleware(application)
+
+    def _get(self, path="/", middleware=None, **headers):
+        req = webob.Request.blank(path, headers=headers)
+        return req.get_response(middleware or self.middleware)
+
+    def test_zstd_preferred(self):
+        response = self._get(**{"Accept-Encoding": "gzip, zstd"})
+
+        self.assertEqual(response.content_encoding, compression.ZSTD)
+        self.assertEqual(decompress_zstd(response.body), BODY)
+        self.assertIn("Accept-Encoding", response.vary)
+
+    def test_client_preference(self):
+        response = self._get(**{"Accept-Encoding": "zstd;q=0.5, gzip"})
+
+        self.assertEqual(response.content_encoding, compression.GZIP)
+        self.assertEqual(gzip.decompress(response.body), BODY)
+
+    def test_no_accept_encoding(self):
+        response = self._get()
+
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(response.body, BODY)
+        self.assertIn("Accept-Encoding", response.vary)
+
+    def test_unsupported_encoding(self):
+        response = self._get(**{"Accept-Encoding": "br"})
+
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(response.headers["ETag"], ETAG)
+        self.assertRaises(
+            ValueError, compression.CompressionMiddleware, application, ["br"]
+        )
+
+    def test_min_size(self):
+        middleware = compression.CompressionMiddleware(
+            application, min_size=len(BODY) + 1
+        )
+
+        response = self._get(middleware=middleware, **{"Accept-Encoding": "gzip"})
+
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(response.body, BODY)
+
+    def test_not_compressible_type(self):
+        response = self._get("/image", **{"Accept-Encoding": "gzip"})
+
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(response.body, BODY)
+
+    def test_stream_encoded_by_chunks(self):
+        response = self._get("/stream", **{"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.content_encoding, compression.GZIP)
+        self.assertIsNone(response.content_length)
+        self.assertEqual(gzip.decompress(response.body), BODY)
+
+    def test_iter_encode_closes_stream(self):
+        stream = Stream([BODY[:10], b"", BODY[10:]])
+
+        chunks = list(
+            compression.iter_encode(stream, compression.ENCODERS[compression.ZSTD]())
+        )
+
+        self.assertTrue(all(chunks))
+        self.assertEqual(decompress_zstd(b"".join(chunks)), BODY)
+        stream.close.assert_called_once_with()
+
+    def test_etag_weakened(self):
+        response = self._get(**{"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["ETag"], f"W/{ETAG}")
+
+    def test_not_modified_passed_through(self):
+        response = self._get(
+            **{"Accept-Encoding": "gzip", "If-None-Match": f"W/{ETAG}"}
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(response.headers["ETag"], f"W/{ETAG}")
+        self.assertEqual(response.body, b"")
+
+    def test_not_modified_without_encoding(self):
+        response = self._get(**{"If-None-Match": ETAG})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], ETAG)
@@ -0,0 +1,367 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import base64
+import datetime
+import json
+import operator
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from restalchemy.api import contexts
+from restalchemy.api import controllers as ra_controllers
+from restalchemy.api import resources as ra_resources
+from restalchemy.common import exceptions as exc
+from restalchemy.dm import filters as dm_filters
+from restalchemy.dm import models
+from restalchemy.dm import properties
+from restalchemy.dm import types
+import webob
+
+from exordos_db.common.api import controllers
+from exordos_db.common.api import packers
+
+START = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+OPERATORS = {
+    dm_filters.EQ: operator.eq,
+    dm_filters.GT: operator.gt,
+    dm_filters.LT: operator.lt,
+}
+
+
+class Item(models.ModelWithUUID, models.ModelWithTimestamp):
+    name = properties.property(types.String(), default="")
+
+
+class ItemController(
+    controllers.ETagMixin,
+    controllers.NDJSONStreamingMixin,
+    controllers.KeysetPaginationMixin,
+    ra_controllers.BaseResourceControllerPaginated,
+):
+    __resource__ = ra_resources.ResourceByRAModel(
+        model_class=Item,
+        convert_underscore=False,
+    )
+
+
+def make_items(count, updated_at=START):
+    return [
+        Item(
+            uuid=sys_uuid.UUID(int=number + 1),
+            name=f"item-{number}",
+            created_at=START + datetime.timedelta(seconds=number),
+            updated_at=updated_at + datetime.timedelta(seconds=number),
+        )
+        for number in range(count)
+    ]
+
+
+class ControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.items = make_items(5)
+        patcher = mock.patch.object(Item, "objects", create=True)
+        self.objects = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.objects.get_all.side_effect = self._get_all
+        self.objects.get_one.side_effect = self._get_one
+
+    def _match(self, item, filters):
+        if isinstance(filters, dm_filters.AND):
+            return all(self._match(item, clause) for clause in filters.clauses)
+        if isinstance(filters, dm_filters.OR):
+            return any(self._match(item, clause) for clause in filters.clauses)
+        return all(
+            OPERATORS[type(clause)](getattr(item, name), clause.value)
+            for name, clause in filters.items()
+        )
+
+    def _get_all(self, filters=None, limit=None, order_by=None):
+        result = [item for item in self.items if self._match(item, filters or {})]
+        # Stable sorts from the least significant key
+        for name, direction in reversed(list((order_by or {}).items())):
+            result.sort(key=operator.attrgetter(name), reverse=direction == "desc")
+        return result[:limit] if limit else result
+
+    def _get_one(self, filters):
+        return self._get_all(filters)[0]
+
+    def expected(self, order_by):
+        return [str(item.uuid) for item in self._get_all(order_by=order_by)]
+
+    def get(self, path, **headers):
+        req = webob.Request.blank(path, headers=headers)
+        req.api_context = contexts.RequestContext(req)
+        return ItemController(request=req).do_collection()
+
+
+class ETagMixinTest(ControllerTestCase):
+    def test_not_modified(self):
+        response = self.get("/")
+        etag = response.headers["ETag"]
+
+        not_modified = self.get("/", **{"If-None-Match": etag})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(304, not_modified.status_code)
+        self.assertEqual(b"", not_modified.body)
+        self.assertEqual(etag, not_modified.headers["ETag"])
+        self.assertNotIn("Content-Type", not_modified.headers)
+
+    def test_changed_collection(self):
+        etag = self.get("/").headers["ETag"]
+        self.items[2] = make_items(5, START + datetime.timedelta(hours=1))[2]
+
+        response = self.get("/", **{"If-None-Match": etag})
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers["ETag"])
+
+    def test_depends_on_content_type(self):
+        json_response = self.get("/?page_limit=2")
+        ndjson_response = self.get(
+            "/?page_limit=2", Accept=packers.CONTENT_TYPE_APPLICATION_NDJSON
+        )
+
+        self.assertNotEqual(
+            json_response.headers["ETag"], ndjson_response.headers["ETag"]
+        )
+        self.assertEqual("Accept", ndjson_response.headers["Vary"])
+        response = self.get(
+            "/?page_limit=2",
+            Accept=packers.CONTENT_TYPE_APPLICATION_NDJSON,
+            **{"If-None-Match": json_response.headers["ETag"]},
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(packers.CONTENT_TYPE_APPLICATION_NDJSON, response.content_type)
+
+    def test_depends_on_fields(self):
+        etag = self.get("/").headers["ETag"]
+
+        response = self.get("/?fields=uuid", **{"If-None-Match": etag})
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers["ETag"])
+
+    def test_not_modified_keeps_pagination_headers(self):
+        response = self.get("/?page_limit=2")
+
+        not_modified = self.get(
+            "/?page_limit=2", **{"If-None-Match": response.headers["ETag"]}
+        )
+
+        self.assertEqual(304, not_modified.status_code)
+        for header in ("X-Pagination-Limit", "X-Pagination-Marker"):
+            self.assertEqual(response.headers[header], not_modified.headers[header])
+
+    def test_not_modified_isnt_packed(self):
+        etag = self.get("/").headers["ETag"]
+
+        with mock.patch.object(
+            ra_controllers.Controller, "get_packer", side_effect=AssertionError
+        ):
+            response = self.get("/", **{"If-None-Match": etag})
+
+        self.assertEqual(304, response.status_code)
+
+
+def make_tied_items(count):
+    # Few distinct names to get ties on the sort key
+    items = make_items(count)
+    for number, item in enumerate(items):
+        item.name = f"name-{number % 3}"
+    return items
+
+
+class KeysetPaginationMixinTest(ControllerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = make_tied_items(11)
+        self.controller = ItemController(request=webob.Request.blank("/"))
+
+    def walk(self, query, limit):
+        uuids = []
+        marker = None
+        while True:
+            path = f"/?page_limit={limit}&{query}"
+            if marker:
+                path += f"&page_marker={marker}"
+            response = self.get(path)
+            uuids.extend(item["uuid"] for item in response.json)
+            marker = response.headers.get("X-Pagination-Marker")
+            if marker is None:
+                return uuids
+            self.assertFalse(controllers.is_uuid(marker))
+
+    def test_marker_roundtrip(self):
+        item = self.items[3]
+
+        token = self.controller._encode_marker(item, {"created_at": "asc"})
+
+        self.assertNotIn("=", token)
+        self.assertEqual(
+            (item.uuid, "created_at", item.created_at),
+            self.controller._decode_marker(token),
+        )
+
+    def test_marker_without_sort_key(self):
+        item = self.items[3]
+
+        token = self.controller._encode_marker(item, None)
+
+        self.assertEqual((item.uuid, None, None), self.controller._decode_marker(token))
+
+    def test_default_order(self):
+        for limit in (1, 2, 4, 11, 20):
+            self.assertEqual(
+                self.expected({"created_at": "asc", "uuid": "asc"}),
+                self.walk("", limit),
+            )
+
+    def test_ties_on_sort_key(self):
+        for limit in (1, 2, 3, 5):
+            uuids = self.walk("sort_key=name&sort_dir=asc", limit)
+
+            self.assertEqual(self.expected({"name": "asc", "uuid": "asc"}), uuids)
+            self.assertEqual(len(self.items), len(set(uuids)))
+
+    def test_descending_order(self):
+        for limit in (1, 2, 3, 5):
+            self.assertEqual(
+                self.expected({"name": "desc", "uuid": "asc"}),
+                self.walk("sort_key=name&sort_dir=desc", limit),
+            )
+            self.assertEqual(
+                self.expected({"created_at": "desc", "uuid": "asc"}),
+                self.walk("sort_key=created_at&sort_dir=desc", limit),
+            )
+
+    def test_marker_doesnt_read_marker_row(self):
+        marker = self.get("/?page_limit=2").headers["X-Pagination-Marker"]
+
+        self.get(f"/?page_limit=2&page_marker={marker}")
+
+        self.objects.get_one.assert_not_called()
+
+    def test_plain_uuid_marker(self):
+        response = self.get(f"/?page_limit=3&page_marker={self.items[1].uuid}")
+
+        self.assertEqual(
+            [str(item.uuid) for item in self.items[2:5]],
+            [item["uuid"] for item in response.json],
+        )
+
+    def test_marker_of_another_sort_key(self):
+        marker = self.get("/?page_limit=3").headers["X-Pagination-Marker"]
+
+        # Continues after the marker row by the new sort key
+        response = self.get(
+            f"/?page_limit=20&sort_key=name&sort_dir=asc&page_marker={marker}"
+        )
+
+        expected = self.expected({"name": "asc", "uuid": "asc"})
+        start = expected.index(str(self.items[2].uuid)) + 1
+        self.assertEqual(expected[start:], [item["uuid"] for item in response.json])
+
+    def test_tampered_marker(self):
+        def encode(cursor):
+            token = base64.urlsafe_b64encode(json.dumps(cursor).encode())
+            return token.decode().rstrip("=")
+
+        uuid = str(self.items[0].uuid)
+        for token in (
+            "not-a-token",
+            "%%%",
+            base64.urlsafe_b64encode(b"not json").decode(),
+            encode(["list"]),
+            encode({"k": "created_at", "v": START.isoformat()}),
+            encode({"id": "not-a-uuid"}),
+            encode({"id": uuid, "k": "unknown", "v": 1}),
+            encode({"id": uuid, "k": "created_at"}),
+            encode({"id": uuid, "k": "created_at", "v": "yesterday"}),
+        ):
+            with self.subTest(token=token):
+                self.assertRaises(
+                    exc.ParseError, self.get, f"/?page_limit=2&page_marker={token}"
+                )
+
+    def test_invalid_limit(self):
+        marker = self.get("/?page_limit=2").headers["X-Pagination-Marker"]
+
+        for limit in ("-1", "many"):
+            self.assertRaises(
+                exc.ParseError,
+                self.get,
+                f"/?page_limit={limit}&page_marker={marker}",
+            )
+
+
+class NDJSONStreamingMixinTest(ControllerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = make_tied_items(11)
+        patcher = mock.patch.object(ItemController, "__stream_chunk_size__", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, query=""):
+        response = self.get(
+            f"/?{query}", Accept=packers.CONTENT_TYPE_APPLICATION_NDJSON
+        )
+        self.assertEqual(packers.CONTENT_TYPE_APPLICATION_NDJSON, response.content_type)
+        return response
+
+    def uuids(self, response):
+        return [json.loads(line)["uuid"] for line in response.body.splitlines()]
+
+    def test_stream_is_lazy(self):
+        response = self.stream()
+        self.objects.get_all.assert_not_called()
+
+        uuids = self.uuids(response)
+
+        self.assertEqual(self.expected({"created_at": "asc", "uuid": "asc"}), uuids)
+        # Short-lived pages of the chunk size
+        self.assertEqual(6, self.objects.get_all.call_count)
+        for call in self.objects.get_all.call_args_list:
+            self.assertEqual(2, call.kwargs["limit"])
+
+    def test_stream_ties_and_order(self):
+        for sort_dir in ("asc", "desc"):
+            response = self.stream(f"sort_key=name&sort_dir={sort_dir}")
+
+            self.assertEqual(
+                self.expected({"name": sort_dir, "uuid": "asc"}),
+                self.uuids(response),
+            )
+
+    def test_stream_of_full_pages(self):
+        self.items = self.items[:4]
+
+        self.assertEqual(
+            self.expected({"created_at": "asc", "uuid": "asc"}),
+            self.uuids(self.stream()),
+        )
+        self.assertEqual(3, self.objects.get_all.call_count)
+
+    def test_stream_single_sort_key(self):
+        self.assertRaises(
+            exc.ValidationSortNumberError,
+            self.stream,
+            "sort_key=name&sort_key=created_at",
+        )
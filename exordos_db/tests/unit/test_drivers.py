@@ -0,0 +1,191 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import datetime
+import unittest
+from unittest import mock
+
+from gcl_iam import drivers as iam_drivers
+from gcl_iam import exceptions as iam_exceptions
+
+from exordos_db.common.api import drivers
+
+AUDIENCE = "exordos_db"
+NOW = 1_750_000_000.0
+
+
+def make_token(token="token", audience=AUDIENCE, expires_in=3600):
+    expiration = datetime.datetime.fromtimestamp(
+        NOW + expires_in, tz=datetime.timezone.utc
+    )
+    return mock.Mock(
+        token=token, audience_name=audience, expiration_datetime=expiration
+    )
+
+
+class CachedHttpDriverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.now = NOW
+        clock = mock.Mock()
+        clock.time.side_effect = lambda: self.now
+        clock.monotonic.side_effect = lambda: self.now
+        patcher = mock.patch.object(drivers, "time", clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.driver = drivers.CachedHttpDriver(
+            "http://iam/v1/",
+            AUDIENCE,
+            "key",
+            introspection_cache_size=2,
+            introspection_cache_ttl=60,
+            jwks_retry_interval=30,
+        )
+
+
+class IntrospectionCacheTest(CachedHttpDriverTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(
+            iam_drivers.HttpDriver,
+            "get_introspection_info",
+            side_effect=lambda token_info, otp_code=None: {"token": token_info.token},
+        )
+        self.introspect = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached(self):
+        token = make_token()
+
+        first = self.driver.get_introspection_info(token)
+        first["amended"] = True
+        second = self.driver.get_introspection_info(token)
+
+        self.assertEqual({"token": "token"}, second)
+        self.assertEqual(1, self.introspect.call_count)
+
+    def test_ttl(self):
+        token = make_token()
+        self.driver.get_introspection_info(token)
+
+        self.now += 59
+        self.driver.get_introspection_info(token)
+        self.assertEqual(1, self.introspect.call_count)
+
+        self.now += 1
+        self.driver.get_introspection_info(token)
+        self.assertEqual(2, self.introspect.call_count)
+
+    def test_token_expiration(self):
+        token = make_token(expires_in=10)
+        self.driver.get_introspection_info(token)
+
+        self.now += 10
+        self.driver.get_introspection_info(token)
+
+        self.assertEqual(2, self.introspect.call_count)
+
+    def test_lru_eviction(self):
+        first, second, third = (make_token(f"token-{i}") for i in range(3))
+        self.driver.get_introspection_info(first)
+        self.driver.get_introspection_info(second)
+        # The first token becomes the most recently used one
+        self.driver.get_introspection_info(first)
+
+        self.driver.get_introspection_info(third)
+        self.assertEqual(3, self.introspect.call_count)
+
+        self.driver.get_introspection_info(first)
+        self.assertEqual(3, self.introspect.call_count)
+        self.driver.get_introspection_info(second)
+        self.assertEqual(4, self.introspect.call_count)
+
+    def test_otp_isnt_cached(self):
+        token = make_token()
+
+        self.driver.get_introspection_info(token, otp_code="123456")
+        self.driver.get_introspection_info(token, otp_code="123456")
+
+        self.assertEqual(2, self.introspect.call_count)
+
+    def test_failed_introspection_isnt_cached(self):
+        token = make_token()
+        self.introspect.side_effect = iam_exceptions.InvalidAuthTokenError()
+
+        for _ in range(2):
+            self.assertRaises(
+                iam_exceptions.InvalidAuthTokenError,
+                self.driver.get_introspection_info,
+                token,
+            )
+
+        self.assertEqual(2, self.introspect.call_count)
+
+
+class GetAlgorithmTest(CachedHttpDriverTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(iam_drivers.HttpDriver, "_get_algorithm_uncached")
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.driver._get_algorithm_cached = self.fetch
+
+    def test_keys_refreshed(self):
+        self.fetch.return_value = "keys"
+
+        self.assertEqual("keys", self.driver.get_algorithm(make_token()))
+
+    def test_first_failure_raises(self):
+        self.fetch.side_effect = ConnectionError()
+
+        for _ in range(2):
+            self.assertRaises(ConnectionError, self.driver.get_algorithm, make_token())
+        self.assertEqual(2, self.fetch.call_count)
+
+    def test_fallback_with_backoff(self):
+        self.fetch.return_value = "keys"
+        self.driver.get_algorithm(make_token())
+        self.fetch.side_effect = ConnectionError()
+
+        # The failed refresh isn't retried until the interval passes
+        for _ in range(3):
+            self.assertEqual("keys", self.driver.get_algorithm(make_token()))
+            self.now += 10
+        self.assertEqual(2, self.fetch.call_count)
+
+        self.assertEqual("keys", self.driver.get_algorithm(make_token()))
+        self.assertEqual(3, self.fetch.call_count)
+
+        self.fetch.side_effect = None
+        self.fetch.return_value = "new-keys"
+        self.now += 30
+        self.assertEqual("new-keys", self.driver.get_algorithm(make_token()))
+        self.assertEqual("new-keys", self.driver.get_algorithm(make_token()))
+        self.assertEqual(5, self.fetch.call_count)
+
+    def test_audience_mismatch(self):
+        self.fetch.return_value = "keys"
+        self.driver.get_algorithm(make_token())
+        self.fetch.side_effect = ConnectionError()
+        self.driver.get_algorithm(make_token())
+
+        for _ in range(2):
+            self.assertRaises(
+                iam_exceptions.TokenAudienceMismatchError,
+                self.driver.get_algorithm,
+                make_token(audience="other"),
+            )
@@ -0,0 +1,68 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from gcl_iam.api import controllers as iam_controllers
+from restalchemy.api import contexts
+from restalchemy.common import exceptions as exc
+import webob
+
+from exordos_db.common.api.middlewares import errors as errors_mw
+from exordos_db.user_api.api import controllers
+
+
+class ImportUsersTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(iam_controllers.contexts, "get_context")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        req = webob.Request.blank("/", method="POST")
+        req.api_context = contexts.RequestContext(req)
+        self.controller = controllers.PGInstanceController(request=req)
+        self.controller.process_result = lambda result: result
+        self.instance = mock.Mock(uuid=sys_uuid.uuid4())
+
+    def import_users(self, users):
+        return controllers.PGInstanceController.import_users.do_post(
+            controller=self.controller, resource=self.instance, users=users
+        )
+
+    def test_too_many_users(self):
+        limit = controllers.PGInstanceController.__max_imported_users__
+        users = [{"name": f"user{i}", "password": "password"} for i in range(limit + 1)]
+
+        with mock.patch.object(controllers.models.PGUser, "insert_many") as insert:
+            self.assertRaises(controllers.TooManyUsersError, self.import_users, users)
+
+        insert.assert_not_called()
+
+    def test_not_a_list(self):
+        self.assertRaises(exc.ParseError, self.import_users, {"name": "user"})
+
+    def test_too_many_users_status(self):
+        def application(environ, start_response):
+            raise controllers.TooManyUsersError(count=2, limit=1)
+
+        response = webob.Request.blank("/").get_response(
+            errors_mw.ErrorsHandlerMiddleware(application)
+        )
+
+        self.assertEqual(413, response.status_code)
@@ -0,0 +1,238 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+import webob
+
+from exordos_db.common.api.middlewares import metrics
+from exordos_db.services import hub
+from exordos_db.user_api.api import app
+
+
+INSTANCES = "/v1/types/postgres/instances/"
+
+
+class GetRouteTest(unittest.TestCase):
+    def setUp(self):
+        self._route_class = app.get_api_application()
+
+    def assertRoute(self, path, expected):
+        self.assertEqual(expected, metrics.get_route(path, self._route_class))
+
+    def test_collection(self):
+        self.assertRoute(INSTANCES, INSTANCES)
+        self.assertRoute("/", "/")
+
+    def test_resource(self):
+        self.assertRoute(f"{INSTANCES}{sys_uuid.uuid4()}", f"{INSTANCES}{{id}}")
+        self.assertRoute(f"{INSTANCES}any-name", f"{INSTANCES}{{id}}")
+
+    def test_nested_resource(self):
+        uuid = sys_uuid.uuid4()
+        self.assertRoute(
+            f"{INSTANCES}{uuid}/databases/", f"{INSTANCES}{{id}}/databases/"
+        )
+        self.assertRoute(
+            f"{INSTANCES}{uuid}/backups/{sys_uuid.uuid4()}",
+            f"{INSTANCES}{{id}}/backups/{{id}}",
+        )
+
+    def test_actions(self):
+        uuid = sys_uuid.uuid4()
+        self.assertRoute(
+            f"{INSTANCES}{uuid}/actions/top_queries",
+            f"{INSTANCES}{{id}}/actions/top_queries",
+        )
+        self.assertRoute(
+            f"{INSTANCES}{uuid}/actions/import_users/invoke",
+            f"{INSTANCES}{{id}}/actions/import_users/invoke",
+        )
+        self.assertRoute(
+            f"{INSTANCES}{uuid}/backups/{uuid}/actions/restore/invoke",
+            f"{INSTANCES}{{id}}/backups/{{id}}/actions/restore/invoke",
+        )
+
+    def test_unmatched_paths_are_other(self):
+        uuid = sys_uuid.uuid4()
+        for path in (
+            "/v1/unknown/",
+            "/v1/unknown/x/y",
+            "/v1//types/",
+            "/wp-admin/setup.php",
+            f"{INSTANCES}{uuid}/unknown/",
+            f"{INSTANCES}{uuid}/actions/unknown",
+            f"{INSTANCES}{uuid}/actions/",
+            f"{INSTANCES}{uuid}/actions/top_queries/x/y",
+            f"{INSTANCES}{uuid}/databases",
+            # A resource route can't be reached as a collection
+            "/v1/types/postgres/databases/",
+        ):
+            self.assertRoute(path, metrics.OTHER_ROUTE)
+
+
+class PrometheusMetricsMiddlewareTest(unittest.TestCase):
+    def _build(self, **kwargs):
+        application = mock.Mock(return_value=webob.Response(status=404))
+        return metrics.PrometheusMetricsMiddleware(
+            application=webob.dec.wsgify(application),
+            route_class=app.get_api_application(),
+            **kwargs,
+        )
+
+    def _errors(self, route):
+        return metrics.REQUEST_ERRORS.labels("GET", route, 404)._value.get()
+
+    def test_serves_metrics(self):
+        response = webob.Request.blank("/metrics").get_response(self._build())
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn(b"exordos_db_http_request_duration_seconds", response.body)
+
+    def test_metrics_path_disabled(self):
+        before = self._errors("/{id}")
+
+        response = webob.Request.blank("/metrics").get_response(
+            self._build(metrics_path=None)
+        )
+
+        # Passed to the application like any other request
+        self.assertEqual(404, response.status_code)
+        self.assertEqual(before + 1, self._errors("/{id}"))
+
+    def test_labels_by_route_template(self):
+        route = f"{INSTANCES}{{id}}"
+        before = self._errors(route)
+
+        middleware = self._build()
+        for _ in range(3):
+            webob.Request.blank(f"{INSTANCES}{sys_uuid.uuid4()}").get_response(
+                middleware
+            )
+
+        self.assertEqual(before + 3, self._errors(route))
+
+    def test_metrics_application(self):
+        response = webob.Request.blank("/").get_response(
+            metrics.build_metrics_application()
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn(b"exordos_db_http_requests_in_progress", response.body)
+
+
+class ProcessHubServiceTest(unittest.TestCase):
+    @mock.patch.object(metrics.multiprocess, "mark_process_dead")
+    def test_stop_marks_workers_dead(self, mark_process_dead):
+        service_hub = hub.ProcessHubService()
+        workers = [mock.Mock(pid=101), mock.Mock(pid=102), mock.Mock(pid=None)]
+        service_hub._instances = {mock.Mock(): worker for worker in workers}
+
+        with mock.patch.dict(os.environ, {metrics.MULTIPROC_DIR_ENV: "/tmp"}):
+            service_hub.stop()
+
+        for worker in workers:
+            worker.terminate.assert_called_once_with()
+            worker.join.assert_called_once_with()
+        mark_process_dead.assert_has_calls([mock.call(101), mock.call(102)])
+        self.assertEqual(2, mark_process_dead.call_count)
+
+    @mock.patch.object(metrics.multiprocess, "mark_process_dead")
+    def test_no_multiprocess_dir(self, mark_process_dead):
+        service_hub = hub.ProcessHubService()
+        service_hub._instances = {mock.Mock(): mock.Mock(pid=101)}
+
+        with mock.patch.dict(os.environ):
+            os.environ.pop(metrics.MULTIPROC_DIR_ENV, None)
+            service_hub.stop()
+
+        mark_process_dead.assert_not_called()
+
+    @mock.patch.object(metrics.multiprocess, "mark_process_dead")
+    def test_dead_worker_marked(self, mark_process_dead):
+        service_hub = hub.ProcessHubService()
+        alive = mock.Mock(pid=101, **{"is_alive.return_value": True})
+        dead = mock.Mock(pid=102, **{"is_alive.return_value": False})
+        service_hub._instances = {mock.Mock(): alive, mock.Mock(): dead}
+
+        with mock.patch.dict(os.environ, {metrics.MULTIPROC_DIR_ENV: "/tmp"}):
+            service_hub._iteration()
+
+        # Before the hub stops the others
+        self.assertEqual(mark_process_dead.call_args_list[0], mock.call(102))
+
+
+# A worker of the hub, it's forked after metrics are imported by root
+WORKER = """
+import os
+import sys
+
+from gcl_looper import utils
+
+from exordos_db.common.api.middlewares import metrics
+
+pid = os.fork()
+if pid == 0:
+    utils.downgrade_user_group_privileges("nobody")
+    with metrics.REQUESTS_IN_PROGRESS.labels("GET").track_inprogress():
+        metrics.REQUEST_LATENCY.labels("GET", "/", 200).observe(0.1)
+    os._exit(0)
+sys.exit(os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]))
+"""
+
+
+class MultiprocDirTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        os.chmod(tmp.name, 0o755)
+        # Like RuntimeDirectory= of the service unit
+        self.directory = os.path.join(tmp.name, "run")
+        os.mkdir(self.directory, 0o755)
+        self.env = {**os.environ, metrics.MULTIPROC_DIR_ENV: self.directory}
+
+    def test_files_of_previous_run_removed(self):
+        with open(os.path.join(self.directory, "counter_1.db"), "wb"):
+            pass
+
+        with mock.patch.dict(os.environ, self.env):
+            metrics.prepare_multiproc_dir()
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+    @unittest.skipUnless(os.getuid() == 0, "Workers are downgraded by root only")
+    def test_downgraded_worker_writes_metrics(self):
+        with mock.patch.dict(os.environ, self.env):
+            metrics.prepare_multiproc_dir("nobody")
+
+        result = subprocess.run(
+            [sys.executable, "-c", WORKER],
+            env=self.env,
+            capture_output=True,
+            check=False,
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr.decode())
+        self.assertTrue(
+            any(n.startswith("histogram_") for n in os.listdir(self.directory))
+        )
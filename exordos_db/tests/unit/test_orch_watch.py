@@ -0,0 +1,208 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import http.client
+import threading
+import time
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from restalchemy.api import contexts
+import webob
+
+from exordos_db.orch_api.api import controllers
+from exordos_db.orch_api import notifier
+from exordos_db.services import wsgi
+
+
+def notify_later(payload_notifier, key, delay=0.05):
+    timer = threading.Timer(delay, payload_notifier._notify, args=(key,))
+    timer.start()
+    return timer
+
+
+class PayloadNotifierTest(unittest.TestCase):
+    def setUp(self):
+        # The listener isn't started, notifications are sent directly
+        self.notifier = notifier.PayloadNotifier("postgresql://")
+
+    def test_generation(self):
+        generation = self.notifier.get_generation(("a",))
+
+        self.notifier._notify("b")
+        self.assertEqual(generation, self.notifier.get_generation(("a",)))
+
+        self.notifier._notify("a")
+        self.assertNotEqual(generation, self.notifier.get_generation(("a",)))
+
+    def test_wait_notified(self):
+        generation = self.notifier.get_generation(("a",))
+        notify_later(self.notifier, "a")
+
+        self.assertTrue(self.notifier.wait(("a",), generation, 5))
+
+    def test_wait_other_key(self):
+        generation = self.notifier.get_generation(("a",))
+        notify_later(self.notifier, "b").join()
+
+        self.assertFalse(self.notifier.wait(("a",), generation, 0.1))
+
+    def test_wait_notified_before(self):
+        generation = self.notifier.get_generation(("a",))
+        self.notifier._notify("a")
+
+        started_at = time.monotonic()
+        self.assertTrue(self.notifier.wait(("a",), generation, 5))
+        self.assertLess(time.monotonic() - started_at, 1)
+
+    def test_reconnect_wakes_all(self):
+        generation = self.notifier.get_generation(("a",))
+        threading.Timer(0.05, self.notifier._wake_all).start()
+
+        self.assertTrue(self.notifier.wait(("a",), generation, 5))
+
+
+class WatchPayloadTest(unittest.TestCase):
+    def setUp(self):
+        self.notifier = notifier.PayloadNotifier("postgresql://")
+        patcher = mock.patch.object(
+            notifier, "get_notifier", return_value=self.notifier
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.agent = mock.Mock(uuid=sys_uuid.uuid4(), node=sys_uuid.uuid4())
+        self.agent.get_payload.side_effect = self._get_payload
+        self.hash = "old"
+
+        req = webob.Request.blank("/")
+        req.api_context = contexts.RequestContext(req)
+        req.context = mock.Mock()
+        self.context = req.context
+        self.controller = controllers.UniversalAgentsController(request=req)
+        self.controller.process_result = lambda result: result
+
+    def _get_payload(self, hash, version):
+        return mock.Mock(
+            hash=self.hash,
+            dump_to_simple_view=mock.Mock(return_value={"hash": self.hash}),
+        )
+
+    def watch(self, hash="old", timeout="5"):
+        return controllers.UniversalAgentsController.watch_payload.do_get(
+            controller=self.controller,
+            resource=self.agent,
+            hash=hash,
+            timeout=timeout,
+        )
+
+    def change_later(self, key, delay=0.05):
+        def change():
+            self.hash = "new"
+            self.notifier._notify(key)
+
+        threading.Timer(delay, change).start()
+
+    def test_changed_payload_returned_at_once(self):
+        self.assertEqual({"hash": "old"}, self.watch(hash="other"))
+        self.context.session_close.assert_not_called()
+
+    def test_wait_for_target_change(self):
+        self.change_later(str(self.agent.uuid))
+
+        self.assertEqual({"hash": "new"}, self.watch())
+        self.assertEqual(2, self.agent.get_payload.call_count)
+
+    def test_session_released_while_waiting(self):
+        self.change_later(str(self.agent.uuid))
+
+        self.watch()
+
+        self.context.get_session.return_value.commit.assert_called_once_with()
+        self.context.session_close.assert_called_once_with()
+        self.context.start_new_session.assert_called_once_with()
+
+    def test_own_node_doesnt_wake(self):
+        # The actual resources reported by the agent itself
+        threading.Timer(0.05, self.notifier._notify, (str(self.agent.node),)).start()
+
+        started_at = time.monotonic()
+        self.assertEqual({"hash": "old"}, self.watch(timeout="0.3"))
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.3)
+        self.assertEqual(2, self.agent.get_payload.call_count)
+
+    def test_without_notifier(self):
+        with mock.patch.object(notifier, "get_notifier", return_value=None):
+            self.assertEqual({"hash": "old"}, self.watch())
+
+        self.context.session_close.assert_not_called()
+
+    def test_timeout_limit(self):
+        self.assertEqual(0.5, self.controller._parse_timeout("0.5"))
+        self.assertEqual(
+            self.controller.__watch_max_timeout__,
+            self.controller._parse_timeout("3600"),
+        )
+        for timeout in ("-1", "soon"):
+            self.assertRaises(
+                controllers.exc.ParseError, self.controller._parse_timeout, timeout
+            )
+
+
+class ThreadingWSGIServerTest(unittest.TestCase):
+    def setUp(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.server = wsgi.ThreadingWSGIServer(
+            ("127.0.0.1", 0), wsgi.LoggingWSGIRequestHandler, max_threads=1
+        )
+        self.server.set_app(self._app)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(self.release.set)
+
+    def _app(self, environ, start_response):
+        self.started.set()
+        self.release.wait(5)
+        start_response("200 OK", [("Content-Length", "2")])
+        return [b"ok"]
+
+    def request(self):
+        conn = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        try:
+            conn.request("GET", "/")
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def test_overflow_rejected(self):
+        results = []
+        busy = threading.Thread(target=lambda: results.append(self.request()))
+        busy.start()
+        # The first request takes the only thread
+        self.assertTrue(self.started.wait(5))
+
+        self.assertEqual((503, b""), self.request())
+
+        self.release.set()
+        busy.join()
+        self.assertEqual([(200, b"ok")], results)
+        self.assertEqual((200, b"ok"), self.request())
@@ -0,0 +1,177 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from gcl_sdk.agents.universal.clients.orch import exceptions as orch_exc
+from gcl_sdk.agents.universal.dm import models
+from gcl_sdk.agents.universal.services import agent
+
+from exordos_db.agent.universal import payload as ua_payload
+
+
+def make_payload(*names):
+    resources = []
+    for number, name in enumerate(names, 1):
+        resource = models.Resource.from_value(
+            {"uuid": str(sys_uuid.UUID(int=number)), "name": name}, "item"
+        )
+        resource.hash = resource.full_hash
+        resources.append(resource)
+    payload = models.Payload.empty()
+    payload.add_caps_resources(resources)
+    payload.calculate_hash()
+    return payload
+
+
+def make_fact(kind, name):
+    resource = models.Resource.from_value(
+        {"uuid": str(sys_uuid.uuid5(sys_uuid.NAMESPACE_DNS, name)), "name": name},
+        kind,
+    )
+    resource.hash = resource.full_hash
+    return resource
+
+
+def names(payload):
+    return sorted(r.value["name"] for r in payload.caps_resources("item"))
+
+
+class PayloadCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "payload.bin")
+        self.json_path = os.path.join(self._tmp.name, "payload.json")
+
+    def test_saved_payload_is_loaded(self):
+        payload = make_payload("item-1", "item-2")
+        ua_payload.PayloadCache(self.path).save(payload)
+
+        loaded = ua_payload.PayloadCache(self.path).load()
+
+        self.assertEqual(loaded, payload)
+        self.assertEqual(names(loaded), ["item-1", "item-2"])
+
+    def test_unchanged_payload_isn_t_rewritten(self):
+        cache = ua_payload.PayloadCache(self.path)
+        with mock.patch.object(os, "replace", wraps=os.replace) as replace:
+            cache.save(make_payload("item-1"))
+            cache.save(make_payload("item-1"))
+            self.assertEqual(replace.call_count, 1)
+
+            cache.save(make_payload("item-2"))
+            self.assertEqual(replace.call_count, 2)
+        self.assertEqual(names(ua_payload.PayloadCache(self.path).load()), ["item-2"])
+
+    def test_payload_changed_by_another_writer_is_parsed(self):
+        cache = ua_payload.PayloadCache(self.path)
+        cache.save(make_payload("item-1"))
+
+        ua_payload.PayloadCache(self.path).save(make_payload("item-2"))
+
+        self.assertEqual(names(cache.load()), ["item-2"])
+
+    def test_json_payload_is_migrated(self):
+        make_payload("item-1").save(self.json_path)
+        cache = ua_payload.PayloadCache(self.path, legacy_path=self.json_path)
+
+        payload = cache.load()
+        self.assertEqual(names(payload), ["item-1"])
+
+        cache.save(payload)
+        self.assertFalse(os.path.exists(self.json_path))
+        self.assertEqual(names(ua_payload.PayloadCache(self.path).load()), ["item-1"])
+
+    def test_corrupted_payload_is_ignored(self):
+        with open(self.path, "wb") as f:
+            f.write(ua_payload.MAGIC + b"\x03abc\xc1")
+
+        self.assertEqual(names(ua_payload.PayloadCache(self.path).load()), [])
+
+
+class CachedAgentService(ua_payload.PayloadCacheMixin, agent.UniversalAgentService):
+    pass
+
+
+class PayloadCacheMixinTest(unittest.TestCase):
+    """The copied iteration behaves as the iteration of the SDK."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def run_iterations(self, service_class, payload_path):
+        calls = []
+        target = make_payload("item-1")
+        target.add_facts_resources([make_fact("host", "host-1")])
+        target.add_facts_resources([make_fact("disk", "disk-1")])
+        target.calculate_hash()
+
+        def get_payload(agent_uuid, last_payload):
+            calls.append(("get_payload", getattr(last_payload, "hash", None)))
+            if next(requests) > 3:
+                raise orch_exc.AgentNotFound(uuid=agent_uuid)
+            return target
+
+        requests = iter(range(1, 5))
+        hosts = iter([["host-1"], ["host-1"], ["host-1", "host-2"]])
+
+        def list_facts(fact):
+            if fact == "disk":
+                raise ValueError(fact)
+            return [make_fact(fact, name) for name in next(hosts)]
+
+        caps_driver = mock.Mock()
+        facts_driver = mock.Mock()
+        facts_driver.get_facts.return_value = ["host", "disk", "cpu"]
+        facts_driver.list.side_effect = list_facts
+
+        service = service_class(
+            agent_uuid=sys_uuid.UUID(int=1),
+            orch_client=mock.Mock(agents_get_payload=get_payload),
+            caps_drivers=[caps_driver],
+            facts_drivers=[facts_driver],
+            payload_path=os.path.join(
+                tempfile.mkdtemp(dir=self._tmp.name), payload_path
+            ),
+        )
+        service._cap_driver_iteration = lambda driver, payload, collected: calls.append(
+            ("capability", driver is caps_driver, payload.hash)
+        )
+        service._actualize_facts = lambda collected, target: calls.append(
+            ("facts", sorted(collected), sorted(target))
+        )
+        service._register_agent = lambda: calls.append(("register",))
+
+        with mock.patch.object(ua_payload.LOG, "exception"):
+            with mock.patch.object(agent.LOG, "exception"):
+                for _ in range(4):
+                    service._iteration()
+        return calls
+
+    def test_iteration_as_sdk(self):
+        expected = self.run_iterations(agent.UniversalAgentService, "payload.json")
+
+        calls = self.run_iterations(CachedAgentService, "payload.bin")
+
+        self.assertEqual(calls, expected)
+        self.assertIn(("register",), calls)
+        self.assertEqual(len({c[1] for c in calls if c[0] == "get_payload"}), 3)
@@ -0,0 +1,56 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+
+from exordos_db.bench import pg_auth
+
+# Minimal items per second, an order of magnitude below a developer laptop
+# to stay stable on loaded CI runners while catching complexity regressions
+SASLPREP_MIN_THROUGHPUT = 1000
+# The overhead around PBKDF2: SASLprep, HMACs and encoding
+SCRAM_MIN_THROUGHPUT = {1: 1000, 4096: 50}
+VERIFY_MIN_THROUGHPUT = {1: 500, 4096: 50}
+BATCH_SIZES = (1, 10)
+
+
+class PgAuthBenchmarkTest(unittest.TestCase):
+    def test_saslprep_throughput(self):
+        for kind in pg_auth.PASSWORDS:
+            with self.subTest(kind=kind):
+                result = pg_auth.bench_saslprep(kind, count=500)
+                self.assertGreater(result.throughput, SASLPREP_MIN_THROUGHPUT)
+
+    def test_scram_sha_256_throughput(self):
+        for kind in pg_auth.PASSWORDS:
+            for iterations, minimum in SCRAM_MIN_THROUGHPUT.items():
+                for batch_size in BATCH_SIZES:
+                    with self.subTest(
+                        kind=kind, iterations=iterations, batch_size=batch_size
+                    ):
+                        result = pg_auth.bench_scram(
+                            kind, iterations, batch_size, repeat=3
+                        )
+                        self.assertEqual(result.items, batch_size * 3)
+                        self.assertGreater(result.throughput, minimum)
+
+    def test_verify_password_throughput(self):
+        for kind in pg_auth.PASSWORDS:
+            for iterations, minimum in VERIFY_MIN_THROUGHPUT.items():
+                with self.subTest(kind=kind, iterations=iterations):
+                    result = pg_auth.bench_verify(kind, iterations, count=3)
+                    self.assertGreater(result.throughput, minimum)
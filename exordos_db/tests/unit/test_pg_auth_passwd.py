@@ -0,0 +1,98 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+from concurrent.futures import process
+import unittest
+from unittest import mock
+
+from exordos_db.common.pg_auth import passwd
+
+
+class ScramSha256BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.items = [
+            (f"password-{i}", i.to_bytes(16, "big"), 1 + i % 3) for i in range(20)
+        ]
+
+    def test_equal_to_one_by_one_in_order(self):
+        expected = [passwd.scram_sha_256(*item) for item in self.items]
+
+        for processes in (1, 2):
+            with self.subTest(processes=processes):
+                self.assertEqual(
+                    passwd.scram_sha_256_batch(self.items, processes=processes),
+                    expected,
+                )
+
+    def test_random_salt(self):
+        verifiers = passwd.scram_sha_256_batch([("password", None, 1)] * 8, processes=2)
+
+        self.assertEqual(len(set(verifiers)), 8)
+        for verifier in verifiers:
+            self.assertTrue(passwd.verify_password("role", "password", verifier))
+
+    def test_empty(self):
+        self.assertEqual(passwd.scram_sha_256_batch([], processes=2), [])
+
+
+class SharedExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.items = [("password", None, 1)] * 8
+        self.addCleanup(passwd.configure_executor)
+
+    def test_pool_reused(self):
+        passwd.configure_executor(2)
+        with mock.patch.object(
+            passwd.futures,
+            "ProcessPoolExecutor",
+            wraps=passwd.futures.ProcessPoolExecutor,
+        ) as executor_class:
+            passwd.scram_sha_256_batch(self.items)
+            passwd.scram_sha_256_batch(self.items)
+
+        executor_class.assert_called_once_with(max_workers=2)
+
+    def test_small_batch_not_started(self):
+        with mock.patch.object(passwd.futures, "ProcessPoolExecutor") as executor:
+            passwd.scram_sha_256_batch(self.items[: passwd.MIN_PARALLEL_BATCH - 1])
+
+        executor.assert_not_called()
+
+    def test_configure_shuts_down_pool(self):
+        passwd.configure_executor(2)
+        passwd.scram_sha_256_batch(self.items)
+        executor = passwd._executor
+
+        passwd.configure_executor(3)
+
+        self.assertIsNone(passwd._executor)
+        self.assertRaises(RuntimeError, executor.submit, int)
+        passwd.scram_sha_256_batch(self.items)
+        self.assertEqual(3, passwd._executor._max_workers)
+
+    def test_broken_pool_replaced(self):
+        passwd.configure_executor(2)
+        broken = mock.Mock()
+        broken.map.side_effect = process.BrokenProcessPool()
+        passwd._executor = broken
+
+        self.assertRaises(
+            process.BrokenProcessPool, passwd.scram_sha_256_batch, self.items
+        )
+
+        self.assertIsNone(passwd._executor)
+        self.assertEqual(8, len(passwd.scram_sha_256_batch(self.items)))
@@ -0,0 +1,95 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from exordos_db.common.pg_auth import saslprep
+
+ASCII = st.text(alphabet=st.characters(max_codepoint=0x7F))
+# Spaces, letters of bidi scripts, mapped to nothing and unassigned code
+# points are drawn more often than in the uniform text
+SPECIAL = st.sampled_from(
+    "\u00a0\u2003\u00ad\u200b\ufb01\u05d0\u0627\u0661\u0221\ue000\U000e0001"
+)
+TEXT = st.one_of(
+    ASCII,
+    st.text(),
+    st.text(alphabet=st.one_of(SPECIAL, st.characters(max_codepoint=0x7F))),
+)
+
+
+def full_saslprep(data, prohibit_unassigned_code_points=True):
+    """The full algorithm without the fast path and the cache."""
+    try:
+        return saslprep._saslprep.__wrapped__(data, prohibit_unassigned_code_points)
+    except ValueError as e:
+        return e.__class__, str(e)
+
+
+def fast_saslprep(data, prohibit_unassigned_code_points=True):
+    try:
+        return saslprep.saslprep(data, prohibit_unassigned_code_points)
+    except ValueError as e:
+        return e.__class__, str(e)
+
+
+class SaslprepTest(unittest.TestCase):
+    def setUp(self):
+        saslprep._saslprep.cache_clear()
+
+    @given(ASCII)
+    def test_ascii_is_unchanged_or_prohibited(self, data):
+        result = fast_saslprep(data)
+        if all(0x20 <= ord(c) < 0x7F for c in data):
+            self.assertIs(result, data)
+        else:
+            self.assertIsInstance(result, tuple)
+
+    @given(TEXT, st.booleans())
+    def test_equal_to_full_algorithm(self, data, prohibit_unassigned):
+        self.assertEqual(
+            fast_saslprep(data, prohibit_unassigned),
+            full_saslprep(data, prohibit_unassigned),
+        )
+
+    @given(TEXT)
+    def test_cached_equal_to_full_algorithm(self, data):
+        first = fast_saslprep(data)
+        self.assertEqual(fast_saslprep(data), first)
+        self.assertEqual(first, full_saslprep(data))
+
+    def test_cache_is_bounded(self):
+        for i in range(saslprep.CACHE_SIZE * 2):
+            saslprep.saslprep(f"пароль-{i}")
+
+        info = saslprep._saslprep.cache_info()
+        self.assertEqual(info.currsize, saslprep.CACHE_SIZE)
+
+    def test_ascii_is_not_cached(self):
+        saslprep.saslprep("password")
+
+        self.assertEqual(saslprep._saslprep.cache_info().currsize, 0)
+
+    def test_empty(self):
+        self.assertEqual(saslprep.saslprep(""), "")
+        self.assertEqual(saslprep.saslprep("\u00ad"), "")
+
+    def test_bytes_are_ignored(self):
+        self.assertEqual(saslprep.saslprep(b"\x00"), b"\x00")
@@ -0,0 +1,222 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from exordos_db.agent.universal.drivers import pg_backup
+
+
+def fake_pg_dump(args):
+    # Dump directory of two table files and the TOC
+    directory = next(a for a in args if a.startswith("--file=")).split("=", 1)[1]
+    os.makedirs(directory)
+    for name, data in (("toc.dat", b"toc"), ("3001.dat.zst", b"x" * 10)):
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
+
+
+class FileSystemStorageTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.storage = pg_backup.get_storage(f"file://{tmp.name}")
+
+    def test_put_get_list_delete(self):
+        self.assertEqual(self.storage.put("a/b/c", io.BytesIO(b"data")), 4)
+        out = io.BytesIO()
+        self.storage.get("a/b/c", out)
+
+        self.assertEqual(out.getvalue(), b"data")
+        self.assertEqual(self.storage.list("a"), ["b"])
+        self.storage.delete("a/b")
+        self.assertFalse(self.storage.exists("a/b/c"))
+        self.assertEqual(self.storage.list("a/b"), [])
+
+    def test_key_out_of_storage(self):
+        self.assertRaises(ValueError, self.storage.exists, "../etc/passwd")
+
+    def test_unsupported_scheme(self):
+        self.assertRaises(ValueError, pg_backup.get_storage, "s3://bucket/path")
+
+
+class BackupRunnerTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(setattr, pg_backup.BackupRunner, "_instance", None)
+        pg_backup.BackupRunner._instance = None
+        self.runner = pg_backup.BackupRunner(
+            storage_url=f"file://{tmp.name}/storage",
+            spool_dir=os.path.join(tmp.name, "spool"),
+        )
+        self.spool_dir = os.path.join(tmp.name, "spool")
+        compression = mock.patch.object(
+            pg_backup, "dump_compression", return_value="zstd"
+        )
+        compression.start()
+        self.addCleanup(compression.stop)
+
+    def test_backup(self):
+        with mock.patch.object(pg_backup, "_run", side_effect=fake_pg_dump):
+            result = self.runner._backup("i/b", ["db1", "db2"], 2)
+
+        self.assertEqual(result, {"status": pg_backup.ACTIVE, "size": 26})
+        manifest = io.BytesIO()
+        self.runner.storage.get("i/b/manifest.json", manifest)
+        self.assertEqual(
+            json.loads(manifest.getvalue())["databases"]["db1"],
+            {"3001.dat.zst": 10, "toc.dat": 3},
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.spool_dir, "i/b")))
+
+    def test_status_after_restart(self):
+        self.assertIsNone(self.runner.backup_status("i", "b"))
+
+        self.runner.storage.put("i/b/started", io.BytesIO())
+        self.assertEqual(self.runner.backup_status("i", "b")["status"], pg_backup.ERROR)
+
+        self.runner.storage.put(
+            "i/b2/manifest.json", io.BytesIO(b'{"databases": {}, "size": 7}')
+        )
+        self.assertEqual(
+            self.runner.backup_status("i", "b2"),
+            {"status": pg_backup.ACTIVE, "size": 7},
+        )
+
+    def test_restore_without_manifest(self):
+        # The backup is made on another node and the storage isn't shared
+        self.runner.storage.put("i/b/started", io.BytesIO())
+
+        with self.assertRaisesRegex(RuntimeError, "must be shared"):
+            self.runner._restore("i/b", 2)
+
+    def test_collect_garbage(self):
+        for backup in ("b1", "b2"):
+            self.runner.storage.put(f"i/{backup}/started", io.BytesIO())
+
+        self.runner.collect_garbage("i", {"b2"})
+
+        self.assertEqual(self.runner.storage.list("i"), ["b2"])
+
+    def test_collect_wal(self):
+        for name in (
+            "000000010000000000000001",
+            "000000010000000000000002",
+            "000000020000000000000003",
+            "00000002.history",
+        ):
+            self.runner.storage.put(pg_backup.wal_key("i", name), io.BytesIO())
+        self.runner.storage.put(
+            "i/b/manifest.json",
+            io.BytesIO(b'{"start_wal": "000000010000000000000002", "size": 1}'),
+        )
+        backups = {"b": {"kind": pg_backup.PHYSICAL, "status": pg_backup.ACTIVE}}
+
+        self.runner.collect_wal("i", backups, "000000020000000000000003")
+
+        self.assertEqual(
+            self.runner.storage.list("i/wal"),
+            [
+                "000000010000000000000002.zst",
+                "00000002.history.zst",
+                "000000020000000000000003.zst",
+            ],
+        )
+
+    def test_collect_wal_backup_in_progress(self):
+        self.runner.storage.put(
+            pg_backup.wal_key("i", "000000010000000000000001"), io.BytesIO()
+        )
+        backups = {"b": {"kind": pg_backup.PHYSICAL, "status": "IN_PROGRESS"}}
+
+        self.runner.collect_wal("i", backups, "000000010000000000000005")
+
+        self.assertEqual(len(self.runner.storage.list("i/wal")), 1)
+
+
+class StorageIdTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.addCleanup(setattr, pg_backup.BackupRunner, "_instance", None)
+
+    def make_runner(self, storage_url=None):
+        pg_backup.BackupRunner._instance = None
+        return pg_backup.BackupRunner(storage_url=storage_url)
+
+    def test_shared_storage(self):
+        storage_id = self.make_runner(f"file://{self.tmp}/a").storage_id()
+
+        self.assertEqual(
+            self.make_runner(f"file://{self.tmp}/a").storage_id(), storage_id
+        )
+        self.assertNotEqual(
+            self.make_runner(f"file://{self.tmp}/b").storage_id(), storage_id
+        )
+        self.assertIsNone(self.make_runner().storage_id())
+
+    def test_restore_base_backup_not_found(self):
+        storage = pg_backup.get_storage(f"file://{self.tmp}/a")
+
+        with self.assertRaisesRegex(RuntimeError, "must be shared"):
+            pg_backup.restore_base_backup(
+                storage, "i", "b", os.path.join(self.tmp, "data")
+            )
+
+
+class NoStorageBackupRunnerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, pg_backup.BackupRunner, "_instance", None)
+        pg_backup.BackupRunner._instance = None
+        self.runner = pg_backup.BackupRunner()
+
+    def test_backup_and_restore_fail(self):
+        with mock.patch.object(threading, "Thread") as thread:
+            self.runner.backup("i", "b", ["db1"], 2)
+            self.runner.restore("i", "b", "2025-06-01T10:00:00", 2)
+
+        thread.assert_not_called()
+        error = {"status": pg_backup.ERROR, "error": pg_backup.NO_STORAGE_ERROR}
+        self.assertEqual(self.runner.backup_status("i", "b"), error)
+        self.assertEqual(
+            self.runner.restore_status("i", "b", "2025-06-01T10:00:00"), error
+        )
+        self.assertIsNone(self.runner.backup_status("i", "b2"))
+
+    def test_nothing_collected(self):
+        self.runner.collect_garbage("i", {})
+        self.runner.collect_wal("i", {}, "000000010000000000000005")
+
+
+class WalFileNameTestCase(unittest.TestCase):
+    def test_wal_file_name(self):
+        # 16MB segments, 256 segments per log id
+        self.assertEqual(
+            pg_backup.wal_file_name(1, 0x1_23000028, 16 * 1024**2),
+            "000000010000000100000023",
+        )
+        self.assertEqual(
+            pg_backup.wal_file_name(3, 0x2000028, 64 * 1024**2),
+            "000000030000000000000000",
+        )
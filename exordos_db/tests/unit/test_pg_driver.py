@@ -0,0 +1,213 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import types
+import unittest
+import uuid
+from unittest import mock
+
+from exordos_db.agent.universal.drivers import pg
+
+
+def statement(calls, exec_time, read_time=0.0):
+    return {
+        "queryid": 1,
+        "userid": 10,
+        "dbid": 5,
+        "query": "SELECT $1",
+        "user": "u",
+        "database": "d",
+        "calls": calls,
+        "total_exec_time": exec_time,
+        "rows": calls,
+        "blks_read": 0,
+        "blks_written": 0,
+        "blk_read_time": read_time,
+        "blk_write_time": 0.0,
+    }
+
+
+class TopQueriesCollectorTestCase(unittest.TestCase):
+    def setUp(self):
+        psql = mock.Mock()
+        psql.info.server_version = 160000
+        self.collector = pg.TopQueriesCollector(types.SimpleNamespace(psql=psql))
+        self.fetch = mock.patch.object(self.collector, "_fetch").start()
+        self.addCleanup(mock.patch.stopall)
+        self.now = mock.patch.object(pg.time, "monotonic", return_value=1000).start()
+
+    def test_collect_once_a_period(self):
+        self.fetch.return_value = [statement(1, 1.0)]
+        self.assertEqual(self.collector.collect(), {})
+
+        self.fetch.return_value = [statement(3, 5.0, read_time=2.5)]
+        self.assertEqual(self.collector.collect(), {})
+        self.now.return_value += pg.TOP_QUERIES_PERIOD
+        top = self.collector.collect()
+
+        self.assertEqual(self.fetch.call_count, 2)
+        [entry] = top["by_io_time"]
+        self.assertEqual(entry["calls"], 2)
+        self.assertEqual(entry["total_time_ms"], 4.0)
+        self.assertEqual(entry["blk_read_time_ms"], 2.5)
+        self.assertIs(self.collector.collect(), top)
+
+
+class ClientsExtensionsTestCase(unittest.TestCase):
+    def test_forget_database(self):
+        clients = pg.ClientsSingleton.__new__(pg.ClientsSingleton)
+        clients._extensions = {("a", "ext"), ("b", "ext")}
+
+        clients.forget_database("a")
+
+        self.assertEqual(clients._extensions, {("b", "ext")})
+
+
+class ClientsReplicationLatencyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clients = pg.ClientsSingleton.__new__(pg.ClientsSingleton)
+        self.clients._pclient = mock.Mock()
+        self.clients._psql = mock.Mock(broken=False, closed=False)
+        self.clients._psql.execute.return_value.fetchall.return_value = [
+            ("a", 12.7, 17.2),
+            ("b", None, None),
+        ]
+
+    def test_quantized_on_primary(self):
+        self.clients._pclient.is_primary.return_value = True
+
+        self.assertEqual(
+            self.clients.get_replication_latency(),
+            {
+                "a": {"write_lag_ms": 10, "flush_lag_ms": 15},
+                "b": {"write_lag_ms": None, "flush_lag_ms": None},
+            },
+        )
+
+    def test_empty_on_replica(self):
+        self.clients._pclient.is_primary.return_value = False
+
+        self.assertEqual(self.clients.get_replication_latency(), {})
+        self.clients._psql.execute.assert_not_called()
+
+    def test_reported_as_stats(self):
+        self.clients.top_queries = mock.Mock()
+        with (
+            mock.patch.object(pg, "ClientsSingleton", return_value=self.clients),
+            mock.patch.object(
+                self.clients, "get_replication_latency", return_value={"a": {}}
+            ),
+        ):
+            stats = pg.PGCapabilityDriver.get_stats(mock.Mock())
+
+        self.assertEqual(stats["replication_latency"], {"a": {}})
+        self.assertNotIn("replication_latency", pg.PGInstance.properties.properties)
+
+
+class PGInstanceTestCase(unittest.TestCase):
+    def setUp(self):
+        clients = mock.patch.object(pg, "ClientsSingleton").start()
+        self.addCleanup(mock.patch.stopall)
+        self.c = clients.return_value
+        self.c.pclient.name = "b"
+        self.instance = pg.PGInstance(
+            uuid=uuid.uuid4(), name="i", parameters={"work_mem": "8MB"}
+        )
+
+    def _reconcile(self, actual, contexts):
+        self.c.pclient.config_get.return_value = {"postgresql": {"parameters": actual}}
+        self.c.pclient.bootstrap_parameters = {"max_connections": 100}
+        self.c.psql.execute.return_value.fetchall.return_value = list(contexts.items())
+        self.instance._reconcile_parameters()
+
+    def test_reconcile_parameters(self):
+        self._reconcile(
+            {"max_connections": 100, "work_mem": "4MB", "shared_buffers": "1GB"},
+            {
+                "work_mem": "user",
+                "shared_buffers": "postmaster",
+            },
+        )
+
+        self.c.pclient.config_patch.assert_called_once_with(
+            # The removed override is reset to the default
+            {"postgresql": {"parameters": {"work_mem": "8MB", "shared_buffers": None}}}
+        )
+
+    def test_reconcile_parameters_skip_unknown(self):
+        self.instance.parameters = {"block_size": 16384, "unknown": 1}
+        self._reconcile({"max_connections": 100}, {"block_size": "internal"})
+
+        self.c.pclient.config_patch.assert_not_called()
+
+    def test_reconcile_parameters_actual(self):
+        self._reconcile({"max_connections": 100, "work_mem": "8MB"}, {})
+
+        self.c.pclient.config_patch.assert_not_called()
+        self.c.psql.execute.assert_not_called()
+
+    def _allowed(self, *members):
+        return self.instance._is_restart_allowed(
+            [
+                {"name": name, "role": role, "state": state, "pending_restart": p}
+                for name, role, state, p in members
+            ]
+        )
+
+    def test_restart_replicas_by_names(self):
+        self.assertTrue(
+            self._allowed(
+                ("a", "leader", "running", True),
+                ("b", "replica", "streaming", True),
+                ("c", "replica", "streaming", True),
+            )
+        )
+        self.assertFalse(
+            self._allowed(
+                ("a", "replica", "streaming", True),
+                ("b", "replica", "streaming", True),
+                ("c", "leader", "running", True),
+            )
+        )
+
+    def test_restart_one_at_a_time(self):
+        self.assertFalse(
+            self._allowed(
+                ("a", "replica", "starting", False),
+                ("b", "replica", "streaming", True),
+                ("c", "leader", "running", True),
+            )
+        )
+        self.assertFalse(
+            self._allowed(
+                ("b", "replica", "streaming", False), ("c", "leader", "running", True)
+            )
+        )
+
+    def test_restart_primary_last(self):
+        self.assertFalse(
+            self._allowed(
+                ("a", "replica", "streaming", True),
+                ("b", "leader", "running", True),
+            )
+        )
+        self.assertTrue(
+            self._allowed(
+                ("a", "replica", "streaming", False),
+                ("b", "leader", "running", True),
+            )
+        )
@@ -0,0 +1,151 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import concurrent.futures
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from exordos_db.agent.universal.drivers import pg_backup
+from exordos_db.agent.universal.drivers import pg_wal
+from exordos_db.agent.universal.drivers import pg_wal_client
+
+
+class WalArchiverTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.storage = pg_backup.get_storage(f"file://{tmp.name}/storage")
+        self.wal_dir = os.path.join(tmp.name, "pg_wal")
+        os.makedirs(os.path.join(self.wal_dir, "archive_status"))
+        self.tmp = tmp.name
+
+        self.addCleanup(setattr, pg_wal.WalArchiver, "_instance", None)
+        pg_wal.WalArchiver._instance = None
+        self.archiver = pg_wal.WalArchiver(self.storage, jobs=2, queue_size=2)
+        self.addCleanup(self.archiver._executor.shutdown)
+        # Configure the archiver without the background thread
+        self.archiver._pg_instance, self.archiver._wal_dir = "i", self.wal_dir
+
+    def _make_wal(self, name, data=b"wal"):
+        with open(os.path.join(self.wal_dir, name), "wb") as f:
+            f.write(data)
+        open(os.path.join(self.wal_dir, "archive_status", f"{name}.ready"), "w").close()
+
+    def _wait_pushing(self):
+        concurrent.futures.wait(self.archiver._pushing.values())
+        self.archiver._push_ready()
+
+    def test_push_fetch(self):
+        self._make_wal("000000010000000000000001", b"x" * 1000)
+        pg_wal.push(
+            self.storage, "i", os.path.join(self.wal_dir, "000000010000000000000001")
+        )
+        path = os.path.join(self.tmp, "restored")
+
+        self.assertTrue(
+            pg_wal.fetch(self.storage, "i", "000000010000000000000001", path)
+        )
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"x" * 1000)
+        self.assertFalse(
+            pg_wal.fetch(self.storage, "i", "000000010000000000000002", path)
+        )
+
+    def test_push_ready_bounded(self):
+        names = [f"0000000100000000000000{i:02X}" for i in range(1, 4)]
+        for name in names:
+            self._make_wal(name)
+
+        self.archiver._push_ready()
+        self.assertEqual(sorted(self.archiver._pushing), names[:2])
+
+        self._wait_pushing()
+        self.assertEqual(set(self.archiver._pushed), set(names[:2]))
+        self.assertEqual(list(self.archiver._pushing), names[2:])
+        self._wait_pushing()
+
+        for name in names:
+            self.assertTrue(self.storage.exists(pg_backup.wal_key("i", name)))
+        self.assertEqual(self.archiver.failures, 0)
+
+        # PostgreSQL marks the files as archived
+        for name in names:
+            os.rename(
+                os.path.join(self.wal_dir, "archive_status", f"{name}.ready"),
+                os.path.join(self.wal_dir, "archive_status", f"{name}.done"),
+            )
+        self.archiver._push_ready()
+        self.assertEqual(self.archiver._pushed, set())
+
+    def test_wait_pushed_ahead(self):
+        names = [f"0000000100000000000000{i:02X}" for i in range(1, 4)]
+        for name in names:
+            self._make_wal(name)
+
+        # PostgreSQL asks for the file before the archiver thread sees it
+        self.assertTrue(self.archiver.wait_pushed("i", names[1], 5))
+
+        self.assertTrue(self.storage.exists(pg_backup.wal_key("i", names[1])))
+        self.assertFalse(self.storage.exists(pg_backup.wal_key("i", names[0])))
+        self.archiver._push_ready()
+        self.assertEqual(sorted(self.archiver._pushing), [names[0], names[2]])
+        self.assertIn(names[1], self.archiver._pushed)
+        self._wait_pushing()
+        self.assertTrue(self.archiver.wait_pushed("i", names[0], 0))
+
+    def test_wait_pushed_rejected(self):
+        self._make_wal("000000010000000000000001")
+
+        self.assertFalse(self.archiver.wait_pushed("j", "000000010000000000000001", 5))
+        self.assertFalse(self.archiver.wait_pushed("i", "000000010000000000000002", 5))
+        self.assertFalse(
+            self.archiver.wait_pushed("i", "../000000010000000000000001", 5)
+        )
+        self.assertEqual(self.archiver._pushing, {})
+
+    def test_wait_pushed_failure(self):
+        self._make_wal("000000010000000000000001")
+
+        with mock.patch.object(pg_wal, "push", side_effect=OSError("no space")):
+            self.assertFalse(
+                self.archiver.wait_pushed("i", "000000010000000000000001", 5)
+            )
+        self.archiver._push_ready()
+        self.assertEqual(self.archiver.failures, 1)
+
+    def test_archived_through_socket(self):
+        self._make_wal("000000010000000000000001")
+        server = pg_wal.ArchivedServer(
+            os.path.join(self.tmp, "run", "wal.sock"), self.archiver
+        )
+        self.addCleanup(server.server_close)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+
+        def wait_archived(name):
+            return pg_wal_client.wait_archived(
+                "i", name, 5, socket_path=os.path.join(self.tmp, "run", "wal.sock")
+            )
+
+        self.assertTrue(wait_archived("000000010000000000000001"))
+        self.assertTrue(
+            self.storage.exists(pg_backup.wal_key("i", "000000010000000000000001"))
+        )
+        self.assertFalse(wait_archived("000000010000000000000002"))
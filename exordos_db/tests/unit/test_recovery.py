@@ -0,0 +1,88 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from gcl_iam.api import controllers as iam_controllers
+from restalchemy.api import contexts
+from restalchemy.storage import exceptions as storage_exc
+import webob
+
+from exordos_db.user_api.api import controllers
+from exordos_db.user_api.dm import models
+
+
+def make_source(*storage_ids, nodes_number=None):
+    source = mock.Mock(nodes_number=nodes_number or len(storage_ids))
+    source.get_node_resources.return_value = [
+        mock.Mock(value={"backup_storage_id": storage_id}) for storage_id in storage_ids
+    ]
+    return source
+
+
+class BackupStorageIdTest(unittest.TestCase):
+    def test_shared(self):
+        source = make_source("s1", "s1")
+
+        self.assertEqual(models.PGInstance.get_backup_storage_id(source), "s1")
+
+    def test_not_shared(self):
+        source = make_source("s1", "s2")
+
+        self.assertIsNone(models.PGInstance.get_backup_storage_id(source))
+
+    def test_not_configured(self):
+        source = make_source(None, None)
+
+        self.assertIsNone(models.PGInstance.get_backup_storage_id(source))
+
+    def test_node_not_reported(self):
+        source = make_source("s1", nodes_number=2)
+
+        self.assertIsNone(models.PGInstance.get_backup_storage_id(source))
+
+
+class RecoveryBackupTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(iam_controllers.contexts, "get_context")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        req = webob.Request.blank("/", method="POST")
+        req.api_context = contexts.RequestContext(req)
+        self.controller = controllers.PGInstanceController(request=req)
+        self.source = mock.Mock(uuid=sys_uuid.uuid4())
+        self.controller.get = mock.Mock(return_value=self.source)
+
+    def test_shared_storage(self):
+        self.source.get_backup_storage_id.return_value = "s1"
+
+        backup = self.controller._get_recovery_backup(self.source.uuid, None, None)
+
+        self.assertIs(backup, self.source.get_recovery_backup.return_value)
+
+    def test_storage_not_shared(self):
+        self.source.get_backup_storage_id.return_value = None
+
+        self.assertRaises(
+            storage_exc.ConflictRecords,
+            self.controller._get_recovery_backup,
+            self.source.uuid,
+            None,
+            None,
+        )
@@ -0,0 +1,174 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import types
+import unittest
+import uuid
+from unittest import mock
+
+from exordos_db.infra.services import rolling
+
+A, B, C = (str(uuid.UUID(int=i)) for i in range(1, 4))
+
+
+class FakeCore:
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.updates = []
+
+    def get(self, collection, node_uuid):
+        return dict(self.nodes[str(node_uuid)])
+
+    def update(self, collection, node_uuid, **kwargs):
+        # Core accepts the new size at once and resizes the node later
+        self.nodes[str(node_uuid)].update(kwargs)
+        self.updates.append(str(node_uuid))
+
+
+class RollingResizerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.core = FakeCore(
+            {
+                name: {"cores": 1, "ram": 1024, "status": "ACTIVE", "ipv4": name}
+                for name in (A, B, C)
+            }
+        )
+        self.members = {
+            A: {"name": A, "host": A, "role": "leader", "state": "running"},
+            B: {"name": B, "host": B, "role": "replica", "state": "streaming"},
+            C: {"name": C, "host": C, "role": "replica", "state": "streaming"},
+        }
+        for member in self.members.values():
+            member["lag"] = 0
+        # Start times of PostgreSQL by hosts of the members
+        self.start_times = dict.fromkeys(self.members, 0)
+        patroni = mock.patch.object(rolling, "PatroniClusterClient").start()
+        self.addCleanup(mock.patch.stopall)
+        self.patroni = patroni.return_value
+        self.patroni.get_cluster.side_effect = lambda: {
+            "members": [dict(m) for m in self.members.values()]
+        }
+        self.patroni.get_start_time.side_effect = self.start_times.get
+        self.now = mock.patch.object(
+            rolling.time, "monotonic", return_value=1000
+        ).start()
+
+        self.instance = types.SimpleNamespace(uuid=uuid.uuid4(), cpu=2, ram=2048)
+        self.nodeset = types.SimpleNamespace(nodes=self.core.nodes)
+        self.resizer = rolling.RollingResizer(self.core)
+
+    def _step(self):
+        return self.resizer.step(self.instance, self.nodeset)
+
+    def _restart(self, name):
+        """Core restarts the node with the new size, Patroni rejoins it."""
+        self.core.nodes[name]["status"] = "IN_PROGRESS"
+        self.members[name]["state"] = "stopped"
+        self.assertFalse(self._step())
+        self.core.nodes[name]["status"] = "ACTIVE"
+        self.assertFalse(self._step())
+        self.members[name]["state"] = "streaming"
+        self.start_times[name] += 1
+
+    def test_resize_replicas_switchover_old_primary(self):
+        self.assertFalse(self._step())
+        self.assertEqual(self.core.updates, [B])
+
+        # The node has the new size in Core, but isn't restarted yet
+        self.assertFalse(self._step())
+        self.assertEqual(self.core.updates, [B])
+        self.assertFalse(self.resizer.is_completed(self.instance, self.nodeset))
+
+        self._restart(B)
+        self.members[B]["lag"] = rolling.MAX_REPLICA_LAG + 1
+        self.assertFalse(self._step())
+        self.members[B]["lag"] = 0
+        self.assertFalse(self._step())
+        self.assertEqual(self.core.updates, [B, C])
+
+        self._restart(C)
+        self.members[C]["lag"] = 10
+        self.assertFalse(self._step())
+        self.assertEqual(self.core.updates, [B, C])
+        self.patroni.switchover.assert_called_once_with(A, A, B)
+
+        # The switchover isn't finished yet
+        self.assertFalse(self._step())
+        self.patroni.switchover.assert_called_once()
+        self.members[A]["role"], self.members[B]["role"] = "replica", "leader"
+        self.assertFalse(self._step())
+        self.assertEqual(self.core.updates, [B, C, A])
+
+        self._restart(A)
+        self.assertTrue(self._step())
+        self.assertTrue(self.resizer.is_completed(self.instance, self.nodeset))
+
+    def test_resize_done_between_iterations(self):
+        self.assertFalse(self._step())
+        self.assertEqual(self.core.updates, [B])
+
+        # The node has never been seen not ACTIVE, but PostgreSQL restarted
+        self.start_times[B] += 1
+        self.assertFalse(self._step())
+
+        self.assertEqual(self.core.updates, [B, C])
+
+    def test_wait_unhealthy_cluster(self):
+        self.members[C]["state"] = "starting"
+
+        self.assertFalse(self._step())
+
+        self.assertEqual(self.core.updates, [])
+
+    def test_step_retried_after_deadline(self):
+        self.assertFalse(self._step())
+        self.now.return_value += rolling.STEP_TIMEOUT
+        self.assertFalse(self._step())
+        self.assertEqual(self.core.updates, [B])
+
+        self.now.return_value += 1
+        with self.assertLogs(rolling.LOG, "WARNING"):
+            self.assertFalse(self._step())
+
+        self.assertEqual(self.core.updates, [B, B])
+
+    def test_switchover_retried_after_deadline(self):
+        for name in (B, C):
+            self.core.nodes[name].update(cores=2, ram=2048)
+        self.assertFalse(self._step())
+        self.patroni.switchover.assert_called_once_with(A, A, B)
+
+        self.now.return_value += rolling.STEP_TIMEOUT + 1
+        self.assertFalse(self._step())
+
+        self.assertEqual(self.patroni.switchover.call_count, 2)
+        self.assertEqual(self.core.updates, [])
+
+    def test_resize_in_flight_restored(self):
+        self.assertFalse(self._step())
+        self.core.nodes[B]["status"] = "IN_PROGRESS"
+        self.members[B]["state"] = "stopped"
+
+        # The service is restarted in the middle of the resize
+        self.resizer = rolling.RollingResizer(self.core)
+        self.assertFalse(self._step())
+        self.assertFalse(self.resizer.is_completed(self.instance, self.nodeset))
+        self.core.nodes[B]["status"] = "ACTIVE"
+        self.members[B]["state"] = "streaming"
+        self.assertFalse(self._step())
+
+        self.assertEqual(self.core.updates, [B, C])
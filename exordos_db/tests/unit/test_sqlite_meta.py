@@ -0,0 +1,99 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import contextlib
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+import uuid as sys_uuid
+
+from gcl_sdk.agents.universal.dm import models
+from gcl_sdk.agents.universal.drivers import meta
+from restalchemy.dm import properties
+from restalchemy.dm import types
+
+from exordos_db.agent.universal.drivers import sqlite_meta
+
+
+class Item(meta.MetaDataPlaneModel):
+    name = properties.property(types.String(), required=True)
+    size = properties.property(types.Integer(), default=0)
+
+    def get_meta_model_fields(self):
+        return {"uuid", "name"}
+
+
+class JsonDriver(meta.MetaFileStorageAgentDriver):
+    __model_map__ = {"item": Item}
+
+
+class SqliteDriver(sqlite_meta.MetaSqliteStorageAgentDriver):
+    __model_map__ = {"item": Item}
+
+
+def make_resource(number, name):
+    return models.Resource.from_value(
+        {"uuid": str(sys_uuid.UUID(int=number)), "name": name, "size": number},
+        "item",
+    )
+
+
+class MetaSqliteStorageAgentDriverTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.json_path = os.path.join(self._tmp.name, "meta.json")
+        self.db_path = os.path.join(self._tmp.name, "meta.db")
+
+    def _names(self, driver):
+        return sorted(r.value["name"] for r in driver.list("item"))
+
+    def _committed_names(self):
+        # Another connection sees only committed changes
+        with contextlib.closing(sqlite3.connect(self.db_path)) as conn:
+            rows = conn.execute("SELECT view FROM meta_resources").fetchall()
+        return sorted(json.loads(view)["name"] for (view,) in rows)
+
+    def test_json_meta_is_migrated(self):
+        json_driver = JsonDriver(meta_file=self.json_path)
+        for number in range(1, 4):
+            json_driver.create(make_resource(number, f"item-{number}"))
+        json_driver.finalize()
+
+        driver = SqliteDriver(meta_file=self.db_path, legacy_meta_file=self.json_path)
+
+        self.assertEqual(self._names(driver), ["item-1", "item-2", "item-3"])
+        self.assertFalse(os.path.exists(self.json_path))
+        self.assertTrue(os.path.exists(f"{self.json_path}.migrated"))
+
+    def test_changes_are_committed_on_finalize(self):
+        driver = SqliteDriver(meta_file=self.db_path)
+        driver.create(make_resource(1, "item-1"))
+        driver.create(make_resource(2, "item-2"))
+        driver.finalize()
+
+        driver.update(make_resource(1, "item-1-new"))
+        driver.delete(make_resource(2, "item-2"))
+
+        self.assertEqual(self._names(driver), ["item-1-new"])
+        self.assertEqual(self._committed_names(), ["item-1", "item-2"])
+
+        driver.finalize()
+
+        self.assertEqual(self._committed_names(), ["item-1-new"])
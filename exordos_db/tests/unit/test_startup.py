@@ -0,0 +1,88 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from unittest import mock
+
+from gcl_iam import drivers
+import webob
+
+from exordos_db.common.api import applications
+from exordos_db.orch_api.api import app as orch_app
+from exordos_db.status_api.api import app as status_app
+from exordos_db.user_api.api import app as user_app
+
+BUILD_APPS = {
+    "user_api": lambda: user_app.build_wsgi_application(drivers.DummyDriver()),
+    "status_api": status_app.build_wsgi_application,
+    "orch_api": orch_app.build_wsgi_application,
+}
+
+
+def get_application(wsgi_app):
+    """Return the application under the middlewares, they need a database."""
+    while not isinstance(wsgi_app, applications.OpenApiApplication):
+        wsgi_app = wsgi_app.application
+    return wsgi_app
+
+
+class SpecificationPrebuiltTest(unittest.TestCase):
+    def _spy_build(self):
+        return mock.patch.object(
+            applications.OpenApiApplication,
+            "_build_specification",
+            autospec=True,
+            side_effect=applications.OpenApiApplication._build_specification,
+        )
+
+    def test_built_with_application(self):
+        for name, build_app in BUILD_APPS.items():
+            with self.subTest(service=name):
+                with self._spy_build() as build:
+                    application = get_application(build_app())
+                    built = build.call_count
+
+                    for host in ("localhost", "db.example.com", "localhost"):
+                        response = webob.Request.blank(
+                            "/specifications/3.0.3", headers={"Host": host}
+                        ).get_response(application)
+                        self.assertEqual(200, response.status_int)
+                        self.assertEqual(
+                            f"http://{host}", response.json["servers"][0]["url"]
+                        )
+
+                # Workers forked after the build don't build it on requests
+                self.assertGreater(built, 0)
+                self.assertEqual(built, build.call_count)
+
+    def test_specification_prebuilt(self):
+        openapi_engine = user_app.get_openapi_engine()
+        application = applications.OpenApiApplication(
+            route_class=user_app.get_api_application(),
+            openapi_engine=openapi_engine,
+            specification_context=user_app.anonymous_context,
+        )
+        application.build_specifications()
+
+        with mock.patch.object(openapi_engine, "build_openapi_specification") as build:
+            response = webob.Request.blank("/specifications/3.0.3").get_response(
+                application
+            )
+
+        self.assertEqual(response.status_int, 200)
+        self.assertEqual(response.json["servers"][0]["url"], "http://localhost")
+        build.assert_not_called()
@@ -0,0 +1,190 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+import bazooka.exceptions as baz_exc
+from gcl_sdk.agents.universal.dm import models as ua_models
+from gcl_sdk.agents.universal.services import agent
+
+from exordos_db.agent.universal import service
+from exordos_db.status_api.api import controllers
+from exordos_db.status_api.dm import models
+
+NODE = sys_uuid.UUID(int=1)
+KIND = "pg_instance_node"
+
+
+def resource(number, full_hash="a"):
+    return {
+        "uuid": str(sys_uuid.UUID(int=number)),
+        "kind": KIND,
+        "value": {"number": number},
+        "hash": "h",
+        "full_hash": full_hash,
+        "status": "ACTIVE",
+    }
+
+
+def actual(number, full_hash="a"):
+    res = ua_models.Resource.restore_from_simple_view(**resource(number, full_hash))
+    res.node = NODE
+    return res
+
+
+class StatusReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.agent = mock.Mock(uuid=sys_uuid.uuid4(), node=NODE, list_kinds=[KIND])
+        self.session = mock.MagicMock()
+        engine = mock.patch.object(models.engines.engine_factory, "get_engine").start()
+        self.addCleanup(mock.patch.stopall)
+        engine.return_value.session_manager.return_value.__enter__.return_value = (
+            self.session
+        )
+        self.last_report = mock.Mock(hash="last", stats={})
+        self.reports = mock.patch.object(
+            models.AgentStatusReport, "objects", create=True
+        ).start()
+        self.reports.get_one_or_none.return_value = self.last_report
+        self.resources = mock.patch.object(
+            ua_models.Resource, "objects", create=True
+        ).start()
+        self.resources.get_all.return_value = []
+
+    def _apply(self, resources=(), hash="new", previous_hash="last", stats=None):
+        report = models.StatusReport(
+            uuid=self.agent.uuid,
+            hash=hash,
+            previous_hash=previous_hash,
+            resources=list(resources),
+            stats=stats,
+        )
+        return report, report._apply(self.agent)
+
+    def test_unchanged_hash_skips_writes(self):
+        _, changed = self._apply(hash="last", stats={"a": 1})
+
+        self.assertIsNone(changed)
+        self.resources.get_all.assert_not_called()
+        self.session.batch_insert.assert_not_called()
+        self.assertEqual(self.last_report.stats, {"a": 1})
+
+    def test_new_removed_and_changed_resources(self):
+        kept, updated, removed = actual(1), actual(2), actual(3)
+        self.resources.get_all.return_value = [kept, updated, removed]
+        with mock.patch.object(ua_models.Resource, "update") as update:
+            report, changed = self._apply(
+                [resource(1), resource(2, full_hash="b"), resource(4)]
+            )
+
+        [new] = self.session.batch_insert.call_args.args[0]
+        self.assertEqual(new.uuid, sys_uuid.UUID(int=4))
+        self.assertEqual(new.node, NODE)
+        self.session.batch_delete.assert_called_once_with([removed])
+        update.assert_called_once_with(session=self.session)
+        self.assertEqual(updated.full_hash, "b")
+        self.assertEqual(changed, [new, updated])
+        self.assertEqual(report.changed, 3)
+        self.assertEqual(self.last_report.hash, "new")
+        self.last_report.update.assert_called_once_with(session=self.session)
+
+    def test_first_report_inserted(self):
+        self.reports.get_one_or_none.return_value = None
+
+        with mock.patch.object(models.AgentStatusReport, "insert") as insert:
+            _, changed = self._apply(previous_hash="", stats={"a": 1})
+
+        self.assertEqual(changed, [])
+        insert.assert_called_once_with(session=self.session)
+
+    def test_out_of_sync_rejected(self):
+        self.assertRaises(
+            models.OutOfSyncReportError, self._apply, previous_hash="other"
+        )
+
+        self.session.batch_insert.assert_not_called()
+        self.last_report.update.assert_not_called()
+
+    def test_full_report_applied_with_same_hash(self):
+        self.resources.get_all.return_value = [actual(1)]
+
+        report, _ = self._apply(hash="last", previous_hash="")
+
+        self.session.batch_delete.assert_called_once()
+        self.assertEqual(report.changed, 1)
+
+    def test_controller_returns_counter_only(self):
+        controller = controllers.StatusReportsController.__new__(
+            controllers.StatusReportsController
+        )
+        with mock.patch.object(models.StatusReport, "apply") as apply:
+            report = controller.create(
+                self.agent, hash="new", resources=[resource(1)], stats={"a": 1}
+            )
+
+        apply.assert_called_once_with(self.agent)
+        self.assertEqual(report.uuid, self.agent.uuid)
+        self.assertEqual(report.resources, [])
+        self.assertIsNone(report.stats)
+
+
+class AgentReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.service = service.UniversalAgentService.__new__(
+            service.UniversalAgentService
+        )
+        self.service._agent_uuid = sys_uuid.uuid4()
+        self.service._caps_drivers = []
+        self.service._orch_client = mock.Mock()
+        self.service._orch_client.resources_report.return_value = {"changed": 0}
+        self.service._report_hash = "last"
+        self.service._stats_hash = ""
+        self.facts = {KIND: {"resources": [resource(1)]}}
+        self.report = self.service._orch_client.resources_report
+
+    def test_report_hash_kept(self):
+        self.service._actualize_facts(self.facts, {})
+
+        self.assertEqual(self.report.call_args.kwargs["previous_hash"], "last")
+        self.assertEqual(
+            self.service._report_hash,
+            self.report.call_args.kwargs["hash"],
+        )
+
+    def test_full_report_after_conflict(self):
+        self.report.side_effect = [baz_exc.ConflictError(mock.Mock()), {"changed": 1}]
+
+        self.service._actualize_facts(self.facts, {})
+
+        self.assertEqual(
+            [c.kwargs["previous_hash"] for c in self.report.call_args_list],
+            ["last", ""],
+        )
+        self.assertEqual(self.report.call_args.kwargs["stats"], {})
+
+    def test_fallback_per_resource(self):
+        self.report.side_effect = baz_exc.NotFoundError(mock.Mock())
+
+        with mock.patch.object(
+            agent.UniversalAgentService, "_actualize_facts"
+        ) as actualize:
+            self.service._actualize_facts(self.facts, {})
+
+        actualize.assert_called_once_with(self.facts, {})
+        self.assertEqual(self.service._report_hash, "last")
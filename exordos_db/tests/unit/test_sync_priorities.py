@@ -0,0 +1,100 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from exordos_db.infra.services import builder
+
+NODES = ("p", "a", "b", "c")
+
+
+def lags(**flush_lags):
+    return {u: {"flush_lag_ms": lag} for u, lag in flush_lags.items()}
+
+
+class SyncPrioritiesTestCase(unittest.TestCase):
+    def test_no_measurements(self):
+        self.assertEqual(
+            builder.get_sync_priorities(NODES, {}, {}),
+            {u: builder.DEFAULT_SYNC_PRIORITY for u in NODES},
+        )
+
+    def test_fastest_first(self):
+        priorities = builder.get_sync_priorities(NODES, lags(a=100, b=10, c=50), {})
+
+        self.assertGreater(priorities["b"], priorities["c"])
+        self.assertGreater(priorities["c"], priorities["a"])
+        self.assertGreaterEqual(min(priorities.values()), 1)
+
+    def test_close_lags_keep_order(self):
+        rendered = {"p": 1, "a": 4, "b": 3, "c": 2}
+
+        priorities = builder.get_sync_priorities(NODES, lags(a=15, b=5, c=10), rendered)
+
+        self.assertEqual(priorities, rendered)
+
+    def test_idle_standby_keeps_place(self):
+        rendered = {"p": 1, "a": 4, "b": 3, "c": 2}
+
+        # Lag of an idle standby is NULL
+        priorities = builder.get_sync_priorities(
+            NODES, {**lags(b=5, c=10), "a": {"flush_lag_ms": None}}, rendered
+        )
+
+        self.assertEqual(priorities, rendered)
+
+    def test_slow_standby_passed(self):
+        rendered = {"p": 1, "a": 4, "b": 3, "c": 2}
+
+        priorities = builder.get_sync_priorities(
+            NODES, lags(a=100, b=5, c=10), rendered
+        )
+
+        self.assertEqual(
+            sorted(NODES, key=priorities.get, reverse=True), ["b", "c", "a", "p"]
+        )
+        # Stable with the same measurements
+        self.assertEqual(
+            builder.get_sync_priorities(NODES, lags(a=100, b=5, c=10), priorities),
+            priorities,
+        )
+
+
+class ReplicationLatencyTestCase(unittest.TestCase):
+    def test_read_from_agent_stats(self):
+        instance = sys_uuid.uuid4()
+        targets = [mock.Mock(uuid=i, master=instance) for i in range(2)]
+        resources = [mock.Mock(uuid=i, node=n) for i, n in enumerate(("p", "a"))]
+        stats = {"p": {"replication_latency": lags(a=10)}, "a": {}}
+
+        with (
+            mock.patch.object(builder.ua_models, "TargetResource") as target,
+            mock.patch.object(builder.ua_models, "Resource") as resource,
+            mock.patch.object(
+                builder.user_models, "get_agent_stats", return_value=stats
+            ) as get_agent_stats,
+        ):
+            target.objects.get_all.return_value = targets
+            resource.objects.get_all.return_value = resources
+            latency = builder.CoreInfraBuilder._get_replication_latency(
+                mock.Mock(), [instance]
+            )
+
+        self.assertEqual(latency, {instance: lags(a=10)})
+        get_agent_stats.assert_called_once_with({"p": instance, "a": instance})
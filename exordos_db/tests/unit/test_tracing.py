@@ -0,0 +1,181 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import datetime
+import os
+import tempfile
+import unittest
+import uuid as sys_uuid
+
+from exordos_db.cmd import trace
+from exordos_db.common import tracing
+
+INSTANCE = str(sys_uuid.UUID(int=1))
+NODES = [str(sys_uuid.UUID(int=i)) for i in (2, 3)]
+GENERATION = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class TracerTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "spans")
+        self.exporter = tracing.FileExporter(self.path)
+        self.addCleanup(self.exporter.close)
+        self.tracer = tracing.Tracer("builder", self.exporter)
+
+    def test_nested_span_inherits_trace(self):
+        with self.tracer.span("build", trace_id="t", instance=INSTANCE) as parent:
+            with self.tracer.span("render") as child:
+                child.add_link("other")
+            parent.set_attribute("targets", {})
+
+        # The child is exported first, spans are loaded in order of starts
+        parent_dump, child_dump = tracing.load_spans([self.path])
+        self.assertEqual(child_dump["trace_id"], "t")
+        self.assertEqual(child_dump["parent_id"], parent.span_id)
+        self.assertEqual(child_dump["links"], ["other"])
+        self.assertEqual(child_dump["component"], "builder")
+        self.assertEqual(
+            parent_dump["attributes"], {"instance": INSTANCE, "targets": {}}
+        )
+        self.assertIsNone(parent_dump["parent_id"])
+        self.assertLessEqual(parent_dump["start"], parent_dump["end"])
+
+    def test_error_recorded(self):
+        with self.assertRaises(ValueError), self.tracer.span("apply"):
+            raise ValueError("boom")
+
+        [span] = tracing.load_spans([self.path])
+        self.assertEqual(span["attributes"]["error"], "ValueError('boom')")
+
+    def test_dropped_span_not_exported(self):
+        with self.tracer.span("status") as span:
+            span.drop()
+
+        self.assertEqual(tracing.load_spans([self.path]), [])
+
+    def test_disabled_tracer(self):
+        tracer = tracing.Tracer("builder")
+
+        with tracer.span("build") as span:
+            span.set_attribute("a", 1)
+
+        self.assertIs(span, tracing.NOOP_SPAN)
+        self.assertFalse(tracer.enabled)
+
+    def test_broken_lines_skipped(self):
+        with self.tracer.span("fetch"):
+            pass
+        with open(self.path, "a") as f:
+            f.write('{"name": "cut')
+
+        [span] = tracing.load_spans([self.path])
+        self.assertEqual(span["name"], "fetch")
+
+    def test_trace_ids(self):
+        self.assertEqual(
+            tracing.change_trace_id(INSTANCE, GENERATION),
+            tracing.change_trace_id(sys_uuid.UUID(INSTANCE), GENERATION.astimezone()),
+        )
+        self.assertNotEqual(
+            tracing.resource_trace_id(NODES[0], "a"),
+            tracing.resource_trace_id(NODES[0], "b"),
+        )
+
+
+def make_span(name, start, end, trace_id=None, links=(), **attributes):
+    return {
+        "name": name,
+        "component": name,
+        "trace_id": trace_id,
+        "span_id": name,
+        "parent_id": None,
+        "start": start,
+        "end": end,
+        "attributes": attributes,
+        "links": list(links),
+    }
+
+
+class CriticalPathTestCase(unittest.TestCase):
+    def setUp(self):
+        generation = tracing.format_generation(GENERATION)
+        traces = [tracing.resource_trace_id(n, "h") for n in NODES]
+        self.spans = [
+            make_span(
+                "api",
+                0,
+                1,
+                trace_id="change",
+                instance=INSTANCE,
+                generation=generation,
+            ),
+            make_span(
+                "build",
+                2,
+                3,
+                trace_id="change",
+                links=traces,
+                instance=INSTANCE,
+                generation=generation,
+                targets=dict.fromkeys(NODES, "h"),
+            ),
+        ]
+        for trace_id, end in zip(traces, (10, 20)):
+            self.spans += [
+                make_span("fetch", 3, 4, links=[trace_id]),
+                make_span("apply", 4, end - 2, trace_id=trace_id),
+                make_span("report", end - 2, end, links=[trace_id]),
+                make_span("status", end - 1.5, end - 1, links=[trace_id]),
+            ]
+        self.spans.sort(key=lambda s: s["start"])
+
+    def test_slowest_node_first(self):
+        change, build, paths = trace.critical_path(self.spans, INSTANCE)
+
+        self.assertEqual(change["name"], "api")
+        self.assertEqual(build["name"], "build")
+        self.assertEqual([n for n, _ in paths], [NODES[1], NODES[0]])
+        self.assertEqual([s["name"] for s in paths[0][1]], list(trace.NODE_STAGES))
+
+    def test_unreached_stage_is_critical(self):
+        self.spans = [
+            s for s in self.spans if not (s["name"] == "status" and s["end"] == 9)
+        ]
+
+        _, _, paths = trace.critical_path(self.spans, INSTANCE)
+
+        self.assertEqual(paths[0][0], NODES[0])
+        self.assertEqual(len(paths[0][1]), len(trace.NODE_STAGES) - 1)
+
+    def test_unknown_change(self):
+        self.assertEqual(
+            trace.critical_path(self.spans, str(sys_uuid.uuid4())), (None, None, [])
+        )
+
+    def test_format_rows(self):
+        change, build, paths = trace.critical_path(self.spans, INSTANCE)
+
+        lines = trace.format_rows(change, [change, build, *paths[0][1]])
+
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(
+            lines[2].split()[:5], ["build", "build", "2.000", "1.000", "1.000"]
+        )
+        # The status is nested in the report, it isn't a wait
+        self.assertEqual(lines[6].split()[:4], ["status", "status", "18.500", "0.000"])
@@ -0,0 +1,96 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from unittest import mock
+import uuid as sys_uuid
+
+from restalchemy.common import exceptions as exc
+
+from exordos_db.infra.dm import models as infra_models
+from exordos_db.user_api.dm import models
+
+
+def make_instance(wal_disk_size=None):
+    return models.PGInstance(
+        name="pg",
+        cpu=1,
+        ram=1024,
+        disk_size=10,
+        wal_disk_size=wal_disk_size,
+        nodes_number=1,
+        project_id=sys_uuid.uuid4(),
+        version=models.PGVersion(name="16", image="image"),
+    )
+
+
+class WalDiskValidationTestCase(unittest.TestCase):
+    def test_minimal_size(self):
+        self.assertRaises(exc.TypeError, make_instance, 1)
+        self.assertEqual(make_instance(2).wal_disk_size, 2)
+
+    def test_added_after_creation(self):
+        instance = make_instance()
+        instance.wal_disk_size = 2
+
+        self.assertRaises(NotImplementedError, instance._validate_update)
+
+    def test_removed(self):
+        instance = make_instance(2)
+        instance.wal_disk_size = None
+
+        self.assertRaises(NotImplementedError, instance._validate_update)
+
+    def test_shrink(self):
+        instance = make_instance(4)
+        instance.wal_disk_size = 2
+
+        self.assertRaises(NotImplementedError, instance._validate_update)
+
+    def test_grow(self):
+        instance = make_instance(2)
+        instance.wal_disk_size = 4
+
+        instance._validate_update()
+
+    def test_other_fields_updated(self):
+        instance = make_instance()
+        instance.cpu = 2
+
+        instance._validate_update()
+
+
+class DiskSpecTestCase(unittest.TestCase):
+    def _get_disks(self, wal_disk_size):
+        instance = mock.Mock(
+            disk_size=10,
+            wal_disk_size=wal_disk_size,
+            version=mock.Mock(image="image"),
+        )
+        spec = infra_models.PGInstance.get_disk_spec(instance)
+        return {d["label"]: d for d in spec.disks}
+
+    def test_wal_disk(self):
+        disks = self._get_disks(4)
+
+        self.assertEqual(list(disks), ["root", "data", "wal"])
+        self.assertEqual(disks["data"]["size"], 10)
+        self.assertEqual(disks["wal"]["size"], 4)
+        self.assertNotIn("image", disks["wal"])
+
+    def test_shared_with_data(self):
+        self.assertEqual(list(self._get_disks(None)), ["root", "data"])
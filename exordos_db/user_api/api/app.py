@@ -14,15 +14,24 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+import typing as tp
+
+from gcl_iam import contexts as iam_contexts
+from gcl_iam import drivers as iam_drivers
+from gcl_iam import engines as iam_engines
 from gcl_iam import middlewares as iam_mw
-from restalchemy.api import applications
 from restalchemy.api.middlewares import logging as logging_mw
 from restalchemy.api import middlewares
 from restalchemy.api import routes
 from restalchemy.openapi import structures as openapi_structures
 from restalchemy.openapi import engines as openapi_engines
+import webob
 
+from exordos_db.common.api import applications
+from exordos_db.common.api.middlewares import compression as compression_mw
 from exordos_db.common.api.middlewares import errors as errors_mw
+from exordos_db.common.api.middlewares import metrics as metrics_mw
 from exordos_db.user_api.api import routes as app_routes
 from exordos_db.user_api.api import versions
 from exordos_db import version as app_version
@@ -59,12 +68,35 @@ def get_openapi_engine():
     return openapi_engine
 
 
-def build_wsgi_application(iam_engine_driver):
+@contextlib.contextmanager
+def anonymous_context(req: webob.Request) -> tp.Iterator[None]:
+    """Context of a request without a token, the specification is public."""
+    ctx = iam_contexts.GenesisCoreAuthContext(req=req)
+    iam_engine = iam_engines.IamEngine(
+        auth_token="",
+        algorithm=None,
+        driver=iam_drivers.AnonDriver(),
+        otp_code=None,
+    )
+    with ctx.context_manager(), ctx.iam_session(iam_engine):
+        yield
+
+
+def build_wsgi_application(
+    iam_engine_driver: iam_drivers.AbstractAuthDriver,
+    compression_encodings: tp.Iterable[str] = compression_mw.DEFAULT_ENCODINGS,
+    compression_min_size: int = compression_mw.DEFAULT_MIN_SIZE,
+) -> tp.Callable:
+    application = applications.OpenApiApplication(
+        route_class=get_api_application(),
+        openapi_engine=get_openapi_engine(),
+        specification_context=anonymous_context,
+    )
+    # Built once, workers forked from the parent share them
+    application.build_specifications()
+
     return middlewares.attach_middlewares(
-        applications.OpenApiApplication(
-            route_class=get_api_application(),
-            openapi_engine=get_openapi_engine(),
-        ),
+        application,
         [
             middlewares.configure_middleware(
                 iam_mw.GenesisCoreAuthMiddleware,
@@ -73,5 +105,16 @@ def build_wsgi_application(iam_engine_driver):
             ),
             errors_mw.ErrorsHandlerMiddleware,
             logging_mw.LoggingMiddleware,
+            # The API is public, the metrics are served on another port
+            middlewares.configure_middleware(
+                metrics_mw.PrometheusMetricsMiddleware,
+                route_class=get_api_application(),
+                metrics_path=None,
+            ),
+            middlewares.configure_middleware(
+                compression_mw.CompressionMiddleware,
+                encodings=compression_encodings,
+                min_size=compression_min_size,
+            ),
         ],
     )
@@ -14,16 +14,113 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import datetime
+import functools
+import typing as tp
+import uuid as sys_uuid
+
 from gcl_iam import controllers as iam_controllers
+from gcl_iam import rules
+from restalchemy.api import actions
 from restalchemy.api import constants
 from restalchemy.api import controllers as ra_controllers
 from restalchemy.api import field_permissions as field_p
 from restalchemy.api import resources as ra_resources
+from restalchemy.common import exceptions as exc
+from restalchemy.dm import filters as dm_filters
+from restalchemy.storage import exceptions as storage_exc
 
+from exordos_db.common import tracing
+from exordos_db.common.api import controllers as common_controllers
 from exordos_db.user_api.api import versions
 from exordos_db.user_api.dm import models
 
 
+# Fields of a user accepted by the bulk import
+IMPORTED_USER_FIELDS = frozenset(("name", "password", "description"))
+
+
+class TooManyUsersError(exc.RestAlchemyException):
+    message = "%(count)s users can't be imported at once, the limit is %(limit)s"
+    code = 413
+
+
+if tp.TYPE_CHECKING:
+    from restalchemy.api.controllers import BaseResourceController as _Controller
+else:
+    _Controller = object
+
+
+class ChangeTracingMixin(_Controller):
+    """Start a trace for every change of an instance made by a user.
+
+    The trace is identified by the instance generation, so the builder
+    continues it, see `exordos_db.common.tracing`.
+    """
+
+    def _trace_change(
+        self,
+        action: str,
+        call: tp.Callable[[], tp.Any],
+        get_instance: tp.Callable[[tp.Any], models.PGInstance],
+    ) -> tp.Any:
+        with tracing.span("api", action=action, resource=self.__policy_name__) as span:
+            result = call()
+            if span.recording:
+                instance = get_instance(result)
+                span.trace_id = tracing.change_trace_id(
+                    instance.uuid, instance.updated_at
+                )
+                span.set_attribute("instance", str(instance.uuid))
+                span.set_attribute(
+                    "generation", tracing.format_generation(instance.updated_at)
+                )
+            return result
+
+
+class InstanceChangeTracingMixin(ChangeTracingMixin):
+    def create(self, **kwargs: tp.Any) -> models.PGInstance:
+        return self._trace_change(
+            "create", functools.partial(super().create, **kwargs), lambda i: i
+        )
+
+    def update(self, uuid: str, **kwargs: tp.Any) -> models.PGInstance:
+        return self._trace_change(
+            "update", functools.partial(super().update, uuid, **kwargs), lambda i: i
+        )
+
+
+class NestedChangeTracingMixin(ChangeTracingMixin):
+    """Changes of instance children bump the instance generation."""
+
+    def create(self, parent_resource: models.PGInstance, **kwargs: tp.Any) -> tp.Any:
+        return self._trace_change(
+            "create",
+            functools.partial(super().create, parent_resource, **kwargs),
+            lambda child: child.instance,
+        )
+
+    def update(
+        self, parent_resource: models.PGInstance, uuid: str, **kwargs: tp.Any
+    ) -> tp.Any:
+        return self._trace_change(
+            "update",
+            functools.partial(super().update, parent_resource, uuid, **kwargs),
+            lambda child: child.instance,
+        )
+
+    def delete(self, parent_resource: models.PGInstance, uuid: str) -> tp.Any:
+        # The deleted child has touched its own copy of the instance
+        return self._trace_change(
+            "delete",
+            functools.partial(super().delete, parent_resource, uuid),
+            lambda _: models.PGInstance.objects.get_one(
+                filters={"uuid": dm_filters.EQ(parent_resource.uuid)}
+            ),
+        )
+
+
 class ApiEndpointController(ra_controllers.RoutesListController):
     """Controller for /v1/ endpoint"""
 
@@ -42,6 +139,7 @@ class PGController(ra_controllers.RoutesListController):
 
 
 class PGVersionController(
+    common_controllers.ETagMixin,
     iam_controllers.PolicyBasedWithoutProjectController,
     ra_controllers.BaseResourceControllerPaginated,
 ):
@@ -56,11 +154,16 @@ class PGVersionController(
 
 
 class PGInstanceController(
+    common_controllers.ETagMixin,
+    common_controllers.NDJSONStreamingMixin,
+    common_controllers.KeysetPaginationMixin,
+    InstanceChangeTracingMixin,
     iam_controllers.PolicyBasedController,
     ra_controllers.BaseResourceControllerPaginated,
 ):
     __policy_service_name__ = "exordos_db"
     __policy_name__ = "pg_instance"
+    __max_imported_users__ = 1000
 
     __resource__ = ra_resources.ResourceByRAModel(
         model_class=models.PGInstance,
@@ -71,12 +174,125 @@ class PGInstanceController(
             fields={
                 "status": {constants.ALL: field_p.Permissions.RO},
                 "ipsv4": {constants.ALL: field_p.Permissions.RO},
+                "recovery_backup": {constants.ALL: field_p.Permissions.RO},
             },
         ),
     )
 
+    def create(self, **kwargs: tp.Any) -> models.PGInstance:
+        if kwargs.get("recovery_source") is not None:
+            kwargs["recovery_backup"] = self._get_recovery_backup(
+                kwargs["recovery_source"],
+                kwargs.get("recovery_target_time"),
+                kwargs.get("version"),
+            ).uuid
+        return super().create(**kwargs)
+
+    def _get_recovery_backup(
+        self,
+        source_uuid: sys_uuid.UUID,
+        target_time: datetime.datetime | None,
+        version: models.PGVersion | None,
+    ) -> models.PGBackup:
+        # The source is read with permissions of the user
+        source = self.get(uuid=source_uuid)
+        if version is not None and version.uuid != source.version.uuid:
+            raise storage_exc.ConflictRecords(
+                model=models.PGInstance.__name__,
+                msg=f"Instance {source.uuid} has another version",
+            )
+        if target_time is not None and target_time > datetime.datetime.now(
+            datetime.timezone.utc
+        ):
+            raise exc.ParseError(value=target_time)
+
+        backup = source.get_recovery_backup(target_time)
+        if backup is None:
+            raise storage_exc.ConflictRecords(
+                model=models.PGBackup.__name__,
+                msg=(
+                    f"Instance {source.uuid} has no physical backups completed "
+                    "before the recovery target time"
+                ),
+            )
+        # Nodes of the new instance restore the backup made by a source node
+        if source.get_backup_storage_id() is None:
+            raise storage_exc.ConflictRecords(
+                model=models.PGInstance.__name__,
+                msg=(
+                    f"Nodes of instance {source.uuid} don't share the backup "
+                    "storage or it isn't configured"
+                ),
+            )
+        return backup
+
+    @actions.get
+    def top_queries(self, resource: models.PGInstance) -> dict[str, dict[str, tp.Any]]:
+        return resource.get_top_queries()
+
+    @actions.get
+    def archive_status(self, resource: models.PGInstance) -> dict[str, tp.Any]:
+        return resource.get_archive_status()
+
+    @actions.post
+    def import_users(
+        self, resource: models.PGInstance, users: tp.Any
+    ) -> list[dict[str, str]]:
+        """Create many users of the instance at once, all or none."""
+        self._enforcer.enforce(
+            rules.Rule(self.__policy_service_name__, "user", "create"),
+            do_raise=True,
+        )
+        if not isinstance(users, list):
+            raise exc.ParseError(value=users)
+        # Passwords are hashed while the request is served
+        if len(users) > self.__max_imported_users__:
+            raise TooManyUsersError(count=len(users), limit=self.__max_imported_users__)
+
+        new_users = []
+        for user in users:
+            if not isinstance(user, dict) or not {"name", "password"} <= set(user):
+                raise exc.ParseError(value=user)
+            unknown = set(user) - IMPORTED_USER_FIELDS
+            if unknown:
+                raise exc.ValidationPropertyIncompatibleError(
+                    val=sorted(unknown), model=models.PGUser.__name__
+                )
+            new_users.append(
+                models.PGUser(instance=resource, project_id=resource.project_id, **user)
+            )
+
+        # Roles are identified by names on the data plane
+        names = collections.Counter(u.name for u in new_users)
+        duplicates = {name for name, count in names.items() if count > 1}
+        duplicates.update(
+            u.name
+            for u in models.PGUser.objects.get_all(
+                filters={
+                    "instance": dm_filters.EQ(resource),
+                    "name": dm_filters.In(list(names)),
+                }
+            )
+        )
+        if duplicates:
+            raise storage_exc.ConflictRecords(
+                model=models.PGUser.__name__,
+                msg=f"Users {sorted(duplicates)} are duplicated",
+            )
+
+        self._trace_change(
+            "import_users",
+            functools.partial(models.PGUser.insert_many, new_users),
+            lambda _: resource,
+        )
+        return [{"uuid": str(u.uuid), "name": u.name} for u in new_users]
+
 
 class PGDatabaseController(
+    common_controllers.ETagMixin,
+    common_controllers.NDJSONStreamingMixin,
+    common_controllers.KeysetPaginationMixin,
+    NestedChangeTracingMixin,
     iam_controllers.NestedPolicyBasedController,
     ra_controllers.BaseNestedResourceControllerPaginated,
 ):
@@ -92,6 +308,10 @@ class PGDatabaseController(
 
 
 class PGUserController(
+    common_controllers.ETagMixin,
+    common_controllers.NDJSONStreamingMixin,
+    common_controllers.KeysetPaginationMixin,
+    NestedChangeTracingMixin,
     iam_controllers.NestedPolicyBasedController,
     ra_controllers.BaseNestedResourceControllerPaginated,
 ):
@@ -110,3 +330,68 @@ class PGUserController(
             },
         ),
     )
+
+
+class PGBackupController(
+    common_controllers.ETagMixin,
+    common_controllers.NDJSONStreamingMixin,
+    common_controllers.KeysetPaginationMixin,
+    NestedChangeTracingMixin,
+    iam_controllers.NestedPolicyBasedController,
+    ra_controllers.BaseNestedResourceControllerPaginated,
+):
+    __policy_service_name__ = "exordos_db"
+    __policy_name__ = "backup"
+    __pr_name__ = "instance"
+
+    __resource__ = ra_resources.ResourceByRAModel(
+        model_class=models.PGBackup,
+        convert_underscore=False,
+        process_filters=True,
+        fields_permissions=field_p.FieldsPermissions(
+            default=field_p.Permissions.RW,
+            fields={
+                field: {constants.ALL: field_p.Permissions.RO}
+                for field in (
+                    "status",
+                    "completed_at",
+                    "node",
+                    "databases",
+                    "size",
+                    "restore_status",
+                    "restore_requested_at",
+                )
+            },
+        ),
+    )
+
+    @actions.post
+    def restore(self, resource: models.PGBackup) -> models.PGBackup:
+        """Replace data of the instance databases with the backup."""
+        self._enforce("restore")
+        if resource.kind == models.PGBackupKind.PHYSICAL.value:
+            raise storage_exc.ConflictRecords(
+                model=models.PGBackup.__name__,
+                msg=(
+                    f"Backup {resource.uuid} is physical, create an instance "
+                    "with it as the recovery source"
+                ),
+            )
+        if resource.status != models.PGStatus.ACTIVE.value:
+            raise storage_exc.ConflictRecords(
+                model=models.PGBackup.__name__,
+                msg=f"Backup {resource.uuid} isn't completed",
+            )
+        if resource.restore_status in (
+            models.PGStatus.NEW.value,
+            models.PGStatus.IN_PROGRESS.value,
+        ):
+            raise storage_exc.ConflictRecords(
+                model=models.PGBackup.__name__,
+                msg=f"Backup {resource.uuid} is being restored",
+            )
+
+        self._trace_change(
+            "restore", resource.request_restore, lambda _: resource.instance
+        )
+        return resource
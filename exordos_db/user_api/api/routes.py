@@ -27,6 +27,37 @@ class PGUserRoute(routes.Route):
     __controller__ = controllers.PGUserController
 
 
+class PGBackupRestoreAction(routes.Action):
+    """Handler for /v1/types/postgres/instances/<uuid>/backups/<uuid>/actions/restore/invoke"""
+
+    __controller__ = controllers.PGBackupController
+
+
+class PGBackupRoute(routes.Route):
+    __controller__ = controllers.PGBackupController
+
+    # route to /v1/types/postgres/instances/<uuid>/backups/<uuid>/actions/restore/invoke
+    restore = routes.action(PGBackupRestoreAction, invoke=True)
+
+
+class PGInstanceTopQueriesAction(routes.Action):
+    """Handler for /v1/types/postgres/instances/<uuid>/actions/top_queries"""
+
+    __controller__ = controllers.PGInstanceController
+
+
+class PGInstanceArchiveStatusAction(routes.Action):
+    """Handler for /v1/types/postgres/instances/<uuid>/actions/archive_status"""
+
+    __controller__ = controllers.PGInstanceController
+
+
+class PGInstanceImportUsersAction(routes.Action):
+    """Handler for /v1/types/postgres/instances/<uuid>/actions/import_users/invoke"""
+
+    __controller__ = controllers.PGInstanceController
+
+
 class PGInstanceRoute(routes.Route):
     __controller__ = controllers.PGInstanceController
 
@@ -34,6 +65,15 @@ class PGInstanceRoute(routes.Route):
     databases = routes.route(PGDatabaseRoute, resource_route=True)
     # route to /v1/types/postgres/instances/<uuid>/users/[<uuid>]
     users = routes.route(PGUserRoute, resource_route=True)
+    # route to /v1/types/postgres/instances/<uuid>/backups/[<uuid>]
+    backups = routes.route(PGBackupRoute, resource_route=True)
+
+    # route to /v1/types/postgres/instances/<uuid>/actions/top_queries
+    top_queries = routes.action(PGInstanceTopQueriesAction)
+    # route to /v1/types/postgres/instances/<uuid>/actions/archive_status
+    archive_status = routes.action(PGInstanceArchiveStatusAction)
+    # route to /v1/types/postgres/instances/<uuid>/actions/import_users/invoke
+    import_users = routes.action(PGInstanceImportUsersAction, invoke=True)
 
 
 class PGVersionRoute(routes.Route):
@@ -14,8 +14,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 import enum
 import re
+import typing as tp
 
 from restalchemy.dm import filters as dm_filters
 from restalchemy.dm import models
@@ -27,6 +29,63 @@ from gcl_sdk.agents.universal.dm import models as ua_models
 
 from exordos_db.common import utils as u
 from exordos_db.common.pg_auth import passwd
+from exordos_db.status_api.dm import models as status_models
+
+PG_INSTANCE_NODE_KIND = "pg_instance_node"
+
+# Parameters managed by the platform (Patroni, replication, backups),
+# users are not allowed to override them
+PG_MANAGED_PARAMETERS = frozenset(
+    (
+        "archive_command",
+        "archive_mode",
+        "config_file",
+        "data_directory",
+        "hba_file",
+        "hot_standby",
+        "ident_file",
+        "listen_addresses",
+        "max_replication_slots",
+        "max_wal_senders",
+        "port",
+        "primary_conninfo",
+        "primary_slot_name",
+        "restore_command",
+        "shared_preload_libraries",
+        "synchronous_standby_names",
+        "unix_socket_directories",
+        "wal_level",
+        "wal_log_hints",
+    )
+)
+
+
+def get_agent_stats(
+    nodes: tp.Iterable[tp.Any], session: tp.Any = None
+) -> dict[str, dict[str, tp.Any]]:
+    """Return statistics reported by agents of the nodes, by node.
+
+    Statistics of agents aren't a part of the node resources, they are
+    stored along with status reports.
+    """
+    stats: dict[str, dict[str, tp.Any]] = {str(n): {} for n in nodes}
+    if not stats:
+        return {}
+
+    agents = ua_models.UniversalAgent.objects.get_all(
+        session=session, filters={"node": dm_filters.In(list(stats))}
+    )
+    if not agents:
+        return stats
+
+    reports = status_models.AgentStatusReport.objects.get_all(
+        session=session,
+        filters={"uuid": dm_filters.In([a.uuid for a in agents])},
+    )
+    reported = {r.uuid: r.stats for r in reports}
+    for agent in agents:
+        stats[str(agent.node)] = reported.get(agent.uuid) or {}
+    return stats
 
 
 class PGStatus(str, enum.Enum):
@@ -36,6 +95,13 @@ class PGStatus(str, enum.Enum):
     ERROR = "ERROR"
 
 
+class PGBackupKind(str, enum.Enum):
+    # pg_dump of databases, restored into the same instance
+    LOGICAL = "logical"
+    # pg_basebackup of the cluster, restored into a new instance with WAL
+    PHYSICAL = "physical"
+
+
 class PGNameType(types.BaseCompiledRegExpTypeFromAttr):
     # https://www.postgresql.org/docs/current/sql-syntax-lexical.html#SQL-SYNTAX-IDENTIFIERS
     pattern = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]{0,62}$")
@@ -49,6 +115,20 @@ class PGRoleNameType(types.BaseCompiledRegExpTypeFromAttr):
     )
 
 
+class PGParametersType(types.Dict):
+    """PostgreSQL configuration parameters (GUCs) overrides."""
+
+    name_pattern = re.compile(r"^[a-z_][a-z0-9_]*(\.[a-z_][a-z0-9_]*)?$")
+
+    def validate(self, value: tp.Any) -> bool:
+        return super().validate(value) and all(
+            self.name_pattern.match(k)
+            and k not in PG_MANAGED_PARAMETERS
+            and isinstance(v, (str, int, float))
+            for k, v in value.items()
+        )
+
+
 class PGVersion(
     models.ModelWithUUID,
     models.ModelWithNameDesc,
@@ -82,13 +162,34 @@ class PGInstance(
     cpu = properties.property(types.Integer(min_value=1, max_value=128))
     ram = properties.property(types.Integer(min_value=512, max_value=1024**3))
     disk_size = properties.property(types.Integer(min_value=8, max_value=1024**3))
+    # Optional dedicated disk for WAL, it's shared with data if not set
+    wal_disk_size = properties.property(
+        types.AllowNone(types.Integer(min_value=2, max_value=1024**3)),
+        default=None,
+    )
     # TODO: restrict shrink/support shrink
     nodes_number = properties.property(types.Integer(min_value=1, max_value=16))
     sync_replica_number = properties.property(
         types.Integer(min_value=0, max_value=15), default=1
     )
+    # Reloadable parameters are applied online, postmaster ones are
+    # reported by nodes as pending restart
+    parameters = properties.property(PGParametersType(), default=lambda: {})
     # TODO: support version update
     version = relationships.relationship(PGVersion, required=True, read_only=True)
+    # Point-in-time recovery of another instance, the instance is created
+    # from a physical backup of the source and its WAL up to the target time,
+    # the latest WAL if the time isn't set
+    recovery_source = properties.property(
+        types.AllowNone(types.UUID()), default=None, read_only=True
+    )
+    recovery_target_time = properties.property(
+        types.AllowNone(types.UTCDateTimeZ()), default=None, read_only=True
+    )
+    # Physical backup of the source the recovery starts from
+    recovery_backup = properties.property(
+        types.AllowNone(types.UUID()), default=None, read_only=True
+    )
 
     def get_users(self, session=None):
         return PGUser.objects.get_all(
@@ -100,16 +201,123 @@ class PGInstance(
             session=session, filters={"instance": dm_filters.EQ(self)}
         )
 
+    def get_backups(self, session: tp.Any = None) -> list["PGBackup"]:
+        return PGBackup.objects.get_all(
+            session=session, filters={"instance": dm_filters.EQ(self)}
+        )
+
+    def get_node_resources(self, session: tp.Any = None) -> list[ua_models.Resource]:
+        """Return actual resources reported by agents of the instance nodes."""
+        node_targets = ua_models.TargetResource.objects.get_all(
+            session=session,
+            filters={
+                "master": dm_filters.EQ(self.uuid),
+                "kind": dm_filters.EQ(PG_INSTANCE_NODE_KIND),
+            },
+        )
+        if not node_targets:
+            return []
+
+        return ua_models.Resource.objects.get_all(
+            session=session,
+            filters={
+                "uuid": dm_filters.In([t.uuid for t in node_targets]),
+                "kind": dm_filters.EQ(PG_INSTANCE_NODE_KIND),
+            },
+        )
+
+    def get_recovery_backup(
+        self, target_time: datetime.datetime | None = None, session: tp.Any = None
+    ) -> "PGBackup | None":
+        """Return the latest physical backup completed before the time."""
+        filters = {
+            "instance": dm_filters.EQ(self),
+            "kind": dm_filters.EQ(PGBackupKind.PHYSICAL.value),
+            "status": dm_filters.EQ(PGStatus.ACTIVE.value),
+        }
+        if target_time is not None:
+            filters["completed_at"] = dm_filters.LE(target_time)
+        backups = PGBackup.objects.get_all(
+            session=session, filters=filters, order_by={"completed_at": "desc"}
+        )
+        return backups[0] if backups else None
+
+    def get_backup_storage_id(self, session: tp.Any = None) -> str | None:
+        """Return the backup storage shared by all nodes, None if there isn't."""
+        nodes = self.get_node_resources(session=session)
+        storage_ids = {n.value.get("backup_storage_id") for n in nodes}
+        if len(nodes) < self.nodes_number or len(storage_ids) != 1:
+            return None
+        return storage_ids.pop()
+
+    def get_archive_status(self, session: tp.Any = None) -> dict[str, tp.Any]:
+        """Return WAL archiving status reported by the primary."""
+        for n in self.get_node_resources(session=session):
+            if n.value.get("archive_status"):
+                return {"node": str(n.node), **n.value["archive_status"]}
+        return {}
+
+    def _copy_recovery_source(self, session: tp.Any = None) -> None:
+        # Roles and databases are restored with the data, the copies keep
+        # them on the data plane
+        source = PGInstance.objects.get_one(
+            session=session, filters={"uuid": dm_filters.EQ(self.recovery_source)}
+        )
+        users = {}
+        for user in source.get_users(session=session):
+            users[user.name] = PGUser(
+                instance=self,
+                project_id=self.project_id,
+                name=user.name,
+                description=user.description,
+                password=user.password,
+                password_hash=user.password_hash,
+            )
+            super(InstanceChildModel, users[user.name]).insert(session=session)
+        for database in source.get_databases(session=session):
+            copy = PGDatabase(
+                instance=self,
+                project_id=self.project_id,
+                name=database.name,
+                description=database.description,
+                owner=users[database.owner.name],
+            )
+            super(InstanceChildModel, copy).insert(session=session)
+
+    def get_top_queries(self, session: tp.Any = None) -> dict[str, dict[str, tp.Any]]:
+        """Return top queries reported by agents, grouped by node."""
+        nodes = [n.node for n in self.get_node_resources(session=session)]
+        return {
+            node: stats.get("top_queries", {})
+            for node, stats in get_agent_stats(nodes, session=session).items()
+        }
+
     def _validate_update(self, session=None):
         disk_size = self.properties["disk_size"]
         if disk_size.is_dirty() and disk_size.old_value > self.disk_size:
             raise NotImplementedError("disk_size shrink is not supported yet")
 
+        wal_disk_size = self.properties["wal_disk_size"]
+        if wal_disk_size.is_dirty():
+            if wal_disk_size.old_value is None or self.wal_disk_size is None:
+                raise NotImplementedError(
+                    "wal_disk_size can be set only on instance creation"
+                )
+            if wal_disk_size.old_value > self.wal_disk_size:
+                raise NotImplementedError("wal_disk_size shrink is not supported yet")
+
+    def insert(self, session: tp.Any = None) -> None:
+        with self._get_engine().session_manager(session=session) as s:
+            super().insert(session=s)
+            if self.recovery_source is not None:
+                self._copy_recovery_source(session=s)
+
     def update(self, session=None, force=False):
         self._validate_update(session=session)
         super().update(session=session, force=force)
 
     def delete(self, session=None, **kwargs):
+        u.remove_nested_dm(PGBackup, "instance", self, session=session)
         u.remove_nested_dm(PGDatabase, "instance", self, session=session)
         u.remove_nested_dm(PGUser, "instance", self, session=session)
         return super().delete(session=session, **kwargs)
@@ -167,6 +375,25 @@ class PGUser(InstanceChildModel):
         self._update_pw_hash()
         super().update(session=session, force=force)
 
+    @classmethod
+    def insert_many(cls, users: list["PGUser"], session: tp.Any = None) -> None:
+        """Insert users in a single transaction.
+
+        Passwords are hashed in parallel before the transaction starts and
+        every instance is touched once instead of once per user.
+        """
+        hashes = passwd.scram_sha_256_batch(
+            (user.password, None, passwd.DEFAULT_ITERATIONS) for user in users
+        )
+        with cls._get_engine().session_manager(session=session) as s:
+            instances = {}
+            for user, password_hash in zip(users, hashes):
+                user.password_hash = password_hash
+                super(InstanceChildModel, user).insert(session=s)
+                instances[user.instance.uuid] = user
+            for user in instances.values():
+                user.touch_parent(session=s)
+
 
 class PGDatabase(InstanceChildModel):
     __tablename__ = "postgres_databases"
@@ -179,6 +406,69 @@ class PGDatabase(InstanceChildModel):
     owner = relationships.relationship(PGUser, required=True)
 
 
+class PGBackup(InstanceChildModel):
+    """Backup of all databases of the instance.
+
+    The backup is made by a replica chosen by the builder, the builder
+    also updates the fields reported by the node. A physical backup is
+    restored by creating a new instance with the recovery source.
+    """
+
+    __tablename__ = "postgres_backups"
+
+    name = properties.property(
+        types.String(min_length=1, max_length=255), required=True
+    )
+    kind = properties.property(
+        types.Enum([kind.value for kind in PGBackupKind]),
+        default=PGBackupKind.LOGICAL.value,
+        read_only=True,
+    )
+    status = properties.property(
+        types.Enum([status.value for status in PGStatus]),
+        default=PGStatus.NEW.value,
+    )
+    # Set by the builder when the backup becomes active, physical backups
+    # restore points in time after it
+    completed_at = properties.property(
+        types.AllowNone(types.UTCDateTimeZ()), default=None
+    )
+    # Parallel jobs of pg_dump and pg_restore or zstd threads of physical
+    # backups, CPU cores of the instance if not set
+    jobs = properties.property(
+        types.AllowNone(types.Integer(min_value=1, max_value=128)), default=None
+    )
+    # Agent of the node making the backup
+    node = properties.property(types.AllowNone(types.UUID()), default=None)
+    databases = properties.property(
+        types.TypedList(types.String(max_length=255)), default=lambda: []
+    )
+    # Size of the compressed dump in bytes
+    size = properties.property(
+        types.AllowNone(types.Integer(min_value=0)), default=None
+    )
+    restore_status = properties.property(
+        types.AllowNone(types.Enum([status.value for status in PGStatus])),
+        default=None,
+    )
+    restore_requested_at = properties.property(
+        types.AllowNone(types.UTCDateTimeZ()), default=None
+    )
+
+    def update(self, session: tp.Any = None, force: bool = False) -> None:
+        # Only the description and reported fields are changed, the data
+        # plane doesn't depend on them
+        super(InstanceChildModel, self).update(session=session, force=force)
+
+    def request_restore(self, session: tp.Any = None) -> None:
+        """Restore the backup on the instance, replacing the current data."""
+        self.restore_status = PGStatus.NEW.value
+        self.restore_requested_at = datetime.datetime.now(datetime.timezone.utc)
+        with self._get_engine().session_manager(session=session) as s:
+            self.update(session=s)
+            self.touch_parent(session=s)
+
+
 # class PGDatabasePrivilege(str, enum.Enum):
 #     ALL = "ALL"
 #     CREATE = "CREATE"
@@ -22,6 +22,48 @@ set -o pipefail
 
 source /usr/local/lib/genesis/lib_bootstrap.sh
 
+WAL_FS_LABEL="pgwal"
+WAL_MOUNT="/var/lib/postgresql/patroni/wal"
+
+# The optional WAL disk is the blank one left after the persistent disk
+# is prepared or the one already formatted by a previous boot.
+find_wal_disk() {
+    local dev
+
+    if dev=$(blkid -L "$WAL_FS_LABEL"); then
+        echo "$dev"
+        return
+    fi
+
+    for dev in $(lsblk -dnpo NAME,TYPE | awk '$2 == "disk" {print $1}'); do
+        if [[ "$dev" == "$PERSISTENT_DISK" ]]; then
+            continue
+        fi
+        # Skip disks with partitions or filesystems
+        if [[ $(lsblk -npo NAME "$dev" | wc -l) -eq 1 ]] && ! blkid "$dev" > /dev/null; then
+            echo "$dev"
+            return
+        fi
+    done
+}
+
+prepare_wal_disk() {
+    local dev="$1"
+
+    if ! blkid -L "$WAL_FS_LABEL" > /dev/null; then
+        sudo mkfs.ext4 -L "$WAL_FS_LABEL" "$dev"
+    fi
+
+    sudo mkdir -p "$WAL_MOUNT"
+    if ! grep -q "LABEL=${WAL_FS_LABEL} " /etc/fstab; then
+        echo "LABEL=${WAL_FS_LABEL} ${WAL_MOUNT} ext4 defaults,noatime 0 2" | sudo tee -a /etc/fstab
+    fi
+    if ! mountpoint -q "$WAL_MOUNT"; then
+        sudo mount "$WAL_MOUNT"
+    fi
+    sudo chown postgres:postgres "$WAL_MOUNT"
+}
+
 # persistent data routines
 PERSISTENT_DISK=$(find_persistent_disk)
 prepare_persistent_disk "$(find_persistent_disk)" "$PERSISTENT_MOUNT"
@@ -37,6 +79,12 @@ if [[ -n "$PERSISTENT_DISK" ]]; then
     persist_migrate_complete
 fi
 
+# Dedicated WAL disk, Patroni creates pg_wal on it on initdb and basebackup
+WAL_DISK=$(find_wal_disk)
+if [[ -n "$WAL_DISK" ]]; then
+    prepare_wal_disk "$WAL_DISK"
+fi
+
 # Enable genesis db services
 sudo systemctl enable --now \
     exordos-patroni
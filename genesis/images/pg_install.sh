@@ -58,7 +58,10 @@ if [[ "$SDK_DEV_MODE" == "true" ]]; then
 fi
 
 # Create links to venv
-sudo ln -sf "$VENV_PATH/bin/genesis-universal-agent" "/usr/bin/exordos-db-pg-agent"
+sudo ln -sf "$VENV_PATH/bin/exordos-db-pg-agent" "/usr/bin/exordos-db-pg-agent"
+# WAL archiving commands are run by PostgreSQL and Patroni
+sudo ln -sf "$VENV_PATH/bin/exordos-db-wal" "/usr/bin/exordos-db-wal"
+sudo ln -sf "$VENV_PATH/bin/exordos-db-wal-archived" "/usr/bin/exordos-db-wal-archived"
 
 deactivate
 
@@ -0,0 +1,68 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstarctMigrationStep):
+    def __init__(self):
+        self._depends = ["0002-pg-wal-disk-b36531.py"]
+
+    @property
+    def migration_id(self):
+        return "3c2f7d41-8b6e-4f0a-9d35-a7e1c4b2f860"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            """\
+CREATE INDEX IF NOT EXISTS postgres_instances_project_id_created_at_idx
+                ON postgres_instances (project_id, created_at, uuid);
+""",
+            """\
+CREATE INDEX IF NOT EXISTS postgres_users_instance_created_at_idx
+                ON postgres_users (instance, created_at, uuid);
+""",
+            """\
+CREATE INDEX IF NOT EXISTS postgres_databases_instance_created_at_idx
+                ON postgres_databases (instance, created_at, uuid);
+""",
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        expressions = [
+            """\
+DROP INDEX IF EXISTS postgres_instances_project_id_created_at_idx;
+""",
+            """\
+DROP INDEX IF EXISTS postgres_users_instance_created_at_idx;
+""",
+            """\
+DROP INDEX IF EXISTS postgres_databases_instance_created_at_idx;
+""",
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+
+migration_step = MigrationStep()
@@ -0,0 +1,76 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstarctMigrationStep):
+    def __init__(self):
+        self._depends = ["0004-agent-reports-5e81a9.py"]
+
+    @property
+    def migration_id(self):
+        return "7b4d0e92-6c1a-4f58-b3e7-2d9a0c5f8e14"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            # Target resources are addressed to agents and form their
+            # payload, the actual resources are reported by the agents
+            # themselves. Notifications with the same payload are sent once
+            # per transaction.
+            """\
+CREATE OR REPLACE FUNCTION ua_target_resources_notify() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.agent IS NOT NULL THEN
+        PERFORM pg_notify('ua_payload', OLD.agent::text);
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.agent IS NOT NULL THEN
+        PERFORM pg_notify('ua_payload', NEW.agent::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""",
+            """\
+CREATE OR REPLACE TRIGGER ua_target_resources_notify_trigger
+    AFTER INSERT OR UPDATE OR DELETE ON ua_target_resources
+    FOR EACH ROW EXECUTE FUNCTION ua_target_resources_notify();
+""",
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        expressions = [
+            """\
+DROP TRIGGER IF EXISTS ua_target_resources_notify_trigger
+    ON ua_target_resources;
+""",
+            """\
+DROP FUNCTION IF EXISTS ua_target_resources_notify;
+""",
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+
+migration_step = MigrationStep()
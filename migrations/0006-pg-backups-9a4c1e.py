@@ -0,0 +1,73 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstarctMigrationStep):
+    def __init__(self):
+        self._depends = ["0005-ua-payload-notify-7b4d0e.py"]
+
+    @property
+    def migration_id(self):
+        return "9a4c1e57-3b82-4d6f-a0c9-e5f17b28d413"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            """\
+CREATE TABLE IF NOT EXISTS postgres_backups (
+    uuid UUID PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    status VARCHAR(64) NOT NULL DEFAULT 'NEW',
+    description TEXT,
+    project_id UUID NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL,
+    instance UUID NOT NULL,
+    jobs INT CHECK (jobs BETWEEN 1 AND 128),
+    node UUID,
+    databases VARCHAR(255) ARRAY NOT NULL DEFAULT '{}',
+    size BIGINT,
+    restore_status VARCHAR(64),
+    restore_requested_at TIMESTAMP,
+    FOREIGN KEY (instance) REFERENCES postgres_instances(uuid)
+);
+""",
+            """\
+CREATE INDEX IF NOT EXISTS postgres_backups_instance_created_at_idx
+                ON postgres_backups (instance, created_at, uuid);
+""",
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        expressions = [
+            """\
+DROP TABLE IF EXISTS postgres_backups;
+""",
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+
+migration_step = MigrationStep()
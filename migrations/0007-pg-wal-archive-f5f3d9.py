@@ -0,0 +1,70 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstarctMigrationStep):
+    def __init__(self):
+        self._depends = ["0006-pg-backups-9a4c1e.py"]
+
+    @property
+    def migration_id(self):
+        return "f5f3d9de-d2d1-4107-a1c3-29161bc7e0b0"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            """\
+ALTER TABLE postgres_backups
+    ADD COLUMN IF NOT EXISTS kind VARCHAR(32) NOT NULL DEFAULT 'logical',
+    ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP;
+""",
+            """\
+ALTER TABLE postgres_instances
+    ADD COLUMN IF NOT EXISTS recovery_source UUID,
+    ADD COLUMN IF NOT EXISTS recovery_target_time TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS recovery_backup UUID;
+""",
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        expressions = [
+            """\
+ALTER TABLE postgres_instances
+    DROP COLUMN IF EXISTS recovery_source,
+    DROP COLUMN IF EXISTS recovery_target_time,
+    DROP COLUMN IF EXISTS recovery_backup;
+""",
+            """\
+ALTER TABLE postgres_backups
+    DROP COLUMN IF EXISTS kind,
+    DROP COLUMN IF EXISTS completed_at;
+""",
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+
+migration_step = MigrationStep()